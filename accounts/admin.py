@@ -15,8 +15,7 @@ class EmployeeInline(admin.StackedInline):
     readonly_fields = ['show_avatar_preview']
     def show_avatar_preview(self, obj):
         if obj.avatar:
-            # เอา Base64 มาแสดงเป็นรูป
-            return format_html(f'<img src="{obj.avatar}" style="height: 100px; border-radius: 10px;" />')
+            return format_html('<img src="{}" style="height: 100px; border-radius: 10px;" />', obj.avatar.url)
         return "ไม่มีรูปภาพ"
     show_avatar_preview.short_description = "ตัวอย่างรูปปัจจุบัน"
 
@@ -0,0 +1,59 @@
+"""
+รูปโปรไฟล์พนักงาน: ย่อรูปตอนอัปโหลด แล้วเก็บเป็นไฟล์ผ่าน Storage ของ Django
+
+- ไม่เก็บรูปเต็มใน DB อีกต่อไป → หน้าเว็บส่งแค่ URL (เบราว์เซอร์ Cache รูปเองได้)
+- ชื่อไฟล์มาจาก Hash ของรูป → รูปใหม่ = URL ใหม่ ตั้ง Cache ยาว ๆ ที่ Web Server ได้เลย
+"""
+
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+
+
+# ขนาด (พิกเซล ด้านละ) ของแต่ละฟิลด์: avatar = หน้าแก้ไขพนักงาน, avatar_thumb = Sidebar
+AVATAR_SIZES = {
+    'avatar': 256,
+    'avatar_thumb': 64,
+}
+AVATAR_QUALITY = 85
+
+
+def _square_thumbnail(image, size):
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    # ครอปกลางให้เป็นสี่เหลี่ยมจัตุรัส แล้วย่อ
+    return ImageOps.fit(image, (size, size), Image.LANCZOS)
+
+
+def make_avatar_files(data):
+    """
+    ย่อรูปเป็นทุกขนาดใน AVATAR_SIZES
+
+    Args:
+        data: bytes ของไฟล์รูป (JPG / PNG / ...)
+
+    Returns:
+        dict: {ชื่อฟิลด์: (ชื่อไฟล์, ContentFile)}
+
+    Raises:
+        ValueError: ไฟล์ไม่ใช่รูปภาพ
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        source = Image.open(BytesIO(data))
+        source.load()
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError("ไฟล์ไม่ใช่รูปภาพที่รองรับ") from e
+
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    files = {}
+    for field_name, size in AVATAR_SIZES.items():
+        buffer = BytesIO()
+        _square_thumbnail(source, size).save(buffer, format='JPEG', quality=AVATAR_QUALITY, optimize=True)
+        files[field_name] = (f"{digest}_{size}.jpg", ContentFile(buffer.getvalue()))
+    return files
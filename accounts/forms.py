@@ -7,11 +7,8 @@ class EmployeeAdminForm(forms.ModelForm):
 
     class Meta:
         model = Employee
-        fields = '__all__'
-        # ซ่อน field avatar ที่เป็นตัวหนังสือยาวๆ ไม่ให้รกตา
-        widgets = {
-            'avatar': forms.HiddenInput(),
-        }
+        # ไฟล์รูปสร้างจาก avatar_file (ย่อให้อัตโนมัติ) → ไม่ให้แก้ฟิลด์ไฟล์ตรง ๆ
+        exclude = ['avatar', 'avatar_thumb']
 
     def save(self, commit=True):
         # 1. ดึงข้อมูลพนักงานออกมา
@@ -20,7 +17,7 @@ class EmployeeAdminForm(forms.ModelForm):
         # 2. เช็คว่ามีการอัปโหลดไฟล์ใหม่มาไหม?
         uploaded_file = self.cleaned_data.get('avatar_file')
         if uploaded_file:
-            # ถ้ามี ให้แปลงเป็น Base64 แล้วยัดใส่ field avatar
+            # ถ้ามี ให้ย่อรูปแล้วบันทึกเป็นไฟล์
             employee.set_avatar_from_file(uploaded_file)
             
         if commit:
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-16 10:00
+
+import base64
+import binascii
+
+from django.db import migrations, models
+
+
+def base64_to_files(apps, schema_editor):
+    """แปลงรูป Base64 เดิม → ไฟล์ย่อ (รูปที่เสีย/อ่านไม่ได้ → ข้าม ปล่อยว่าง)"""
+    from accounts.avatars import make_avatar_files
+
+    Employee = apps.get_model('accounts', 'Employee')
+    for employee in Employee.objects.exclude(avatar_base64='').iterator(chunk_size=50):
+        encoded = employee.avatar_base64.split(',', 1)[-1]
+        try:
+            files = make_avatar_files(base64.b64decode(encoded))
+        except (binascii.Error, ValueError):
+            continue
+        for field_name, (name, content) in files.items():
+            getattr(employee, field_name).save(name, content, save=False)
+        Employee.objects.filter(pk=employee.pk).update(
+            avatar=employee.avatar.name,
+            avatar_thumb=employee.avatar_thumb.name,
+        )
+
+
+def files_to_base64(apps, schema_editor):
+    Employee = apps.get_model('accounts', 'Employee')
+    for employee in Employee.objects.exclude(avatar='').only('id', 'avatar').iterator(chunk_size=50):
+        try:
+            with employee.avatar.open('rb') as f:
+                encoded = base64.b64encode(f.read()).decode('utf-8')
+        except OSError:
+            continue
+        Employee.objects.filter(pk=employee.pk).update(avatar_base64=f"data:image/jpeg;base64,{encoded}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_employee_position'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='employee',
+            old_name='avatar',
+            new_name='avatar_base64',
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='avatar',
+            field=models.ImageField(blank=True, default='', upload_to='avatars/', verbose_name='รูปโปรไฟล์'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='avatar_thumb',
+            field=models.ImageField(blank=True, default='', upload_to='avatars/thumbs/', verbose_name='รูปโปรไฟล์ (ย่อ)'),
+        ),
+        migrations.RunPython(base64_to_files, files_to_base64),
+        migrations.RemoveField(
+            model_name='employee',
+            name='avatar_base64',
+        ),
+    ]
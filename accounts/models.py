@@ -1,4 +1,3 @@
-import base64
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
@@ -12,8 +11,9 @@ class Employee(models.Model):
     # ==============================
     nickname = models.CharField(max_length=50, verbose_name="ชื่อเล่น")
     
-    # เก็บรูปเป็น Base64
-    avatar = models.TextField(blank=True, default="", verbose_name="รูปโปรไฟล์ (Base64)")
+    # เก็บรูปเป็นไฟล์ (ย่อแล้ว) — DB เก็บแค่ Path ดู accounts/avatars.py
+    avatar = models.ImageField(upload_to='avatars/', blank=True, default="", verbose_name="รูปโปรไฟล์")
+    avatar_thumb = models.ImageField(upload_to='avatars/thumbs/', blank=True, default="", verbose_name="รูปโปรไฟล์ (ย่อ)")
     
     phone = models.CharField(max_length=15, blank=True, verbose_name="เบอร์โทรศัพท์")
     address = models.TextField(blank=True, verbose_name="ที่อยู่")
@@ -33,11 +33,28 @@ class Employee(models.Model):
         return f"{self.nickname} ({role})"
     
     def set_avatar_from_file(self, image_file):
-        """ฟังก์ชันช่วยแปลงไฟล์รูป -> ข้อความ Base64"""
-        if image_file:
-            image_data = image_file.read()
-            encoded_string = base64.b64encode(image_data).decode('utf-8')
-            self.avatar = f"data:image/jpeg;base64,{encoded_string}"
+        """
+        ย่อรูปที่อัปโหลดเป็น avatar / avatar_thumb แล้วบันทึกไฟล์ลง Storage (ลบไฟล์เดิมทิ้ง)
+        ยังไม่ save() ตัว Employee — ผู้เรียกต้อง save() เอง
+
+        Returns:
+            bool: False ถ้าไฟล์ไม่ใช่รูปภาพ (ไม่เปลี่ยนรูปเดิม)
+        """
+        from accounts.avatars import make_avatar_files
+
+        if not image_file:
+            return False
+        try:
+            files = make_avatar_files(image_file.read())
+        except ValueError:
+            return False
+
+        for field_name, (name, content) in files.items():
+            field = getattr(self, field_name)
+            if field:
+                field.delete(save=False)
+            field.save(name, content, save=False)
+        return True
 
 # ==============================
 # ⚡ Signals
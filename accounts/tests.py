@@ -1,3 +1,139 @@
-from django.test import TestCase
+import base64
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from accounts.avatars import make_avatar_files
+
+
+def image_bytes(size=(400, 300), color='red', format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def upload(data, name='avatar.png'):
+    return SimpleUploadedFile(name, data, content_type='image/png')
+
+
+class TempMediaMixin:
+    """เก็บไฟล์รูปในโฟลเดอร์ชั่วคราว (ลบทิ้งหลังเทสต์)"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class AvatarFileTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_superuser('owner', password='pass1234')
+        self.staff = User.objects.create_user('staff', password='pass1234')
+        self.employee = self.staff.profile
+
+    def test_resized_square_jpegs(self):
+        data = image_bytes()
+        files = make_avatar_files(data)
+
+        for field_name, size in (('avatar', 256), ('avatar_thumb', 64)):
+            name, content = files[field_name]
+            image = Image.open(BytesIO(content.read()))
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (size, size))
+            self.assertTrue(name.endswith(f'_{size}.jpg'))
+        # ชื่อไฟล์มาจากเนื้อรูป → รูปเดิมได้ชื่อเดิม
+        self.assertEqual(make_avatar_files(data)['avatar'][0], files['avatar'][0])
+
+    def test_not_an_image(self):
+        with self.assertRaises(ValueError):
+            make_avatar_files(b'not an image')
+
+    def test_new_upload_replaces_old_files(self):
+        self.assertTrue(self.employee.set_avatar_from_file(upload(image_bytes(color='red'))))
+        self.employee.save()
+        old_avatar = self.employee.avatar
+        old_storage, old_name = old_avatar.storage, old_avatar.name
+
+        self.assertTrue(self.employee.set_avatar_from_file(upload(image_bytes(color='blue'))))
+        self.employee.save()
+
+        self.assertNotEqual(self.employee.avatar.name, old_name)
+        self.assertFalse(old_storage.exists(old_name))
+        self.assertTrue(self.employee.avatar_thumb.storage.exists(self.employee.avatar_thumb.name))
+
+    def test_invalid_upload_keeps_old_avatar(self):
+        self.employee.set_avatar_from_file(upload(image_bytes()))
+        self.employee.save()
+        name = self.employee.avatar.name
+
+        self.assertFalse(self.employee.set_avatar_from_file(upload(b'broken', name='broken.png')))
+        self.assertEqual(self.employee.avatar.name, name)
+
+    def edit(self, avatar):
+        self.client.force_login(self.owner)
+        return self.client.post(reverse('employee_edit', args=[self.employee.pk]), {
+            'nickname': 'ต้น',
+            'avatar': avatar,
+        }, follow=True)
+
+    def test_edit_page_upload(self):
+        self.edit(upload(image_bytes()))
+
+        self.employee.refresh_from_db()
+        self.assertTrue(self.employee.avatar.name.startswith('avatars/'))
+        self.assertTrue(self.employee.avatar_thumb.name.startswith('avatars/thumbs/'))
+
+    def test_edit_page_invalid_upload_warns(self):
+        response = self.edit(upload(b'broken', name='broken.png'))
+
+        self.assertContains(response, 'ไฟล์รูปไม่ถูกต้อง')
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.avatar.name, '')
+
+
+class AvatarMigrationTests(TempMediaMixin, TransactionTestCase):
+    """Migration 0005: รูป Base64 เดิม → ไฟล์ย่อ"""
+
+    migrate_from = [('accounts', '0004_alter_employee_position')]
+    migrate_to = [('accounts', '0005_employee_avatar_files')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_base64_rows_become_files(self):
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes()
+        old_apps = self.migrate(self.migrate_from)
+        self.addCleanup(self.migrate, latest)
+        OldUser = old_apps.get_model('auth', 'User')
+        OldEmployee = old_apps.get_model('accounts', 'Employee')
+        encoded = base64.b64encode(image_bytes(format='JPEG')).decode()
+        good = OldEmployee.objects.create(
+            user=OldUser.objects.create(username='good'), nickname='ดี',
+            avatar=f"data:image/jpeg;base64,{encoded}",
+        )
+        broken = OldEmployee.objects.create(
+            user=OldUser.objects.create(username='broken'), nickname='เสีย', avatar='data:image/png;base64,!!!',
+        )
+
+        new_apps = self.migrate(self.migrate_to)
+        Employee = new_apps.get_model('accounts', 'Employee')
+        good = Employee.objects.get(pk=good.pk)
+        self.assertTrue(good.avatar.storage.exists(good.avatar.name))
+        self.assertTrue(good.avatar_thumb.name.endswith('_64.jpg'))
+        self.assertEqual(Employee.objects.get(pk=broken.pk).avatar.name, '')
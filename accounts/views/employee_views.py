@@ -125,8 +125,8 @@ def employee_add(request):
         employee.address = address
         employee.position = 'MANAGER'  # บังคับเป็น MANAGER ตาม Model ใหม่
         
-        if avatar_file:
-            employee.set_avatar_from_file(avatar_file)
+        if avatar_file and not employee.set_avatar_from_file(avatar_file):
+            messages.warning(request, "⚠️ ไฟล์รูปไม่ถูกต้อง ไม่ได้บันทึกรูปโปรไฟล์")
         
         employee.save()
         
@@ -191,8 +191,8 @@ def employee_edit(request, pk):
         
         # ✅ รับไฟล์รูปภาพ
         avatar_file = request.FILES.get('avatar')
-        if avatar_file:
-            employee.set_avatar_from_file(avatar_file)
+        if avatar_file and not employee.set_avatar_from_file(avatar_file):
+            messages.warning(request, "⚠️ ไฟล์รูปไม่ถูกต้อง ไม่ได้บันทึกรูปโปรไฟล์")
             
         employee.save()
         
@@ -212,7 +212,7 @@ def employee_edit(request, pk):
             'nickname': employee.nickname,
             'phone': employee.phone,
             'address': employee.address,
-            'avatar': employee.avatar, # ส่งรูปไปโชว์
+            'avatar': employee.avatar.url if employee.avatar else '', # ส่ง URL รูปไปโชว์
         }
     }
     return render(request, 'accounts/employees/employee_form.html', context)
@@ -85,6 +85,12 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 20971520  # 20MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 20971520  # 20MB
 
 PROMPTPAY_PHONE = '0834755649'  # ⚠️ เปลี่ยนเป็นเบอร์จริงของร้าน
+PROMPTPAY_QR_CACHE_SIZE = 256    # จำนวนรูป QR (เบอร์, ยอดเงิน) ที่เก็บไว้ในหน่วยความจำต่อ Process
+ESCPOS_THAI_CODEPAGE = 21         # เลข Code Page ภาษาไทย (CP874) ของเครื่องพิมพ์ความร้อน (ESC t n) ดูจากคู่มือเครื่อง
+
+# ค้นหาสินค้า: 'fts5' = ตัดคำไทย + จัดอันดับ (ไฟล์ SQLite แยก), 'memory' = ค้นแบบ substring
+PRODUCT_SEARCH_BACKEND = 'fts5'
+PRODUCT_SEARCH_FTS_PATH = BASE_DIR / 'search_index.sqlite3'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -101,6 +107,40 @@ DATABASES = {
 }
 
 
+# Cache
+# default: ใช้ร่วมกันทุก Process (Gunicorn หลาย Worker + run_worker) สำหรับส่งสัญญาณข้อมูลเปลี่ยน
+#   (Version ของ Index ค้นหาสินค้า / ตั้งค่าร้าน, อันดับรุ่นรถยอดนิยม)
+#   - ตั้ง REDIS_URL → ใช้ Redis (เร็วสุด)
+#   - ไม่ตั้ง → ใช้ตารางในฐานข้อมูล (สร้างให้ตอน migrate หรือ `manage.py createcachetable`)
+#     ห้ามใช้ locmem เพราะแยกกันต่อ Process → งานเบื้องหลังแก้ข้อมูลแล้วหน้าเว็บไม่รู้
+# local: ข้อมูลที่อ่านบ่อยในแต่ละ Process (Snapshot ใบเสร็จ) ดู products/Services/cache_tiers.py
+# SHARED_VERSION_POLL: วินาทีที่จำ Version จาก default ไว้ใน Process ก่อนถามใหม่
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'pos_cache',
+        }
+    }
+
+CACHES['local'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'pos-local',
+    'OPTIONS': {'MAX_ENTRIES': 5000},
+}
+SHARED_VERSION_POLL = 2
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -141,6 +181,11 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# ไฟล์ที่ผู้ใช้อัปโหลด (รูปโปรไฟล์พนักงาน) — Production ให้ Web Server เสิร์ฟโฟลเดอร์นี้ตรง ๆ
+# ชื่อไฟล์รูปเป็น Hash ของเนื้อหา → ตั้ง Cache-Control แบบ immutable ได้
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
@@ -27,3 +29,6 @@ urlpatterns = [
     
     path("__reload__/", include("django_browser_reload.urls")),
 ]
+
+# โหมด DEBUG: ให้ Django เสิร์ฟไฟล์อัปโหลดเอง (Production ใช้ Web Server)
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,53 @@
+"""
+Cache 2 ชั้น
+
+- shared (CACHES['default']): Redis หรือตาราง DatabaseCache ใช้ร่วมกันทุก Process
+  ใช้ส่งสัญญาณ "ข้อมูลเปลี่ยน" (Version Stamp / id ที่เปลี่ยน) ไม่ใช่ที่อ่านข้อมูลทุก Request
+- local (CACHES['local']): LocMemCache ใน Process เก็บข้อมูลที่อ่านบ่อย (Snapshot ใบเสร็จ ...)
+- read_version(): จำ Version ที่อ่านจาก shared ไว้ใน Process ไม่เกิน SHARED_VERSION_POLL วินาที
+  → พิมพ์ค้นหาทุกตัวอักษร / อ่านค่าตั้ง / พิมพ์ใบเสร็จซ้ำ ไม่ต้องถาม shared (DatabaseCache = 1 Query ต่อครั้ง)
+  Process อื่นเห็นการเปลี่ยนแปลงช้าสุด SHARED_VERSION_POLL วินาที
+  Process ที่เปลี่ยนเอง → remember_version() เห็นค่าใหม่ทันที
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+
+_seen = {}          # key → (version, เวลาที่อ่านจาก shared)
+_lock = threading.Lock()
+
+
+def local_cache():
+    """Cache ใน Process (CACHES['local'])"""
+    return caches['local']
+
+
+def _poll_seconds():
+    return getattr(settings, 'SHARED_VERSION_POLL', 2)
+
+
+def read_version(key, default=None):
+    """Version จาก shared cache (อ่านจริงไม่เกินทุก SHARED_VERSION_POLL วินาทีต่อ Process)"""
+    with _lock:
+        seen = _seen.get(key)
+    if seen is None or time.monotonic() - seen[1] >= _poll_seconds():
+        seen = remember_version(key, cache.get(key))
+    return default if seen[0] is None else seen[0]
+
+
+def remember_version(key, version):
+    """จำ Version ที่ Process นี้เพิ่งเขียน/อ่าน (ไม่ต้องรอรอบ Poll)"""
+    seen = (version, time.monotonic())
+    with _lock:
+        _seen[key] = seen
+    return seen
+
+
+def forget_versions():
+    """ล้าง Version ที่จำไว้ (ครั้งถัดไปอ่านจาก shared)"""
+    with _lock:
+        _seen.clear()
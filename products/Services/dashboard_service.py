@@ -0,0 +1,244 @@
+"""
+Dashboard Service: คำนวณตัวเลขหน้า Dashboard ด้วย Query จำนวนคงที่
+
+- ยอดขาย/รับคืน/จำนวนบิล/จำนวนชิ้น/กำไร ของช่วงที่เลือก + ช่วงก่อนหน้า + กราฟ 7 วัน
+  → อ่านตารางสรุปรายวัน (DailySalesSummary) ครั้งเดียว แล้วรวมใน Python
+- สินค้าขายดี (Owner อ่าน ProductDailySales) / การชำระเงินล่าสุด / สต็อก (เฉพาะ Owner) → อย่างละ 1 Query
+
+รวม: Staff 3 Query, Owner 4 Query ไม่ว่าจะเลือกช่วงวันที่ยาวเท่าไร
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db.models import Sum, Count, Q, F, DecimalField
+from django.utils import timezone
+
+from products.models import TransactionItem, Product, Payment, ProductDailySales
+from products.Services.sales_summary_service import summary_rows
+
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+@dataclass
+class DayPoint:
+    """จุดในกราฟ 7 วัน"""
+    day: object
+    day_name: str
+    sales: Decimal = Decimal('0')
+    returns: Decimal = Decimal('0')
+    bills: int = 0
+    total: float = 0
+
+
+@dataclass
+class DashboardMetrics:
+    """ผลลัพธ์ทั้งหมดของหน้า Dashboard"""
+    start_date: object
+    end_date: object
+    is_owner: bool
+
+    # ตัวเลขหลัก
+    net_sales: Decimal = Decimal('0')
+    total_bills: int = 0
+    avg_bill: Decimal = Decimal('0')
+    net_items_count: Decimal = Decimal('0')
+    net_profit: Decimal = Decimal('0')
+    net_profit_margin: float = 0
+
+    # เทียบช่วงก่อนหน้า
+    prev_net_sales: Decimal = Decimal('0')
+    change_percent: float = 0.0
+
+    # รายการ
+    last_7_days: List[DayPoint] = field(default_factory=list)
+    top_products: list = field(default_factory=list)
+    recent_payments: list = field(default_factory=list)
+
+    # สต็อก (เฉพาะ Owner)
+    low_stock_products: Optional[object] = None
+    low_stock_count: int = 0
+    out_of_stock_count: int = 0
+    inventory_value: Decimal = Decimal('0')
+
+    @property
+    def date_diff_days(self):
+        return (self.end_date - self.start_date).days + 1
+
+    @property
+    def is_increase(self):
+        return self.change_percent >= 0
+
+
+def _day_bounds(start, end):
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end, time.max)),
+    )
+
+
+def _daily_totals(user, is_owner, first_day, last_day):
+    """
+    ยอดขาย / ยอดคืน / จำนวนบิล / จำนวนชิ้น / กำไร แยกรายวัน
+    อ่านจากตารางสรุป DailySalesSummary (1 Query, ตามจำนวนวัน)
+
+    Returns:
+        dict: {date: {'sales', 'returns', 'bills', 'sold_qty', 'returned_qty', 'profit_sales', 'profit_returns'}}
+    """
+    qs = summary_rows(first_day, last_day, user_id=None if is_owner else user.id)
+
+    is_sale = Q(doc_type='SALE')
+    is_return = Q(doc_type='RETURN')
+    rows = qs.values('summary_date').annotate(
+        sales=Sum('grand_total', filter=is_sale),
+        returns=Sum('grand_total', filter=is_return),
+        bills=Sum('bill_count', filter=is_sale),
+        sold_qty=Sum('item_qty', filter=is_sale),
+        returned_qty=Sum('item_qty', filter=is_return),
+        sales_gross=Sum('gross_amount', filter=is_sale),
+        sales_cost=Sum('cost_amount', filter=is_sale),
+        returns_gross=Sum('gross_amount', filter=is_return),
+        returns_cost=Sum('cost_amount', filter=is_return),
+    ).order_by('summary_date')
+
+    zero = Decimal('0')
+    return {
+        row['summary_date']: {
+            'sales': row['sales'] or zero,
+            'returns': abs(row['returns'] or zero),
+            'bills': row['bills'] or 0,
+            'sold_qty': row['sold_qty'] or zero,
+            'returned_qty': row['returned_qty'] or zero,
+            # กำไร = ยอดก่อนส่วนลด - ต้นทุน (เท่ากับ Σ (ราคา - ต้นทุน) × จำนวน)
+            'profit_sales': (row['sales_gross'] or zero) - (row['sales_cost'] or zero),
+            'profit_returns': abs(row['returns_gross'] or zero) - (row['returns_cost'] or zero),
+        }
+        for row in rows
+    }
+
+
+def _sum_days(daily, start, end, key):
+    """รวมค่ารายวันในช่วง start..end"""
+    initial = 0 if key == 'bills' else Decimal('0')
+    return sum((values[key] for day, values in daily.items() if start <= day <= end), initial)
+
+
+def get_dashboard_metrics(user, start_date, end_date, today=None):
+    """
+    คำนวณตัวเลขทั้งหมดของ Dashboard
+
+    Args:
+        user: ผู้ใช้ (Staff เห็นเฉพาะบิลของตัวเอง)
+        start_date / end_date: ช่วงวันที่ (date)
+        today: วันปัจจุบัน (default: timezone.localdate())
+
+    Returns:
+        DashboardMetrics
+    """
+    today = today or timezone.localdate()
+    is_owner = user.is_superuser
+    metrics = DashboardMetrics(start_date=start_date, end_date=end_date, is_owner=is_owner)
+
+    diff_days = metrics.date_diff_days
+    prev_start = start_date - timedelta(days=diff_days)
+    prev_end = start_date - timedelta(days=1)
+    chart_start = today - timedelta(days=6)
+
+    # ===== 1. รายวัน: ช่วงที่เลือก + ช่วงก่อนหน้า + 7 วันล่าสุด (Query เดียว) =====
+    daily = _daily_totals(
+        user, is_owner,
+        min(prev_start, chart_start),
+        max(end_date, today),
+    )
+
+    total_sales = _sum_days(daily, start_date, end_date, 'sales')
+    total_returns = _sum_days(daily, start_date, end_date, 'returns')
+    metrics.net_sales = total_sales - total_returns
+    metrics.total_bills = _sum_days(daily, start_date, end_date, 'bills')
+    if metrics.total_bills > 0:
+        metrics.avg_bill = metrics.net_sales / metrics.total_bills
+
+    metrics.prev_net_sales = (
+        _sum_days(daily, prev_start, prev_end, 'sales') - _sum_days(daily, prev_start, prev_end, 'returns')
+    )
+    if metrics.prev_net_sales > 0:
+        metrics.change_percent = float((metrics.net_sales - metrics.prev_net_sales) / metrics.prev_net_sales * 100)
+    else:
+        metrics.change_percent = 100.0 if metrics.net_sales > 0 else 0.0
+
+    for i in range(6, -1, -1):
+        day = today - timedelta(days=i)
+        values = daily.get(day, {})
+        point = DayPoint(
+            day=day,
+            day_name=day.strftime('%a'),
+            sales=values.get('sales', Decimal('0')),
+            returns=values.get('returns', Decimal('0')),
+            bills=values.get('bills', 0),
+        )
+        # Staff เห็นจำนวนบิล, Admin เห็นยอดเงิน
+        point.total = float(point.sales - point.returns) if is_owner else point.bills
+        metrics.last_7_days.append(point)
+
+    # ===== 2. จำนวนชิ้น + กำไร (จากตารางสรุปรายวันชุดเดียวกัน) =====
+    metrics.net_items_count = (
+        _sum_days(daily, start_date, end_date, 'sold_qty') - _sum_days(daily, start_date, end_date, 'returned_qty')
+    )
+
+    if is_owner:
+        metrics.net_profit = (
+            _sum_days(daily, start_date, end_date, 'profit_sales') - _sum_days(daily, start_date, end_date, 'profit_returns')
+        )
+        if metrics.net_sales > 0:
+            metrics.net_profit_margin = float(metrics.net_profit / metrics.net_sales * 100)
+
+    # ===== 3. สินค้าขายดี =====
+    # Owner: อ่านจาก ProductDailySales / Staff: ต้องกรองตามพนักงาน จึงใช้รายการขายของตัวเอง
+    query_min, query_max = _day_bounds(start_date, end_date)
+    if is_owner:
+        top_qs = ProductDailySales.objects.filter(
+            sales_date__range=(start_date, end_date),
+        ).values('product__name', 'product__sku').annotate(
+            total_qty=Sum('qty'),
+            total_amount=Sum('sales_amount'),
+        ).filter(total_qty__gt=0)
+    else:
+        top_qs = TransactionItem.objects.filter(
+            transaction__transaction_date__range=(query_min, query_max),
+            transaction__doc_type='SALE',
+            transaction__status='POSTED',
+            transaction__created_by=user,
+        ).values('product__name', 'product__sku').annotate(
+            total_qty=Sum('quantity'),
+            total_amount=Sum('line_total'),
+        )
+    metrics.top_products = list(top_qs.order_by('-total_qty')[:5])
+
+    # ===== 4. การชำระเงินล่าสุด =====
+    payments_qs = Payment.objects.filter(
+        transaction__status='POSTED',
+        transaction__transaction_date__range=(query_min, query_max),
+    ).select_related('transaction__created_by').order_by('-created_at')
+    if not is_owner:
+        payments_qs = payments_qs.filter(transaction__created_by=user)
+    metrics.recent_payments = list(payments_qs[:10])
+
+    # ===== 5. สต็อก (เฉพาะ Owner, Query เดียว) =====
+    if is_owner:
+        products = Product.objects.filter(is_active=True)
+        low_stock = Q(quantity__lte=10, quantity__gt=0)
+        inventory = products.aggregate(
+            out_of_stock=Count('id', filter=Q(quantity=0)),
+            low_stock=Count('id', filter=low_stock),
+            value=Sum(F('quantity') * F('cost_price'), output_field=MONEY),
+        )
+        metrics.out_of_stock_count = inventory['out_of_stock']
+        metrics.low_stock_count = inventory['low_stock']
+        metrics.inventory_value = inventory['value'] or Decimal('0')
+        # Lazy: Query เฉพาะเมื่อ Template ใช้
+        metrics.low_stock_products = products.filter(low_stock).order_by('quantity')[:5]
+
+    return metrics
@@ -0,0 +1,103 @@
+"""
+Document Number Service: ออกเลขที่เอกสาร (SALE / RET / PO)
+
+- ใช้ตาราง DocumentSequence นับแยก Prefix ต่อวัน
+- เพิ่มเลขด้วย UPDATE เดียว (atomic) → ไม่ต้องสแกน doc_no__startswith และไม่ชนกันระหว่างเครื่องขาย
+- เรียกภายใน transaction เดียวกับการสร้างเอกสาร → ถ้า Rollback เลขจะถูกคืน (ไม่มีเลขหาย)
+- จองเป็นช่วง (Block) ได้ สำหรับงานที่สร้างเอกสารหลายใบพร้อมกัน
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products.models import DocumentSequence, Transaction, Purchase
+
+
+# doc_type -> (prefix, จำนวนหลักของเลขรัน)
+DOC_NUMBER_FORMATS = {
+    'SALE':   ('SALE', 4),
+    'RETURN': ('RET', 4),
+    'PO':     ('PO', 3),
+}
+
+
+def _format(prefix, day, number, width):
+    return f"{prefix}-{day.strftime('%Y%m%d')}-{number:0{width}d}"
+
+
+def _existing_max(prefix, day):
+    """
+    หาเลขสูงสุดของวันนั้นจากเอกสารที่มีอยู่แล้ว
+    ใช้ครั้งเดียวตอนสร้างตัวนับของวัน (รองรับข้อมูลเก่าก่อนมีตาราง DocumentSequence)
+    """
+    model = Purchase if prefix == 'PO' else Transaction
+    doc_prefix = f"{prefix}-{day.strftime('%Y%m%d')}-"
+    max_number = 0
+    for doc_no in model.objects.filter(doc_no__startswith=doc_prefix).values_list('doc_no', flat=True):
+        try:
+            max_number = max(max_number, int(doc_no.split('-')[-1]))
+        except ValueError:
+            continue
+    return max_number
+
+
+def reserve_doc_numbers(doc_type, count=1, on_date=None):
+    """
+    จองเลขที่เอกสารต่อเนื่องกัน count เลข
+
+    Args:
+        doc_type: 'SALE', 'RETURN' หรือ 'PO'
+        count: จำนวนเลขที่ต้องการจอง
+        on_date: วันที่ของเอกสาร (default: วันนี้ ตาม TIME_ZONE)
+
+    Returns:
+        list: เลขที่เอกสาร เช่น ['SALE-20250101-0001', ...]
+    """
+    if doc_type not in DOC_NUMBER_FORMATS:
+        raise ValueError(f"ไม่รู้จักประเภทเอกสาร: {doc_type}")
+    if count < 1:
+        raise ValueError("จำนวนเลขที่จองต้องมากกว่า 0")
+
+    prefix, width = DOC_NUMBER_FORMATS[doc_type]
+    day = on_date or timezone.localdate()
+    counter = DocumentSequence.objects.filter(prefix=prefix, seq_date=day)
+
+    with transaction.atomic():
+        # ✅ UPDATE เดียว: ล็อคแถวตัวนับ + เพิ่มค่า
+        if not counter.update(last_value=F('last_value') + count):
+            # เลขแรกของวัน → สร้างตัวนับ (ถ้ามีเครื่องอื่นสร้างพร้อมกัน ให้กลับไป UPDATE)
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(
+                        prefix=prefix,
+                        seq_date=day,
+                        last_value=_existing_max(prefix, day) + count,
+                    )
+            except IntegrityError:
+                counter.update(last_value=F('last_value') + count)
+
+        last_value = counter.values_list('last_value', flat=True).get()
+
+    first_value = last_value - count + 1
+    return [_format(prefix, day, n, width) for n in range(first_value, last_value + 1)]
+
+
+def next_doc_no(doc_type, on_date=None):
+    """ออกเลขที่เอกสารถัดไป 1 เลข"""
+    return reserve_doc_numbers(doc_type, 1, on_date)[0]
+
+
+def peek_doc_no(doc_type, on_date=None):
+    """
+    ดูเลขที่ถัดไปโดยไม่จอง (ใช้แสดงบนหน้าจอเท่านั้น)
+    เลขจริงจะถูกออกตอนบันทึกเอกสาร
+    """
+    prefix, width = DOC_NUMBER_FORMATS[doc_type]
+    day = on_date or timezone.localdate()
+    last_value = DocumentSequence.objects.filter(
+        prefix=prefix, seq_date=day
+    ).values_list('last_value', flat=True).first()
+    if last_value is None:
+        last_value = _existing_max(prefix, day)
+    return _format(prefix, day, last_value + 1, width)
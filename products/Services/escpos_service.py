@@ -0,0 +1,208 @@
+"""
+ESC/POS Service: สร้างใบเสร็จเป็น Byte Stream สำหรับเครื่องพิมพ์ความร้อน 58/80 มม.
+
+- ไม่ต้อง Render HTML → ส่งคำสั่ง ESC/POS ให้เครื่องพิมพ์โดยตรง
+- ภาษาไทย: เข้ารหัส CP874 (TIS-620) + เลือก Code Page ด้วย ESC t n
+  (เลข n ขึ้นกับรุ่นเครื่อง ตั้งได้ที่ ESCPOS_THAI_CODEPAGE)
+- สระบน/ล่าง/วรรณยุกต์ ไม่กินความกว้าง → คำนวณการจัดคอลัมน์ตามจำนวนช่องที่แสดงจริง
+- QR PromptPay: ใช้คำสั่ง QR ของเครื่องพิมพ์ (GS ( k) ส่งแค่ Payload ไม่ต้องสร้างรูป
+"""
+
+import unicodedata
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from products.Services.payment_service import create_promptpay_payload
+
+
+# ความกว้าง (ตัวอักษร Font A) ตามขนาดกระดาษ
+PAPER_COLUMNS = {58: 32, 80: 48}
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+INIT = ESC + b'@'
+ALIGN_LEFT = ESC + b'a\x00'
+ALIGN_CENTER = ESC + b'a\x01'
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+SIZE_NORMAL = GS + b'!\x00'
+SIZE_DOUBLE = GS + b'!\x11'
+CUT = GS + b'V\x42\x00'
+
+PAYMENT_METHOD_LABELS = {
+    'cash': 'เงินสด',
+    'qr': 'QR Code',
+    'transfer': 'โอนเงิน',
+}
+
+STATUS_LABELS = {
+    'POSTED': 'ยืนยันแล้ว',
+    'DRAFT': 'ฉบับร่าง',
+    'HOLD': 'พักบิล',
+    'CANCELLED': 'ยกเลิก',
+}
+
+
+def _codepage_command():
+    return ESC + b't' + bytes([getattr(settings, 'ESCPOS_THAI_CODEPAGE', 21)])
+
+
+def display_width(text):
+    """จำนวนช่องที่ใช้บนกระดาษ (สระบน/ล่าง/วรรณยุกต์ไทย = 0 ช่อง)"""
+    return sum(0 if unicodedata.category(ch) == 'Mn' else 1 for ch in text)
+
+
+def _encode(text):
+    return text.encode('cp874', errors='replace')
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def _quantity(value):
+    # Decimal('2.00') → '2', Decimal('1.50') → '1.5' (format 'g' ของ Decimal ไม่ตัดศูนย์ท้าย)
+    return f"{Decimal(str(value)).normalize():f}"
+
+
+class ReceiptBuilder:
+    """ประกอบคำสั่ง ESC/POS ทีละบรรทัด"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.parts = [INIT, _codepage_command()]
+
+    def raw(self, data):
+        self.parts.append(data)
+        return self
+
+    def line(self, text=''):
+        self.parts.append(_encode(text) + b'\n')
+        return self
+
+    def wrap(self, text, indent=''):
+        """ตัดบรรทัดตามความกว้างกระดาษ (ไม่ตัดกลางสระ/วรรณยุกต์)"""
+        current, width = indent, display_width(indent)
+        for ch in text:
+            ch_width = 0 if unicodedata.category(ch) == 'Mn' else 1
+            if width + ch_width > self.columns:
+                self.line(current)
+                current, width = indent, display_width(indent)
+            current += ch
+            width += ch_width
+        if current.strip():
+            self.line(current)
+        return self
+
+    def pair(self, left, right):
+        """ข้อความซ้าย + ขวา ในบรรทัดเดียว (ถ้าไม่พอ → ขึ้นบรรทัดใหม่)"""
+        gap = self.columns - display_width(left) - display_width(right)
+        if gap < 1:
+            self.wrap(left)
+            return self.line(' ' * max(self.columns - display_width(right), 0) + right)
+        return self.line(left + ' ' * gap + right)
+
+    def rule(self, char='-'):
+        return self.line(char * self.columns)
+
+    def qr(self, payload, size=6):
+        """QR Code แบบ Native (GS ( k): Model 2, ขนาดโมดูล size, แก้ไขข้อผิดพลาดระดับ M"""
+        data = payload.encode('ascii')
+        store_len = len(data) + 3
+        self.parts.extend([
+            GS + b'(k\x04\x001A2\x00',                      # Model 2
+            GS + b'(k\x03\x001C' + bytes([size]),            # ขนาดโมดูล
+            GS + b'(k\x03\x001E1',                           # Error correction M
+            GS + b'(k' + bytes([store_len % 256, store_len // 256]) + b'1P0' + data,
+            GS + b'(k\x03\x001Q0',                           # พิมพ์
+        ])
+        return self
+
+    def build(self, feed=4):
+        self.parts.append(b'\n' * feed + CUT)
+        return b''.join(self.parts)
+
+
+def build_receipt(sale, items=None, settings_values=None, paper_width=80, include_qr=False):
+    """
+    สร้างใบเสร็จ ESC/POS จากบิลขาย
+
+    Args:
+        sale: Transaction (ควร select_related('created_by', 'payment'))
+        items: รายการสินค้า (default: sale.items + product)
+        settings_values: dict จาก SystemSetting.get_all() (default: อ่านเอง)
+        paper_width: 58 หรือ 80 (มม.)
+        include_qr: พิมพ์ QR PromptPay ตามยอดสุทธิท้ายบิล
+
+    Returns:
+        bytes: ส่งตรงให้เครื่องพิมพ์ได้เลย
+    """
+    if paper_width not in PAPER_COLUMNS:
+        raise ValueError(f"ไม่รองรับกระดาษขนาด {paper_width} มม.")
+    if settings_values is None:
+        from products.models import SystemSetting
+        settings_values = SystemSetting.get_all()
+    if items is None:
+        items = sale.items.select_related('product')
+
+    out = ReceiptBuilder(PAPER_COLUMNS[paper_width])
+
+    # Header
+    out.raw(ALIGN_CENTER + SIZE_DOUBLE + BOLD_ON)
+    out.wrap(settings_values.get('store_name') or 'ร้านขายอะไหล่ยนต์')
+    out.raw(SIZE_NORMAL + BOLD_OFF)
+    if settings_values.get('store_phone'):
+        out.line(f"โทร {settings_values['store_phone']}")
+    if settings_values.get('store_address'):
+        out.wrap(settings_values['store_address'])
+    out.raw(BOLD_ON).line('ใบเสร็จรับเงิน').raw(BOLD_OFF + ALIGN_LEFT)
+    out.rule()
+
+    # ข้อมูลบิล
+    out.pair('เลขที่บิล:', sale.doc_no)
+    out.pair('วันที่:', timezone.localtime(sale.transaction_date).strftime('%d/%m/%Y %H:%M') + ' น.')
+    out.pair('พนักงานขาย:', sale.created_by.username)
+    out.pair('สถานะ:', STATUS_LABELS.get(sale.status, sale.status))
+    out.rule()
+
+    # รายการสินค้า
+    for number, item in enumerate(items, start=1):
+        product = item.product
+        if item.unit_type in ('คู่', 'ชุด'):
+            name = f"{product.base_name or product.name} [{item.unit_type}]"
+        else:
+            name = product.name
+        out.wrap(f"{number}. {name}")
+        out.pair(
+            f"   {_quantity(item.quantity)} {item.unit_type or product.unit} x {_money(item.unit_price)}",
+            _money(item.line_total),
+        )
+    out.rule()
+
+    # สรุปยอด
+    out.pair('ยอดรวม:', _money(sale.total_amount))
+    if sale.discount_amount > 0:
+        out.pair('ส่วนลด:', f"-{_money(sale.discount_amount)}")
+    out.raw(BOLD_ON).pair('ยอดชำระทั้งสิ้น:', _money(sale.grand_total)).raw(BOLD_OFF)
+
+    # การชำระเงิน
+    payment = getattr(sale, 'payment', None)
+    if payment:
+        out.pair('วิธีชำระเงิน:', PAYMENT_METHOD_LABELS.get(payment.method, payment.method))
+        if payment.method == 'cash':
+            out.pair('รับเงิน:', _money(payment.received))
+            out.pair('เงินทอน:', _money(payment.change))
+    out.rule()
+
+    # Footer
+    out.raw(ALIGN_CENTER)
+    if include_qr and sale.grand_total > 0:
+        promptpay_id = getattr(settings, 'PROMPTPAY_PHONE', '0834755649')
+        out.line('สแกนจ่ายด้วย PromptPay')
+        out.qr(create_promptpay_payload(promptpay_id, sale.grand_total)).line()
+    out.wrap(settings_values.get('receipt_footer') or 'ขอบคุณที่ใช้บริการ')
+    out.line(f"พิมพ์เมื่อ: {timezone.localtime().strftime('%d/%m/%Y %H:%M:%S')}")
+    return out.build()
@@ -0,0 +1,312 @@
+"""
+Import Commit Service: บันทึกตะกร้านำเข้า (ImportBatch) ลงคลังแบบ Bulk
+
+- ทีละก้อน (IMPORT_COMMIT_CHUNK แถว) แต่ละก้อนเป็น Transaction สั้น ๆ ของตัวเอง
+  → ไม่ล็อคตารางสินค้าตลอดการนำเข้าทั้งไฟล์
+- ต่อก้อน: หา SKU ที่มีอยู่ด้วย Query เดียว, สินค้าใหม่ bulk_create, สินค้าเดิมที่เปลี่ยน bulk_update,
+  ลิงก์ชุด (แม่-ลูก) และ PurchaseItem เขียนแบบ Bulk
+- แถวที่บันทึกแล้วถูกลบจากตะกร้าใน Transaction เดียวกัน → ถ้าล้มกลางทาง กดบันทึกใหม่ได้เฉพาะแถวที่เหลือ
+  และบันทึกต่อลงใบรับสินค้า DRAFT ใบเดิม (ImportBatch.purchase) ไม่เปิดใบใหม่
+- bulk_* ไม่ยิง Signal → แจ้ง Search Index / รุ่นรถ / จำนวนชุดที่ขายได้ ให้เอง
+- รับเข้าสต็อก + Weighted Average ทำที่ post_purchase หลังบันทึกครบทุกก้อน
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from products.models import Product, Purchase, PurchaseItem, ImportRow
+from products.Services.doc_number_service import next_doc_no
+from products.Services.popular_models_service import apply_model_changes
+from products.Services.purchase_service import post_purchase
+from products.Services.search_index import mark_products_changed
+from products.Services.stock_service import refresh_bundle_availability
+from products.Services.vehicle_model_service import sync_vehicle_models
+
+
+IMPORT_COMMIT_CHUNK = 500
+
+
+# ===================================
+# 1. แปลงแถว → สเปกสินค้า
+# ===================================
+def _product_specs(row, supplier_id):
+    """
+    แถวนำเข้า 1 แถว → สินค้าที่ต้องสร้าง/อัปเดต (ตามลำดับ) + สินค้าที่ใช้ใน PurchaseItem
+
+    Returns:
+        tuple: (specs, purchase_sku, children)
+            specs: list ของ (sku, defaults, initial_cost) — initial_cost ใช้เฉพาะตอนสร้างใหม่
+            purchase_sku: SKU ที่ลง PurchaseItem (แม่ สำหรับชุด)
+            children: [sku ลูก 1, sku ลูก 2] หรือ [] ถ้าไม่ใช่ชุด
+    """
+    sku = (row.sku or '').strip()
+    name = (row.name or '').strip()
+    cost = row.cost_price
+    price = row.selling_price
+    wholesale = row.wholesale_price
+    items_per_unit = int(row.items_per_purchase_unit or 1)
+
+    if row.bundle_type in ('L-R', 'F-R'):
+        suffix_1 = 'L' if row.bundle_type == 'L-R' else 'F'
+        child_base = {
+            'category_id': row.category_id,
+            'unit': 'ชิ้น',
+            'base_name': name,
+            'items_per_purchase_unit': 1,
+            'purchase_unit_name': '',
+            'allow_partial_sale': True,
+            'bundle_group': sku,
+            'is_bundle': False,
+            'selling_price': price / 2,
+            'wholesale_price': wholesale / 2,
+            'compatible_models': row.compatible_models,
+            'is_active': True,
+            'primary_supplier_id': supplier_id,
+        }
+        child_1 = dict(child_base, name=f"{name} ({'ซ้าย' if row.bundle_type == 'L-R' else 'หน้า'})", bundle_type=suffix_1)
+        child_2 = dict(child_base, name=f"{name} ({'ขวา' if row.bundle_type == 'L-R' else 'หลัง'})", bundle_type='R')
+        parent = {
+            'name': name,
+            'category_id': row.category_id,
+            'base_name': name,
+            'unit': 'ชุด',
+            'bundle_type': row.bundle_type,
+            'is_bundle': True,
+            'items_per_purchase_unit': items_per_unit,
+            'purchase_unit_name': row.purchase_unit_name,
+            'bundle_group': sku,
+            'cost_price': cost,            # แม่เก็บทุนเต็ม (ใช้แค่ reference)
+            'selling_price': price,
+            'wholesale_price': wholesale,
+            'compatible_models': row.compatible_models,
+            'is_active': True,
+            'primary_supplier_id': supplier_id,
+        }
+        sku_1, sku_2 = f"{sku}-{suffix_1}", f"{sku}-R"
+        specs = [(sku_1, child_1, cost / 2), (sku_2, child_2, cost / 2), (sku, parent, cost)]
+        return specs, sku, [sku_1, sku_2]
+
+    defaults = {
+        'name': name,
+        'category_id': row.category_id,
+        'unit': row.unit,
+        'items_per_purchase_unit': items_per_unit,
+        'purchase_unit_name': row.purchase_unit_name,
+        'allow_partial_sale': True,
+        'bundle_type': 'SAME',
+        'selling_price': price,
+        'wholesale_price': wholesale,
+        'compatible_models': row.compatible_models,
+        'is_active': True,
+        'primary_supplier_id': supplier_id,
+    }
+    cost_per_piece = cost / items_per_unit if items_per_unit > 0 else cost
+    return [(sku, defaults, cost_per_piece)], sku, []
+
+
+# ===================================
+# 2. บันทึก 1 ก้อน
+# ===================================
+def _commit_chunk(purchase, rows, supplier_id):
+    """
+    บันทึกสินค้า + ลิงก์ชุด + PurchaseItem ของแถวในก้อนนี้ (เรียกภายใน transaction.atomic)
+
+    Returns:
+        dict: created, updated, total (ยอดเงินของก้อนนี้)
+    """
+    parsed = [(row, *_product_specs(row, supplier_id)) for row in rows]
+
+    # 2.1 รวม SKU ซ้ำในก้อน: ค่าจากแถวหลังสุดชนะ (เหมือน update_or_create ทีละแถว)
+    #     ทุนเริ่มต้นของสินค้าใหม่มาจากแถวแรกที่เจอ
+    merged = {}
+    occurrences = []
+    for _, specs, _, _ in parsed:
+        for sku, defaults, initial_cost in specs:
+            if sku in merged:
+                merged[sku][0].update(defaults)
+            else:
+                merged[sku] = [dict(defaults), initial_cost]
+            occurrences.append(sku)
+
+    # 2.2 หา SKU ที่มีอยู่แล้ว (Query เดียว)
+    existing = Product.objects.filter(sku__in=[sku for sku in merged if sku]).in_bulk(field_name='sku')
+
+    # 2.3 สินค้าใหม่ → bulk_create (SKU ว่าง = ให้ Product.save() สร้างรหัสเอง ทีละตัว)
+    new_products = []
+    for sku, (defaults, initial_cost) in merged.items():
+        if sku and sku not in existing:
+            values = dict(defaults)
+            values.setdefault('cost_price', initial_cost)
+            new_products.append(Product(sku=sku, **values))
+    if new_products:
+        Product.objects.bulk_create(new_products, batch_size=IMPORT_COMMIT_CHUNK)
+        # MySQL ไม่คืน id จาก bulk insert → อ่าน id กลับด้วย Query เดียว
+        new_ids = dict(Product.objects.filter(sku__in=[p.sku for p in new_products]).values_list('sku', 'id'))
+        for product in new_products:
+            product.id = new_ids[product.sku]
+
+    # 2.4 สินค้าเดิม → bulk_update เฉพาะตัวที่ค่าเปลี่ยน (แยกตามชุดฟิลด์: ปกติ / ลูก / แม่)
+    now = timezone.now()
+    to_update = {}
+    synced_models = list(new_products)
+    for sku, product in existing.items():
+        defaults = merged[sku][0]
+        changed = [field for field, value in defaults.items() if getattr(product, field) != value]
+        if not changed:
+            continue
+        if 'compatible_models' in changed:
+            synced_models.append(product)
+        for field, value in defaults.items():
+            setattr(product, field, value)
+        product.updated_at = now
+        to_update.setdefault(tuple(sorted(defaults)) + ('updated_at',), []).append(product)
+    for fields, products in to_update.items():
+        Product.objects.bulk_update(products, list(fields), batch_size=IMPORT_COMMIT_CHUNK)
+
+    by_sku = {p.sku: p for p in new_products}
+    by_sku.update(existing)
+
+    # แถวที่ไม่มี SKU (กรอกมือไม่ระบุ) → create ทีละตัวเพื่อให้ได้รหัสอัตโนมัติ
+    blank = {}
+    for index, (row, specs, purchase_sku, _) in enumerate(parsed):
+        if not purchase_sku:
+            defaults, initial_cost = dict(specs[-1][1]), specs[-1][2]
+            defaults['cost_price'] = initial_cost
+            blank[index] = Product.objects.create(**defaults)
+            synced_models.append(blank[index])
+
+    # 2.5 ลิงก์ชุด (แม่ → ลูก 2 ตัว) เทียบกับของเดิมแบบ set()
+    Link = Product.bundle_components.through
+    wanted = {}
+    for _, _, purchase_sku, children in parsed:
+        if children and purchase_sku:
+            wanted[by_sku[purchase_sku].id] = {by_sku[c].id for c in children}
+    if wanted:
+        current = {}
+        for parent_id, child_id in Link.objects.filter(from_product_id__in=wanted).values_list(
+            'from_product_id', 'to_product_id'
+        ):
+            current.setdefault(parent_id, set()).add(child_id)
+        stale = [
+            (parent_id, child_id)
+            for parent_id, child_ids in current.items()
+            for child_id in child_ids - wanted[parent_id]
+        ]
+        for parent_id, child_id in stale:
+            Link.objects.filter(from_product_id=parent_id, to_product_id=child_id).delete()
+        Link.objects.bulk_create(
+            [
+                Link(from_product_id=parent_id, to_product_id=child_id)
+                for parent_id, child_ids in wanted.items()
+                for child_id in child_ids - current.get(parent_id, set())
+            ],
+            ignore_conflicts=True,
+        )
+
+    # 2.6 PurchaseItem (unit_cost = ทุนต่อหน่วยซื้อ, actual_stock = จำนวนชิ้น/ชุดที่รับเข้า)
+    items = []
+    total = Decimal('0')
+    for index, (row, _, purchase_sku, _) in enumerate(parsed):
+        product = blank[index] if index in blank else by_sku[purchase_sku]
+        qty = row.quantity
+        line_total = qty * row.cost_price
+        total += line_total
+        items.append(PurchaseItem(
+            purchase=purchase,
+            product=product,
+            quantity=qty,
+            unit_cost=row.cost_price,
+            line_total=line_total,
+            actual_stock=qty * int(row.items_per_purchase_unit or 1),
+        ))
+    PurchaseItem.objects.bulk_create(items, batch_size=IMPORT_COMMIT_CHUNK)
+
+    # 2.7 แทน Signal ที่ bulk_* ไม่ยิง
+    touched = [p.id for p in by_sku.values()] + [p.id for p in blank.values()]
+    mark_products_changed(touched)
+    if synced_models:
+        delta = sync_vehicle_models(synced_models)
+        transaction.on_commit(lambda: apply_model_changes(delta))
+    if wanted:
+        refresh_bundle_availability(bundle_ids=wanted)
+
+    # นับแบบเดิม: ครั้งแรกที่เจอ SKU ใหม่ = สร้าง, ที่เหลือ = อัปเดต
+    created_skus = {p.sku for p in new_products}
+    seen = set()
+    created = len(blank)
+    updated = 0
+    for sku in occurrences:
+        if sku and sku in created_skus and sku not in seen:
+            created += 1
+        elif sku:
+            updated += 1
+        seen.add(sku)
+    return {'created': created, 'updated': updated, 'total': total}
+
+
+# ===================================
+# 3. บันทึกทั้งตะกร้า
+# ===================================
+def commit_import_batch(batch, user, supplier, progress=None, chunk_size=IMPORT_COMMIT_CHUNK):
+    """
+    บันทึกตะกร้านำเข้าเป็นใบรับสินค้า 1 ใบ แล้วรับเข้าสต็อก
+
+    Args:
+        batch: ImportBatch
+        user: ผู้บันทึก (Purchase.created_by)
+        supplier: Supplier ของใบรับสินค้า
+        progress: ฟังก์ชัน progress(done, total) เรียกหลังแต่ละก้อน (optional)
+        chunk_size: จำนวนแถวต่อ Transaction
+
+    Returns:
+        dict: purchase, created, updated, rows, posted
+
+    Raises:
+        Exception จากก้อนที่ล้ม — ก้อนก่อนหน้าบันทึกแล้ว (ใบรับสินค้ายังเป็น DRAFT, แถวที่เหลืออยู่ในตะกร้า)
+            ข้อมูลที่บันทึกแล้วอยู่ใน exc.import_result / เรียกซ้ำด้วย Batch เดิม = ทำต่อในใบเดิม
+    """
+    rows = ImportRow.objects.filter(batch=batch)
+    total_rows = rows.count()
+    first = rows.first()
+
+    # ครั้งก่อนล้มกลางทาง → บันทึกต่อลงใบ DRAFT เดิม
+    purchase = Purchase.objects.filter(id=batch.purchase_id, status='DRAFT').first() if batch.purchase_id else None
+    if purchase is None:
+        purchase = Purchase.objects.create(
+            doc_no=next_doc_no('PO'),
+            supplier=supplier,
+            purchase_date=timezone.now(),
+            status='DRAFT',
+            created_by=user,
+            remark=f"Import Ref: {first.reference if first else '-'}",
+        )
+        batch.purchase = purchase
+        batch.save(update_fields=['purchase', 'updated_at'])
+    supplier = purchase.supplier
+
+    result = {'purchase': purchase, 'created': 0, 'updated': 0, 'rows': 0, 'posted': False}
+    grand_total = purchase.grand_total or Decimal('0')
+    try:
+        while True:
+            chunk = list(rows.order_by('id')[:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                stats = _commit_chunk(purchase, chunk, supplier.id)
+                ImportRow.objects.filter(id__in=[r.id for r in chunk]).delete()
+                grand_total += stats['total']
+                Purchase.objects.filter(id=purchase.id).update(grand_total=grand_total)
+            result['created'] += stats['created']
+            result['updated'] += stats['updated']
+            result['rows'] += len(chunk)
+            if progress:
+                progress(result['rows'], total_rows)
+    except Exception as e:
+        e.import_result = result
+        raise
+
+    purchase.grand_total = grand_total
+    result['posted'] = post_purchase(purchase)
+    return result
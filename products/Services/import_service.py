@@ -0,0 +1,203 @@
+"""
+Import Service: แปลงไฟล์ Excel/CSV เป็นแถว Staging ด้วย pandas ทั้งคอลัมน์
+
+- โหลดชื่อหมวดหมู่ / ซัพพลายเออร์ครั้งเดียว (dict) แทนการ Query ทีละแถว
+- ทำความสะอาด + ตรวจข้อมูลด้วย Column Operation (ไม่วน iterrows)
+- แถวที่ผิด → รวมเป็นรายงาน (เก็บบน ImportBatch ดาวน์โหลดได้) แทนการส่ง Message ทีละแถว
+"""
+
+import numpy as np
+import pandas as pd
+
+from products.models import Category, Supplier
+
+
+IMPORT_REQUIRED_COLUMNS = ['SKU', 'ชื่อสินค้า', 'หมวดหมู่', 'ราคาทุน', 'ราคาขาย', 'จำนวน']
+IMPORT_BUNDLE_TYPES = ['L-R', 'F-R']
+
+ERROR_REPORT_HEADER = ['แถว', 'SKU', 'ชื่อสินค้า', 'ปัญหา', 'ผลลัพธ์']
+
+
+def read_import_file(uploaded_file):
+    """
+    อ่านไฟล์เป็น DataFrame
+
+    Raises:
+        ValueError: นามสกุลไม่รองรับ / ขาดคอลัมน์ที่จำเป็น
+    """
+    name = uploaded_file.name.lower()
+    if name.endswith('.csv'):
+        df = pd.read_csv(uploaded_file, encoding='utf-8-sig')
+    elif name.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(uploaded_file)
+    else:
+        raise ValueError("รองรับเฉพาะไฟล์ .xlsx, .xls, .csv")
+
+    missing = [col for col in IMPORT_REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"ไฟล์ขาดคอลัมน์: {', '.join(missing)}")
+    return df
+
+
+def _text(df, column, default=''):
+    """คอลัมน์ข้อความ (ตัดช่องว่าง) ช่องว่าง/ไม่มีคอลัมน์ → default"""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[column]
+    return values.where(values.isna(), values.astype(str).str.strip()).fillna(default)
+
+
+def _number(df, column):
+    """
+    คอลัมน์ตัวเลข → (ค่า float, mask ค่าที่แปลงไม่ได้)
+    ช่องว่าง = 0 (เหมือนเดิม) แต่ข้อความที่ไม่ใช่ตัวเลข = ผิด
+    """
+    if column not in df.columns:
+        return pd.Series(0.0, index=df.index), pd.Series(False, index=df.index)
+    raw = df[column]
+    values = pd.to_numeric(raw, errors='coerce')
+    invalid = values.isna() & raw.notna()
+    return values.fillna(0.0).astype(float), invalid
+
+
+def _name_map(model):
+    """{ชื่อตัวเล็ก: id} โหลดครั้งเดียว"""
+    return {name.strip().lower(): pk for pk, name in model.objects.values_list('id', 'name')}
+
+
+def parse_import_frame(df, default_created_by='', default_supplier_id=None):
+    """
+    แปลง DataFrame → แถว Staging + รายงานแถวที่มีปัญหา
+
+    Args:
+        df: DataFrame จาก read_import_file()
+        default_created_by: ผู้นำเข้า (ถ้าในไฟล์ไม่ระบุ)
+        default_supplier_id: ซัพพลายเออร์ (ถ้าในไฟล์ไม่ระบุ / หาไม่เจอ)
+
+    Returns:
+        tuple: (rows, errors)
+            rows: list ของ dict (รูปแบบเดียวกับ Staging เดิม)
+            errors: list ของ dict {row, sku, name, message, skipped}
+    """
+    # แถวว่าง (ไม่มี SKU หรือชื่อ) → ข้ามเงียบ ๆ เหมือนเดิม
+    df = df[df['SKU'].notna() & df['ชื่อสินค้า'].notna()]
+    if df.empty:
+        return [], []
+
+    row_no = pd.Series(df.index + 2, index=df.index)  # เลขแถวใน Excel (มีหัวตาราง)
+
+    sku = _text(df, 'SKU').str.upper()
+    name = _text(df, 'ชื่อสินค้า')
+    category_name = _text(df, 'หมวดหมู่')
+    supplier_name = _text(df, 'ซัพพลายเออร์')
+
+    cost_price, cost_invalid = _number(df, 'ราคาทุน')
+    selling_price, selling_invalid = _number(df, 'ราคาขาย')
+    wholesale_price, wholesale_invalid = _number(df, 'ราคาส่ง')
+    quantity, quantity_invalid = _number(df, 'จำนวน')
+
+    # ===== หมวดหมู่ / ซัพพลายเออร์ (dict lookup ทั้งคอลัมน์) =====
+    category_id = category_name.str.lower().map(_name_map(Category))
+    supplier_id = pd.Series(np.nan, index=df.index)
+    if supplier_name.ne('').any():
+        supplier_id = supplier_name.str.lower().map(_name_map(Supplier))
+    supplier_unknown = supplier_name.ne('') & supplier_id.isna()
+    if default_supplier_id:
+        supplier_id = supplier_id.fillna(int(default_supplier_id))
+
+    # ===== หน่วย =====
+    sales_unit = _text(df, 'หน่วย', 'ชิ้น')
+    items_per_unit, _ = _number(df, 'ชิ้น/หน่วย')
+    items_per_unit = np.floor(items_per_unit).clip(lower=1).astype(int)
+    purchase_unit_name = _text(df, 'หน่วยซื้อ')
+
+    multi = items_per_unit > 1
+    base_unit = sales_unit.where(~multi, 'ชิ้น')
+    default_purchase_unit = sales_unit.where(~multi | sales_unit.ne('ชิ้น'), 'ชุด')
+    purchase_unit_name = purchase_unit_name.where(purchase_unit_name.ne(''), default_purchase_unit)
+
+    bundle_type = _text(df, 'bundle_type').str.upper()
+    bundle_type = bundle_type.where(bundle_type.isin(IMPORT_BUNDLE_TYPES), 'SAME')
+
+    created_by = _text(df, 'ผู้นำเข้า', default_created_by)
+    reference = _text(df, 'เลขที่อ้างอิง', 'FILE-IMPORT')
+
+    # ===== ตรวจข้อมูล (แถวละ 1 ปัญหา เรียงตามลำดับความสำคัญ) =====
+    number_invalid = cost_invalid | selling_invalid | wholesale_invalid | quantity_invalid
+    checks = [
+        (number_invalid, "ราคา/จำนวน ไม่ใช่ตัวเลข"),
+        (category_id.isna(), "ไม่พบหมวดหมู่"),
+        (sku.eq('') | name.eq('') | (quantity <= 0), "ข้อมูลไม่ครบหรือจำนวน ≤ 0"),
+        ((cost_price < 0) | (selling_price < 0), "ราคาต้องไม่ติดลบ"),
+    ]
+    reason = pd.Series('', index=df.index, dtype=object)
+    for mask, message in checks:
+        reason = reason.mask(reason.eq('') & mask, message)
+    reason = reason.mask(reason.eq('ไม่พบหมวดหมู่'), "ไม่พบหมวดหมู่ '" + category_name + "'")
+    skipped = reason.ne('')
+
+    errors = [
+        {'row': int(r), 'sku': s, 'name': n, 'message': m, 'skipped': True}
+        for r, s, n, m in zip(row_no[skipped], sku[skipped], name[skipped], reason[skipped])
+    ]
+    warn = supplier_unknown & ~skipped
+    errors += [
+        {'row': int(r), 'sku': s, 'name': n, 'message': f"ไม่พบซัพพลายเออร์ '{sup}' (ใช้ค่าเริ่มต้น)", 'skipped': False}
+        for r, s, n, sup in zip(row_no[warn], sku[warn], name[warn], supplier_name[warn])
+    ]
+    errors.sort(key=lambda e: e['row'])
+
+    # ===== แถวที่ผ่าน → Staging (ราคาเก็บเป็น String กัน Error Serialize) =====
+    ok = ~skipped
+    staged = pd.DataFrame({
+        'category_id': category_id[ok].astype(int),
+        'category_name': category_name[ok],
+        'sku': sku[ok],
+        'name': name[ok],
+        'compatible_models': _text(df, 'รุ่นรถที่ใช้ได้')[ok],
+        'bundle_type': bundle_type[ok],
+        'unit': base_unit[ok],
+        'items_per_purchase_unit': items_per_unit[ok],
+        'purchase_unit_name': purchase_unit_name[ok],
+        'cost_price': cost_price[ok].astype(str),
+        'selling_price': selling_price[ok].astype(str),
+        'wholesale_price': wholesale_price[ok].astype(str),
+        'quantity': quantity[ok].astype(str),
+        'created_by': created_by[ok],
+        'reference': reference[ok],
+        'supplier_id': supplier_id[ok],
+    })
+    rows = staged.to_dict('records')
+    for row in rows:
+        # ให้เป็น int ของ Python (Session / JSON ไม่รับ numpy)
+        row['category_id'] = int(row['category_id'])
+        row['items_per_purchase_unit'] = int(row['items_per_purchase_unit'])
+        row['supplier_id'] = None if pd.isna(row['supplier_id']) else int(row['supplier_id'])
+    return rows, errors
+
+
+# ===================================
+# รายงานแถวที่มีปัญหา (เก็บบน ImportBatch → ทุก Worker อ่านได้, ลบพร้อม Batch)
+# ===================================
+def save_error_report(batch, errors):
+    """เก็บรายงานของการอัปโหลดล่าสุดไว้ให้ดาวน์โหลด (ไม่มีปัญหา = ล้างรายงานเดิม)"""
+    batch.error_report = list(errors)
+    batch.save(update_fields=['error_report', 'updated_at'])
+
+
+def load_error_report(batch):
+    """list ของปัญหา หรือ None ถ้าไม่มี Batch / ไม่มีรายงาน"""
+    if batch is None or not batch.error_report:
+        return None
+    return batch.error_report
+
+
+def error_report_rows(errors):
+    for error in errors:
+        yield [
+            error['row'],
+            error['sku'],
+            error['name'],
+            error['message'],
+            'ข้าม' if error['skipped'] else 'นำเข้า',
+        ]
@@ -0,0 +1,221 @@
+"""
+Job Service: คิวงานเบื้องหลังที่เก็บในฐานข้อมูล (ไม่ต้องมี Redis / Celery)
+
+- หน้าเว็บเรียก enqueue_job() แล้วตอบกลับทันที → Gunicorn ไม่ค้าง, เครื่องขายไม่ถูกบล็อก
+- `manage.py run_worker` วนหยิบงานด้วย claim_job()
+    - MySQL 8 / PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED (หลาย Worker ไม่แย่งแถวเดียวกัน)
+    - SQLite: จองแบบ Optimistic (UPDATE ... WHERE status='PENDING' แล้วดูจำนวนแถวที่เปลี่ยน)
+- งานล้ม → ลองใหม่ (หน่วงเวลาเพิ่มขึ้นตามครั้ง) จนครบ max_attempts แล้วจึง FAILED
+- Worker ตายกลางงาน → requeue_stale_jobs() คืนงานที่ไม่มี Heartbeat (updated_at) นานเกินไปกลับเข้าคิว
+    - Worker ที่ยังอยู่เรียกตอนเริ่มและทุก STALE_CHECK_SECONDS (รวมตอนว่าง) → ไม่ต้องรอ Restart
+    - ระหว่างทำงาน run_job() แตะ updated_at ทุก HEARTBEAT_SECONDS (report_progress ก็แตะด้วย)
+      → งานที่ยาวแต่ยังทำอยู่จะไม่ถูกคืนคิวซ้ำ
+"""
+
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products.models import Job
+
+
+RETRY_DELAY = 30                # วินาที (× จำนวนครั้งที่ลอง)
+STALE_JOB_MINUTES = 30          # ไม่มี Heartbeat นานกว่านี้ถือว่า Worker ตาย
+STALE_CHECK_SECONDS = STALE_JOB_MINUTES * 60 // 2   # run_worker เรียก requeue_stale_jobs() ถี่เท่านี้
+HEARTBEAT_SECONDS = 60          # ความถี่ที่ Worker แตะ updated_at ระหว่างทำงาน
+CLAIM_CANDIDATES = 5            # จำนวนแถวที่ลองจองต่อรอบ (โหมด Optimistic)
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """
+    ลงทะเบียนฟังก์ชันทำงาน: handler(job) → result (dict ที่ JSON ได้)
+
+    ใช้ report_progress(job, ...) ระหว่างทำเพื่อให้หน้าเว็บเห็นความคืบหน้า
+    """
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def _load_handlers():
+    # ลงทะเบียนงานทั้งหมด (import ภายหลังกัน Circular Import)
+    from products.Services import job_tasks  # noqa: F401
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ===================================
+# 1. สร้างงาน
+# ===================================
+def enqueue_job(kind, payload=None, user=None, max_attempts=3, message="รอคิว..."):
+    """
+    สร้างงานใหม่ (Worker จะเห็นหลัง Transaction ของผู้เรียก Commit)
+
+    Raises:
+        ValueError: ไม่รู้จักประเภทงาน
+    """
+    _load_handlers()
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"ไม่รู้จักงานประเภท '{kind}'")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        max_attempts=max(1, max_attempts),
+        message=message,
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+# ===================================
+# 2. จองงาน
+# ===================================
+def _claim_values(worker):
+    now = timezone.now()
+    return {
+        'status': 'RUNNING', 'attempts': F('attempts') + 1,
+        'locked_by': worker, 'locked_at': now, 'updated_at': now,
+    }
+
+
+def claim_job(worker=None):
+    """
+    จองงานที่ถึงเวลาทำ 1 งาน (เก่าสุดก่อน)
+
+    Returns:
+        Job หรือ None ถ้าไม่มีงาน
+    """
+    worker = worker or worker_name()
+    ready = Job.objects.filter(status='PENDING', run_after__lte=timezone.now()).order_by('id')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = ready.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(id=job.id).update(**_claim_values(worker))
+        return Job.objects.get(id=job.id)
+
+    for job_id in ready.values_list('id', flat=True)[:CLAIM_CANDIDATES]:
+        # Worker อื่นจองไปก่อน → UPDATE ได้ 0 แถว → ลองแถวถัดไป
+        if Job.objects.filter(id=job_id, status='PENDING').update(**_claim_values(worker)):
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs(minutes=STALE_JOB_MINUTES):
+    """
+    งาน RUNNING ที่ไม่มี Heartbeat นานเกินไป (Worker ตาย/ถูก Kill) → กลับเข้าคิว หรือ FAILED ถ้าลองครบแล้ว
+
+    ดูจาก updated_at (ไม่ใช่ locked_at) → งานที่ใช้เวลานานกว่า minutes แต่ Worker ยังแตะอยู่จะไม่ถูกคืนคิว
+    """
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    stale = Job.objects.filter(status='RUNNING', updated_at__lt=cutoff)
+    now = timezone.now()
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED', error="Worker หยุดทำงานระหว่างประมวลผล", locked_by='', finished_at=now, updated_at=now,
+    )
+    requeued = stale.update(status='PENDING', locked_by='', run_after=now, updated_at=now)
+    return requeued, failed
+
+
+# ===================================
+# 3. ทำงาน
+# ===================================
+def report_progress(job, done=None, total=None, message=None):
+    """อัปเดตความคืบหน้า (UPDATE ตรง ไม่แตะฟิลด์อื่นของงาน)"""
+    values = {'updated_at': timezone.now()}
+    if done is not None:
+        job.progress_done = values['progress_done'] = int(done)
+    if total is not None:
+        job.progress_total = values['progress_total'] = int(total)
+    if message is not None:
+        job.message = values['message'] = str(message)[:255]
+    Job.objects.filter(id=job.id).update(**values)
+
+
+def _heartbeat(job_id, worker, stop):
+    """แตะ updated_at ทุก HEARTBEAT_SECONDS จนกว่างานจะจบ (รันใน Thread แยก → ใช้ Connection ของตัวเอง)"""
+    try:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            Job.objects.filter(id=job_id, status='RUNNING', locked_by=worker).update(updated_at=timezone.now())
+    finally:
+        connections.close_all()
+
+
+def run_job(job):
+    """
+    ทำงานที่จองแล้ว 1 งาน
+
+    Returns:
+        str: สถานะหลังทำ (DONE / PENDING = รอลองใหม่ / FAILED)
+    """
+    _load_handlers()
+    handler = JOB_HANDLERS.get(job.kind)
+    now = timezone.now()
+
+    if handler is None:
+        Job.objects.filter(id=job.id).update(
+            status='FAILED', error=f"ไม่รู้จักงานประเภท '{job.kind}'", locked_by='', finished_at=now, updated_at=now,
+        )
+        return 'FAILED'
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(job.id, job.locked_by, stop), daemon=True)
+    beat.start()
+    try:
+        result = handler(job)
+    except Exception as e:
+        now = timezone.now()
+        error = f"{e}\n\n{traceback.format_exc()}"
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(id=job.id).update(
+                status='PENDING', error=error, message=f"⚠️ ล้มเหลว จะลองใหม่ ({job.attempts}/{job.max_attempts})",
+                locked_by='', run_after=now + timedelta(seconds=RETRY_DELAY * job.attempts), updated_at=now,
+            )
+            return 'PENDING'
+        Job.objects.filter(id=job.id).update(
+            status='FAILED', error=error, message=f"❌ {str(e)[:250]}",
+            locked_by='', finished_at=now, updated_at=now,
+        )
+        return 'FAILED'
+    finally:
+        stop.set()
+
+    now = timezone.now()
+    Job.objects.filter(id=job.id).update(
+        status='DONE', result=result, error='', message="✅ เสร็จสิ้น",
+        locked_by='', finished_at=now, updated_at=now,
+    )
+    return 'DONE'
+
+
+# ===================================
+# 4. สถานะ (สำหรับหน้าเว็บ Poll)
+# ===================================
+def job_status(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'finished': job.is_finished,
+        'progress_done': job.progress_done,
+        'progress_total': job.progress_total,
+        'percent': job.percent,
+        'message': job.message,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'result': job.result,
+        'error': job.error_summary if job.status == 'FAILED' else '',
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None,
+    }
@@ -0,0 +1,95 @@
+"""
+งานเบื้องหลังที่ run_worker ทำได้ (ลงทะเบียนด้วย @job_handler)
+
+- import_commit: บันทึกตะกร้านำเข้าสินค้าลงคลัง (รายงานความคืบหน้าทีละก้อน)
+- management_command: คำสั่ง manage.py ที่ใช้เวลานาน (sync_bundles, update_stock, ...)
+"""
+
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+
+from products.models import ImportBatch, Supplier
+from products.Services.import_commit_service import commit_import_batch
+from products.Services.job_service import job_handler, report_progress
+
+
+User = get_user_model()
+
+# คำสั่งที่อนุญาตให้ส่งเข้าคิว (กันการสั่งคำสั่งอื่นผ่าน payload)
+JOB_COMMANDS = (
+    'sync_bundles',
+    'update_stock',
+    'rebuild_search_index',
+    'rebuild_sales_summary',
+    'recount_vehicle_models',
+    'backfill_bill_costs',
+)
+COMMAND_OUTPUT_LINES = 50   # เก็บ Output ท้าย ๆ ไว้ดูในผลลัพธ์
+
+
+# ===================================
+# นำเข้าสินค้า
+# ===================================
+@job_handler('import_commit')
+def import_commit(job):
+    """
+    payload: {batch_id, user_id, supplier_id}
+
+    ก้อนที่บันทึกแล้วถูกลบออกจากตะกร้า → ถ้าล้มกลางทาง แถวที่เหลือยังอยู่ให้กดบันทึกใหม่
+    """
+    payload = job.payload
+    batch = ImportBatch.objects.filter(id=payload.get('batch_id')).first()
+    if batch is None:
+        raise ValueError("ไม่พบรายการนำเข้า (อาจถูกล้างไปแล้ว)")
+    user = User.objects.filter(id=payload.get('user_id')).first()
+    supplier = Supplier.objects.get(id=payload['supplier_id'])
+
+    report_progress(job, 0, batch.rows.count(), "⏳ กำลังบันทึกสินค้า...")
+    try:
+        result = commit_import_batch(
+            batch, user, supplier,
+            progress=lambda done, total: report_progress(job, done, total, f"⏳ บันทึกแล้ว {done}/{total} แถว"),
+        )
+    except Exception as e:
+        done = getattr(e, 'import_result', None)
+        if done and done['rows']:
+            raise RuntimeError(
+                f"{e} — บันทึกแล้ว {done['rows']} แถวใน {done['purchase'].doc_no} (DRAFT) "
+                f"แถวที่เหลือยังอยู่ในรายการ กดบันทึกอีกครั้งเพื่อทำต่อในใบเดิม"
+            ) from e
+        raise
+
+    # บันทึกครบทุกแถว → ไม่ต้องเก็บ Batch ไว้แล้ว
+    if not batch.rows.exists():
+        batch.delete()
+
+    purchase = result['purchase']
+    return {
+        'purchase_id': purchase.id,
+        'doc_no': purchase.doc_no,
+        'created': result['created'],
+        'updated': result['updated'],
+        'rows': result['rows'],
+        'posted': result['posted'],
+        'redirect_url': reverse('purchase_report'),
+    }
+
+
+# ===================================
+# คำสั่ง manage.py
+# ===================================
+@job_handler('management_command')
+def management_command(job):
+    """payload: {command, options} — Output ของคำสั่งเก็บไว้ใน result"""
+    name = job.payload.get('command')
+    if name not in JOB_COMMANDS:
+        raise ValueError(f"ไม่อนุญาตให้รันคำสั่ง '{name}' ผ่านคิว")
+
+    report_progress(job, message=f"⏳ กำลังรัน {name}...")
+    out = io.StringIO()
+    call_command(name, stdout=out, stderr=out, **(job.payload.get('options') or {}))
+    lines = out.getvalue().splitlines()
+    return {'command': name, 'output': lines[-COMMAND_OUTPUT_LINES:]}
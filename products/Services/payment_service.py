@@ -5,6 +5,7 @@ Pure Python - ไม่ต้อง Compile
 
 import qrcode
 import base64
+from functools import lru_cache
 from io import BytesIO
 from decimal import Decimal
 from django.db import transaction
@@ -16,7 +17,29 @@ from products.models import Payment
 # 1. CRC16 Calculation
 # ===================================
 
+def _build_crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+_CRC16_TABLE = _build_crc16_table()
+
+
 def crc16_ccitt(data: bytes) -> int:
+    """CRC16-CCITT (0xFFFF) แบบตาราง: 1 lookup ต่อ byte แทนการวนทีละ bit"""
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+def crc16_ccitt_bitwise(data: bytes) -> int:
+    """CRC16-CCITT แบบวนทีละ bit (ตัวเดิม) เก็บไว้เทียบผลและวัดความเร็ว"""
     crc = 0xFFFF
     for byte in data:
         crc ^= byte << 8
@@ -33,72 +56,129 @@ def crc16_ccitt(data: bytes) -> int:
 # 2. PromptPay Payload Generation
 # ===================================
 
-def create_promptpay_payload(identifier, amount=None):
+@lru_cache(maxsize=32)
+def _payload_prefix(identifier, with_amount):
     """
-    สร้าง PromptPay Payload (EMV QR Code)
-    
-    Args:
-        identifier: เบอร์มือถือ (66xxxxxxxx) หรือ เลขบัตรประชาชน
-        amount: จำนวนเงิน (float)
-    
-    Returns:
-        str: Payload String
+    ส่วนหัวของ Payload ที่ไม่ขึ้นกับยอดเงิน (Tag 00, 01, 29, 53, 58)
+    คำนวณครั้งเดียวต่อ (เบอร์/เลขบัตร, มียอดเงินหรือไม่)
     """
-    
-    # 1. เริ่มต้นโครงสร้าง
-    payload = "000201" 
-    payload += "010212" if amount else "010211" # 12=มียอดเงิน, 11=ไม่มี
-    
-    # 2. ข้อมูลร้านค้า (Tag 29)
-    # -------------------------------------------------------
+    payload = "000201"
+    payload += "010212" if with_amount else "010211" # 12=มียอดเงิน, 11=ไม่มี
+
+    # ข้อมูลร้านค้า (Tag 29)
     merchant_id = "0016A000000677010111" # AID ของ PromptPay
-    
-    identifier = str(identifier).strip().replace('-', '')
-    
+
     # เช็คว่าเป็นเบอร์โทร หรือ บัตรประชาชน
     if len(identifier) == 10 and identifier.startswith('0'):
-        # เบอร์โทร: เปลี่ยน 08x -> 00668x
+        # เบอร์โทร: เปลี่ยน 08x -> 00668x (Tag 01)
         formatted_id = f"0066{identifier[1:]}"
-        # Tag 01 คือ เบอร์มือถือ
         merchant_id += f"01{len(formatted_id):02d}{formatted_id}"
-        
     elif len(identifier) == 13:
-        # บัตรประชาชน
-        # Tag 02 คือ เลขบัตรปชช.
+        # บัตรประชาชน (Tag 02)
         merchant_id += f"02{len(identifier):02d}{identifier}"
-        
     else:
         # กรณี E-Wallet (Tag 03) หรืออื่นๆ
         merchant_id += f"03{len(identifier):02d}{identifier}"
-        
-    # เอาใส่ Tag 29
+
     payload += f"29{len(merchant_id):02d}{merchant_id}"
-    # -------------------------------------------------------
-    
-    # 3. สกุลเงินและประเทศ
+
+    # สกุลเงินและประเทศ
     payload += "5303764" # 764 = THB
     payload += "5802TH"
-    
-    # 4. ยอดเงิน (Tag 54)
-    if amount and float(amount) > 0:
-        amount_str = f"{float(amount):.2f}"
-        payload += f"54{len(amount_str):02d}{amount_str}"
-    
-    # 5. ปิดท้ายด้วย Checksum (Tag 63)
+    return payload
+
+
+def _normalize_identifier(identifier):
+    return str(identifier).strip().replace('-', '')
+
+
+def _amount_text(amount):
+    """ยอดเงินเป็นข้อความ 2 ตำแหน่ง ('' = ไม่ระบุยอด)"""
+    if amount is None or amount == '':
+        return ''
+    value = Decimal(str(amount)).quantize(Decimal('0.01'))
+    return f"{value:.2f}" if value > 0 else ''
+
+
+def _build_payload(identifier, amount_text):
+    payload = _payload_prefix(identifier, bool(amount_text))
+
+    # ยอดเงิน (Tag 54)
+    if amount_text:
+        payload += f"54{len(amount_text):02d}{amount_text}"
+
+    # ปิดท้ายด้วย Checksum (Tag 63)
     payload += "6304"
+    return payload + f"{crc16_ccitt(payload.encode()):04X}"
+
+
+def create_promptpay_payload(identifier, amount=None):
+    """
+    สร้าง PromptPay Payload (EMV QR Code)
     
-    # คำนวณ CRC
-    crc = crc16_ccitt(payload.encode())
-    payload += f"{crc:04X}" # แปลงเป็นฐาน 16 ตัวพิมพ์ใหญ่ (เช่น A1B2)
+    Args:
+        identifier: เบอร์มือถือ (66xxxxxxxx) หรือ เลขบัตรประชาชน
+        amount: จำนวนเงิน (Decimal / float / str)
     
-    return payload
+    Returns:
+        str: Payload String
+    """
+    return _build_payload(_normalize_identifier(identifier), _amount_text(amount))
 
 
 # ===================================
 # 3. QR Code Generation
 # ===================================
 
-def generate_promptpay_qr(phone_number, amount, reference=''):
+QR_FORMATS = ('png', 'svg')
+QR_CACHE_SIZE = getattr(settings, 'PROMPTPAY_QR_CACHE_SIZE', 256)
+
+
+def _render_qr(payload, fmt='png'):
+    """แปลง Payload เป็นรูป QR (data URL) ด้วยค่าตั้งชุดเดียวกันทุกจุด"""
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    if fmt == 'svg':
+        # SVG: เขียน path ตรง ๆ ไม่ต้องผ่าน PIL
+        from qrcode.image.svg import SvgPathImage
+        img = qr.make_image(image_factory=SvgPathImage)
+        return f"data:image/svg+xml;base64,{base64.b64encode(img.to_string()).decode()}"
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _cached_qr(identifier, amount_text, fmt):
+    return _render_qr(_build_payload(identifier, amount_text), fmt)
+
+
+def promptpay_qr_image(identifier, amount, fmt='png'):
+    """
+    รูป QR PromptPay (data URL) จาก Cache แบบ LRU ตาม (เบอร์, ยอดเงิน, รูปแบบ)
+
+    Args:
+        identifier: เบอร์มือถือ / เลขบัตรประชาชน
+        amount: จำนวนเงิน
+        fmt: 'png' หรือ 'svg'
+
+    Returns:
+        str: data:image/png;base64,... หรือ data:image/svg+xml;base64,...
+    """
+    if fmt not in QR_FORMATS:
+        raise ValueError(f"ไม่รองรับรูปแบบ QR: {fmt}")
+    return _cached_qr(_normalize_identifier(identifier), _amount_text(amount), fmt)
+
+
+def generate_promptpay_qr(phone_number, amount, reference='', fmt='png'):
     """
     สร้าง QR Code PromptPay (เบอร์มือถือ)
     
@@ -106,37 +186,13 @@ def generate_promptpay_qr(phone_number, amount, reference=''):
         phone_number: เบอร์มือถือ (เช่น '0812345678')
         amount: จำนวนเงิน
         reference: เลขที่อ้างอิง
+        fmt: 'png' หรือ 'svg'
     
     Returns:
         str: Base64 Image (data:image/png;base64,...)
     """
-    
     try:
-        # สร้าง Payload
-        payload = create_promptpay_payload(
-            identifier=phone_number,
-            amount=float(amount) if amount else None
-        )
-        
-        # สร้าง QR Code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(payload)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # แปลงเป็น Base64
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        
-        return f"data:image/png;base64,{img_base64}"
-        
+        return promptpay_qr_image(phone_number, amount, fmt)
     except Exception as e:
         raise ValueError(f"ไม่สามารถสร้าง QR Code ได้: {str(e)}")
 
@@ -199,22 +255,7 @@ class PaymentService:
         try:
             # ✅ ดึงเบอร์จาก Settings
             SHOP_PROMPTPAY_ID = getattr(settings, 'PROMPTPAY_PHONE', '0834755649')
-            
-            # 1. สร้างรหัส Text
-            payload = create_promptpay_payload(SHOP_PROMPTPAY_ID, float(amount))
-            
-            # 2. แปลง Text เป็นรูป QR
-            qr = qrcode.QRCode(box_size=10, border=4)
-            qr.add_data(payload)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # 3. แปลงรูปเป็น Base64 ส่งกลับไปหน้าเว็บ
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            
-            return f"data:image/png;base64,{img_str}"
+            return promptpay_qr_image(SHOP_PROMPTPAY_ID, amount)
             
         except Exception as e:
             print(f"QR Error: {e}")
@@ -0,0 +1,88 @@
+"""
+Popular Models Service: อันดับรุ่นรถยอดนิยม (เก็บใน Django Cache)
+
+- อ่าน: ดึงรายการที่จัดอันดับไว้แล้วจาก Cache (ไม่ Query DB)
+- Cache หาย/หมดอายุ: จัดอันดับจาก VehicleModel.product_count (มี Index) ครั้งเดียว
+- เขียน: จำนวนจริงอยู่ที่ VehicleModel.product_count (sync_vehicle_models ปรับด้วย UPDATE แบบ atomic)
+  Signal แค่ลบอันดับใน Cache หลัง Commit → ไม่มีการ get → แก้ → set แข่งกันจนยอดเพี้ยน
+- นับใหม่ทั้งหมด: python manage.py recount_vehicle_models
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from products.models import Product, VehicleModel
+
+
+TOP_KEY = 'popular_models:top'
+TOP_TIMEOUT = 10 * 60   # กันค่าค้างกรณี Cache ไม่ได้ใช้ร่วมกันทุก Process
+
+# จำนวนอันดับที่เก็บไว้ใน Cache (limit ที่ขอเกินนี้ → อ่านจาก DB)
+TOP_SIZE = 100
+
+
+def _ranked(limit):
+    return list(
+        VehicleModel.objects.filter(product_count__gt=0)
+        .order_by('-product_count', 'name')
+        .values_list('name', flat=True)[:limit]
+    )
+
+
+def load_ranking():
+    """จัดอันดับจาก VehicleModel ลง Cache"""
+    top = _ranked(TOP_SIZE)
+    cache.set(TOP_KEY, top, TOP_TIMEOUT)
+    return top
+
+
+def get_popular_models(limit=20):
+    """รุ่นรถยอดนิยม (ชื่อ) จาก Cache"""
+    if limit > TOP_SIZE:
+        return _ranked(limit)
+
+    top = cache.get(TOP_KEY)
+    if top is None:
+        top = load_ranking()
+    return top[:limit]
+
+
+def apply_model_changes(delta):
+    """
+    จำนวนรุ่นเปลี่ยน → ลบอันดับใน Cache หลัง Commit (ครั้งถัดไปจัดอันดับใหม่จาก DB)
+
+    Args:
+        delta: {vehicle_model_id: +n / -n} จาก sync_vehicle_models
+    """
+    if not any(delta.values()):
+        return
+    transaction.on_commit(lambda: cache.delete(TOP_KEY))
+
+
+def recount_vehicle_models():
+    """
+    นับจำนวนสินค้าของทุกรุ่นใหม่จากตาราง M2M แล้วเขียนทับ product_count + Cache
+
+    Returns:
+        tuple: (จำนวนรุ่นทั้งหมด, จำนวนรุ่นที่ค่าเปลี่ยน)
+    """
+    Link = Product.vehicle_models.through
+    actual = dict(
+        Link.objects.values('vehiclemodel_id')
+        .annotate(total=Count('product_id'))
+        .values_list('vehiclemodel_id', 'total')
+    )
+
+    with transaction.atomic():
+        models = list(VehicleModel.objects.select_for_update().order_by('id'))
+        changed = []
+        for vehicle_model in models:
+            count = actual.get(vehicle_model.id, 0)
+            if vehicle_model.product_count != count:
+                vehicle_model.product_count = count
+                changed.append(vehicle_model)
+        VehicleModel.objects.bulk_update(changed, ['product_count'], batch_size=1000)
+
+    load_ranking()
+    return len(models), len(changed)
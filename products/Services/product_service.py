@@ -1,10 +1,13 @@
 # products/services/product_service.py
 
 from typing import List, Optional
-from collections import Counter
-from django.db.models import Q, QuerySet
+from decimal import Decimal
+from django.db.models import Q, QuerySet, Case, When, F, Value, Count, CharField, DecimalField
 
-from products.models import Product
+from products.models import Product, VehicleModel
+from products.Services import popular_models_service
+from products.Services.search_backends import get_search_backend
+from products.Services.vehicle_model_service import vehicle_model_key
 
 
 class ProductService:
@@ -24,28 +27,8 @@ class ProductService:
         Returns:
             List รุ่นรถที่ใช้บ่อย
         """
-        all_models = []
-        
-        # ดึงข้อมูล
-        products = Product.objects.exclude(
-            compatible_models__isnull=True
-        ).exclude(
-            compatible_models=''
-        ).values_list('compatible_models', flat=True)
-        
-        # แยกแต่ละรุ่น
-        for compatible in products:
-            models = [
-                m.strip().title() 
-                for m in compatible.split(',') 
-                if m.strip()
-            ]
-            all_models.extend(models)
-        
-        # นับความถี่
-        counter = Counter(all_models)
-        
-        return [model for model, count in counter.most_common(limit)]
+        # ✅ อ่านอันดับจาก Cache (อัปเดตตามส่วนต่างทุกครั้งที่แก้รุ่นรถของสินค้า)
+        return popular_models_service.get_popular_models(limit)
     
     @staticmethod
     def get_compatible_models_list(product: Product) -> List[str]:
@@ -96,10 +79,21 @@ class ProductService:
         Returns:
             QuerySet ของสินค้า
         """
+        # ✅ หารุ่นในตาราง VehicleModel ก่อน (ตารางเล็ก ค้นกลางคำได้ เช่น "vios" → "toyota vios")
+        # แล้ว Join สินค้าด้วย id ของรุ่น
+        key = vehicle_model_key(model_name)
+        if not key:
+            return Product.objects.none()
+        
+        model_ids = list(VehicleModel.objects.filter(name_key__contains=key).values_list('id', flat=True))
+        if not model_ids:
+            # ไม่พบในตารางรุ่น (เช่น ยังไม่ได้ Sync) → ค้นจากข้อความเดิม
+            return Product.objects.filter(compatible_models__icontains=model_name.strip(), is_active=True)
+        
         return Product.objects.filter(
-            compatible_models__icontains=model_name,
+            vehicle_models__in=model_ids,
             is_active=True
-        )
+        ).distinct()
     
     @staticmethod
     def search_products(
@@ -118,43 +112,27 @@ class ProductService:
         Returns:
             QuerySet ของสินค้า
         """
-        products = Product.objects.filter(is_active=True)
-        
-        # กรองตามชื่อสินค้า
-        if product_query:
-            products = products.filter(
-                Q(name__icontains=product_query) |
-                Q(sku__icontains=product_query) |
-                Q(description__icontains=product_query)
-            )
+        # เลือกรุ่นรถอย่างเดียว → Join ตาราง VehicleModel
+        if model_query and not product_query:
+            return ProductService.search_by_model(model_query).select_related('category')[:limit]
+        
+        # ✅ ค้นผ่าน Search Backend (ตัดคำไทย + จัดอันดับ) แล้วคืนเป็น QuerySet ตามลำดับเดิม
+        ids = get_search_backend().filter(
+            product_query=product_query,
+            model_query=model_query,
+            limit=limit
+        )
         
-        # กรองตามรุ่นรถ
-        if model_query:
-            products = products.filter(
-                compatible_models__icontains=model_query
-            )
+        if not ids:
+            return Product.objects.none()
         
-        return products.select_related('category')[:limit]
+        ranking = Case(*[When(id=pid, then=pos) for pos, pid in enumerate(ids)])
+        return Product.objects.filter(id__in=ids).select_related('category').order_by(ranking)
     
     @staticmethod
     def get_stock_status(product):
-        quantity = 0
-        
-        # ✅ 1. ถ้าเป็น Bundle คำนวณจากลูกที่น้อยที่สุด
-        if product.is_bundle:
-            components = product.bundle_components.all()
-            if components.exists():
-                min_qty = float('inf')
-                for comp in components:
-                    comp_qty = float(comp.quantity or 0)
-                    if comp_qty < min_qty:
-                        min_qty = comp_qty
-                quantity = min_qty if min_qty != float('inf') else 0
-            else:
-                quantity = 0
-        else:
-            # ✅ 2. สินค้าปกติ
-            quantity = float(product.quantity or 0)
+        # ✅ อ่านจากคอลัมน์ (ชุด → available_sets ที่คำนวณไว้แล้ว, สินค้าปกติ → quantity)
+        quantity = float(product.stock_available or 0)
             
         status = 'in_stock'
         text = 'มีสินค้า'
@@ -174,4 +152,64 @@ class ProductService:
             'status': status,
             'label': text,
             'color': badge
-        }
\ No newline at end of file
+        }
+    
+    # ===================================
+    # สถานะสต็อกฝั่ง SQL (กรอง / นับ / เรียง ได้ใน Query)
+    # ===================================
+    STOCK_STATUSES = ('in_stock', 'low_stock', 'out_of_stock')
+    
+    @staticmethod
+    def stock_status_conditions() -> dict:
+        """
+        เงื่อนไข Q ของแต่ละสถานะ (ใช้หลัง annotate_stock_status)
+        เกณฑ์เดียวกับ get_stock_status: ≤ 0 = หมด, ≤ min_stock (0 → 5) = ใกล้หมด
+        """
+        return {
+            'out_of_stock': Q(stock_level__lte=0),
+            'low_stock': Q(stock_level__gt=0, stock_level__lte=F('stock_threshold')),
+            'in_stock': Q(stock_level__gt=F('stock_threshold')),
+        }
+    
+    @staticmethod
+    def annotate_stock_status(queryset: QuerySet) -> QuerySet:
+        """
+        เพิ่ม stock_level (ชุด → available_sets, ปกติ → quantity), stock_threshold และ stock_status
+        """
+        conditions = ProductService.stock_status_conditions()
+        return queryset.annotate(
+            stock_level=Case(
+                When(is_bundle=True, then=F('available_sets')),
+                default=F('quantity'),
+            ),
+            stock_threshold=Case(
+                When(min_stock=0, then=Value(Decimal('5'))),
+                default=F('min_stock'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        ).annotate(
+            stock_status=Case(
+                *[When(conditions[status], then=Value(status)) for status in ProductService.STOCK_STATUSES],
+                output_field=CharField(),
+            ),
+        )
+    
+    @staticmethod
+    def filter_stock_status(queryset: QuerySet, status: str) -> QuerySet:
+        """กรองตามสถานะสต็อก (queryset ต้องผ่าน annotate_stock_status แล้ว)"""
+        condition = ProductService.stock_status_conditions().get(status)
+        return queryset.filter(condition) if condition is not None else queryset
+    
+    @staticmethod
+    def stock_status_counts(queryset: QuerySet) -> dict:
+        """
+        นับจำนวนสินค้าแต่ละสถานะใน Query เดียว
+        
+        Returns:
+            dict: {'total': n, 'in_stock': n, 'low_stock': n, 'out_of_stock': n}
+        """
+        conditions = ProductService.stock_status_conditions()
+        return queryset.aggregate(
+            total=Count('id'),
+            **{status: Count('id', filter=conditions[status]) for status in ProductService.STOCK_STATUSES}
+        )
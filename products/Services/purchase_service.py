@@ -3,10 +3,142 @@ products/Services/purchase_service.py
 ฉบับแก้ไข: 
 1. ระบุชื่อคนนำเข้าใน Note (เพื่อให้รายงานแยกคนได้)
 2. หารต้นทุนสินค้าชุดถูกต้อง (ไม่เบิ้ลราคา)
+3. รับเข้า / ยกเลิก แบบ Set-based (_apply_receiving)
+   - โหลดรายการ + สินค้า + ลูกของชุด ด้วยจำนวน Query คงที่
+   - ล็อคแถวสินค้าที่กระทบ + ชุดที่ใช้สินค้านั้น ใน SELECT ... FOR UPDATE เดียว (เรียงตาม id กัน Deadlock กับเครื่องขาย)
+   - คำนวณจำนวน + Weighted Average ในหน่วยความจำ (SKU ซ้ำในใบเดียวกันใช้ Object เดียว → สะสมต่อกันถูกต้อง)
+   - เขียนกลับด้วย bulk_update + bulk_create
 """
 from django.db import transaction
 from decimal import Decimal
-from products.models import Purchase, StockMovement, Product
+from products.models import Product, StockMovement
+from products.Services.search_index import mark_products_changed
+from products.Services.stock_service import apply_bundle_availability, lock_with_bundles
+
+
+def _receiving_plan(purchase_obj):
+    """
+    รายการในใบรับ + ลูกของชุด (2 Query)
+
+    Returns:
+        tuple: (items, children) — children = {bundle_id: [child_id, ...]}
+    """
+    items = list(purchase_obj.items.select_related('product').order_by('id'))
+    bundle_ids = {item.product_id for item in items if item.product.is_bundle}
+    children = {}
+    if bundle_ids:
+        Link = Product.bundle_components.through
+        for parent_id, child_id in Link.objects.filter(from_product_id__in=bundle_ids).values_list(
+            'from_product_id', 'to_product_id'
+        ).order_by('id'):
+            children.setdefault(parent_id, []).append(child_id)
+    return items, children
+
+
+def _apply_receiving(purchase_obj, receive, actor_name):
+    """
+    รับเข้า (receive=True) หรือยกเลิกการรับเข้า (receive=False) ทั้งใบ
+    ต้องเรียกภายใน transaction.atomic
+
+    Returns:
+        list: id สินค้าที่สต็อกเปลี่ยน
+    """
+    items, children = _receiving_plan(purchase_obj)
+
+    affected = set()
+    for item in items:
+        if item.product.is_bundle:
+            affected.update(children.get(item.product_id, []))
+        else:
+            affected.add(item.product_id)
+    products, family = lock_with_bundles(affected)
+
+    movements = []
+    touched = {}
+    for item in items:
+        product = item.product
+        multiplier = max(1, int(product.items_per_purchase_unit or 1))
+        stock_qty = item.quantity * multiplier
+
+        if receive:
+            # คำนวณต้นทุนต่อหน่วยสต็อก (Per Unit/Set)
+            unit_cost_stock = item.line_total / stock_qty if stock_qty > 0 else 0
+
+            if product.is_bundle:
+                # ====================================================
+                # 📦 สินค้าชุด (Bundle) -> กระจายเข้าลูก
+                # ====================================================
+                # Movement ของ "ตัวแม่" (เพื่อโชว์ประวัติ) แม่ไม่มีสต็อกจริง → balance_after = 0
+                movements.append(StockMovement(
+                    product=product,
+                    movement_type='IN',
+                    quantity=stock_qty,            # จำนวนชุด (เช่น +10)
+                    unit_cost=unit_cost_stock,     # ต้นทุนต่อชุด (เช่น 1500)
+                    balance_after=0,
+                    reference=purchase_obj.doc_no,
+                    note=f"Import Bundle Set (โดย {actor_name})"
+                ))
+                child_ids = [c for c in children.get(product.id, []) if c in products]
+                child_unit_cost = unit_cost_stock / len(child_ids) if child_ids else 0
+                targets = [(products[c], child_unit_cost, f"Component of {product.sku} (โดย {actor_name})") for c in child_ids]
+            else:
+                # ====================================================
+                # 📦 สินค้าปกติ -> เข้าตัวมันเอง
+                # ====================================================
+                targets = [(products[product.id], unit_cost_stock, f"Import File (โดย {actor_name})")]
+
+            for target, unit_cost, note in targets:
+                old_qty = Decimal(str(target.quantity or 0))
+                old_cost = Decimal(str(target.cost_price or 0))
+                new_qty = Decimal(str(stock_qty))  # ลูกเพิ่มเท่าแม่ (1:1)
+
+                # ⭐ Weighted Average Cost
+                total_qty = old_qty + new_qty
+                if total_qty > 0 and unit_cost > 0:
+                    target.cost_price = (old_qty * old_cost + new_qty * unit_cost) / total_qty
+                target.quantity = total_qty
+                touched[target.id] = target
+
+                movements.append(StockMovement(
+                    product=target,
+                    movement_type='IN',
+                    quantity=stock_qty,
+                    unit_cost=unit_cost,
+                    balance_after=target.quantity,
+                    reference=purchase_obj.doc_no,
+                    note=note,
+                ))
+        else:
+            if product.is_bundle:
+                child_ids = [c for c in children.get(product.id, []) if c in products]
+                note = f"ยกเลิกรับเข้า {purchase_obj.doc_no} (ชุด {product.sku}) โดย {actor_name}"
+                targets = [products[c] for c in child_ids]
+            else:
+                note = f"ยกเลิกรับเข้า {purchase_obj.doc_no} โดย {actor_name}"
+                targets = [products[product.id]]
+
+            for target in targets:
+                target.quantity = (target.quantity or 0) - stock_qty
+                touched[target.id] = target
+                movements.append(StockMovement(
+                    product=target,
+                    movement_type='OUT',
+                    quantity=stock_qty,
+                    unit_cost=target.cost_price,
+                    balance_after=target.quantity,
+                    reference=f"CANCEL-{purchase_obj.doc_no}",
+                    note=note,
+                ))
+
+    if touched:
+        Product.objects.bulk_update(touched.values(), ['quantity', 'cost_price'])
+    StockMovement.objects.bulk_create(movements)
+
+    # bulk_update ไม่ยิง Signal → แจ้ง Search Index + คำนวณชุดที่ขายได้เอง (แถวชุดล็อคไว้แล้ว)
+    mark_products_changed(touched)
+    apply_bundle_availability(family, products)
+    return list(touched)
+
 
 def post_purchase(purchase_obj, user=None):
     """
@@ -21,89 +153,7 @@ def post_purchase(purchase_obj, user=None):
             # ✅ ดึงชื่อคนทำรายการ (ถ้าไม่มีให้ใช้ System)
             importer_name = purchase_obj.created_by.username if purchase_obj.created_by else "System"
 
-            for item in purchase_obj.items.all():
-                product = item.product
-                
-                # 1. คำนวณจำนวนสต็อกจริง (Convert Unit)
-                qty_bought = item.quantity
-                multiplier = max(1, int(product.items_per_purchase_unit or 1))
-                stock_qty_to_add = qty_bought * multiplier
-                
-                # คำนวณต้นทุนต่อหน่วยสต็อก (Per Unit/Set)
-                unit_cost_stock = 0
-                if stock_qty_to_add > 0:
-                    unit_cost_stock = item.line_total / stock_qty_to_add
-
-                # ====================================================
-                # 📦 2. กรณีสินค้าชุด (Bundle) -> กระจายเข้าลูก
-                # ====================================================
-                if product.is_bundle:
-                    # 1. สร้าง StockMovement ให้ "ตัวแม่" (เพื่อโชว์ประวัติ)
-                    # หมายเหตุ: balance_after ใส่ 0 หรือค่าสมมติ เพราะแม่ไม่มีสต็อกจริง
-                    StockMovement.objects.create(
-                        product=product,
-                        movement_type='IN',
-                        quantity=stock_qty_to_add,     # จำนวนชุด (เช่น +10)
-                        unit_cost=unit_cost_stock,     # ต้นทุนต่อชุด (เช่น 1500)
-                        balance_after=0,               # แม่ไม่มีสต็อกจริง ให้เป็น 0
-                        reference=purchase_obj.doc_no,
-                        note=f"Import Bundle Set (โดย {importer_name})"
-                    )
-
-                    # 2. จัดการลูกๆ (เหมือนเดิม)
-                    children = product.bundle_components.all()
-                    if children.exists():
-                        child_count = children.count()
-                        child_unit_cost = unit_cost_stock / child_count if child_count > 0 else 0
-
-                        for child in children:
-                            # ... (Logic คำนวณ Weighted Average ของลูก เหมือนเดิม) ...
-                            old_qty = Decimal(str(child.quantity or 0))
-                            old_cost = Decimal(str(child.cost_price or 0))
-                            new_qty = Decimal(str(stock_qty_to_add)) # ลูกเพิ่มเท่าแม่ (1:1)
-
-                            total_qty = old_qty + new_qty
-                            if total_qty > 0 and child_unit_cost > 0:
-                                child.cost_price = (old_qty * old_cost + new_qty * child_unit_cost) / total_qty
-
-                            child.quantity = total_qty
-                            child.save(update_fields=['quantity', 'cost_price'])
-                            
-                            StockMovement.objects.create(
-                                product=child,
-                                movement_type='IN',
-                                quantity=stock_qty_to_add,
-                                unit_cost=child_unit_cost,
-                                balance_after=child.quantity,
-                                reference=purchase_obj.doc_no,
-                                note=f"Component of {product.sku} (โดย {importer_name})"
-                            )
-                # ====================================================
-                # 📦 3. กรณีสินค้าปกติ -> เข้าตัวมันเอง
-                # ====================================================
-                else:
-                    old_qty = Decimal(str(product.quantity or 0))
-                    old_cost = Decimal(str(product.cost_price or 0))
-                    new_qty = Decimal(str(stock_qty_to_add))
-
-                    # ⭐ Weighted Average Cost
-                    total_qty = old_qty + new_qty
-                    if total_qty > 0 and unit_cost_stock > 0:
-                        product.cost_price = (old_qty * old_cost + new_qty * unit_cost_stock) / total_qty
-
-                    product.quantity = total_qty
-                    product.save(update_fields=['quantity', 'cost_price'])
-                    
-                    StockMovement.objects.create(
-                        product=product,
-                        movement_type='IN',
-                        quantity=stock_qty_to_add,
-                        unit_cost=unit_cost_stock,
-                        balance_after=product.quantity,
-                        reference=purchase_obj.doc_no,
-                        # ✅ แก้ไข: เพิ่ม (โดย ชื่อคนนำเข้า)
-                        note=f"Import File (โดย {importer_name})"
-                    )
+            _apply_receiving(purchase_obj, receive=True, actor_name=importer_name)
 
             # Finalize
             purchase_obj.status = 'POSTED'
@@ -132,48 +182,7 @@ def cancel_purchase(purchase_obj, user=None):
             # ✅ ดึงชื่อคนยกเลิก
             canceler_name = user.username if user else (purchase_obj.created_by.username if purchase_obj.created_by else "System")
 
-            for item in purchase_obj.items.all():
-                product = item.product
-                qty = item.quantity
-                items_per_unit = max(1, int(product.items_per_purchase_unit or 1))
-                
-                if product.is_bundle:
-                    children = product.bundle_components.all()
-                    if not children.exists(): continue
-
-                    total_qty_to_remove = qty * items_per_unit
-
-                    for child in children:
-                        child.quantity = (child.quantity or 0) - total_qty_to_remove
-                        child.save(update_fields=['quantity'])
-                        
-                        StockMovement.objects.create(
-                            product=child,
-                            movement_type='OUT', 
-                            quantity=total_qty_to_remove,
-                            unit_cost=child.cost_price,
-                            balance_after=child.quantity,
-                            reference=f"CANCEL-{purchase_obj.doc_no}",
-                            # ✅ เพิ่มชื่อคนยกเลิกด้วย
-                            note=f"ยกเลิกรับเข้า {purchase_obj.doc_no} (ชุด {product.sku}) โดย {canceler_name}"
-                        )
-                
-                else:
-                    stock_qty_to_remove = qty * items_per_unit
-                    
-                    product.quantity = (product.quantity or 0) - stock_qty_to_remove
-                    product.save(update_fields=['quantity'])
-                    
-                    StockMovement.objects.create(
-                        product=product,
-                        movement_type='OUT',
-                        quantity=stock_qty_to_remove,
-                        unit_cost=product.cost_price,
-                        balance_after=product.quantity,
-                        reference=f"CANCEL-{purchase_obj.doc_no}",
-                        # ✅ เพิ่มชื่อคนยกเลิกด้วย
-                        note=f"ยกเลิกรับเข้า {purchase_obj.doc_no} โดย {canceler_name}"
-                    )
+            _apply_receiving(purchase_obj, receive=False, actor_name=canceler_name)
 
             purchase_obj.status = 'CANCELLED'
             purchase_obj.save(update_fields=['status'])
@@ -0,0 +1,153 @@
+"""
+Receipt Snapshot Service: เก็บข้อมูลใบเสร็จ / ใบรับคืนที่ยืนยันแล้วไว้ใน Cache
+
+- บิล POSTED / CANCELLED ไม่เปลี่ยนเนื้อหาอีก → สร้าง Snapshot ครั้งเดียว พิมพ์ซ้ำไม่ต้อง Query ตารางบิล
+- Key: receipt:{id}:{stamp}:{settings_version}
+  stamp = สถานะ + updated_at ของบิลและการชำระเงิน อ่านจากแถวบิลเอง (1 Query ด้วย Primary Key)
+  → ยกเลิกบิล / บันทึกการชำระเงิน = Key ใหม่ทันทีทุก Process (ไม่พึ่ง Cache ร่วมกัน)
+  → แก้ค่าตั้งร้าน = Key ใหม่ภายใน SHARED_VERSION_POLL วินาที
+- เก็บเป็น dict ธรรมดา (ไม่ใช่ HTML) เพราะวันที่พิมพ์ / ปุ่มกลับจากรายงาน ต่างกันทุก Request
+- Key ไม่เคยถูกเขียนทับด้วยเนื้อหาอื่น → เก็บใน Cache ของ Process (CACHES['local']) ไม่ต้องใช้ Cache ร่วม
+  (Process ที่ยังไม่เคยเปิดบิลนี้สร้าง Snapshot เองครั้งเดียว)
+- สร้างหลัง Commit ตอนยืนยัน / ยกเลิก / บันทึกการชำระเงิน (ดู signals.py)
+"""
+
+from django.db import transaction
+from django.db.models import Sum
+
+from products.models import Transaction
+from products.Services.cache_tiers import local_cache
+from products.Services.settings_service import get_settings, settings_version
+
+
+SNAPSHOT_STATUSES = ('POSTED', 'CANCELLED')
+SNAPSHOT_TIMEOUT = 60 * 60 * 24      # 1 วัน (บิลเก่าที่ไม่มีใครเปิด ปล่อยให้หมดอายุ)
+
+SNAPSHOT_KEY = 'receipt:{id}:{stamp}:{version}'
+
+
+def _stamp(status, updated_at, payment_updated_at):
+    def micros(value):
+        return int(value.timestamp() * 1_000_000) if value else 0
+    return f"{status}-{micros(updated_at)}-{micros(payment_updated_at)}"
+
+
+def _snapshot_key(txn_id, stamp, version):
+    return SNAPSHOT_KEY.format(id=txn_id, stamp=stamp, version=version)
+
+
+def _row_stamp(txn_id):
+    """(สถานะ, stamp) ของบิลจาก DB หรือ None ถ้าไม่พบ"""
+    row = Transaction.objects.filter(id=txn_id).values_list('status', 'updated_at', 'payment__updated_at').first()
+    if row is None:
+        return None
+    return row[0], _stamp(*row)
+
+
+def build_snapshot(txn_id):
+    """
+    อ่านบิลจาก DB แล้วแปลงเป็น dict สำหรับ Template ใบเสร็จ
+
+    Returns:
+        dict: {'sale': {...}, 'items': [...], 'settings': {...}} หรือ None ถ้าไม่พบบิล
+    """
+    sale = (
+        Transaction.objects
+        .select_related('created_by', 'payment')
+        .filter(id=txn_id)
+        .first()
+    )
+    if sale is None:
+        return None
+
+    items = []
+    for item in sale.items.select_related('product').order_by('id'):
+        product = item.product
+        items.append({
+            'unit_type': item.unit_type,
+            'display_sku': item.display_sku,
+            'quantity': item.quantity,
+            'unit_price': item.unit_price,
+            'line_total': item.line_total,
+            'product': {
+                'name': product.name,
+                'base_name': product.base_name,
+                'sku': product.sku,
+                'unit': product.unit,
+            },
+        })
+
+    payment = getattr(sale, 'payment', None)
+    return {
+        'stamp': _stamp(sale.status, sale.updated_at, payment.updated_at if payment else None),
+        'sale': {
+            'id': sale.id,
+            'doc_no': sale.doc_no,
+            'doc_type': sale.doc_type,
+            'ref_doc_no': sale.ref_doc_no,
+            'transaction_date': sale.transaction_date,
+            'status': sale.status,
+            'remark': sale.remark,
+            'total_amount': sale.total_amount,
+            'discount_amount': sale.discount_amount,
+            'grand_total': sale.grand_total,
+            'created_by_id': sale.created_by_id,
+            'created_by': {'username': sale.created_by.username if sale.created_by else ''},
+            'payment': {
+                'method': payment.method,
+                'received': payment.received,
+                'change': payment.change,
+            } if payment else None,
+            'total_quantity': sale.items.aggregate(total=Sum('quantity'))['total'] or 0,
+        },
+        'items': items,
+        'settings': get_settings(),
+    }
+
+
+def refresh_receipt_snapshot(txn_id):
+    """
+    สร้าง Snapshot ใหม่
+    (บิลร่าง / พักบิล คืนค่าได้ แต่ไม่เก็บ Cache เพราะยังแก้ไขได้)
+    """
+    snapshot = build_snapshot(txn_id)
+    if snapshot is None:
+        return None
+
+    stamp = snapshot.pop('stamp')
+    if snapshot['sale']['status'] in SNAPSHOT_STATUSES:
+        local_cache().set(_snapshot_key(txn_id, stamp, settings_version()), snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def schedule_receipt_refresh(txn_id):
+    """สร้าง Snapshot หลัง Commit (ไม่เก็บข้อมูลที่อาจถูก Rollback)"""
+    transaction.on_commit(lambda: refresh_receipt_snapshot(txn_id))
+
+
+def get_receipt_snapshot(txn_id, doc_type=None):
+    """
+    ข้อมูลใบเสร็จจาก Cache (Cache ใน Process hit = Query เดียว: สถานะ/เวลาแก้ไขของบิล ด้วย Primary Key)
+
+    Args:
+        txn_id: id ของบิล
+        doc_type: 'SALE' / 'RETURN' (ถ้าระบุ และไม่ตรง → None)
+
+    Returns:
+        dict หรือ None ถ้าไม่พบบิล
+    """
+    current = _row_stamp(txn_id)
+    if current is None:
+        return None
+
+    status, stamp = current
+    snapshot = None
+    if status in SNAPSHOT_STATUSES:
+        snapshot = local_cache().get(_snapshot_key(txn_id, stamp, settings_version()))
+
+    if snapshot is None:
+        snapshot = refresh_receipt_snapshot(txn_id)
+
+    if snapshot is None or (doc_type and snapshot['sale']['doc_type'] != doc_type):
+        return None
+    return snapshot
@@ -15,6 +15,8 @@ from datetime import datetime, timedelta
 
 # ✅ แก้ Circular Import: import เฉพาะที่จำเป็น
 from products.models import Transaction, TransactionItem, Product
+from products.Services.stock_service import apply_stock_changes, item_stock_changes
+from products.Services.sales_summary_service import record_bill
 
 
 # ===================================
@@ -185,6 +187,7 @@ def create_return_transaction(
                 doc_no=doc_no,
                 doc_type='RETURN',
                 ref_doc_no=ref_doc_no,
+                price_type=original_sale.price_type,
                 status='DRAFT',
                 discount_amount=Decimal(str(discount_amount)),
                 remark=f"เหตุผล: {return_reason}\n{return_note}",
@@ -193,6 +196,7 @@ def create_return_transaction(
             
             # ✅ เพิ่มรายการสินค้าที่คืน
             total_amount = Decimal('0')
+            return_items = []
             
             for item_data in items_data:
                 
@@ -235,7 +239,7 @@ def create_return_transaction(
                 # ✅ สร้างรายการคืน (ใช้ราคาและต้นทุนจากบิลเดิม)
                 line_total = return_qty * original_item.unit_price
                 
-                TransactionItem.objects.create(
+                return_items.append(TransactionItem.objects.create(
                     transaction=return_sale,
                     product=product,
                     quantity=return_qty,
@@ -244,15 +248,17 @@ def create_return_transaction(
                     line_total=line_total,
                     unit_type=original_item.unit_type or 'ชิ้น',      
                     display_sku=original_item.display_sku or product.sku,  
-                    bundle_items=original_item.bundle_items
-                )
+                    bundle_items=original_item.bundle_items,
+                    price_type=original_item.price_type,
+                ))
                 
                 total_amount += line_total
             
             # ✅ คำนวณยอดรวม (เป็นลบเพราะคืนเงิน)
             return_sale.total_amount = -abs(total_amount)
             return_sale.grand_total = -abs(total_amount - Decimal(str(discount_amount)))
-            return_sale.save(update_fields=['total_amount', 'grand_total'])
+            return_sale.set_cost_from_items(return_items)
+            return_sale.save(update_fields=['total_amount', 'grand_total', 'total_cost', 'gross_profit'])
             
             return return_sale
             
@@ -274,9 +280,6 @@ def post_return(return_sale):
         True
     """
     
-    # ✅ แก้ Circular Import: import ภายในฟังก์ชัน
-    from products.models import StockMovement
-    
     if return_sale.doc_type != 'RETURN':
         raise ValueError("ไม่ใช่บิลรับคืน")
     
@@ -289,45 +292,25 @@ def post_return(return_sale):
     try:
         with transaction.atomic():
             
-            # ✅ คืนสต็อก
-            for item in return_sale.items.select_related('product').all():
-                
-                # ⭐ ถ้ามี bundle_items → คืนทุก SKU
-                if item.bundle_items:
-                    for product_id in item.bundle_items:
-                        product = Product.objects.select_for_update().get(id=product_id)
-                        product.quantity += int(item.quantity)
-                        product.save(update_fields=['quantity'])
-                        
-                        StockMovement.objects.create(
-                            product=product,
-                            movement_type='IN',
-                            quantity=item.quantity,
-                            unit_cost=item.cost_price,
-                            balance_after=product.quantity,
-                            reference=return_sale.doc_no,
-                            note=f"รับคืน{item.unit_type} {return_sale.ref_doc_no}"
-                        )
-                else:
-                    # คืนปกติ
-                    product = Product.objects.select_for_update().get(id=item.product.id)
-                    product.quantity += int(item.quantity)
-                    product.save(update_fields=['quantity'])
-                    
-                    StockMovement.objects.create(
-                        product=item.product,
-                        movement_type='IN',
-                        quantity=item.quantity,
-                        unit_cost=item.cost_price,
-                        balance_after=product.quantity,
-                        reference=return_sale.doc_no,
-                        note=f"รับคืนจากบิล: {return_sale.ref_doc_no}"
-                    )
+            # ✅ คืนสต็อกทั้งบิลในรอบเดียว (ชุด → คืนทุก SKU ลูก)
+            ref_doc_no = return_sale.ref_doc_no
+            items = list(return_sale.items.all())
+            apply_stock_changes(
+                item_stock_changes(
+                    items,
+                    bundle_note=lambda item: f"รับคืน{item.unit_type} {ref_doc_no}",
+                    single_note=lambda item: f"รับคืนจากบิล: {ref_doc_no}",
+                ),
+                movement_type='IN',
+                reference=return_sale.doc_no,
+            )
             
             # เปลี่ยนสถานะ
             return_sale.status = 'POSTED'
             return_sale.transaction_date = timezone.now()
-            return_sale.save(update_fields=['status', 'transaction_date'])
+            return_sale.set_cost_from_items(items)
+            return_sale.save(update_fields=['status', 'transaction_date', 'total_cost', 'gross_profit'])
+            record_bill(return_sale, sign=1, items=items)
             
             return True
             
@@ -355,9 +338,6 @@ def cancel_return(return_sale):
         True
     """
     
-    # ✅ แก้ Circular Import: import ภายในฟังก์ชัน
-    from products.models import StockMovement
-    
     if return_sale.doc_type != 'RETURN':
         raise ValueError("ไม่ใช่บิลรับคืน")
     
@@ -371,51 +351,20 @@ def cancel_return(return_sale):
         with transaction.atomic():
             
             # ⚠️ ตัดสต็อกออกอีกครั้ง (เพราะเคยคืนเข้าไปแล้ว)
-            for item in return_sale.items.select_related('product').all():
-                
-                # ⭐ ถ้ามี bundle_items → ตัดทุก SKU
-                if item.bundle_items:
-                    for product_id in item.bundle_items:
-                        product = Product.objects.select_for_update().get(id=product_id)
-                        
-                        if product.quantity < item.quantity:
-                            raise ValueError(f"สต็อก {product.name} ไม่พอ")
-                        
-                        product.quantity -= int(item.quantity)
-                        product.save(update_fields=['quantity'])
-                        
-                        StockMovement.objects.create(
-                            product=product,
-                            movement_type='OUT',
-                            quantity=item.quantity,
-                            unit_cost=item.cost_price,
-                            balance_after=product.quantity,
-                            reference=f'CANCEL-{return_sale.doc_no}',
-                            note=f"ยกเลิกการรับคืน{item.unit_type}"
-                        )
-                else:
-                    # ตัดปกติ
-                    product = Product.objects.select_for_update().get(id=item.product.id)
-                    
-                    if product.quantity < item.quantity:
-                        raise ValueError(f"สต็อก {product.name} ไม่พอ")
-                    
-                    product.quantity -= int(item.quantity)
-                    product.save(update_fields=['quantity'])
-                    
-                    StockMovement.objects.create(
-                        product=item.product,
-                        movement_type='OUT',
-                        quantity=item.quantity,
-                        unit_cost=item.cost_price,
-                        balance_after=product.quantity,
-                        reference=f'CANCEL-{return_sale.doc_no}',
-                        note=f"ยกเลิกการรับคืน"
-                    )
+            apply_stock_changes(
+                item_stock_changes(
+                    return_sale.items.all(),
+                    bundle_note=lambda item: f"ยกเลิกการรับคืน{item.unit_type}",
+                    single_note=lambda item: "ยกเลิกการรับคืน",
+                ),
+                movement_type='OUT',
+                reference=f'CANCEL-{return_sale.doc_no}',
+            )
             
             # เปลี่ยนสถานะ
             return_sale.status = 'CANCELLED'
             return_sale.save(update_fields=['status'])
+            record_bill(return_sale, sign=-1)
             
             # ยกเลิก Payment
             if hasattr(return_sale, 'payment'):
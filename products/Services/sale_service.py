@@ -2,9 +2,11 @@ from django.utils import timezone
 from django.db import transaction as db_transaction # ✅ ตั้งชื่อ alias กันชื่อซ้ำกับ Model Transaction
 from decimal import Decimal
 from products.models import (
-    Transaction, TransactionItem, Product, StockMovement
+    Transaction, TransactionItem, Product
 )
 from products.Services.payment_service import PaymentService
+from products.Services.stock_service import apply_stock_changes, item_stock_changes
+from products.Services.sales_summary_service import record_bill
 
 # ===================================
 # 1. สร้างบิลขาย (Transaction)
@@ -22,6 +24,7 @@ def create_sale_transaction(user, items_data, price_type='retail', discount_amou
                     sale.items.all().delete()
                     sale.doc_type = doc_type
                     sale.ref_doc_no = ref_doc_no
+                    sale.price_type = price_type
                     sale.status = status
                     sale.discount_amount = Decimal(str(discount_amount))
                     sale.remark = remark
@@ -34,70 +37,63 @@ def create_sale_transaction(user, items_data, price_type='retail', discount_amou
                     doc_no=doc_no,
                     doc_type=doc_type,
                     ref_doc_no=ref_doc_no,
+                    price_type=price_type,
                     status=status,
                     discount_amount=Decimal(str(discount_amount)),
                     remark=remark,
                     created_by=user,
                 )
             
-            # 1.2 เพิ่มรายการสินค้า
+            # 1.2 เพิ่มรายการสินค้า (โหลดสินค้า/ลูกชุดครั้งเดียว แล้วตรวจในหน่วยความจำ)
+            line_ctx = _load_line_context(items_data)
+            products_map = line_ctx['products']
+            components_map = line_ctx['components']
+            stock_map = line_ctx['stock']
+
             total_amount = Decimal('0')
-            
+            demand = {}  # product_id -> จำนวนที่ต้องใช้รวมทั้งบิล
+            bundle_children = set()
+            new_items = []
+
             for item_data in items_data:
-                try:
-                    product = Product.objects.select_related('category').get(id=item_data['product_id'], is_active=True)
-                except Product.DoesNotExist:
+                product = products_map.get(_as_int(item_data['product_id']))
+                if product is None:
                     raise ValueError(f"ไม่พบสินค้า ID {item_data['product_id']}")
-                
+
                 unit_type = item_data.get('unit_type', 'ชิ้น')
                 display_sku = product.sku
-                bundle_items = item_data.get('bundle_items', [])
-                
-                # ถ้าหน้าจอไม่ได้ส่งมา ให้ลองเช็คจาก Database (สินค้าชุดปกติ)
-                if not bundle_items and product.is_bundle:
-                    bundle_items = list(product.bundle_components.values_list('id', flat=True))
-                
-                # ✅ LOGIC ใหม่: ใช้ bundle_components แทน bundle_group
+
+                # ✅ สินค้าชุดใช้สูตรจาก bundle_components เสมอ (Snapshot)
+                # สินค้าจับคู่หน้างานใช้ list ที่หน้าจอส่งมา
                 if product.is_bundle:
-                    # ดึง ID ลูกๆ มาเก็บไว้ตัดสต็อก (Snapshot)
-                    bundle_items = list(product.bundle_components.values_list('id', flat=True))
+                    bundle_items = list(components_map.get(product.id, []))
+                else:
+                    bundle_items = item_data.get('bundle_items', []) or []
 
                 # แปลงจำนวน
                 quantity = Decimal(str(item_data['quantity']))
                 if quantity <= 0: raise ValueError(f"จำนวนสินค้า {product.name} ไม่ถูกต้อง")
-                
+
                 # กำหนดราคา
                 if 'custom_price' in item_data and item_data['custom_price'] is not None:
                     unit_price = Decimal(str(item_data['custom_price']))
                 else:
                     unit_price = product.wholesale_price if price_type == 'wholesale' else product.selling_price
-                
-                # ✅ เช็คสต็อก (เฉพาะสินค้าปกติ)
-                if doc_type == 'SALE' and not product.is_bundle:
-                    current_stock = Decimal(str(product.quantity or 0))
-                    if current_stock < quantity:
-                        raise ValueError(f"สินค้า {product.name} มีสต็อกไม่พอ (เหลือ {current_stock:g} {product.unit})")
-                elif doc_type == 'SALE' and product.is_bundle:
-                    # ถ้าหน้าจอส่ง list ลูกมาใช้จากหน้าจอ ถ้าไม่มีดึงจาก DB
-                    check_items = bundle_items if bundle_items else product.bundle_components.all()
-                    
-                    for item_ref in check_items:
-                        # กรณีเป็น ID (จากหน้าจอ/values_list)
-                        if isinstance(item_ref, int): 
-                            comp = Product.objects.get(id=item_ref)
-                        else: # กรณีเป็น Object (จาก .all())
-                            comp = item_ref
-                            
-                        # คำนวณ: 1 ชุดใช้ลูก 1 ชิ้น * จำนวนชุดที่ขาย
-                        req_qty = quantity 
-                        if comp.quantity < req_qty:
-                             raise ValueError(f"สินค้าในชุด '{comp.name}' มีสต็อกไม่พอ (เหลือ {comp.quantity:g} ชิ้น)")
+
+                # ✅ สะสมจำนวนที่ต้องใช้ (ชุด: 1 ชุดใช้ลูก 1 ชิ้น * จำนวนชุดที่ขาย)
+                if doc_type == 'SALE':
+                    if product.is_bundle:
+                        for comp_id in bundle_items:
+                            bundle_children.add(comp_id)
+                            demand[comp_id] = demand.get(comp_id, Decimal('0')) + quantity
+                    else:
+                        demand[product.id] = demand.get(product.id, Decimal('0')) + quantity
+
                 # คำนวณยอด
                 line_total = quantity * unit_price
                 total_amount += line_total
-                
-                # สร้างรายการ
-                TransactionItem.objects.create(
+
+                new_items.append(TransactionItem(
                     transaction=sale,
                     product=product,
                     quantity=quantity,
@@ -106,84 +102,120 @@ def create_sale_transaction(user, items_data, price_type='retail', discount_amou
                     line_total=line_total,
                     unit_type=unit_type,
                     display_sku=display_sku,
-                    bundle_items=bundle_items # ✅ บันทึกสูตรไว้ตัดสต็อก
-                )
+                    bundle_items=bundle_items, # ✅ บันทึกสูตรไว้ตัดสต็อก
+                    price_type=price_type, # ✅ บันทึกประเภทราคา (ปลีก/ส่ง) ไว้ใช้ในรายงาน
+                ))
+
+            # ✅ เช็คสต็อกจาก map ในหน่วยความจำ (รวมทุกบรรทัดที่ใช้สินค้าเดียวกัน)
+            for product_id, required_qty in demand.items():
+                current_stock = stock_map.get(product_id)
+                if current_stock is None:
+                    raise ValueError(f"ไม่พบสินค้า ID {product_id}")
+                name, unit, qty = current_stock
+                if qty < required_qty:
+                    if product_id in bundle_children:
+                        raise ValueError(f"สินค้าในชุด '{name}' มีสต็อกไม่พอ (เหลือ {qty:g} ชิ้น)")
+                    raise ValueError(f"สินค้า {name} มีสต็อกไม่พอ (เหลือ {qty:g} {unit})")
+
+            # สร้างรายการทั้งหมดใน query เดียว
+            TransactionItem.objects.bulk_create(new_items)
             
             # 1.3 อัปเดตท้ายบิล
             sale.total_amount = total_amount
             sale.grand_total = total_amount - sale.discount_amount
-            sale.save(update_fields=['total_amount', 'grand_total'])
+            sale.set_cost_from_items(new_items)
+            sale.save(update_fields=['total_amount', 'grand_total', 'total_cost', 'gross_profit'])
             
             return sale
             
     except Exception as e:
         raise e
 
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_line_context(items_data):
+    """
+    โหลดข้อมูลที่ต้องใช้สร้างรายการขายแบบ Batch
+
+    จำนวน Query คงที่ ไม่ขึ้นกับจำนวนบรรทัดในบิล:
+    1. สินค้าทุกตัวที่อ้างถึงในบิล
+    2. ความสัมพันธ์ แม่ → ลูก ของสินค้าชุด (ตาราง M2M)
+    3. สต็อกของลูกชุด (เฉพาะที่ยังไม่ได้โหลดในข้อ 1)
+
+    Returns:
+        dict: {
+            'products':   {product_id: Product},
+            'components': {bundle_id: [child_id, ...]},
+            'stock':      {product_id: (name, unit, quantity)},
+        }
+    """
+    product_ids = {_as_int(item['product_id']) for item in items_data} - {None}
+    products = Product.objects.select_related('category').filter(id__in=product_ids, is_active=True).in_bulk()
+
+    bundle_ids = [p.id for p in products.values() if p.is_bundle]
+    components = {}
+    if bundle_ids:
+        links = Product.bundle_components.through.objects.filter(
+            from_product_id__in=bundle_ids
+        ).order_by('id').values_list('from_product_id', 'to_product_id')
+        for parent_id, child_id in links:
+            components.setdefault(parent_id, []).append(child_id)
+
+    stock = {
+        p.id: (p.name, p.unit, Decimal(str(p.quantity or 0)))
+        for p in products.values()
+    }
+    child_ids = {c for children in components.values() for c in children} - set(stock)
+    if child_ids:
+        for pid, name, qty in Product.objects.filter(id__in=child_ids).values_list('id', 'name', 'quantity'):
+            stock[pid] = (name, 'ชิ้น', Decimal(str(qty or 0)))
+
+    return {'products': products, 'components': components, 'stock': stock}
+
+
 # ===================================
 # 2. ยืนยันบิลขาย (ตัดสต็อก)
 # ===================================
-def post_sale(sale_obj):
+def post_sale(sale_obj, payment_method=None):
+    """
+    ยืนยันบิลขาย -> ตัดสต็อก + บวกยอดเข้าตารางสรุปรายวัน
+
+    payment_method: วิธีชำระเงินของบิล (หน้าขายสร้าง Payment หลังยืนยัน จึงต้องส่งมา)
+    """
     if sale_obj.status == 'POSTED': return True
     if sale_obj.status == 'CANCELLED': raise ValueError("ไม่สามารถยืนยันบิลที่ยกเลิกแล้ว")
     
     try:
         with db_transaction.atomic():
-            for item in sale_obj.items.select_related('product').all():
-                
-                # ⭐ ตัดสต็อก: ถ้ามี bundle_items ให้ตัดลูก
-                if item.bundle_items:
-                    for product_id in item.bundle_items:
-                        product = Product.objects.select_for_update().get(id=product_id)
-                        
-                        item_qty = Decimal(str(item.quantity)) # ขาย 1 คู่ ตัดลูก 1 ชิ้น
-                        current_stock = Decimal(str(product.quantity or 0))
-                        
-                        if current_stock < item_qty:
-                            raise ValueError(f"สินค้าในชุด {item.product.name} ({product.name}) สต็อกไม่พอ")
-                        
-                        product.quantity -= int(item_qty)
-                        product.save(update_fields=['quantity'])
-                        
-                        StockMovement.objects.create(
-                            product=product,
-                            movement_type='OUT',
-                            quantity=item.quantity,
-                            unit_cost=item.cost_price,
-                            balance_after=product.quantity,
-                            reference=sale_obj.doc_no,
-                            note=f"ขายชุด {item.product.sku}"
-                        )
-                else:
-                    # ตัดสต็อกสินค้าปกติ
-                    product = Product.objects.select_for_update().get(id=item.product.id)
-                    item_qty = Decimal(str(item.quantity))
-                    
-                    if product.quantity < item_qty:
-                        raise ValueError(f"สินค้า {product.name} สต็อกไม่พอ")
-                    
-                    product.quantity -= int(item_qty)
-                    product.save(update_fields=['quantity'])
-                    
-                    StockMovement.objects.create(
-                        product=item.product,
-                        movement_type='OUT',
-                        quantity=item.quantity,
-                        unit_cost=item.cost_price,
-                        balance_after=product.quantity,
-                        reference=sale_obj.doc_no,
-                        note=f"ขายปลีก"
-                    )
+            # ⭐ ตัดสต็อกทั้งบิลในรอบเดียว (ชุด → ตัดลูก, ปกติ → ตัดตัวเอง)
+            items = list(sale_obj.items.select_related('product'))
+            apply_stock_changes(
+                item_stock_changes(
+                    items,
+                    bundle_note=lambda item: f"ขายชุด {item.product.sku}",
+                    single_note=lambda item: "ขายปลีก",
+                ),
+                movement_type='OUT',
+                reference=sale_obj.doc_no,
+            )
             
             sale_obj.status = 'POSTED'
-            if hasattr(sale_obj, 'transaction_date'):
-                sale_obj.transaction_date = timezone.now()
-                sale_obj.save(update_fields=['status', 'transaction_date'])
-            else:
-                sale_obj.save(update_fields=['status'])
+            sale_obj.transaction_date = timezone.now()
+            sale_obj.set_cost_from_items(items)
+            sale_obj.save(update_fields=['status', 'transaction_date', 'total_cost', 'gross_profit'])
+
+            record_bill(sale_obj, sign=1, payment_method=payment_method, items=items)
             return True
             
     except Exception as e:
         raise ValueError(f"ยืนยันบิลไม่สำเร็จ: {str(e)}")
+
 # ===================================
 # 3. ยกเลิกบิลขาย (คืนสต็อก)
 # ===================================
@@ -202,54 +234,25 @@ def cancel_sale(sale_obj):
     
     try:
         with db_transaction.atomic():
-            for item in sale_obj.items.all():
-                qty = item.quantity
-                
-                # ✅ LOGIC ใหม่: เช็คว่ารายการนี้มีสูตร Bundle หรือไม่ (จาก Snapshot)
-                # รองรับทั้งสินค้าชุดปกติ และ สินค้าจับคู่หน้างาน
-                if item.bundle_items:
-                    # วนลูปคืนสต็อกให้ลูกๆ ตาม ID ที่บันทึกไว้
-                    for child_id in item.bundle_items:
-                        try:
-                            # ล็อคแถวเพื่อป้องกัน Race Condition
-                            child = Product.objects.select_for_update().get(id=child_id)
-                            
-                            # คืนสต็อก (IN)
-                            child.quantity = (child.quantity or 0) + int(qty)
-                            child.save(update_fields=['quantity'])
-                            
-                            # บันทึก Movement
-                            StockMovement.objects.create(
-                                product=child,
-                                movement_type='IN',
-                                quantity=qty,
-                                unit_cost=child.cost_price,
-                                balance_after=child.quantity,
-                                reference=f'CANCEL-{sale_obj.doc_no}',
-                                note=f"ยกเลิกบิลขาย {sale_obj.doc_no} (คืนชุด {item.display_sku})"
-                            )
-                        except Product.DoesNotExist:
-                            pass # ถ้าสินค้าลูกถูกลบไปแล้ว ให้ข้าม
-                            
-                # ✅ กรณีสินค้าปกติ -> คืนให้ตัวมันเอง
-                else:
-                    product = Product.objects.select_for_update().get(id=item.product.id)
-                    product.quantity = (product.quantity or 0) + int(qty)
-                    product.save(update_fields=['quantity'])
-                    
-                    StockMovement.objects.create(
-                        product=product,
-                        movement_type='IN',
-                        quantity=qty,
-                        unit_cost=item.cost_price,
-                        balance_after=product.quantity,
-                        reference=f'CANCEL-{sale_obj.doc_no}',
-                        note=f"ยกเลิกบิลขาย {sale_obj.doc_no}"
-                    )
+            # ✅ คืนสต็อกตามสูตร Bundle ที่บันทึกไว้ (Snapshot) หรือคืนให้ตัวมันเอง
+            # ลูกที่ถูกลบไปแล้วจะถูกข้าม
+            doc_no = sale_obj.doc_no
+            apply_stock_changes(
+                item_stock_changes(
+                    sale_obj.items.all(),
+                    bundle_note=lambda item: f"ยกเลิกบิลขาย {doc_no} (คืนชุด {item.display_sku})",
+                    single_note=lambda item: f"ยกเลิกบิลขาย {doc_no}",
+                    unit_cost_from_item=False,
+                ),
+                movement_type='IN',
+                reference=f'CANCEL-{doc_no}',
+                skip_missing=True,
+            )
             
             # เปลี่ยนสถานะบิล
             sale_obj.status = 'CANCELLED'
             sale_obj.save(update_fields=['status'])
+            record_bill(sale_obj, sign=-1)
             
             # ยกเลิก Payment (ถ้ามี)
             if hasattr(sale_obj, 'payment') and sale_obj.payment:
@@ -0,0 +1,325 @@
+"""
+Sales Summary Service: ตารางสรุปยอดขายรายวัน (DailySalesSummary)
+
+- post_sale / post_return บวกยอดเข้า, cancel_sale / cancel_return หักยอดออก
+  → เรียกภายใน DB Transaction เดียวกับการตัด/คืนสต็อก (Rollback พร้อมกัน)
+- Key: (วันที่ตาม TIME_ZONE, พนักงาน, ประเภทเอกสาร, วิธีชำระเงิน)
+- ProductDailySales: ยอดขาย/รับคืนต่อสินค้าต่อวัน อัปเดตในจังหวะเดียวกัน
+- รายงานช่วงยาวอ่านจากตารางนี้ → ทำงานตามจำนวนวัน ไม่ใช่จำนวนรายการขาย
+- rebuild_sales_summary() สร้างใหม่จากบิล POSTED ทั้งหมด (ใช้ตอนติดตั้ง/ข้อมูลเพี้ยน)
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, Count, F, Q, Value, Case, When, OuterRef, Subquery, ExpressionWrapper, DecimalField
+from django.db.models.functions import TruncDate, Coalesce
+from django.utils import timezone
+
+from products.models import DailySalesSummary, ProductDailySales, Transaction, TransactionItem
+
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+SUMMARY_FIELDS = (
+    'bill_count', 'line_count', 'gross_amount', 'discount_amount',
+    'grand_total', 'cost_amount', 'item_qty',
+)
+
+
+# ===================================
+# 1. อัปเดตยอดตอน Post / Cancel
+# ===================================
+def _bill_payment_method(txn, payment_method=None):
+    if payment_method is not None:
+        return payment_method or ''
+    payment = getattr(txn, 'payment', None)
+    return payment.method if payment else ''
+
+
+def _item_totals(items):
+    """จำนวนรายการ / ต้นทุน / จำนวนชิ้น ของบิล"""
+    line_count = 0
+    cost = Decimal('0')
+    qty = Decimal('0')
+    for item in items:
+        line_count += 1
+        cost += item.quantity * item.cost_price
+        qty += item.quantity
+    return line_count, cost, qty
+
+
+def _product_totals(items):
+    """{product_id: [จำนวน, ยอดเงิน, ต้นทุน]} รวมทุกบรรทัดของสินค้าเดียวกัน"""
+    totals = {}
+    for item in items:
+        row = totals.setdefault(item.product_id, [Decimal('0'), Decimal('0'), Decimal('0')])
+        row[0] += item.quantity
+        row[1] += item.line_total
+        row[2] += item.quantity * item.cost_price
+    return totals
+
+
+def _record_product_lines(txn, day, sign, items):
+    """บวก/หัก ยอดรายสินค้าเข้า ProductDailySales (ขาย → qty/sales/cost, รับคืน → return_*)"""
+    totals = _product_totals(items)
+    if not totals:
+        return
+
+    if txn.doc_type == 'RETURN':
+        qty_field, amount_field, cost_field = 'return_qty', 'return_amount', 'return_cost'
+    else:
+        qty_field, amount_field, cost_field = 'qty', 'sales_amount', 'cost_amount'
+
+    # สร้างแถวที่ยังไม่มีในรอบเดียว (แถวที่มีอยู่แล้วถูกข้าม)
+    ProductDailySales.objects.bulk_create(
+        [ProductDailySales(product_id=product_id, sales_date=day) for product_id in totals],
+        ignore_conflicts=True,
+    )
+
+    # ทุกสินค้าในบิลด้วย UPDATE เดียว (CASE ตาม product_id)
+    def delta(position):
+        return Case(
+            *[When(product_id=product_id, then=Value(sign * values[position])) for product_id, values in totals.items()],
+            default=Value(Decimal('0')),
+            output_field=MONEY,
+        )
+
+    ProductDailySales.objects.filter(product_id__in=totals, sales_date=day).update(**{
+        qty_field: F(qty_field) + delta(0),
+        amount_field: F(amount_field) + delta(1),
+        cost_field: F(cost_field) + delta(2),
+    })
+
+
+def record_bill(txn, sign=1, payment_method=None, items=None):
+    """
+    บวก (sign=1) หรือหัก (sign=-1) ยอดของบิลเข้าตารางสรุปรายวัน และยอดรายสินค้ารายวัน
+
+    ต้องเรียกหลังตั้ง transaction_date ของบิลแล้ว และอยู่ใน transaction.atomic()
+
+    Args:
+        txn: Transaction (SALE / RETURN)
+        sign: 1 = Post, -1 = Cancel
+        payment_method: วิธีชำระเงิน (default: อ่านจาก txn.payment)
+        items: รายการสินค้าที่โหลดไว้แล้ว (default: โหลดจาก DB)
+    """
+    if items is None:
+        items = txn.items.only('product_id', 'quantity', 'cost_price', 'line_total')
+    items = list(items)
+
+    line_count, cost, qty = _item_totals(items)
+    day = timezone.localdate(txn.transaction_date)
+    key = {
+        'summary_date': day,
+        'created_by_id': txn.created_by_id,
+        'doc_type': txn.doc_type,
+        'payment_method': _bill_payment_method(txn, payment_method),
+    }
+
+    # สร้างแถวถ้ายังไม่มี (มีอยู่แล้ว/เครื่องอื่นสร้างพร้อมกัน → ข้าม) แล้ว UPDATE ด้วย Key
+    # ไม่อ่านแถวกลับมา: MySQL REPEATABLE READ จะเห็น Snapshot เก่าที่ยังไม่มีแถวของเครื่องอื่น
+    DailySalesSummary.objects.bulk_create([DailySalesSummary(**key)], ignore_conflicts=True)
+    DailySalesSummary.objects.filter(**key).update(
+        bill_count=F('bill_count') + sign,
+        line_count=F('line_count') + sign * line_count,
+        gross_amount=F('gross_amount') + sign * txn.total_amount,
+        discount_amount=F('discount_amount') + sign * txn.discount_amount,
+        grand_total=F('grand_total') + sign * txn.grand_total,
+        cost_amount=F('cost_amount') + sign * cost,
+        item_qty=F('item_qty') + sign * qty,
+        updated_at=timezone.now(),
+    )
+
+    _record_product_lines(txn, day, sign, items)
+
+
+# ===================================
+# 2. สร้างตารางสรุปใหม่ทั้งหมด
+# ===================================
+def rebuild_sales_summary(batch_size=1000):
+    """
+    ล้างและคำนวณตารางสรุปใหม่จากบิล POSTED ทั้งหมด (2 Query + Bulk Insert)
+
+    Returns:
+        int: จำนวนแถวที่สร้าง
+    """
+    with transaction.atomic():
+        # ล็อคตารางสรุปก่อนอ่านบิล → บิลที่ Post ระหว่างนี้รอจน Rebuild เสร็จ แล้วค่อยบวกยอดของตัวเอง
+        list(DailySalesSummary.objects.select_for_update().values_list('id', flat=True))
+        rows = _summary_rows_from_bills()
+        DailySalesSummary.objects.all().delete()
+        DailySalesSummary.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _summary_rows_from_bills():
+    """แถว DailySalesSummary ที่คำนวณจากบิล POSTED ทั้งหมด (2 Query)"""
+    day = TruncDate('transaction_date')
+    method = Coalesce('payment__method', Value(''))
+
+    headers = Transaction.objects.filter(
+        status='POSTED', doc_type__in=['SALE', 'RETURN'],
+    ).annotate(day=day, method=method).values(
+        'day', 'created_by_id', 'doc_type', 'method',
+    ).annotate(
+        bill_count=Count('id'),
+        gross_amount=Sum('total_amount'),
+        discount_amount=Sum('discount_amount'),
+        grand_total=Sum('grand_total'),
+    ).order_by()
+
+    lines = TransactionItem.objects.filter(
+        transaction__status='POSTED', transaction__doc_type__in=['SALE', 'RETURN'],
+    ).annotate(
+        day=TruncDate('transaction__transaction_date'),
+        method=Coalesce('transaction__payment__method', Value('')),
+    ).values(
+        'day', 'transaction__created_by_id', 'transaction__doc_type', 'method',
+    ).annotate(
+        line_count=Count('id'),
+        cost_amount=Sum(ExpressionWrapper(F('quantity') * F('cost_price'), output_field=MONEY)),
+        item_qty=Sum('quantity'),
+    ).order_by()
+
+    line_map = {
+        (row['day'], row['transaction__created_by_id'], row['transaction__doc_type'], row['method']): row
+        for row in lines
+    }
+
+    rows = []
+    for head in headers:
+        line = line_map.get((head['day'], head['created_by_id'], head['doc_type'], head['method']), {})
+        rows.append(DailySalesSummary(
+            summary_date=head['day'],
+            created_by_id=head['created_by_id'],
+            doc_type=head['doc_type'],
+            payment_method=head['method'],
+            bill_count=head['bill_count'],
+            line_count=line.get('line_count') or 0,
+            gross_amount=head['gross_amount'] or Decimal('0'),
+            discount_amount=head['discount_amount'] or Decimal('0'),
+            grand_total=head['grand_total'] or Decimal('0'),
+            cost_amount=line.get('cost_amount') or Decimal('0'),
+            item_qty=line.get('item_qty') or Decimal('0'),
+        ))
+    return rows
+
+
+def rebuild_product_daily_sales(batch_size=1000):
+    """
+    ล้างและคำนวณ ProductDailySales ใหม่จากบิล POSTED ทั้งหมด (1 Query + Bulk Insert)
+
+    Returns:
+        int: จำนวนแถวที่สร้าง
+    """
+    with transaction.atomic():
+        # ล็อคก่อนอ่าน (เหตุผลเดียวกับ rebuild_sales_summary)
+        list(ProductDailySales.objects.select_for_update().values_list('id', flat=True))
+        rows = _product_rows_from_bills()
+        ProductDailySales.objects.all().delete()
+        ProductDailySales.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _product_rows_from_bills():
+    """แถว ProductDailySales ที่คำนวณจากบิล POSTED ทั้งหมด (1 Query)"""
+    is_sale = Q(transaction__doc_type='SALE')
+    is_return = Q(transaction__doc_type='RETURN')
+    line_cost = ExpressionWrapper(F('quantity') * F('cost_price'), output_field=MONEY)
+
+    lines = TransactionItem.objects.filter(
+        transaction__status='POSTED', transaction__doc_type__in=['SALE', 'RETURN'],
+    ).annotate(day=TruncDate('transaction__transaction_date')).values('day', 'product_id').annotate(
+        qty=Sum('quantity', filter=is_sale),
+        sales_amount=Sum('line_total', filter=is_sale),
+        cost_amount=Sum(line_cost, filter=is_sale),
+        return_qty=Sum('quantity', filter=is_return),
+        return_amount=Sum('line_total', filter=is_return),
+        return_cost=Sum(line_cost, filter=is_return),
+    ).order_by()
+
+    zero = Decimal('0')
+    rows = [
+        ProductDailySales(
+            product_id=row['product_id'],
+            sales_date=row['day'],
+            qty=row['qty'] or zero,
+            sales_amount=row['sales_amount'] or zero,
+            cost_amount=row['cost_amount'] or zero,
+            return_qty=row['return_qty'] or zero,
+            return_amount=row['return_amount'] or zero,
+            return_cost=row['return_cost'] or zero,
+        )
+        for row in lines
+    ]
+    return rows
+
+
+def backfill_bill_costs():
+    """
+    คำนวณ total_cost / gross_profit ของหัวบิลทุกใบจากรายการสินค้า (UPDATE เดียว)
+    ใช้กับบิลที่สร้างก่อนมีคอลัมน์ต้นทุนบนหัวบิล
+
+    Returns:
+        int: จำนวนบิลที่อัปเดต
+    """
+    line_cost = TransactionItem.objects.filter(transaction_id=OuterRef('pk')).values('transaction_id').annotate(
+        cost=Sum(ExpressionWrapper(F('quantity') * F('cost_price'), output_field=MONEY)),
+    ).values('cost')
+    cost = Coalesce(Subquery(line_cost, output_field=MONEY), Value(Decimal('0')), output_field=MONEY)
+    signed_cost = Case(When(doc_type='RETURN', then=-cost), default=cost, output_field=MONEY)
+
+    with transaction.atomic():
+        updated = Transaction.objects.update(total_cost=signed_cost)
+        Transaction.objects.update(gross_profit=F('total_amount') - F('total_cost'))
+    return updated
+
+
+# ===================================
+# 3. อ่านยอดสำหรับรายงาน
+# ===================================
+def summary_rows(start_date, end_date, doc_type=None, user_id=None, payment_method=None):
+    """QuerySet ของแถวสรุปในช่วงวันที่ (กรองพนักงาน / ประเภท / วิธีชำระเงินได้)"""
+    qs = DailySalesSummary.objects.filter(summary_date__range=(start_date, end_date))
+    if doc_type:
+        qs = qs.filter(doc_type=doc_type)
+    if user_id:
+        qs = qs.filter(created_by_id=user_id)
+    if payment_method:
+        qs = qs.filter(payment_method=payment_method)
+    return qs
+
+
+def summarize(rows):
+    """
+    รวมยอดของ QuerySet จาก summary_rows() (1 Query)
+
+    Returns:
+        dict: ทุกช่องใน SUMMARY_FIELDS (ไม่มีค่า None)
+    """
+    totals = rows.aggregate(**{name: Sum(name) for name in SUMMARY_FIELDS})
+    return {
+        name: value if value is not None else (0 if name in ('bill_count', 'line_count') else Decimal('0'))
+        for name, value in totals.items()
+    }
+
+
+def product_sales_rows(start_date, end_date, category_id=None, search=None):
+    """
+    ยอดขายรายสินค้าในช่วงวันที่ จาก ProductDailySales (1 Query, เรียงตามจำนวนขาย)
+
+    Returns:
+        QuerySet of dict: product__* + total_qty / total_sales / total_cost
+    """
+    qs = ProductDailySales.objects.filter(sales_date__range=(start_date, end_date))
+    if category_id:
+        qs = qs.filter(product__category_id=category_id)
+    if search:
+        qs = qs.filter(Q(product__name__icontains=search) | Q(product__sku__icontains=search))
+
+    return qs.values('product_id').annotate(
+        total_qty=Sum('qty'),
+        total_sales=Sum('sales_amount'),
+        total_cost=Sum('cost_amount'),
+    ).filter(total_qty__gt=0).order_by('-total_qty')
@@ -0,0 +1,297 @@
+"""
+Search Backends: ตัวค้นหาสินค้าแบบเปลี่ยนได้ (ตั้งค่าที่ settings.PRODUCT_SEARCH_BACKEND)
+
+- 'memory' : ค้นแบบ substring จาก ProductSearchIndex ในหน่วยความจำ
+- 'fts5'   : Full-text Index ภาษาไทย (SQLite FTS5 ไฟล์แยก) ตัดคำ + จัดอันดับด้วย bm25
+             ไฟล์อยู่ที่ settings.PRODUCT_SEARCH_FTS_PATH (สร้างเองอัตโนมัติ / rebuild_search_index)
+             ไม่พบผล → ค้นแบบ substring ต่อ (เช่น เศษ SKU กลางคำ)
+
+ทุก Backend ตอบเป็น id สินค้าเรียงตามความเกี่ยวข้อง
+ส่วนข้อมูลที่แสดงบนหน้าขาย (ราคา/สต็อก/สินค้าคู่) ดึงจาก ProductSearchIndex เสมอ → ไม่ Query DB
+"""
+
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from products.models import Product
+from products.Services import search_index
+from products.Services.thai_text import segment
+
+
+class BaseSearchBackend:
+    """Interface ของตัวค้นหา"""
+
+    name = ''
+
+    def search(self, query, limit=search_index.MAX_RESULTS):
+        """คำค้นเดียว (SKU / ชื่อ / รุ่นรถ) → list ของ (product_id, match_type)"""
+        raise NotImplementedError
+
+    def filter(self, product_query=None, model_query=None, limit=50):
+        """ค้นแยกช่องสินค้า / รุ่นรถ (หน้าตรวจสต็อก) → list ของ product_id"""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """สร้าง Index ใหม่ทั้งหมด → จำนวนสินค้าที่ Index"""
+        raise NotImplementedError
+
+
+# ===================================
+# 1. Memory (substring)
+# ===================================
+class MemorySearchBackend(BaseSearchBackend):
+    name = 'memory'
+
+    def search(self, query, limit=search_index.MAX_RESULTS):
+        index = search_index.get_search_index()
+        return [(row['id'], match_type) for match_type, row in index.search(query)][:limit]
+
+    def filter(self, product_query=None, model_query=None, limit=50):
+        index = search_index.get_search_index()
+        return index.filter(product_query, model_query)[:limit]
+
+    def rebuild(self):
+        search_index.reset_search_index()
+        return len(search_index.get_search_index().entries)
+
+
+# ===================================
+# 2. SQLite FTS5 (ภาษาไทย)
+# ===================================
+FTS_TOKENIZERS = (
+    # ให้สระ/วรรณยุกต์ไทย (หมวด M) เป็นส่วนหนึ่งของคำ
+    "unicode61 remove_diacritics 0 categories 'L* N* Co M*'",
+    # SQLite รุ่นเก่าไม่มี categories
+    "unicode61 remove_diacritics 0",
+)
+
+# น้ำหนักคอลัมน์ใน bm25: product_id, sku, name, models, description
+FTS_WEIGHTS = (0.0, 10.0, 5.0, 2.0, 1.0)
+
+FTS_FIELDS = ('id', 'sku', 'name', 'compatible_models', 'description')
+
+
+def _fts_text(value):
+    return ' '.join(segment(value))
+
+
+def _fts_query(text):
+    """คำค้น → FTS5 query (ทุกคำต้องตรง, คำสุดท้ายเป็น prefix)"""
+    tokens = segment(text)
+    return ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    name = 'fts5'
+
+    def __init__(self, path=None):
+        self.path = str(path or getattr(
+            settings, 'PRODUCT_SEARCH_FTS_PATH', settings.BASE_DIR / 'search_index.sqlite3'
+        ))
+        self._lock = threading.Lock()
+        self._local = threading.local()   # Connection ต่อ Thread (ไม่เปิดใหม่ทุกครั้งที่พิมพ์)
+        self._version = None              # Version ล่าสุดที่ Process นี้ Sync แล้ว
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._local.conn = conn
+        return conn
+
+    def _create_table(self, conn):
+        conn.execute("DROP TABLE IF EXISTS product_fts")
+        for tokenizer in FTS_TOKENIZERS:
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE product_fts USING fts5("
+                    "product_id UNINDEXED, sku, name, models, description, "
+                    f"tokenize=\"{tokenizer}\")"
+                )
+                return
+            except sqlite3.OperationalError:
+                continue
+        raise RuntimeError("SQLite นี้ไม่รองรับ FTS5")
+
+    def _meta(self, conn, key):
+        row = conn.execute("SELECT value FROM search_meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else float(row[0])
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _rows(self, queryset):
+        for row in queryset.values_list(*FTS_FIELDS):
+            pid, sku, name, models, description = row
+            yield (pid, _fts_text(sku), _fts_text(name), _fts_text(models), _fts_text(description))
+
+    def _rebuild(self, conn, version):
+        self._create_table(conn)
+        products = Product.objects.filter(is_active=True).order_by('id')
+        conn.executemany(
+            "INSERT INTO product_fts (product_id, sku, name, models, description) VALUES (?, ?, ?, ?, ?)",
+            self._rows(products),
+        )
+        self._set_meta(conn, 'version', version)
+        self._set_meta(conn, 'built_at', time.time())
+        self._version = version
+        return conn.execute("SELECT count(*) FROM product_fts").fetchone()[0]
+
+    def _sync(self, conn):
+        """
+        ตาม Version ของ search_index → อัปเดตเฉพาะสินค้าที่เปลี่ยน
+
+        ไฟล์ใช้ร่วมกันทุก Process → จำ Version ที่ Sync แล้วไว้ต่อ Process
+        (Version ในไฟล์ใช้แค่เป็นจุดเริ่มตอนเปิด Process และไม่ถอยหลัง)
+        Version ใน Cache น้อยกว่าที่ Sync แล้ว = ตัวนับเริ่มใหม่ (Cache ถูกล้าง) → สร้างใหม่
+        ไฟล์เก่ากว่า PRODUCT_SEARCH_INDEX_TTL → สร้างใหม่
+        """
+        version = search_index.current_version()
+        built_at = self._meta(conn, 'built_at')
+        if built_at is None or time.time() - built_at > search_index._index_ttl():
+            with conn:
+                self._rebuild(conn, version)
+            return
+
+        local = self._version
+        if local is None:
+            meta_version = self._meta(conn, 'version')
+            local = None if meta_version is None else int(meta_version)
+        if local is None or local == version:
+            self._version = version
+            return
+
+        # ตัวนับถอยหลัง → ไม่รู้ว่าอะไรเปลี่ยนบ้าง ต้องสร้างใหม่ทั้งหมด
+        changed = search_index.changed_product_ids(local, version) if local < version else None
+        with conn:
+            if changed is None:
+                self._rebuild(conn, version)
+                return
+            conn.executemany("DELETE FROM product_fts WHERE product_id = ?", [(pid,) for pid in changed])
+            conn.executemany(
+                "INSERT INTO product_fts (product_id, sku, name, models, description) VALUES (?, ?, ?, ?, ?)",
+                self._rows(Product.objects.filter(id__in=changed, is_active=True)),
+            )
+            meta_version = self._meta(conn, 'version')
+            self._set_meta(conn, 'version', max(version, int(meta_version or 0)))
+        self._version = version
+
+    def _match(self, match, limit):
+        with self._lock:
+            conn = self._connect()
+            try:
+                self._sync(conn)
+                rows = conn.execute(
+                    "SELECT product_id FROM product_fts WHERE product_fts MATCH ? "
+                    f"ORDER BY bm25(product_fts, {', '.join(map(str, FTS_WEIGHTS))}) LIMIT ?",
+                    (match, limit),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                # คำค้นที่ FTS5 อ่านไม่ได้ → ไม่พบ
+                return []
+        return [row[0] for row in rows]
+
+    def search(self, query, limit=search_index.MAX_RESULTS):
+        match = _fts_query(query)
+        if not match:
+            return []
+        index = search_index.get_search_index()
+        ids = [pid for pid in self._match(match, limit * 2) if pid in index.entries]
+        if not ids:
+            # FTS ตรงเฉพาะต้นคำ → เศษ SKU กลางคำ ฯลฯ ค้นแบบ substring ต่อ
+            return MemorySearchBackend().search(query, limit)
+
+        # SKU ตรงขึ้นก่อนเสมอ ที่เหลือตามอันดับ bm25
+        results = [(pid, index.match_type(pid, query)) for pid in ids]
+        results.sort(key=lambda r: r[1] != 'exact_sku')
+        return results[:limit]
+
+    def filter(self, product_query=None, model_query=None, limit=50):
+        parts = []
+        if product_query and _fts_query(product_query):
+            parts.append('{sku name description} : (%s)' % _fts_query(product_query))
+        if model_query and _fts_query(model_query):
+            parts.append('models : (%s)' % _fts_query(model_query))
+        if not parts:
+            return []
+        return self._match(' AND '.join(parts), limit) or MemorySearchBackend().filter(product_query, model_query, limit)
+
+    def rebuild(self):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return self._rebuild(conn, search_index.current_version())
+
+
+# ===================================
+# เลือก Backend
+# ===================================
+SEARCH_BACKENDS = {
+    'memory': MemorySearchBackend,
+    'fts5': SQLiteFTSSearchBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend(name=None):
+    """
+    คืน Backend ตามชื่อ หรือตาม settings.PRODUCT_SEARCH_BACKEND (default: memory)
+    รองรับ dotted path ของคลาสที่สืบทอด BaseSearchBackend
+    """
+    global _backend
+
+    if name is not None:
+        return _load_backend(name)
+
+    with _backend_lock:
+        if _backend is None:
+            _backend = _load_backend(getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'memory'))
+        return _backend
+
+
+def _load_backend(name):
+    backend_class = SEARCH_BACKENDS.get(name)
+    if backend_class is None:
+        backend_class = import_string(name)
+    return backend_class()
+
+
+def search_sale_products(query):
+    """
+    ค้นหาสินค้าสำหรับหน้าขาย (รูปแบบเดียวกับ search_products_ajax)
+
+    Returns:
+        list ของ dict พร้อมส่งเป็น JSON
+    """
+    index = search_index.get_search_index()
+    results = []
+    for pid, match_type in get_search_backend().search(query):
+        row = index.entries[pid]
+        stock_qty = index.stock_of(pid)
+        pair_products = index.siblings(row)
+        results.append({
+            'id': row['id'],
+            'sku': row['sku'],
+            'name': row['name'],
+            'category': row['category__name'] or '-',
+            'compatible_models': row['compatible_models'] or '',
+            'unit': row['unit'],
+            'cost_price': float(row['cost_price'] or 0),
+            'selling_price': float(row['selling_price'] or 0),
+            'wholesale_price': float(row['wholesale_price'] or 0),
+            'stock_units': float(stock_qty),
+            'has_stock': stock_qty > 0,
+            'match_type': match_type,
+            'bundle_type': row['bundle_type'],
+            'bundle_group': row['bundle_group'],
+            'has_pair': len(pair_products) > 0,
+            'pair_products': pair_products,
+        })
+    return results
@@ -0,0 +1,322 @@
+"""
+Product Search Index: ดัชนีค้นหาสินค้าในหน่วยความจำ (ต่อ Process)
+
+ใช้กับช่องค้นหาหน้าขาย (search_products_ajax) ที่ยิงทุกครั้งที่พิมพ์
+- โหลดสินค้าที่เปิดขายทั้งหมดครั้งเดียว แล้วตอบจากหน่วยความจำ (ไม่ Query DB ต่อการพิมพ์)
+- Trigram Index บน SKU / ชื่อ / รุ่นรถ → ได้ตัวเลือกก่อน แล้วค่อยเช็ค substring จริง
+- Map bundle_group → สินค้าคู่/ชุด (สต็อกชุดอ่านจาก available_sets)
+
+ความสดของข้อมูล:
+- Signal ของ Product (post_save / post_delete / m2m_changed) และ Stock Engine
+  เรียก mark_products_changed() → เพิ่ม Version ใน Cache + เก็บ id ที่เปลี่ยน
+- ทุก Process เทียบ Version ก่อนตอบ ถ้าไม่ตรง → โหลดเฉพาะ id ที่เปลี่ยน (หรือสร้างใหม่ทั้งหมด)
+  Version อ่านผ่าน cache_tiers.read_version → ไม่ถาม Cache ร่วมทุกตัวอักษรที่พิมพ์
+  (Process อื่นเห็นสินค้าที่เปลี่ยนภายใน SHARED_VERSION_POLL วินาที)
+- CACHES['default'] ต้องใช้ร่วมกันทุก Process (Redis หรือตาราง DatabaseCache ตาม settings)
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from products.models import Product
+from products.Services.cache_tiers import read_version, remember_version
+from products.Services.thai_text import normalize_text
+
+
+VERSION_KEY = 'product_search_index:version'
+CHANGES_KEY = 'product_search_index:changes:{}'
+CHANGES_TTL = 60 * 60
+
+# เปลี่ยนเกินจำนวนนี้ → สร้างใหม่ทั้งหมดถูกกว่าโหลดทีละ id
+MAX_INCREMENTAL_CHANGES = 500
+
+# จำนวนผลลัพธ์ต่อกลุ่ม (เหมือนลำดับเดิม: SKU ตรง → SKU คล้าย → ชื่อ → รุ่นรถ)
+MATCH_LIMITS = (
+    ('exact_sku', 5),
+    ('sku', 10),
+    ('name', 8),
+    ('car', 7),
+)
+MAX_RESULTS = 20
+
+GRAM_SIZE = 3
+
+PRODUCT_FIELDS = (
+    'id', 'sku', 'name', 'category__name', 'compatible_models', 'unit',
+    'cost_price', 'selling_price', 'wholesale_price', 'quantity', 'available_sets',
+    'is_bundle', 'bundle_type', 'bundle_group', 'is_active',
+)
+
+
+def _grams(text):
+    """Trigram ทั้งหมดของข้อความ (ข้อความสั้นกว่า 3 ตัว → ใช้ทั้งคำ)"""
+    if len(text) < GRAM_SIZE:
+        return {text} if text else set()
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _fold(value):
+    # ตัวพิมพ์เล็ก + แก้คำสะกดผิดที่พบบ่อย (ผ้าเบรค → ผ้าเบรก)
+    return normalize_text(value)
+
+
+class ProductSearchIndex:
+    """ดัชนีของสินค้าที่เปิดขาย (สร้างด้วย build(), อัปเดตด้วย refresh())"""
+
+    def __init__(self):
+        self.version = 0
+        self.built_at = 0.0
+        self.entries = {}        # id → dict ข้อมูลสินค้า
+        self.keys = {}           # id → (sku, name, models) ที่ผ่าน normalize_text
+        self.grams = {}          # trigram → set(id)
+        self.groups = {}         # bundle_group → set(id)
+
+    # ---------- สร้าง / อัปเดต ----------
+
+    def build(self):
+        rows = Product.objects.filter(is_active=True).values(*PRODUCT_FIELDS).order_by('id')
+        for row in rows:
+            self._put(row)
+        return self
+
+    def refresh(self, product_ids):
+        """โหลดใหม่เฉพาะสินค้าที่เปลี่ยน (รวมที่ถูกปิดขาย/ลบ)"""
+        ids = set(product_ids)
+        if not ids:
+            return
+        found = set()
+        for row in Product.objects.filter(id__in=ids).values(*PRODUCT_FIELDS):
+            found.add(row['id'])
+            if row['is_active']:
+                self._put(row)
+            else:
+                self._drop(row['id'])
+        for pid in ids - found:
+            self._drop(pid)
+
+    def _put(self, row):
+        pid = row['id']
+        self._drop(pid)
+        key = (_fold(row['sku']), _fold(row['name']), _fold(row['compatible_models']))
+        self.entries[pid] = row
+        self.keys[pid] = key
+        for gram in _grams(key[0]) | _grams(key[1]) | _grams(key[2]):
+            self.grams.setdefault(gram, set()).add(pid)
+        if row['bundle_group']:
+            self.groups.setdefault(row['bundle_group'], set()).add(pid)
+
+    def _drop(self, pid):
+        row = self.entries.pop(pid, None)
+        key = self.keys.pop(pid, None)
+        if row is None:
+            return
+        for gram in _grams(key[0]) | _grams(key[1]) | _grams(key[2]):
+            bucket = self.grams.get(gram)
+            if bucket is not None:
+                bucket.discard(pid)
+                if not bucket:
+                    del self.grams[gram]
+        group = self.groups.get(row['bundle_group'])
+        if group is not None:
+            group.discard(pid)
+            if not group:
+                del self.groups[row['bundle_group']]
+
+    # ---------- ค้นหา ----------
+
+    def _candidates(self, needle):
+        """id ที่อาจตรงกับคำค้น (ต้องเช็ค substring อีกรอบ)"""
+        if len(needle) < GRAM_SIZE:
+            # คำสั้น → ไล่ดูทุกตัว (ถูกกว่าเก็บ index 1-2 ตัวอักษร)
+            return self.keys.keys()
+        result = None
+        for gram in _grams(needle):
+            bucket = self.grams.get(gram)
+            if not bucket:
+                return ()
+            result = set(bucket) if result is None else result & bucket
+            if not result:
+                return ()
+        return result
+
+    def stock_of(self, pid):
+        """คงเหลือแบบเดียวกับ ProductService.get_stock_status (ชุด = available_sets)"""
+        row = self.entries[pid]
+        return float((row['available_sets'] if row['is_bundle'] else row['quantity']) or 0)
+
+    def search(self, query):
+        """
+        ค้นหาสินค้า → list ของ (match_type, row) เรียงตามลำดับความสำคัญ
+        """
+        needle = _fold(query.strip())
+        if not needle:
+            return []
+
+        buckets = {match_type: [] for match_type, _ in MATCH_LIMITS}
+        for pid in sorted(self._candidates(needle)):
+            sku, name, models = self.keys[pid]
+            if sku == needle:
+                buckets['exact_sku'].append(pid)
+            elif needle in sku:
+                buckets['sku'].append(pid)
+            elif needle in name:
+                buckets['name'].append(pid)
+            elif needle in models:
+                buckets['car'].append(pid)
+
+        results = []
+        for match_type, limit in MATCH_LIMITS:
+            results.extend((match_type, self.entries[pid]) for pid in buckets[match_type][:limit])
+        return results[:MAX_RESULTS]
+
+    def match_type(self, pid, query):
+        """ประเภทการตรงของสินค้ากับคำค้น (ใช้จัดกลุ่มผลจาก Backend อื่น)"""
+        needle = _fold(query.strip())
+        sku, name, models = self.keys[pid]
+        if sku == needle:
+            return 'exact_sku'
+        if needle in sku:
+            return 'sku'
+        if needle in models and needle not in name:
+            return 'car'
+        return 'name'
+
+    def filter(self, query=None, model_query=None):
+        """
+        id สินค้าที่ SKU/ชื่อ มี query และรุ่นรถมี model_query (เรียงตาม id)
+        """
+        ids = None
+        if query:
+            needle = _fold(query.strip())
+            ids = [
+                pid for pid in sorted(self._candidates(needle))
+                if needle in self.keys[pid][0] or needle in self.keys[pid][1]
+            ]
+        if model_query:
+            needle = _fold(model_query.strip())
+            pool = ids if ids is not None else sorted(self._candidates(needle))
+            ids = [pid for pid in pool if needle in self.keys[pid][2]]
+        return ids or []
+
+    def siblings(self, row):
+        """สินค้าคู่/ชุดใน bundle_group เดียวกัน (ไม่รวมตัวเอง)"""
+        if not row['bundle_group']:
+            return []
+        return [
+            {
+                'id': sibling['id'],
+                'sku': sibling['sku'],
+                'name': sibling['name'],
+                'quantity': sibling['quantity'],
+                'selling_price': sibling['selling_price'],
+            }
+            for sibling in (
+                self.entries[pid]
+                for pid in sorted(self.groups.get(row['bundle_group'], ()))
+                if pid != row['id']
+            )
+        ]
+
+
+# ===================================
+# Process-local instance
+# ===================================
+_index = None
+_lock = threading.Lock()
+
+
+def _index_ttl():
+    return getattr(settings, 'PRODUCT_SEARCH_INDEX_TTL', 15 * 60)
+
+
+def changed_product_ids(local_version, current_version):
+    """รวม id ที่เปลี่ยนระหว่าง Version (None = ต้องสร้างใหม่ทั้งหมด)"""
+    if current_version - local_version > MAX_INCREMENTAL_CHANGES:
+        return None
+    keys = [CHANGES_KEY.format(v) for v in range(local_version + 1, current_version + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return None
+    ids = set()
+    for changed in found.values():
+        ids.update(changed)
+    if len(ids) > MAX_INCREMENTAL_CHANGES:
+        return None
+    return ids
+
+
+def current_version():
+    """Version ล่าสุดของข้อมูลสินค้า (ใช้ร่วมกับ Backend อื่นที่ต้อง Sync)"""
+    return read_version(VERSION_KEY, 0)
+
+
+def get_search_index():
+    """
+    คืน Index ที่สดแล้ว (สร้างครั้งแรกตอนถูกเรียก)
+    ถ้าไม่มีอะไรเปลี่ยน → ไม่ Query DB เลย (Version จาก Cache ร่วมอ่านไม่เกินทุก SHARED_VERSION_POLL วินาที)
+    """
+    global _index
+
+    with _lock:
+        version = current_version()
+        index = _index
+
+        expired = index is None or time.monotonic() - index.built_at > _index_ttl()
+        if not expired and version != index.version:
+            changed = None
+            if version > index.version:
+                changed = changed_product_ids(index.version, version)
+            if changed is None:
+                expired = True
+            else:
+                index.refresh(changed)
+                index.version = version
+
+        if expired:
+            index = ProductSearchIndex().build()
+            index.version = version
+            index.built_at = time.monotonic()
+            _index = index
+
+        return index
+
+
+def mark_products_changed(product_ids):
+    """
+    แจ้งว่าสินค้าเปลี่ยน → ทุก Process จะโหลดเฉพาะ id เหล่านี้ใหม่
+    (ประกาศหลัง Commit เพื่อไม่ให้ Process อื่นอ่านข้อมูลที่ยังไม่ Commit)
+    """
+    ids = sorted({int(pid) for pid in product_ids if pid is not None})
+    if not ids:
+        return
+
+    def publish():
+        # incr ของ DatabaseCache ไม่ Atomic (get แล้ว set) → สอง Process อาจได้ Version เดียวกัน
+        # จองช่อง CHANGES ด้วย add() ถ้ามีคนจองไปแล้วให้ขยับ Version ต่อ (ไม่เขียนทับ id ของอีกฝั่ง)
+        while True:
+            try:
+                version = cache.incr(VERSION_KEY)
+                # incr ของ DatabaseCache/LocMem เขียนกลับด้วย Timeout ปกติ (300 วิ) → ตั้งกลับเป็นไม่หมดอายุ
+                # ไม่งั้นตัวนับหายแล้วเริ่มที่ 1 ใหม่ → Index ทุก Process ต้องสร้างใหม่
+                cache.touch(VERSION_KEY, None)
+            except ValueError:
+                # ยังไม่มี key / หายระหว่างทาง (Cache ถูกล้าง) → เริ่มที่ 1
+                cache.set(VERSION_KEY, 1, None)
+                version = 1
+            if cache.add(CHANGES_KEY.format(version), ids, CHANGES_TTL):
+                remember_version(VERSION_KEY, version)
+                return
+
+    transaction.on_commit(publish)
+
+
+def reset_search_index():
+    """ทิ้ง Index ของ Process นี้ (ครั้งถัดไปจะสร้างใหม่)"""
+    global _index
+    with _lock:
+        _index = None
+
@@ -0,0 +1,107 @@
+"""
+Settings Service: อ่านค่า SystemSetting ผ่าน Cache
+
+- ข้อมูล: dict ใน Process (ไม่ต้องถามใคร ถ้าเวอร์ชันยังตรง และอายุไม่เกิน LOCAL_TTL)
+- version อยู่ใน Cache ร่วม อ่านผ่าน cache_tiers.read_version (ไม่เกินทุก SHARED_VERSION_POLL วินาที)
+  → อ่านค่าตั้งปกติไม่มี Query เลย, Worker อื่นเห็นค่าใหม่ภายใน SHARED_VERSION_POLL วินาที
+- เขียน: Signal ของ SystemSetting (set / admin / save ตรง) → เปลี่ยน version หลัง Commit
+"""
+
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from products.models.system_setting import SystemSetting, SYSTEM_SETTINGS_DEFAULTS
+from products.Services.cache_tiers import read_version, remember_version
+
+
+VERSION_KEY = 'system_settings:version'
+
+# อายุสำเนาใน Process (วินาที) → โหลดจาก DB ใหม่แม้ version ไม่เปลี่ยน
+LOCAL_TTL = 60
+
+# สำเนาใน Process: {'version': ..., 'data': {key: value ที่อยู่ใน DB}, 'loaded_at': ...}
+_local = {'version': None, 'data': None, 'loaded_at': 0.0}
+
+
+def settings_version():
+    """เวอร์ชันปัจจุบันของค่าตั้ง (เปลี่ยนทุกครั้งที่มีการบันทึก) — ใช้เป็นส่วนหนึ่งของ Cache Key อื่นได้"""
+    version = read_version(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+        remember_version(VERSION_KEY, version)
+    return version
+
+
+def _stored_settings():
+    """{key: value} เฉพาะที่บันทึกใน DB (ห้ามแก้ dict ที่ได้)"""
+    version = settings_version()
+    expired = time.monotonic() - _local['loaded_at'] > LOCAL_TTL
+
+    if _local['version'] != version or _local['data'] is None or expired:
+        # เก็บเฉพาะค่าที่อยู่ใน DB (Default รวมตอนอ่าน) → แยกได้ว่า key ไหนยังไม่เคยบันทึก
+        _local['data'] = dict(SystemSetting.objects.values_list('key', 'value'))
+        _local['version'] = version
+        _local['loaded_at'] = time.monotonic()
+
+    return _local['data']
+
+
+def get_settings():
+    """
+    dict ค่าตั้งทั้งหมด (รวม Default) — ปกติไม่มี Query DB
+
+    Returns:
+        dict: สำเนา (แก้ไขได้โดยไม่กระทบ Cache)
+    """
+    result = dict(SYSTEM_SETTINGS_DEFAULTS)
+    result.update(_stored_settings())
+    return result
+
+
+def get_setting(key, default=None):
+    """เหมือน SystemSetting.get เดิม: ไม่มีใน DB → default ของผู้เรียก (ไม่ระบุ → Default ของระบบ)"""
+    stored = _stored_settings()
+    if key in stored:
+        return stored[key]
+    return default if default is not None else SYSTEM_SETTINGS_DEFAULTS.get(key, "")
+
+
+def invalidate_settings():
+    """เปลี่ยน version → ทุก Worker โหลดค่าใหม่ใน Request ถัดไป (รอ Commit ก่อน)"""
+    def bump():
+        version = uuid.uuid4().hex
+        cache.set(VERSION_KEY, version, None)
+        remember_version(VERSION_KEY, version)
+        _local['version'] = None
+    transaction.on_commit(bump)
+
+
+def save_settings(values):
+    """
+    บันทึกหลาย key ในรอบเดียว (bulk_update + bulk_create) แล้วเปลี่ยน version ครั้งเดียว
+
+    Args:
+        values: {key: value}
+    """
+    values = {key: str(value) for key, value in values.items()}
+    with transaction.atomic():
+        existing = SystemSetting.objects.select_for_update().in_bulk(list(values), field_name='key')
+        changed = []
+        for key, obj in existing.items():
+            if obj.value != values[key]:
+                obj.value = values[key]
+                changed.append(obj)
+        if changed:
+            SystemSetting.objects.bulk_update(changed, ['value'])
+
+        missing = [SystemSetting(key=key, value=value) for key, value in values.items() if key not in existing]
+        if missing:
+            SystemSetting.objects.bulk_create(missing)
+
+        if changed or missing:
+            invalidate_settings()
@@ -0,0 +1,229 @@
+"""
+Stock Service: ตัด/คืนสต็อกแบบ Set-based
+
+ใช้ร่วมกันโดย post_sale, cancel_sale, post_return, cancel_return
+- ล็อคแถวสินค้าที่เกี่ยวข้องทั้งหมดใน SELECT ... FOR UPDATE เดียว (เรียงตาม id กัน Deadlock ระหว่างเครื่องขาย)
+- รวมจำนวนต่อสินค้า (ลูกตัวเดียวกันอยู่หลายชุดในบิลเดียว)
+- อัปเดตสต็อกด้วย bulk_update และบันทึก StockMovement ด้วย bulk_create
+- bulk_update ไม่ยิง Signal → แจ้ง Search Index ให้เอง
+- คำนวณ available_sets ของชุดที่มีลูกถูกปรับสต็อก ใน Transaction เดียวกัน
+  (ชุด + ลูกทุกตัวของชุดถูกล็อคพร้อมสินค้าที่ตัด/คืนตั้งแต่แรก → ไม่มีค่าค้างถ้า Process ตายหลัง Commit)
+"""
+
+from decimal import Decimal
+from django.db import transaction
+
+from products.models import Product, StockMovement
+from products.Services.search_index import mark_products_changed
+
+
+def lock_products(product_ids):
+    """
+    ล็อคแถวสินค้าตาม id ที่ระบุ (ต้องเรียกภายใน transaction.atomic)
+
+    Args:
+        product_ids: iterable ของ product id
+
+    Returns:
+        dict: {product_id: Product} ที่ถูกล็อคแล้ว
+    """
+    ids = sorted(set(product_ids))
+    if not ids:
+        return {}
+    return {
+        p.id: p
+        for p in Product.objects.select_for_update().filter(id__in=ids).order_by('id')
+    }
+
+
+def apply_stock_changes(changes, movement_type, reference, check_stock=True, skip_missing=False):
+    """
+    ปรับสต็อกหลายรายการพร้อมกัน + บันทึก StockMovement
+
+    Args:
+        changes: list ของ dict
+            {
+                'product_id': id สินค้าที่ถูกตัด/คืนจริง,
+                'quantity':   จำนวน (Decimal),
+                'unit_cost':  ต้นทุนต่อหน่วย (None = ใช้ทุนปัจจุบันของสินค้า),
+                'note':       หมายเหตุของ Movement,
+            }
+        movement_type: 'OUT' (ตัดสต็อก) หรือ 'IN' (คืนสต็อก)
+        reference: เลขที่เอกสารอ้างอิง
+        check_stock: ตรวจสต็อกพอหรือไม่ (เฉพาะ OUT)
+        skip_missing: ข้ามสินค้าที่ถูกลบไปแล้ว แทนการ raise
+
+    Raises:
+        ValueError: สต็อกไม่พอ หรือไม่พบสินค้า
+
+    Returns:
+        dict: {product_id: Product} หลังอัปเดต
+    """
+    if not changes:
+        return {}
+
+    sign = -1 if movement_type == 'OUT' else 1
+
+    with transaction.atomic():
+        products, family = lock_with_bundles(c['product_id'] for c in changes)
+
+        # 1. รวมจำนวนต่อสินค้า
+        required = {}
+        for change in changes:
+            pid = change['product_id']
+            if pid not in products:
+                if skip_missing:
+                    continue
+                raise ValueError(f"ไม่พบสินค้า ID {pid}")
+            required[pid] = required.get(pid, Decimal('0')) + Decimal(str(change['quantity']))
+
+        # 2. ตรวจสต็อก (ทั้งบิลในครั้งเดียว)
+        if movement_type == 'OUT' and check_stock:
+            for pid, qty in required.items():
+                product = products[pid]
+                current_stock = Decimal(str(product.quantity or 0))
+                if current_stock < qty:
+                    raise ValueError(
+                        f"สินค้า {product.name} สต็อกไม่พอ (เหลือ {current_stock:g} ต้องการ {qty:g})"
+                    )
+
+        # 3. คำนวณยอดคงเหลือ + Movement (ตามลำดับรายการ)
+        movements = []
+        for change in changes:
+            product = products.get(change['product_id'])
+            if product is None:
+                continue
+            product.quantity = (product.quantity or 0) + sign * int(change['quantity'])
+            unit_cost = change.get('unit_cost')
+            movements.append(StockMovement(
+                product=product,
+                movement_type=movement_type,
+                quantity=change['quantity'],
+                unit_cost=product.cost_price if unit_cost is None else unit_cost,
+                balance_after=product.quantity,
+                reference=reference,
+                note=change.get('note', ''),
+            ))
+
+        touched = [products[pid] for pid in required]
+        Product.objects.bulk_update(touched, ['quantity'])
+        StockMovement.objects.bulk_create(movements)
+
+        # bulk_update ไม่ยิง Signal → แจ้ง Search Index + คำนวณชุดที่ขายได้เอง (แถวชุดล็อคไว้แล้ว)
+        mark_products_changed(required)
+        apply_bundle_availability(family, products)
+
+    return {p.id: p for p in touched}
+
+
+def bundle_family(component_ids=(), bundle_ids=()):
+    """
+    {ชุด: [ลูก, ...]} ของชุดใน bundle_ids + ทุกชุดที่มีสินค้าใน component_ids เป็นลูก (2 Query)
+    """
+    Link = Product.bundle_components.through
+    parent_ids = set(bundle_ids)
+    component_ids = set(component_ids)
+    if component_ids:
+        parent_ids.update(
+            Link.objects.filter(to_product_id__in=component_ids).values_list('from_product_id', flat=True)
+        )
+    family = {parent_id: [] for parent_id in parent_ids}
+    if parent_ids:
+        for parent_id, child_id in Link.objects.filter(from_product_id__in=parent_ids).values_list(
+            'from_product_id', 'to_product_id'
+        ):
+            family[parent_id].append(child_id)
+    return family
+
+
+def lock_with_bundles(product_ids):
+    """
+    ล็อคสินค้า + ชุดที่มีสินค้าเหล่านี้เป็นลูก + ลูกตัวอื่นของชุดนั้น ใน SELECT ... FOR UPDATE เดียว (เรียงตาม id)
+    → ปรับสต็อกแล้วคำนวณ available_sets ต่อได้ใน Transaction เดียวกัน โดยไม่ล็อคเพิ่มทีหลัง (ไม่ Deadlock)
+
+    Returns:
+        tuple: (locked, family) — locked = {product_id: Product}, family = {ชุด: [ลูก, ...]}
+    """
+    ids = set(product_ids)
+    family = bundle_family(component_ids=ids)
+    return lock_products(ids.union(family, *family.values())), family
+
+
+def apply_bundle_availability(family, locked):
+    """
+    คำนวณ available_sets ของชุด (= คงเหลือของลูกที่น้อยที่สุด, ไม่มีลูก = 0) จากแถวที่ล็อคไว้แล้ว
+    (ใช้ quantity ในหน่วยความจำ → เห็นสต็อกที่เพิ่งปรับใน Transaction นี้)
+
+    Returns:
+        list: ชุดที่ค่าเปลี่ยน
+    """
+    changed = []
+    for parent_id, child_ids in family.items():
+        parent = locked.get(parent_id)
+        if parent is None or not parent.is_bundle:
+            continue
+        quantities = [locked[c].quantity or 0 for c in child_ids if c in locked]
+        available = min(quantities) if quantities else Decimal('0')
+        if parent.available_sets != available:
+            parent.available_sets = available
+            changed.append(parent)
+
+    if changed:
+        Product.objects.bulk_update(changed, ['available_sets'])
+        mark_products_changed(p.id for p in changed)
+    return changed
+
+
+def refresh_bundle_availability(component_ids=(), bundle_ids=()):
+    """
+    คำนวณ available_sets ของชุดใหม่ภายใน Transaction ของผู้เรียก (Signal / นำเข้าสินค้า / แก้รายการลูก)
+    → Rollback พร้อมกัน ไม่มีช่วงที่สต็อกเปลี่ยนแล้วแต่จำนวนชุดยังค้าง
+
+    Args:
+        component_ids: id สินค้าที่สต็อกเปลี่ยน → คำนวณทุกชุดที่มีสินค้านี้เป็นลูก
+        bundle_ids: id ชุดที่ต้องคำนวณเพิ่ม (เช่น เพิ่งแก้รายการลูก)
+
+    Returns:
+        list: ชุดที่ค่าเปลี่ยน
+    """
+    with transaction.atomic():
+        family = bundle_family(component_ids, bundle_ids)
+        if not family:
+            return []
+        locked = lock_products(set(family).union(*family.values()))
+        return apply_bundle_availability(family, locked)
+
+
+def item_stock_changes(items, bundle_note, single_note, unit_cost_from_item=True):
+    """
+    แปลงรายการในบิล (TransactionItem) เป็น changes สำหรับ apply_stock_changes
+
+    - ถ้ามี bundle_items → กระจายเป็นลูกทุกตัว (1 ชุด ใช้ลูก 1 ชิ้น)
+    - ถ้าไม่มี → ตัด/คืนตัวสินค้าเอง
+
+    Args:
+        items: iterable ของ TransactionItem
+        bundle_note / single_note: ฟังก์ชันรับ item แล้วคืนข้อความหมายเหตุ
+        unit_cost_from_item: True = ใช้ cost_price ของรายการ, False = ใช้ทุนปัจจุบันของลูก (เฉพาะชุด)
+
+    Returns:
+        list ของ dict
+    """
+    changes = []
+    for item in items:
+        if item.bundle_items:
+            for product_id in item.bundle_items:
+                changes.append({
+                    'product_id': product_id,
+                    'quantity': item.quantity,
+                    'unit_cost': item.cost_price if unit_cost_from_item else None,
+                    'note': bundle_note(item),
+                })
+        else:
+            changes.append({
+                'product_id': item.product_id,
+                'quantity': item.quantity,
+                'unit_cost': item.cost_price,
+                'note': single_note(item),
+            })
+    return changes
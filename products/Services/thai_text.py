@@ -0,0 +1,85 @@
+"""
+Thai Text: เตรียมข้อความภาษาไทยสำหรับการค้นหา
+
+- normalize_text(): ตัวพิมพ์เล็ก + แก้คำที่สะกดต่างกันบ่อย (เช่น ผ้าเบรค → ผ้าเบรก)
+- segment(): ตัดคำภาษาไทย
+    * ถ้าติดตั้ง pythainlp → ตัดเป็นคำ (newmm)
+    * ถ้าไม่มี → ตัดเป็นคู่ตัวอักษร (Bigram) ซึ่งค้นเจอได้แม้ไม่มีพจนานุกรม
+  ใช้ฟังก์ชันเดียวกันทั้งตอนสร้าง Index และตอนค้นหา ผลจึงตรงกันเสมอ
+"""
+
+import re
+import unicodedata
+
+try:
+    from pythainlp.tokenize import word_tokenize
+except ImportError:  # pythainlp เป็น Optional
+    word_tokenize = None
+
+
+# คำที่พนักงานพิมพ์ผิดบ่อย → คำที่ใช้ในระบบ (เรียงคำยาวก่อนตอนแทนที่)
+SPELLING_VARIANTS = {
+    'เบรค': 'เบรก',
+    'คลัทช์': 'คลัตช์',
+    'คลัทซ์': 'คลัตช์',
+    'คลัช': 'คลัตช์',
+    'โช๊ค': 'โช้ค',
+    'โช๊ก': 'โช้ค',
+    'โช้ก': 'โช้ค',
+    'ปั้ม': 'ปั๊ม',
+    'ฟิวซ์': 'ฟิวส์',
+    'แบตเตอร์รี่': 'แบตเตอรี่',
+    'คาบู': 'คาร์บู',
+    'สปิง': 'สปริง',
+}
+
+# ตัวอักษรที่มองไม่เห็น (มักติดมาจากการ Copy)
+_INVISIBLE = dict.fromkeys(map(ord, '\u200b\u200c\u200d\ufeff'), None)
+
+_VARIANT_RE = re.compile(
+    '|'.join(re.escape(k) for k in sorted(SPELLING_VARIANTS, key=len, reverse=True))
+)
+
+# ช่วงอักษรไทย / ตัวอักษรและตัวเลขอื่น
+_TOKEN_RE = re.compile(r'[\u0e00-\u0e7f]+|[^\W_]+')
+_THAI_RE = re.compile(r'[\u0e00-\u0e7f]')
+
+
+def normalize_text(text):
+    """
+    ทำให้ข้อความอยู่ในรูปเดียวกันก่อนเปรียบเทียบ
+
+    - NFC + ตัดอักษรที่มองไม่เห็น
+    - ํ + า (นิคหิต + สระอา) → ำ
+    - ตัวพิมพ์เล็ก (casefold)
+    - แก้คำสะกดผิดที่พบบ่อย
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFC', str(text)).translate(_INVISIBLE)
+    text = text.replace('ํา', 'ำ').casefold()
+    return _VARIANT_RE.sub(lambda m: SPELLING_VARIANTS[m.group(0)], text)
+
+
+def _bigrams(run):
+    if len(run) < 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def segment(text):
+    """
+    ตัดข้อความเป็นคำสำหรับ Full-text Index
+
+    Returns:
+        list ของคำ (ผ่าน normalize_text แล้ว)
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall(normalize_text(text)):
+        if not _THAI_RE.match(run):
+            tokens.append(run)
+        elif word_tokenize is not None:
+            tokens.extend(t for t in word_tokenize(run, engine='newmm', keep_whitespace=False) if t.strip())
+        else:
+            tokens.extend(_bigrams(run))
+    return tokens
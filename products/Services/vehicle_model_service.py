@@ -0,0 +1,125 @@
+"""
+Vehicle Model Service: ผูกสินค้ากับตาราง VehicleModel
+
+- แยก Product.compatible_models (ข้อความคั่นด้วย ,) เป็นรุ่นรถ
+- เพิ่ม/ถอด M2M ด้วย bulk_create / delete ครั้งเดียว
+- ปรับ VehicleModel.product_count ด้วย F() ตามส่วนต่าง (ไม่ต้องนับใหม่ทั้งตาราง)
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from products.models import Product, VehicleModel
+
+
+def vehicle_model_key(name):
+    """ชื่อรุ่นรถ → key สำหรับค้นหา (ตัวพิมพ์เล็ก + ช่องว่างเดียว)"""
+    return ' '.join((name or '').split()).casefold()
+
+
+def split_vehicle_models(text):
+    """
+    แยกข้อความรุ่นรถ
+
+    Returns:
+        dict: {name_key: ชื่อที่แสดง} (ตัดรุ่นซ้ำในสินค้าเดียวกัน)
+    """
+    models = {}
+    for part in (text or '').split(','):
+        name = ' '.join(part.split())
+        if name:
+            models.setdefault(vehicle_model_key(name), name)
+    return models
+
+
+def _get_or_create_models(names):
+    """{name_key: name} → {name_key: VehicleModel id} (สร้างรุ่นที่ยังไม่มีในครั้งเดียว)"""
+    if not names:
+        return {}
+    ids = dict(VehicleModel.objects.filter(name_key__in=names).values_list('name_key', 'id'))
+    missing = [key for key in names if key not in ids]
+    if missing:
+        VehicleModel.objects.bulk_create(
+            [VehicleModel(name=names[key], name_key=key) for key in missing],
+            ignore_conflicts=True,
+        )
+        ids.update(VehicleModel.objects.filter(name_key__in=missing).values_list('name_key', 'id'))
+    return ids
+
+
+def _apply_links(wanted):
+    """
+    ทำให้ M2M ตรงกับ wanted = {product_id: set(vehicle_model_id)}
+
+    Returns:
+        dict: {vehicle_model_id: ส่วนต่างของจำนวนสินค้า} (เฉพาะที่เปลี่ยน)
+    """
+    Link = Product.vehicle_models.through
+    current = defaultdict(set)
+    for product_id, model_id in Link.objects.filter(product_id__in=wanted).values_list('product_id', 'vehiclemodel_id'):
+        current[product_id].add(model_id)
+
+    delta = defaultdict(int)
+    to_add = []
+    remove_filter = Q()
+    for product_id, model_ids in wanted.items():
+        added = model_ids - current[product_id]
+        removed = current[product_id] - model_ids
+        to_add.extend(Link(product_id=product_id, vehiclemodel_id=model_id) for model_id in added)
+        if removed:
+            remove_filter |= Q(product_id=product_id, vehiclemodel_id__in=removed)
+        for model_id in added:
+            delta[model_id] += 1
+        for model_id in removed:
+            delta[model_id] -= 1
+
+    if remove_filter:
+        Link.objects.filter(remove_filter).delete()
+    if to_add:
+        Link.objects.bulk_create(to_add)
+
+    # ปรับจำนวนแบบกลุ่มตามค่าส่วนต่าง (ส่วนใหญ่มีแค่ +1 / -1)
+    by_change = defaultdict(list)
+    for model_id, change in delta.items():
+        if change:
+            by_change[change].append(model_id)
+    for change, model_ids in by_change.items():
+        VehicleModel.objects.filter(id__in=model_ids).update(product_count=F('product_count') + change)
+
+    return {model_id: change for model_id, change in delta.items() if change}
+
+
+def sync_vehicle_models(products):
+    """
+    ผูกสินค้ากับ VehicleModel ตาม compatible_models ปัจจุบัน
+
+    Args:
+        products: iterable ของ Product
+
+    Returns:
+        dict: {vehicle_model_id: ส่วนต่างของจำนวนสินค้า}
+    """
+    parsed = {p.id: split_vehicle_models(p.compatible_models) for p in products if p.id}
+    if not parsed:
+        return {}
+
+    names = {}
+    for models in parsed.values():
+        for key, name in models.items():
+            names.setdefault(key, name)
+
+    with transaction.atomic():
+        ids = _get_or_create_models(names)
+        wanted = {
+            product_id: {ids[key] for key in models}
+            for product_id, models in parsed.items()
+        }
+        return _apply_links(wanted)
+
+
+def unlink_vehicle_models(product_ids):
+    """ถอดรุ่นรถทั้งหมดของสินค้า (ก่อนลบจริง) → ลดจำนวนสินค้าของรุ่น"""
+    with transaction.atomic():
+        return _apply_links({product_id: set() for product_id in product_ids})
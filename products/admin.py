@@ -5,7 +5,9 @@ from products.models import (
     Transaction, TransactionItem,
     Payment,
     Purchase, PurchaseItem,
-    SystemSetting
+    SystemSetting,
+    VehicleModel,
+    Job,
 )
 
 
@@ -390,4 +392,27 @@ class SystemSettingAdmin(admin.ModelAdmin):
         ('Setting', {
             'fields': ('key', 'value')
         }),
-    )
\ No newline at end of file
+    )
+
+
+# ===========================
+# 11. VehicleModel Admin
+# ===========================
+@admin.register(VehicleModel)
+class VehicleModelAdmin(admin.ModelAdmin):
+    list_display = ['name', 'name_key', 'product_count']
+    search_fields = ['name', 'name_key']
+    ordering = ['-product_count', 'name']
+    readonly_fields = ['name_key', 'product_count', 'created_at']
+
+
+# ===========================
+# 12. Job Admin (งานเบื้องหลัง)
+# ===========================
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress_done', 'progress_total', 'attempts', 'max_attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['kind', 'message']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'updated_at', 'finished_at', 'locked_by', 'locked_at']
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
-    verbose_name = 'ระบบจัดการสินค้า'  # (Optional) ชื่อที่จะโชว์ใน Admin
\ No newline at end of file
+    verbose_name = 'ระบบจัดการสินค้า'  # (Optional) ชื่อที่จะโชว์ใน Admin
+
+    def ready(self):
+        # ลงทะเบียน Signals (Search Index)
+        from products import signals  # noqa: F401
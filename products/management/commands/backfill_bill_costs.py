@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.Services.sales_summary_service import backfill_bill_costs
+
+
+class Command(BaseCommand):
+    help = 'คำนวณต้นทุนรวมและกำไรขั้นต้นบนหัวบิล (total_cost / gross_profit) จากรายการสินค้า'
+
+    def handle(self, *args, **options):
+        self.stdout.write("⏳ กำลังคำนวณต้นทุน/กำไรของบิล...")
+
+        count = backfill_bill_costs()
+
+        self.stdout.write(self.style.SUCCESS(f'✨ เสร็จสิ้น! อัปเดต {count:,} บิล'))
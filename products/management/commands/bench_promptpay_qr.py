@@ -0,0 +1,65 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.Services.payment_service import (
+    _render_qr, _cached_qr, crc16_ccitt_bitwise, promptpay_qr_image,
+)
+
+
+def _legacy_qr(identifier, amount):
+    """เส้นทางเดิม: สร้าง Payload ใหม่ทั้งหมด + CRC ทีละ bit + วาดรูปทุกครั้ง"""
+    payload = "000201010212"
+    merchant_id = "0016A000000677010111"
+    formatted_id = f"0066{identifier[1:]}"
+    merchant_id += f"01{len(formatted_id):02d}{formatted_id}"
+    payload += f"29{len(merchant_id):02d}{merchant_id}53037645802TH"
+    amount_str = f"{float(amount):.2f}"
+    payload += f"54{len(amount_str):02d}{amount_str}6304"
+    payload += f"{crc16_ccitt_bitwise(payload.encode()):04X}"
+    return _render_qr(payload)
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    p99_index = max(0, int(round(len(ordered) * 0.99)) - 1)
+    return statistics.median(ordered) * 1000, ordered[p99_index] * 1000
+
+
+class Command(BaseCommand):
+    help = 'วัดเวลาสร้าง QR PromptPay (p50 / p99) เทียบเส้นทางเดิมกับแบบ Cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500, help='จำนวนครั้งที่วัด (default: 500)')
+        parser.add_argument('--amounts', type=int, default=50, help='จำนวนยอดเงินที่ต่างกัน (default: 50)')
+
+    def handle(self, *args, **options):
+        identifier = getattr(settings, 'PROMPTPAY_PHONE', '0834755649')
+        rng = random.Random(42)
+        amounts = [f"{rng.randint(20, 5000)}.{rng.randint(0, 99):02d}" for _ in range(options['amounts'])]
+        sequence = [rng.choice(amounts) for _ in range(options['iterations'])]
+
+        def measure(build):
+            samples = []
+            for amount in sequence:
+                started = time.perf_counter()
+                build(amount)
+                samples.append(time.perf_counter() - started)
+            return _percentiles(samples)
+
+        _cached_qr.cache_clear()
+        rows = [
+            ('เดิม (ไม่มี Cache)', measure(lambda amount: _legacy_qr(identifier, amount))),
+            ('ใหม่ PNG (LRU Cache)', measure(lambda amount: promptpay_qr_image(identifier, amount))),
+            ('ใหม่ SVG (LRU Cache)', measure(lambda amount: promptpay_qr_image(identifier, amount, 'svg'))),
+        ]
+
+        self.stdout.write(
+            f"QR PromptPay: {options['iterations']:,} ครั้ง, ยอดเงินต่างกัน {len(amounts):,} ค่า"
+        )
+        for label, (p50, p99) in rows:
+            self.stdout.write(f"  {label:<22} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+        self.stdout.write(self.style.SUCCESS(f"✨ Cache: {_cached_qr.cache_info()}"))
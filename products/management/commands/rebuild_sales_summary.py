@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.Services.sales_summary_service import rebuild_sales_summary, rebuild_product_daily_sales
+
+
+class Command(BaseCommand):
+    help = 'สร้างตารางสรุปยอดขายรายวัน (DailySalesSummary, ProductDailySales) ใหม่จากบิลที่ยืนยันแล้วทั้งหมด'
+
+    def handle(self, *args, **options):
+        self.stdout.write("⏳ กำลังสรุปยอดขายรายวัน...")
+        started = time.perf_counter()
+        count = rebuild_sales_summary()
+        product_count = rebuild_product_daily_sales()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✨ เสร็จสิ้น! สรุปรายวัน {count:,} แถว, รายสินค้า {product_count:,} แถว ใช้เวลา {elapsed:.2f} วินาที'
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.Services.search_backends import SEARCH_BACKENDS, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'สร้าง Index ค้นหาสินค้าใหม่ทั้งหมด (ตัดคำไทย + Full-text)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend',
+            choices=sorted(SEARCH_BACKENDS),
+            help='Backend ที่ต้องการสร้าง (default: ตาม PRODUCT_SEARCH_BACKEND)',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options.get('backend'))
+
+        self.stdout.write(f"⏳ กำลังสร้าง Index ค้นหาสินค้า ({backend.name})...")
+        started = time.perf_counter()
+        count = backend.rebuild()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✨ สร้าง Index เสร็จสิ้น: {count:,} สินค้า ใช้เวลา {elapsed:.2f} วินาที'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from products.Services.popular_models_service import recount_vehicle_models
+
+
+class Command(BaseCommand):
+    help = 'นับจำนวนสินค้าของรุ่นรถใหม่ทั้งหมด และโหลดอันดับรุ่นรถยอดนิยมลง Cache'
+
+    def handle(self, *args, **options):
+        self.stdout.write("⏳ กำลังนับจำนวนสินค้าต่อรุ่นรถ...")
+
+        total, changed = recount_vehicle_models()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✨ เสร็จสิ้น! รุ่นรถทั้งหมด {total:,} รุ่น (แก้จำนวน {changed:,} รุ่น)'
+        ))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from products.Services.job_service import (
+    STALE_CHECK_SECONDS, claim_job, requeue_stale_jobs, run_job, worker_name,
+)
+
+
+class Command(BaseCommand):
+    help = 'ทำงานเบื้องหลังจากตาราง Job (นำเข้าสินค้า / จับคู่ชุด / อัพเดทสต็อก ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sleep', type=float, default=2.0, help='วินาทีที่รอเมื่อไม่มีงาน')
+        parser.add_argument('--once', action='store_true', help='ทำงานที่ค้างให้หมดแล้วจบ (ใช้กับ Cron)')
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.stdout.write(self.style.SUCCESS(f"🚀 Worker {worker} เริ่มทำงาน"))
+
+        next_check = 0
+        try:
+            while True:
+                close_old_connections()
+
+                # คืนงานของ Worker ที่ตายเป็นระยะ (ไม่ใช่แค่ตอนเริ่ม) → งานไม่ค้าง RUNNING จน Worker ถูก Restart
+                if time.monotonic() >= next_check:
+                    self.requeue_stale()
+                    next_check = time.monotonic() + STALE_CHECK_SECONDS
+
+                job = claim_job(worker)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                self.stdout.write(f"⏳ Job #{job.id} {job.kind} (ครั้งที่ {job.attempts}/{job.max_attempts})")
+                status = run_job(job)
+                if status == 'DONE':
+                    self.stdout.write(self.style.SUCCESS(f"✅ Job #{job.id} เสร็จสิ้น"))
+                elif status == 'PENDING':
+                    self.stdout.write(self.style.WARNING(f"⚠️ Job #{job.id} ล้มเหลว จะลองใหม่"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"❌ Job #{job.id} ล้มเหลว"))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"👋 Worker {worker} หยุดทำงาน"))
+
+    def requeue_stale(self):
+        requeued, failed = requeue_stale_jobs()
+        if requeued or failed:
+            self.stdout.write(self.style.WARNING(f"♻️ คืนงานที่ค้างเข้าคิว {requeued} งาน, ปิดเป็น FAILED {failed} งาน"))
@@ -1,11 +1,21 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from products.models import Product
+from products.Services.job_service import enqueue_job
+from products.Services.stock_service import refresh_bundle_availability
 
 class Command(BaseCommand):
     help = 'จับคู่สินค้า Bundle จาก bundle_group ลง bundle_components'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--background', action='store_true', help='ส่งเข้าคิวให้ run_worker ทำแทน')
+
     def handle(self, *args, **kwargs):
+        if kwargs.get('background'):
+            job = enqueue_job('management_command', {'command': 'sync_bundles'}, max_attempts=1)
+            self.stdout.write(self.style.SUCCESS(f"📥 ส่งเข้าคิวแล้ว (Job #{job.id}) — รัน `python manage.py run_worker` เพื่อประมวลผล"))
+            return
+
         self.stdout.write("⏳ กำลังเริ่มตรวจสอบและจับคู่สินค้า...")
 
         # 1. หาสินค้าที่เป็นตัวแม่ (เฉพาะประเภทชุด L-R หรือ F-R เท่านั้น)
@@ -39,6 +49,9 @@ class Command(BaseCommand):
                     # 4. บังคับเปิด is_bundle เป็น True
                     parent.is_bundle = True
                     parent.save(update_fields=['is_bundle'])
+
+                    # 5. จำนวนชุดที่ขายได้ (เพิ่งเปิด is_bundle → Signal ของ M2M ข้ามไปแล้ว)
+                    refresh_bundle_availability(bundle_ids=[parent.id])
                 
                 names = ", ".join([f"{c.sku}({c.bundle_type})" for c in children])
                 self.stdout.write(self.style.SUCCESS(f'✅ [{group}] จับคู่แม่ {parent.sku} -> ลูก: [{names}]'))
@@ -1,12 +1,21 @@
 from django.core.management.base import BaseCommand
 from django.db.models import Sum
 from products.models import Product, StockMovement
+from products.Services.job_service import enqueue_job
 
 
 class Command(BaseCommand):
     help = 'อัพเดทสต็อกสินค้าจาก StockMovement'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--background', action='store_true', help='ส่งเข้าคิวให้ run_worker ทำแทน')
+
     def handle(self, *args, **options):
+        if options.get('background'):
+            job = enqueue_job('management_command', {'command': 'update_stock'}, max_attempts=1)
+            self.stdout.write(self.style.SUCCESS(f"📥 ส่งเข้าคิวแล้ว (Job #{job.id}) — รัน `python manage.py run_worker` เพื่อประมวลผล"))
+            return
+
         self.stdout.write("=" * 60)
         self.stdout.write(self.style.WARNING("🔄 กำลังอัพเดทสต็อกสินค้า..."))
         self.stdout.write("=" * 60)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0027_alter_category_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10, verbose_name='Prefix เอกสาร')),
+                ('seq_date', models.DateField(verbose_name='วันที่')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='เลขล่าสุดที่จองแล้ว')),
+            ],
+            options={
+                'db_table': 'document_sequences',
+                'unique_together': {('prefix', 'seq_date')},
+            },
+        ),
+    ]
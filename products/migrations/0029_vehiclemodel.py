@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0028_documentsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='รุ่นรถ')),
+                ('name_key', models.CharField(max_length=255, unique=True, verbose_name='รุ่นรถ (สำหรับค้นหา)')),
+                ('product_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='จำนวนสินค้า')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Vehicle Model',
+                'verbose_name_plural': 'Vehicle Models',
+                'db_table': 'vehicle_models',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='vehicle_models',
+            field=models.ManyToManyField(blank=True, related_name='products', to='products.vehiclemodel', verbose_name='รุ่นรถ (ตาราง)'),
+        ),
+    ]
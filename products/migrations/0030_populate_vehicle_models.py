@@ -0,0 +1,52 @@
+# แยก Product.compatible_models (ข้อความคั่นด้วย ,) ลงตาราง VehicleModel + M2M
+
+from django.db import migrations
+
+
+def _split_models(text):
+    seen = {}
+    for part in (text or '').split(','):
+        name = ' '.join(part.split())
+        if name:
+            seen.setdefault(name.casefold(), name)
+    return seen
+
+
+def populate_vehicle_models(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    VehicleModel = apps.get_model('products', 'VehicleModel')
+    Link = Product.vehicle_models.through
+
+    links = []
+    names = {}
+    counts = {}
+    for product_id, text in Product.objects.exclude(compatible_models='').values_list('id', 'compatible_models'):
+        for key, name in _split_models(text).items():
+            names.setdefault(key, name)
+            counts[key] = counts.get(key, 0) + 1
+            links.append((product_id, key))
+
+    VehicleModel.objects.bulk_create(
+        [VehicleModel(name=names[key], name_key=key, product_count=counts[key]) for key in names],
+        batch_size=1000,
+    )
+    ids = dict(VehicleModel.objects.values_list('name_key', 'id'))
+    Link.objects.bulk_create(
+        [Link(product_id=product_id, vehiclemodel_id=ids[key]) for product_id, key in links],
+        batch_size=1000,
+    )
+
+
+def clear_vehicle_models(apps, schema_editor):
+    apps.get_model('products', 'VehicleModel').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0029_vehiclemodel'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_vehicle_models, clear_vehicle_models),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:02
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def fill_available_sets(apps, schema_editor):
+    # ชุด: จำนวนชุดที่ขายได้ = คงเหลือของลูกที่น้อยที่สุด
+    Product = apps.get_model('products', 'Product')
+    bundles = Product.objects.filter(is_bundle=True).annotate(min_child=Min('bundle_components__quantity'))
+    changed = []
+    for bundle in bundles:
+        bundle.available_sets = bundle.min_child or 0
+        changed.append(bundle)
+    Product.objects.bulk_update(changed, ['available_sets'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0030_populate_vehicle_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='available_sets',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=12, verbose_name='จำนวนชุดที่ขายได้'),
+        ),
+        migrations.RunPython(fill_available_sets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0031_product_available_sets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary_date', models.DateField(db_index=True, verbose_name='วันที่')),
+                ('doc_type', models.CharField(max_length=10, verbose_name='ประเภทเอกสาร')),
+                ('payment_method', models.CharField(blank=True, default='', max_length=20, verbose_name='วิธีชำระเงิน')),
+                ('bill_count', models.IntegerField(default=0, verbose_name='จำนวนบิล')),
+                ('line_count', models.IntegerField(default=0, verbose_name='จำนวนรายการ')),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดรวม')),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ส่วนลด')),
+                ('grand_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดสุทธิ')),
+                ('cost_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ต้นทุน')),
+                ('item_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='จำนวนชิ้น')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='พนักงาน')),
+            ],
+            options={
+                'db_table': 'daily_sales_summaries',
+                'ordering': ['summary_date'],
+                'unique_together': {('summary_date', 'created_by', 'doc_type', 'payment_method')},
+            },
+        ),
+    ]
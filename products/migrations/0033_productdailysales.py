@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0032_dailysalessummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sales_date', models.DateField(verbose_name='วันที่')),
+                ('qty', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='จำนวนขาย')),
+                ('sales_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดขาย')),
+                ('cost_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ต้นทุนขาย')),
+                ('return_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='จำนวนรับคืน')),
+                ('return_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดรับคืน')),
+                ('return_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ต้นทุนรับคืน')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product', verbose_name='สินค้า')),
+            ],
+            options={
+                'db_table': 'product_daily_sales',
+                'indexes': [models.Index(fields=['sales_date', 'product'], name='product_daily_sales_date_idx')],
+                'unique_together': {('product', 'sales_date')},
+            },
+        ),
+    ]
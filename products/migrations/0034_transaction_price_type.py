@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:10
+
+from django.db import migrations, models
+
+
+def fill_price_type(apps, schema_editor):
+    # ข้อมูลเก่า: จัดบรรทัดเข้าราคาที่ใกล้ที่สุด (ปลีก/ส่ง ปัจจุบันของสินค้า) แบบเดียวกับรายงานเดิม
+    # หัวบิล = ขายส่ง เมื่อบรรทัดขายส่งมากกว่าครึ่งบิล
+    TransactionItem = apps.get_model('products', 'TransactionItem')
+    Transaction = apps.get_model('products', 'Transaction')
+
+    wholesale_ids = []
+    line_counts = {}  # transaction_id -> [ขายส่ง, ทั้งหมด]
+    rows = TransactionItem.objects.values_list(
+        'id', 'transaction_id', 'unit_price', 'product__selling_price', 'product__wholesale_price',
+    ).iterator(chunk_size=2000)
+    for item_id, txn_id, unit_price, retail, wholesale in rows:
+        counts = line_counts.setdefault(txn_id, [0, 0])
+        counts[1] += 1
+        if abs(unit_price - wholesale) < abs(unit_price - retail):
+            wholesale_ids.append(item_id)
+            counts[0] += 1
+
+    for i in range(0, len(wholesale_ids), 1000):
+        TransactionItem.objects.filter(id__in=wholesale_ids[i:i + 1000]).update(price_type='wholesale')
+
+    wholesale_bills = [txn_id for txn_id, (w, n) in line_counts.items() if w * 2 > n]
+    for i in range(0, len(wholesale_bills), 1000):
+        Transaction.objects.filter(id__in=wholesale_bills[i:i + 1000]).update(price_type='wholesale')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0033_productdailysales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='price_type',
+            field=models.CharField(choices=[('retail', 'ขายปลีก'), ('wholesale', 'ขายส่ง')], db_index=True, default='retail', max_length=10, verbose_name='ประเภทราคา'),
+        ),
+        migrations.AddField(
+            model_name='transactionitem',
+            name='price_type',
+            field=models.CharField(choices=[('retail', 'ขายปลีก'), ('wholesale', 'ขายส่ง')], db_index=True, default='retail', max_length=10, verbose_name='ประเภทราคา'),
+        ),
+        migrations.RunPython(fill_price_type, migrations.RunPython.noop),
+    ]
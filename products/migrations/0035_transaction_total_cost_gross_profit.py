@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:12
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def fill_bill_costs(apps, schema_editor):
+    # เหมือน backfill_bill_costs: ต้นทุนจากรายการ (บิลรับคืนเป็นลบ), กำไร = ยอดรวม - ต้นทุน
+    Transaction = apps.get_model('products', 'Transaction')
+    TransactionItem = apps.get_model('products', 'TransactionItem')
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    line_cost = TransactionItem.objects.filter(transaction_id=OuterRef('pk')).values('transaction_id').annotate(
+        cost=Sum(ExpressionWrapper(F('quantity') * F('cost_price'), output_field=money)),
+    ).values('cost')
+    cost = Coalesce(Subquery(line_cost, output_field=money), Value(Decimal('0')), output_field=money)
+
+    Transaction.objects.update(total_cost=Case(When(doc_type='RETURN', then=-cost), default=cost, output_field=money))
+    Transaction.objects.update(gross_profit=F('total_amount') - F('total_cost'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0034_transaction_price_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='ต้นทุนรวม'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='gross_profit',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='กำไรขั้นต้น'),
+        ),
+        migrations.RunPython(fill_bill_costs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0035_transaction_total_cost_gross_profit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_batches', to=settings.AUTH_USER_MODEL, verbose_name='ผู้นำเข้า')),
+            ],
+            options={
+                'db_table': 'import_batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('sku', models.CharField(blank=True, max_length=50)),
+                ('name', models.CharField(max_length=200)),
+                ('compatible_models', models.TextField(blank=True)),
+                ('bundle_type', models.CharField(default='SAME', max_length=10)),
+                ('unit', models.CharField(default='ชิ้น', max_length=50, verbose_name='หน่วยสต็อก')),
+                ('items_per_purchase_unit', models.IntegerField(default=1)),
+                ('purchase_unit_name', models.CharField(blank=True, max_length=50)),
+                ('cost_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('selling_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('wholesale_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_by', models.CharField(blank=True, max_length=150, verbose_name='ผู้นำเข้า (ข้อความ)')),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='products.importbatch')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.category', verbose_name='หมวดหมู่')),
+                ('supplier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.supplier')),
+            ],
+            options={
+                'db_table': 'import_rows',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0036_importbatch_importrow'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='ประเภทงาน')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='ข้อมูลตั้งต้น')),
+                ('status', models.CharField(choices=[('PENDING', 'รอทำ'), ('RUNNING', 'กำลังทำ'), ('DONE', 'เสร็จแล้ว'), ('FAILED', 'ล้มเหลว')], default='PENDING', max_length=10, verbose_name='สถานะ')),
+                ('progress_done', models.PositiveIntegerField(default=0)),
+                ('progress_total', models.PositiveIntegerField(default=0)),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='ข้อความล่าสุด')),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='จำนวนครั้งที่ลอง')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='ลองได้สูงสุด')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='เริ่มได้หลังเวลา')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker ที่ทำอยู่')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='ผู้สั่งงาน')),
+            ],
+            options={
+                'db_table': 'jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx')],
+            },
+        ),
+    ]
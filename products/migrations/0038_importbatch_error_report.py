@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0037_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importbatch',
+            name='error_report',
+            field=models.JSONField(blank=True, default=list, verbose_name='รายงานแถวที่มีปัญหา (อัปโหลดล่าสุด)'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0038_importbatch_error_report'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importbatch',
+            name='purchase',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.purchase', verbose_name='ใบรับสินค้า (DRAFT) ที่กำลังบันทึก'),
+        ),
+    ]
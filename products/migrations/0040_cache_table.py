@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:15
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Cache เริ่มต้นเป็น DatabaseCache (ใช้ร่วมกันทุก Process) → สร้างตารางให้ตอน migrate
+    # ตั้ง REDIS_URL แล้ว → ไม่มี DatabaseCache ให้สร้าง คำสั่งจะไม่ทำอะไร
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0039_importbatch_purchase'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
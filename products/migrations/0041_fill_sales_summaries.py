@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:00
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+SOURCE = {'status': 'POSTED', 'doc_type__in': ['SALE', 'RETURN']}
+LINE_SOURCE = {'transaction__status': 'POSTED', 'transaction__doc_type__in': ['SALE', 'RETURN']}
+
+
+def fill_sales_summaries(apps, schema_editor):
+    # เหมือน rebuild_sales_summary + rebuild_product_daily_sales:
+    # บิลที่ยืนยันก่อนมีตารางสรุป → ไม่งั้นรายงานยอดขาย/สินค้าขายดีจะว่างสำหรับยอดเก่า
+    Transaction = apps.get_model('products', 'Transaction')
+    TransactionItem = apps.get_model('products', 'TransactionItem')
+    DailySalesSummary = apps.get_model('products', 'DailySalesSummary')
+    ProductDailySales = apps.get_model('products', 'ProductDailySales')
+    money = DecimalField(max_digits=14, decimal_places=2)
+    line_cost = ExpressionWrapper(F('quantity') * F('cost_price'), output_field=money)
+    zero = Decimal('0')
+
+    # ===== DailySalesSummary =====
+    headers = Transaction.objects.filter(**SOURCE).annotate(
+        day=TruncDate('transaction_date'), method=Coalesce('payment__method', Value('')),
+    ).values('day', 'created_by_id', 'doc_type', 'method').annotate(
+        bill_count=Count('id'),
+        gross_amount=Sum('total_amount'),
+        discount_amount=Sum('discount_amount'),
+        grand_total=Sum('grand_total'),
+    ).order_by()
+
+    lines = TransactionItem.objects.filter(**LINE_SOURCE).annotate(
+        day=TruncDate('transaction__transaction_date'), method=Coalesce('transaction__payment__method', Value('')),
+    ).values('day', 'transaction__created_by_id', 'transaction__doc_type', 'method').annotate(
+        line_count=Count('id'), cost_amount=Sum(line_cost), item_qty=Sum('quantity'),
+    ).order_by()
+    line_map = {
+        (row['day'], row['transaction__created_by_id'], row['transaction__doc_type'], row['method']): row
+        for row in lines
+    }
+
+    summaries = []
+    for head in headers:
+        line = line_map.get((head['day'], head['created_by_id'], head['doc_type'], head['method']), {})
+        summaries.append(DailySalesSummary(
+            summary_date=head['day'],
+            created_by_id=head['created_by_id'],
+            doc_type=head['doc_type'],
+            payment_method=head['method'],
+            bill_count=head['bill_count'],
+            line_count=line.get('line_count') or 0,
+            gross_amount=head['gross_amount'] or zero,
+            discount_amount=head['discount_amount'] or zero,
+            grand_total=head['grand_total'] or zero,
+            cost_amount=line.get('cost_amount') or zero,
+            item_qty=line.get('item_qty') or zero,
+        ))
+    DailySalesSummary.objects.all().delete()
+    DailySalesSummary.objects.bulk_create(summaries, batch_size=1000)
+
+    # ===== ProductDailySales =====
+    is_sale = Q(transaction__doc_type='SALE')
+    is_return = Q(transaction__doc_type='RETURN')
+    products = TransactionItem.objects.filter(**LINE_SOURCE).annotate(
+        day=TruncDate('transaction__transaction_date'),
+    ).values('day', 'product_id').annotate(
+        qty=Sum('quantity', filter=is_sale),
+        sales_amount=Sum('line_total', filter=is_sale),
+        cost_amount=Sum(line_cost, filter=is_sale),
+        return_qty=Sum('quantity', filter=is_return),
+        return_amount=Sum('line_total', filter=is_return),
+        return_cost=Sum(line_cost, filter=is_return),
+    ).order_by()
+
+    ProductDailySales.objects.all().delete()
+    ProductDailySales.objects.bulk_create([
+        ProductDailySales(
+            product_id=row['product_id'],
+            sales_date=row['day'],
+            qty=row['qty'] or zero,
+            sales_amount=row['sales_amount'] or zero,
+            cost_amount=row['cost_amount'] or zero,
+            return_qty=row['return_qty'] or zero,
+            return_amount=row['return_amount'] or zero,
+            return_cost=row['return_cost'] or zero,
+        )
+        for row in products
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0040_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_sales_summaries, migrations.RunPython.noop),
+    ]
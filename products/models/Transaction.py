@@ -6,7 +6,6 @@ from django.db.models import Sum
 
 
 from django.utils import timezone
-from datetime import datetime
 
 User = get_user_model()
 
@@ -22,6 +21,11 @@ class Transaction(models.Model):
         ('RETURN', 'รับคืน'),
     ]
     
+    PRICE_TYPE_CHOICES = [
+        ('retail', 'ขายปลีก'),
+        ('wholesale', 'ขายส่ง'),
+    ]
+
     STATUS_CHOICES = [
         ('HOLD', 'พักบิล'),
         ('POSTED', 'ขายแล้ว'),
@@ -29,6 +33,7 @@ class Transaction(models.Model):
     ]
     doc_type = models.CharField(max_length=10, choices=DOC_TYPE_CHOICES, default='SALE', db_index=True, verbose_name="ประเภทเอกสาร")
     ref_doc_no = models.CharField(max_length=50, blank=True, verbose_name="อ้างอิงเลขที่บิลเดิม")
+    price_type = models.CharField(max_length=10, choices=PRICE_TYPE_CHOICES, default='retail', db_index=True, verbose_name="ประเภทราคา")
     doc_no = models.CharField(max_length=50, unique=True, blank=True, verbose_name="เลขที่บิล")
     transaction_date = models.DateTimeField(default=timezone.now, db_index=True)
     
@@ -36,6 +41,8 @@ class Transaction(models.Model):
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="ยอดรวม")
     discount_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="ส่วนลด")
     grand_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="ยอดสุทธิ")
+    total_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="ต้นทุนรวม")
+    gross_profit = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="กำไรขั้นต้น")
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='HOLD', db_index=True)
     remark = models.TextField(blank=True)
@@ -56,16 +63,9 @@ class Transaction(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.doc_no:
-            today_str = datetime.now().strftime('%y%m%d')
-            prefix = 'RET' if self.doc_type == 'RETURN' else 'SALE'
-            last_sale = Transaction.objects.filter(doc_no__startswith=f'{prefix}-{today_str}').order_by('doc_no').last()
-            
-            if last_sale:
-                last_id = int(last_sale.doc_no.split('-')[-1])
-                new_id = last_id + 1
-            else:
-                new_id = 1
-            self.doc_no = f"{prefix}-{today_str}-{new_id:04d}"
+            # ✅ ออกเลขจากตัวนับ (DocumentSequence) แทนการหาเลขล่าสุด
+            from products.Services.doc_number_service import next_doc_no
+            self.doc_no = next_doc_no(self.doc_type)
         super().save(*args, **kwargs)
 
     def calculate_totals(self):
@@ -74,6 +74,15 @@ class Transaction(models.Model):
         self.grand_total = total - self.discount_amount
         self.save(update_fields=['total_amount', 'grand_total'])
 
+    def set_cost_from_items(self, items):
+        """
+        คำนวณต้นทุน/กำไรขั้นต้นของบิลจากรายการที่โหลดไว้แล้ว (ยังไม่ save)
+        บิลรับคืนเก็บเป็นลบตามยอดบิล
+        """
+        cost = sum((item.quantity * item.cost_price for item in items), Decimal('0'))
+        self.total_cost = -cost if self.doc_type == 'RETURN' else cost
+        self.gross_profit = self.total_amount - self.total_cost
+
     def post(self):
         """ยืนยันบิล (เรียก Service)"""
         from products.Services.sale_service import post_sale
@@ -98,6 +107,7 @@ class TransactionItem(models.Model):
     unit_type = models.CharField(max_length=20, default='ชิ้น',verbose_name='หน่วยขาย')
     display_sku = models.CharField(max_length=50, blank=True, verbose_name='SKU ที่แสดง')
     bundle_items = models.JSONField(null=True, blank=True, verbose_name='รายการสินค้าในชุด')
+    price_type = models.CharField(max_length=10, choices=Transaction.PRICE_TYPE_CHOICES, default='retail', db_index=True, verbose_name='ประเภทราคา')
 
     class Meta:
         db_table = "Transaction_items"
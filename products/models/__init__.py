@@ -4,3 +4,8 @@ from .purchase import *
 from .Transaction import *
 from .payment import *
 from .system_setting import *
+from .sequence import *
+from .vehicle import *
+from .report_summary import *
+from .import_stage import *
+from .job import *
@@ -77,8 +77,11 @@ class Product(models.Model):
     
     # การค้นหา
     compatible_models = models.CharField(max_length=255, blank=True, verbose_name="รุ่นรถที่ใช้ได้")
+    vehicle_models = models.ManyToManyField('VehicleModel', blank=True, related_name='products', verbose_name="รุ่นรถ (ตาราง)")
     quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="คงเหลือ")
     
+    # ชุด: จำนวนชุดที่ขายได้ = คงเหลือของลูกที่น้อยที่สุด (คำนวณใหม่ทุกครั้งที่สต็อกลูกเปลี่ยน)
+    available_sets = models.DecimalField(max_digits=12, decimal_places=2, default=0, db_index=True, verbose_name="จำนวนชุดที่ขายได้")
     min_stock = models.DecimalField(max_digits=12, decimal_places=2, default=5, verbose_name="สต็อกขั้นต่ำ")
     items_per_purchase_unit = models.IntegerField(default=1, verbose_name="จำนวนชิ้นต่อหน่วยซื้อ")
     purchase_unit_name = models.CharField(max_length=20, blank=True, verbose_name="หน่วยซื้อ")
@@ -125,6 +128,11 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.sku} - {self.name}"
 
+    @property
+    def stock_available(self):
+        """คงเหลือที่ขายได้ (ชุด → available_sets, สินค้าปกติ → quantity)"""
+        return self.available_sets if self.is_bundle else self.quantity
+
     def delete(self, *args, **kwargs):
         
         # 1. เช็คว่ามี FK หรือไม่ (เคยขายหรือยัง)
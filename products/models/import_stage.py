@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.db import models
+from django.contrib.auth import get_user_model
+
+
+User = get_user_model()
+
+
+# ------------------------
+# Import Batch (ชุดข้อมูลนำเข้าที่รอบันทึก)
+# ------------------------
+class ImportBatch(models.Model):
+    """
+    ตะกร้านำเข้าสินค้า 1 ชุด (ไฟล์ / กรอกมือ) ก่อนกดบันทึกลงคลังจริง
+    Session เก็บแค่ id ของ Batch → ไฟล์ใหญ่แค่ไหน Session ก็ยังเล็ก
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='import_batches', verbose_name="ผู้นำเข้า")
+    purchase = models.ForeignKey(
+        'Purchase', on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        verbose_name="ใบรับสินค้า (DRAFT) ที่กำลังบันทึก",
+    )
+    error_report = models.JSONField(default=list, blank=True, verbose_name="รายงานแถวที่มีปัญหา (อัปโหลดล่าสุด)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "import_batches"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import #{self.pk} ({self.user})"
+
+
+# ------------------------
+# Import Row (แถวสินค้าที่รอบันทึก)
+# ------------------------
+class ImportRow(models.Model):
+    """ชื่อฟิลด์ตรงกับ dict Staging เดิม (Template / _commit_to_database ใช้ชื่อเดียวกัน)"""
+    batch = models.ForeignKey(ImportBatch, on_delete=models.CASCADE, related_name='rows')
+
+    category = models.ForeignKey('Category', on_delete=models.CASCADE, verbose_name="หมวดหมู่")
+    category_name = models.CharField(max_length=100, blank=True)
+    sku = models.CharField(max_length=50, blank=True)
+    name = models.CharField(max_length=200)
+    compatible_models = models.TextField(blank=True)
+    bundle_type = models.CharField(max_length=10, default='SAME')
+
+    unit = models.CharField(max_length=50, default='ชิ้น', verbose_name="หน่วยสต็อก")
+    items_per_purchase_unit = models.IntegerField(default=1)
+    purchase_unit_name = models.CharField(max_length=50, blank=True)
+
+    cost_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    selling_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    wholesale_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    created_by = models.CharField(max_length=150, blank=True, verbose_name="ผู้นำเข้า (ข้อความ)")
+    reference = models.CharField(max_length=100, blank=True)
+    supplier = models.ForeignKey('Supplier', on_delete=models.SET_NULL, null=True, blank=True)
+
+    STAGE_FIELDS = (
+        'category_id', 'category_name', 'sku', 'name', 'compatible_models', 'bundle_type',
+        'unit', 'items_per_purchase_unit', 'purchase_unit_name',
+        'cost_price', 'selling_price', 'wholesale_price', 'quantity',
+        'created_by', 'reference', 'supplier_id',
+    )
+    MONEY_FIELDS = ('cost_price', 'selling_price', 'wholesale_price', 'quantity')
+
+    class Meta:
+        db_table = "import_rows"
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.sku} - {self.name}"
+
+    @classmethod
+    def from_stage(cls, batch, data):
+        """สร้างจาก dict Staging (ราคาเป็น String ได้)"""
+        values = {key: data[key] for key in cls.STAGE_FIELDS if key in data}
+        for key in cls.MONEY_FIELDS:
+            try:
+                values[key] = Decimal(str(values.get(key) or 0))
+            except ArithmeticError:
+                values[key] = Decimal('0')
+        return cls(batch=batch, **values)
+
+    def as_stage(self):
+        """แปลงกลับเป็น dict Staging (ใช้เติมฟอร์มตอนแก้ไข)"""
+        data = {key: getattr(self, key) for key in self.STAGE_FIELDS}
+        for key in self.MONEY_FIELDS:
+            data[key] = str(data[key])
+        return data
@@ -0,0 +1,72 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+
+User = get_user_model()
+
+
+# ------------------------
+# Job (งานเบื้องหลัง)
+# ------------------------
+class Job(models.Model):
+    """
+    งานที่ใช้เวลานาน (นำเข้าสินค้า / จับคู่ชุด / คำนวณสต็อกใหม่ ...)
+    หน้าเว็บแค่สร้างแถวนี้ แล้ว `manage.py run_worker` หยิบไปทำ → ไม่ต้องใช้ Redis / Celery
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'รอทำ'),
+        ('RUNNING', 'กำลังทำ'),
+        ('DONE', 'เสร็จแล้ว'),
+        ('FAILED', 'ล้มเหลว'),
+    ]
+
+    kind = models.CharField(max_length=50, verbose_name="ประเภทงาน")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="ข้อมูลตั้งต้น")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING', verbose_name="สถานะ")
+
+    # ===== ความคืบหน้า (Template Poll ผ่าน job_status) =====
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True, verbose_name="ข้อความล่าสุด")
+
+    # ===== ผลลัพธ์ =====
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    # ===== ลองใหม่ / การจอง =====
+    attempts = models.PositiveIntegerField(default=0, verbose_name="จำนวนครั้งที่ลอง")
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name="ลองได้สูงสุด")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="เริ่มได้หลังเวลา")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker ที่ทำอยู่")
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs', verbose_name="ผู้สั่งงาน")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.pk} {self.kind} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('DONE', 'FAILED')
+
+    @property
+    def error_summary(self):
+        """บรรทัดแรกของ Error (ไม่รวม Traceback)"""
+        return self.error.split('\n', 1)[0]
+
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return 100 if self.status == 'DONE' else 0
+        return min(100, int(self.progress_done * 100 / self.progress_total))
@@ -0,0 +1,71 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+
+User = get_user_model()
+
+
+# ------------------------
+# Daily Sales Summary (ยอดขายสรุปรายวัน)
+# ------------------------
+class DailySalesSummary(models.Model):
+    """
+    ยอดสรุปรายวันแยกตาม (วันที่, พนักงาน, ประเภทเอกสาร, วิธีชำระเงิน)
+    อัปเดตใน DB Transaction เดียวกับ post/cancel ของบิลขายและบิลรับคืน
+    → รายงานช่วงยาวอ่านจากตารางนี้ (ตามจำนวนวัน) แทนการสแกนรายการขายทั้งหมด
+
+    ยอดจากหัวบิล (gross/discount/grand_total) เก็บตามเครื่องหมายของบิลจริง (บิลรับคืน gross/grand_total เป็นลบ)
+    ยอดจากรายการ (line_count/cost/item_qty) เก็บเป็นบวกเหมือนใน TransactionItem
+    สร้างใหม่ทั้งหมด: python manage.py rebuild_sales_summary
+    """
+    summary_date = models.DateField(db_index=True, verbose_name="วันที่")
+    created_by = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name="พนักงาน")
+    doc_type = models.CharField(max_length=10, verbose_name="ประเภทเอกสาร")
+    payment_method = models.CharField(max_length=20, blank=True, default='', verbose_name="วิธีชำระเงิน")
+
+    bill_count = models.IntegerField(default=0, verbose_name="จำนวนบิล")
+    line_count = models.IntegerField(default=0, verbose_name="จำนวนรายการ")
+    gross_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดรวม")
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ส่วนลด")
+    grand_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดสุทธิ")
+    cost_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ต้นทุน")
+    item_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="จำนวนชิ้น")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "daily_sales_summaries"
+        unique_together = ('summary_date', 'created_by', 'doc_type', 'payment_method')
+        ordering = ['summary_date']
+
+    def __str__(self):
+        return f"{self.summary_date} {self.doc_type} {self.payment_method or '-'} → {self.grand_total:,.2f}"
+
+
+# ------------------------
+# Product Daily Sales (ยอดขายสินค้ารายวัน)
+# ------------------------
+class ProductDailySales(models.Model):
+    """
+    ยอดขาย/รับคืนต่อสินค้าต่อวัน อัปเดตพร้อม DailySalesSummary ตอน post/cancel
+    → รายงานยอดขายแยกสินค้า / สินค้าขายดี อ่านจากตารางนี้แทน Group by รายการขายทั้งหมด
+
+    จำนวนและยอดเงินเก็บเป็นบวกทั้งฝั่งขายและฝั่งรับคืน
+    """
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='daily_sales', verbose_name="สินค้า")
+    sales_date = models.DateField(verbose_name="วันที่")
+
+    qty = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="จำนวนขาย")
+    sales_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดขาย")
+    cost_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ต้นทุนขาย")
+    return_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="จำนวนรับคืน")
+    return_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดรับคืน")
+    return_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ต้นทุนรับคืน")
+
+    class Meta:
+        db_table = "product_daily_sales"
+        unique_together = ('product', 'sales_date')
+        indexes = [models.Index(fields=['sales_date', 'product'], name='product_daily_sales_date_idx')]
+
+    def __str__(self):
+        return f"{self.sales_date} #{self.product_id} → {self.qty:g}"
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+# ------------------------
+# Document Sequence (ตัวนับเลขที่เอกสาร)
+# ------------------------
+class DocumentSequence(models.Model):
+    """
+    ตัวนับเลขที่เอกสารแยกตาม Prefix ต่อวัน (SALE / RET / PO)
+    เพิ่มค่าด้วย UPDATE ... SET last_value = last_value + n (atomic) แทนการสแกนหาเลขล่าสุด
+    """
+    prefix = models.CharField(max_length=10, verbose_name="Prefix เอกสาร")
+    seq_date = models.DateField(verbose_name="วันที่")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="เลขล่าสุดที่จองแล้ว")
+
+    class Meta:
+        db_table = "document_sequences"
+        unique_together = ('prefix', 'seq_date')
+
+    def __str__(self):
+        return f"{self.prefix}-{self.seq_date:%Y%m%d} → {self.last_value}"
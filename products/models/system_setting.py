@@ -56,26 +56,27 @@ class SystemSetting(models.Model):
     # ─── Helper class methods ───────────────────────────
     @classmethod
     def get(cls, key, default=None):
-        """ดึง value จาก key — ถ้าไม่มี return default"""
-        try:
-            return cls.objects.get(key=key).value
-        except cls.DoesNotExist:
-            return default if default is not None else SYSTEM_SETTINGS_DEFAULTS.get(key, "")
+        """ดึง value จาก key (ผ่าน Cache) — ถ้าไม่มี return default"""
+        from products.Services.settings_service import get_setting
+        return get_setting(key, default)
 
     @classmethod
     def set(cls, key, value):
-        """บันทึก key-value (upsert)"""
+        """บันทึก key-value (upsert) — Signal จะล้าง Cache ให้หลัง Commit"""
         obj, _ = cls.objects.update_or_create(key=key, defaults={"value": str(value)})
         return obj
 
+    @classmethod
+    def set_many(cls, values):
+        """บันทึกหลาย key ในรอบเดียว แล้วล้าง Cache ครั้งเดียว"""
+        from products.Services.settings_service import save_settings
+        save_settings(values)
+
     @classmethod
     def get_all(cls):
-        """ดึง dict ทั้งหมด — ใช้สำหรับ render หน้า settings"""
-        rows = {row.key: row.value for row in cls.objects.all()}
-        # merge กับ defaults (เพื่อให้ key ใหม่ที่ยัง migrate ไม่ done ก็มี)
-        result = dict(SYSTEM_SETTINGS_DEFAULTS)
-        result.update(rows)
-        return result
+        """ดึง dict ทั้งหมด (merge กับ defaults) — อ่านจาก Cache ไม่ Query DB"""
+        from products.Services.settings_service import get_settings
+        return get_settings()
 
     @classmethod
     def seed_defaults(cls):
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+# ------------------------
+# Vehicle Model (รุ่นรถ)
+# ------------------------
+class VehicleModel(models.Model):
+    """
+    รุ่นรถที่สินค้าใช้ได้ (แยกจาก Product.compatible_models ที่เป็นข้อความคั่นด้วย ,)
+    - name_key: ชื่อที่ normalize แล้ว (ตัวพิมพ์เล็ก/ช่องว่างเดียว) ใช้ค้นหาแบบมี Index
+    - product_count: จำนวนสินค้าที่ผูกกับรุ่นนี้ (อัปเดตทุกครั้งที่ผูก/ถอด)
+    """
+    name = models.CharField(max_length=255, verbose_name="รุ่นรถ")
+    name_key = models.CharField(max_length=255, unique=True, verbose_name="รุ่นรถ (สำหรับค้นหา)")
+    product_count = models.PositiveIntegerField(default=0, db_index=True, verbose_name="จำนวนสินค้า")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "vehicle_models"
+        verbose_name = "Vehicle Model"
+        verbose_name_plural = "Vehicle Models"
+
+    def save(self, *args, **kwargs):
+        if not self.name_key:
+            self.name_key = ' '.join(self.name.split()).casefold()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
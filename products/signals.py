@@ -0,0 +1,117 @@
+"""
+Signals ของแอป products
+- แจ้ง Product Search Index เมื่อสินค้า / หมวดหมู่เปลี่ยน
+- คำนวณ available_sets ของชุดเมื่อสต็อกลูก / รายการลูกเปลี่ยน
+- ผูกสินค้ากับตาราง VehicleModel ตาม compatible_models + ปรับอันดับรุ่นรถยอดนิยมใน Cache
+- ล้าง Cache ของ SystemSetting เมื่อค่าตั้งเปลี่ยน (set / admin)
+- สร้าง Snapshot ใบเสร็จใหม่เมื่อบิลยืนยัน / ยกเลิก / บันทึกการชำระเงิน
+"""
+
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from products.models import Product, Category, SystemSetting, Transaction, Payment
+from products.Services.search_index import mark_products_changed
+from products.Services.vehicle_model_service import sync_vehicle_models, unlink_vehicle_models
+from products.Services.popular_models_service import apply_model_changes
+from products.Services.stock_service import refresh_bundle_availability
+from products.Services.settings_service import invalidate_settings
+from products.Services.receipt_snapshot_service import SNAPSHOT_STATUSES, schedule_receipt_refresh
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    mark_products_changed([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def category_changed(sender, instance, created, **kwargs):
+    # ชื่อหมวดหมู่แสดงในผลค้นหา → โหลดสินค้าในหมวดนี้ใหม่
+    if not created:
+        mark_products_changed(
+            Product.objects.filter(category=instance).values_list('id', flat=True)
+        )
+
+
+def _bundle_parents(product_id):
+    Link = Product.bundle_components.through
+    return list(Link.objects.filter(to_product_id=product_id).values_list('from_product_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Product.bundle_components.through)
+def bundle_components_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # ล้างจากฝั่งลูก → post_clear ไม่มี pk_set เก็บชุดเดิมไว้ก่อน
+        instance._bundle_parents = _bundle_parents(instance.pk)
+        return
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bundle_ids = [instance.pk]
+    elif action == 'post_clear':
+        bundle_ids = getattr(instance, '_bundle_parents', [])
+    else:
+        # แก้จากฝั่งลูก → ชุดที่ได้รับผลคือ pk_set
+        bundle_ids = pk_set or []
+    refresh_bundle_availability(bundle_ids=bundle_ids)
+
+
+@receiver(pre_delete, sender=Product)
+def bundle_child_deleting(sender, instance, **kwargs):
+    # ลบลูก → ลิงก์หายแบบ Cascade (ไม่มี m2m_changed) เก็บชุดที่ใช้ลูกนี้ไว้ก่อน
+    instance._bundle_parents = _bundle_parents(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def bundle_child_deleted(sender, instance, **kwargs):
+    refresh_bundle_availability(bundle_ids=getattr(instance, '_bundle_parents', []))
+
+
+@receiver(post_save, sender=Product)
+def product_stock_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    # สต็อกเปลี่ยนผ่าน save() (รับเข้า, แก้ไขสินค้า, Admin) → คำนวณชุดที่มีสินค้านี้เป็นลูกใหม่
+    # (ตัด/คืนสต็อกผ่าน stock_service คำนวณให้อยู่แล้ว)
+    if raw or (update_fields is not None and 'quantity' not in update_fields):
+        return
+    refresh_bundle_availability(
+        component_ids=[instance.pk],
+        bundle_ids=[instance.pk] if instance.is_bundle else [],
+    )
+
+
+@receiver(post_save, sender=Product)
+def product_vehicle_models(sender, instance, raw=False, update_fields=None, **kwargs):
+    # บันทึกเฉพาะบางฟิลด์ (เช่น ตัดสต็อก) ที่ไม่เกี่ยวกับรุ่นรถ → ข้าม
+    if raw or (update_fields is not None and 'compatible_models' not in update_fields):
+        return
+    # ส่วนต่าง (รุ่นที่เพิ่ม/ถอด) → ปรับอันดับใน Cache โดยไม่ต้องนับใหม่
+    apply_model_changes(sync_vehicle_models([instance]))
+
+
+@receiver(pre_delete, sender=Product)
+def product_vehicle_models_deleted(sender, instance, **kwargs):
+    apply_model_changes(unlink_vehicle_models([instance.pk]))
+
+
+@receiver(post_save, sender=SystemSetting)
+@receiver(post_delete, sender=SystemSetting)
+def system_setting_changed(sender, instance, **kwargs):
+    invalidate_settings()
+
+
+@receiver(post_save, sender=Transaction)
+def transaction_status_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Snapshot สร้างเฉพาะตอนสถานะเปลี่ยน (post_sale / post_return / cancel) ไม่ใช่ทุกครั้งที่บันทึกยอด
+    if raw or instance.status not in SNAPSHOT_STATUSES:
+        return
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    schedule_receipt_refresh(instance.pk)
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, raw=False, **kwargs):
+    # หน้าขายบันทึก Payment หลัง post_sale → Snapshot ต้องมีข้อมูลรับเงิน / เงินทอนด้วย
+    if not raw:
+        schedule_receipt_refresh(instance.transaction_id)
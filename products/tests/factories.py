@@ -0,0 +1,45 @@
+"""
+ตัวช่วยสร้างข้อมูลสำหรับเทสต์ (ผู้ใช้ / สินค้า / บิลขาย)
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from products.models import Product
+from products.Services.sale_service import create_payment, create_sale_transaction, post_sale
+
+
+def make_user(username='cashier', **extra):
+    return User.objects.create_user(username=username, password='pass1234', **extra)
+
+
+def make_product(sku, name=None, quantity=10, cost_price='60', selling_price='100', wholesale_price=None, **extra):
+    return Product.objects.create(
+        sku=sku,
+        name=name or f"สินค้า {sku}",
+        quantity=Decimal(str(quantity)),
+        cost_price=Decimal(cost_price),
+        selling_price=Decimal(selling_price),
+        wholesale_price=Decimal(wholesale_price or selling_price),
+        **extra,
+    )
+
+
+def make_bundle(sku, children, **extra):
+    bundle = make_product(sku, quantity=0, is_bundle=True, **extra)
+    bundle.bundle_components.set(children)
+    return bundle
+
+
+def sell(user, lines, method='cash', discount=0):
+    """สร้างบิลขาย → ยืนยัน → บันทึกการชำระเงิน (ลำดับเดียวกับหน้าขาย)"""
+    sale = create_sale_transaction(
+        user,
+        [{'product_id': product.id, 'quantity': qty} for product, qty in lines],
+        discount_amount=discount,
+    )
+    post_sale(sale, payment_method=method)
+    create_payment(sale, method=method)
+    sale.refresh_from_db()
+    return sale
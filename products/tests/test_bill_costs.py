@@ -0,0 +1,52 @@
+import io
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from products.models import Transaction
+from products.Services.return_service import create_return_transaction, post_return
+from products.Services.sale_service import create_sale_transaction
+from products.tests.factories import make_product, make_user, sell
+
+
+class BillCostTests(TestCase):
+    """ต้นทุน / กำไรขั้นต้นบนหัวบิล ต้องตรงกับรายการสินค้าในบิล"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.oil = make_product('OIL-1', quantity=20, cost_price='60', selling_price='100')
+        self.pad = make_product('PAD-1', quantity=20, cost_price='250', selling_price='400')
+
+    def costs(self, bill):
+        bill.refresh_from_db()
+        return bill.total_cost, bill.gross_profit
+
+    def test_sale_stores_cost_and_profit(self):
+        sale = sell(self.user, [(self.oil, 3), (self.pad, 1)], discount=20)
+        # ทุน 3×60 + 250 = 430, กำไรขั้นต้นคิดจากยอดก่อนส่วนลด 700 - 430
+        self.assertEqual(self.costs(sale), (Decimal('430'), Decimal('270')))
+
+    def test_held_bill_has_cost_before_posting(self):
+        held = create_sale_transaction(self.user, [{'product_id': self.pad.id, 'quantity': 2}])
+        self.assertEqual(self.costs(held), (Decimal('500'), Decimal('300')))
+
+    def test_return_is_stored_negative(self):
+        sale = sell(self.user, [(self.oil, 3)])
+        ret = create_return_transaction(self.user, sale.doc_no, [{'product_id': self.oil.id, 'quantity': 1}])
+        post_return(ret)
+
+        self.assertEqual(self.costs(ret), (Decimal('-60'), ret.total_amount + Decimal('60')))
+        self.assertLess(ret.total_amount, 0)
+
+    def test_backfill_matches_posting(self):
+        sale = sell(self.user, [(self.oil, 3), (self.pad, 1)])
+        ret = create_return_transaction(self.user, sale.doc_no, [{'product_id': self.pad.id, 'quantity': 1}])
+        post_return(ret)
+        expected = {bill.id: self.costs(bill) for bill in (sale, ret)}
+
+        # บิลเก่าก่อนมีคอลัมน์ → 0 ทั้งหมด
+        Transaction.objects.update(total_cost=0, gross_profit=0)
+        call_command('backfill_bill_costs', stdout=io.StringIO())
+
+        self.assertEqual({bill.id: self.costs(bill) for bill in (sale, ret)}, expected)
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from products.models import Product, Purchase, PurchaseItem, Supplier
+from products.Services.purchase_service import cancel_purchase, post_purchase
+from products.Services.sale_service import cancel_sale
+from products.tests.factories import make_bundle, make_product, make_user, sell
+
+
+class BundleAvailabilityTests(TestCase):
+    """available_sets ต้องถูกต้องตั้งแต่ใน Transaction ที่ปรับสต็อก (ไม่รอ on_commit)"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.left = make_product('LAMP-L', quantity=5)
+        self.right = make_product('LAMP-R', quantity=3)
+        self.pair = make_bundle('LAMP-LR', [self.left, self.right])
+
+    def sets(self, bundle=None):
+        return Product.objects.values_list('available_sets', flat=True).get(id=(bundle or self.pair).id)
+
+    def test_components_set_on_bundle(self):
+        self.assertEqual(self.sets(), Decimal('3'))
+
+    def test_selling_a_child_updates_the_bundle(self):
+        sale = sell(self.user, [(self.right, 2)])
+        self.assertEqual(self.sets(), Decimal('1'))
+
+        cancel_sale(sale)
+        self.assertEqual(self.sets(), Decimal('3'))
+
+    def test_selling_the_bundle_updates_itself(self):
+        sell(self.user, [(self.pair, 2)])
+        self.assertEqual(self.sets(), Decimal('1'))
+
+    def test_receiving_a_purchase_updates_the_bundle(self):
+        purchase = Purchase.objects.create(
+            doc_no='PO-TEST-001', supplier=Supplier.objects.create(name='ผู้ขาย'), created_by=self.user,
+        )
+        PurchaseItem.objects.create(purchase=purchase, product=self.right, quantity=4, unit_cost=Decimal('50'))
+
+        post_purchase(purchase, self.user)
+        self.assertEqual(self.sets(), Decimal('5'))
+
+        purchase.refresh_from_db()
+        cancel_purchase(purchase, self.user)
+        self.assertEqual(self.sets(), Decimal('3'))
+
+    def test_clearing_from_the_child_side(self):
+        self.right.product_set.clear()
+        self.assertEqual(self.sets(), Decimal('5'))
+
+    def test_deleting_a_child(self):
+        # Product.delete() เช็คประวัติด้วย JSON contains (MySQL) → ลบผ่าน QuerySet ให้ Signal ทำงานเหมือนกัน
+        Product.objects.filter(id=self.left.id).delete()
+        self.assertEqual(self.sets(), Decimal('3'))
+        Product.objects.filter(id=self.right.id).delete()
+        self.assertEqual(self.sets(), Decimal('0'))
@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from products.Services import search_index, settings_service
+from products.Services.cache_tiers import forget_versions, local_cache, read_version
+from products.Services.receipt_snapshot_service import get_receipt_snapshot
+from products.Services.search_backends import MemorySearchBackend
+from products.Services.settings_service import get_setting, get_settings, save_settings
+from products.tests.factories import make_product, make_user, sell
+
+
+DATABASE_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'pos_cache'},
+    'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-local'},
+}
+
+
+@override_settings(CACHES=DATABASE_CACHES, SHARED_VERSION_POLL=60)
+class HotPathQueryTests(TestCase):
+    """เส้นทางที่อ่านบ่อยต้องไม่ถาม DatabaseCache ทุกครั้ง (Cache ชั้นใน Process + จำ Version)"""
+
+    def setUp(self):
+        cache.clear()
+        local_cache().clear()
+        forget_versions()
+        search_index.reset_search_index()
+        settings_service._local['version'] = None
+        self.addCleanup(search_index.reset_search_index)
+        self.product = make_product('BRK-100', name='ผ้าเบรกหน้า')
+
+    def assertNoQueries(self, func):
+        func()
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        self.assertEqual(len(ctx), 0, [q['sql'] for q in ctx.captured_queries])
+
+    def test_settings_read_without_queries(self):
+        self.assertNoQueries(get_settings)
+
+    def test_search_keystroke_without_queries(self):
+        self.assertNoQueries(lambda: MemorySearchBackend().search('เบรก'))
+
+    def test_reprint_reads_only_the_bill_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = sell(make_user(), [(self.product, 1)])
+
+        with CaptureQueriesContext(connection) as ctx:
+            snapshot = get_receipt_snapshot(sale.id)
+        self.assertEqual(snapshot['sale']['doc_no'], sale.doc_no)
+        self.assertEqual(len(ctx), 1)
+        self.assertNotIn('pos_cache', ctx.captured_queries[0]['sql'])
+
+    def test_writer_sees_its_own_changes_immediately(self):
+        get_settings()
+        with self.captureOnCommitCallbacks(execute=True):
+            save_settings({'store_name': 'ร้านใหม่'})
+        self.assertEqual(get_setting('store_name'), 'ร้านใหม่')
+
+        self.assertTrue(MemorySearchBackend().search('หน้า'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'ผ้าเบรกหลัง'
+            self.product.save()
+        self.assertEqual(MemorySearchBackend().search('หน้า'), [])
+
+
+@override_settings(CACHES=DATABASE_CACHES)
+class SharedVersionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        forget_versions()
+
+    def test_other_process_change_seen_after_poll(self):
+        cache.set('tests:version', 1, None)
+        with self.settings(SHARED_VERSION_POLL=60):
+            self.assertEqual(read_version('tests:version'), 1)
+            # Process อื่นเปลี่ยน → ยังใช้ค่าที่จำไว้จนครบรอบ Poll
+            cache.set('tests:version', 2, None)
+            self.assertEqual(read_version('tests:version'), 1)
+        with self.settings(SHARED_VERSION_POLL=0):
+            self.assertEqual(read_version('tests:version'), 2)
+
+    def test_missing_version_uses_default(self):
+        self.assertEqual(read_version('tests:missing', 0), 0)
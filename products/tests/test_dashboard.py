@@ -0,0 +1,58 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from products.Services.dashboard_service import get_dashboard_metrics
+from products.Services.return_service import create_return_transaction, post_return
+from products.tests.factories import make_product, make_user, sell
+
+
+class DashboardMetricsTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner', is_superuser=True, is_staff=True)
+        self.staff = make_user('staff')
+        self.oil = make_product('OIL-1', quantity=20, cost_price='60', selling_price='100')
+        pad = make_product('PAD-1', quantity=20, cost_price='250', selling_price='400')
+
+        sale = sell(self.owner, [(self.oil, 3), (pad, 1)], discount=20)
+        ret = create_return_transaction(self.owner, sale.doc_no, [{'product_id': self.oil.id, 'quantity': 1}])
+        post_return(ret)
+        sell(self.staff, [(self.oil, 1)])
+
+        self.today = timezone.localdate()
+
+    def metrics(self, user, days=1):
+        return get_dashboard_metrics(user, self.today - timedelta(days=days - 1), self.today, today=self.today)
+
+    def test_owner_totals(self):
+        metrics = self.metrics(self.owner)
+
+        self.assertEqual(metrics.net_sales, Decimal('680'))
+        self.assertEqual(metrics.total_bills, 2)
+        self.assertEqual(metrics.net_items_count, Decimal('4'))
+        # (700 - 430) + (100 - 60) - คืน (100 - 60)
+        self.assertEqual(metrics.net_profit, Decimal('270'))
+        self.assertEqual(metrics.change_percent, 100.0)
+        self.assertEqual(metrics.last_7_days[-1].total, 680.0)
+        self.assertEqual(metrics.top_products[0]['product__sku'], 'OIL-1')
+        self.assertEqual(metrics.inventory_value, Decimal('17') * 60 + Decimal('19') * 250)
+
+    def test_staff_sees_only_own_bills(self):
+        metrics = self.metrics(self.staff)
+
+        self.assertEqual((metrics.net_sales, metrics.total_bills), (Decimal('100'), 1))
+        self.assertEqual(metrics.last_7_days[-1].total, 1)
+        self.assertEqual([p['product__sku'] for p in metrics.top_products], ['OIL-1'])
+        self.assertEqual(len(metrics.recent_payments), 1)
+        self.assertEqual(metrics.net_profit, Decimal('0'))
+
+    def test_query_count_does_not_depend_on_range(self):
+        for days in (1, 365):
+            with self.subTest(days=days):
+                with self.assertNumQueries(4):
+                    self.metrics(self.owner, days)
+                with self.assertNumQueries(3):
+                    self.metrics(self.staff, days)
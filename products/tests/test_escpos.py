@@ -0,0 +1,79 @@
+import unicodedata
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from products.Services.escpos_service import CUT, GS, INIT, ReceiptBuilder, build_receipt, display_width
+from products.tests.factories import make_product, make_user, sell
+
+
+def printed_lines(data):
+    """ข้อความแต่ละบรรทัดที่พิมพ์ (ตัดคำสั่ง ESC/GS ออก)"""
+    text = data.decode('cp874', errors='replace')
+    lines = []
+    for line in text.split('\n'):
+        for command in ('\x1b@', '\x1bt\x15', '\x1ba\x00', '\x1ba\x01', '\x1bE\x01', '\x1bE\x00', '\x1d!\x00', '\x1d!\x11'):
+            line = line.replace(command, '')
+        lines.append(line)
+    return lines
+
+
+class ReceiptBuilderTests(SimpleTestCase):
+
+    def test_thai_marks_take_no_columns(self):
+        self.assertEqual(display_width('ผ้าเบรก'), 6)
+        self.assertEqual(display_width('น้ำมัน'), 4)
+
+    def test_pair_fills_the_paper_width(self):
+        out = ReceiptBuilder(32)
+        out.pair('ผ้าเบรกหน้า', '1,250.00')
+        line = out.parts[-1].decode('cp874').rstrip('\n')
+
+        self.assertEqual(display_width(line), 32)
+        self.assertTrue(line.endswith('1,250.00'))
+
+    def test_wrap_never_splits_a_mark_from_its_letter(self):
+        out = ReceiptBuilder(10)
+        out.wrap('น้ำมันเครื่องสังเคราะห์แท้ ขนาดหนึ่งลิตร')
+        lines = [part.decode('cp874').rstrip('\n') for part in out.parts[2:]]
+
+        self.assertGreater(len(lines), 2)
+        for line in lines:
+            self.assertLessEqual(display_width(line), 10)
+            self.assertNotEqual(unicodedata.category(line[0]), 'Mn')
+
+
+class BuildReceiptTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        oil = make_product('OIL-1', name='น้ำมันเครื่องสังเคราะห์แท้ 100% ขนาด 1 ลิตร', selling_price='350')
+        self.sale = sell(self.user, [(oil, 2)], discount=50)
+
+    def test_receipt_bytes(self):
+        data = build_receipt(self.sale, paper_width=58, settings_values={'store_name': 'ร้านทดสอบ'})
+
+        self.assertTrue(data.startswith(INIT + b'\x1bt\x15'))
+        self.assertTrue(data.endswith(CUT))
+        lines = printed_lines(data)
+        self.assertIn('ร้านทดสอบ', lines)
+        self.assertTrue(any(self.sale.doc_no in line and display_width(line) == 32 for line in lines))
+        self.assertTrue(any(line.endswith('650.00') for line in lines))
+        self.assertTrue(any(line.strip().startswith('2 ') and line.endswith('700.00') for line in lines))
+        self.assertTrue(all(display_width(line) <= 32 for line in lines if GS.decode() not in line))
+        self.assertNotIn(GS + b'(k', data)
+
+    def test_native_qr_when_requested(self):
+        data = build_receipt(self.sale, paper_width=80, settings_values={}, include_qr=True)
+        self.assertIn(b'5406650.00', data)
+        self.assertIn(GS + b'(k\x03\x001Q0', data)
+
+    def test_endpoint(self):
+        self.client.force_login(self.user)
+        url = reverse('print_receipt_escpos', args=[self.sale.id])
+
+        response = self.client.get(url, {'width': 58, 'download': 1})
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertIn(f'{self.sale.doc_no}.bin', response['Content-Disposition'])
+
+        self.assertEqual(self.client.get(url, {'width': 70}).status_code, 400)
@@ -0,0 +1,88 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from products.models import Category, ImportBatch, ImportRow, Product, Purchase, Supplier
+from products.Services import import_commit_service
+from products.Services.import_commit_service import commit_import_batch
+from products.tests.factories import make_product, make_user
+
+
+class CommitImportBatchTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        self.supplier = Supplier.objects.create(name='ร้านส่ง')
+        self.category = Category.objects.create(name='น้ำมัน', code='OIL')
+        self.batch = ImportBatch.objects.create(user=self.user)
+        self.existing = make_product('OIL-1', name='น้ำมันเครื่องเก่า', quantity=2, cost_price='100')
+
+    def stage(self, sku, quantity, cost='100', price='150', **extra):
+        return ImportRow.objects.create(
+            batch=self.batch, category=self.category, sku=sku, name=f"สินค้า {sku}",
+            cost_price=Decimal(cost), selling_price=Decimal(price), wholesale_price=Decimal(price),
+            quantity=Decimal(quantity), reference='INV-01', **extra,
+        )
+
+    def quantities(self):
+        return dict(Product.objects.values_list('sku', 'quantity'))
+
+    def test_commit_in_chunks(self):
+        self.stage('OIL-1', 3)
+        self.stage('OIL-2', 4, items_per_purchase_unit=6, unit='ชิ้น')
+        self.stage('PAD-9', 2, cost='300', bundle_type='L-R')
+
+        result = commit_import_batch(self.batch, self.user, self.supplier, chunk_size=2)
+
+        purchase = Purchase.objects.get()
+        self.assertEqual((result['created'], result['updated'], result['rows']), (4, 1, 3))
+        self.assertEqual(purchase.status, 'POSTED')
+        self.assertEqual(purchase.grand_total, Decimal('1300'))
+        self.assertFalse(ImportRow.objects.exists())
+
+        quantities = self.quantities()
+        self.assertEqual(quantities['OIL-1'], Decimal('5'))
+        self.assertEqual(quantities['OIL-2'], Decimal('24'))
+        self.assertEqual((quantities['PAD-9-L'], quantities['PAD-9-R']), (Decimal('2'), Decimal('2')))
+        pair = Product.objects.get(sku='PAD-9')
+        self.assertEqual(set(pair.bundle_components.values_list('sku', flat=True)), {'PAD-9-L', 'PAD-9-R'})
+        self.assertEqual(pair.available_sets, Decimal('2'))
+        self.assertEqual(Product.objects.get(sku='OIL-1').name, 'สินค้า OIL-1')
+
+    def test_failed_chunk_resumes_onto_the_same_draft(self):
+        for index in range(5):
+            self.stage(f'NEW-{index}', 1)
+
+        real_commit_chunk = import_commit_service._commit_chunk
+        calls = []
+
+        def fail_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("ฐานข้อมูลหลุด")
+            return real_commit_chunk(*args)
+
+        with mock.patch.object(import_commit_service, '_commit_chunk', side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError) as failure:
+                commit_import_batch(self.batch, self.user, self.supplier, chunk_size=2)
+
+        # ก้อนแรกบันทึกแล้ว, ก้อนที่ล้มย้อนกลับทั้งก้อน, ใบรับสินค้ายังเป็น DRAFT
+        draft = Purchase.objects.get()
+        self.assertEqual(failure.exception.import_result['rows'], 2)
+        self.assertEqual(draft.status, 'DRAFT')
+        self.assertEqual(draft.items.count(), 2)
+        self.assertEqual(ImportRow.objects.count(), 3)
+        self.assertEqual(self.quantities().get('NEW-0'), Decimal('0'))
+
+        self.batch.refresh_from_db()
+        result = commit_import_batch(self.batch, self.user, self.supplier, chunk_size=2)
+
+        self.assertEqual(result['purchase'].id, draft.id)
+        self.assertEqual(Purchase.objects.count(), 1)
+        draft.refresh_from_db()
+        self.assertEqual((draft.status, draft.items.count(), draft.grand_total), ('POSTED', 5, Decimal('500')))
+        self.assertEqual(
+            [self.quantities()[f'NEW-{index}'] for index in range(5)],
+            [Decimal('1')] * 5,
+        )
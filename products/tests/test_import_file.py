@@ -0,0 +1,88 @@
+import csv
+import io
+
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from products.models import Category, ImportBatch, Supplier
+from products.Services.import_service import ERROR_REPORT_HEADER, parse_import_frame
+from products.tests.factories import make_user
+
+
+HEADER = ['SKU', 'ชื่อสินค้า', 'หมวดหมู่', 'ราคาทุน', 'ราคาขาย', 'จำนวน', 'ซัพพลายเออร์']
+
+
+def import_frame(*rows):
+    return pd.DataFrame([dict(zip(HEADER, row)) for row in rows], columns=HEADER)
+
+
+def import_csv(*rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    writer.writerows(rows)
+    return SimpleUploadedFile('products.csv', buffer.getvalue().encode('utf-8-sig'), content_type='text/csv')
+
+
+class ParseImportFrameTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='น้ำมัน', code='OIL')
+        self.supplier = Supplier.objects.create(name='ร้านส่ง')
+
+    def test_valid_and_invalid_rows(self):
+        rows, errors = parse_import_frame(import_frame(
+            ['oil-1', 'น้ำมันเครื่อง', 'น้ำมัน', 120, 180, 5, 'ร้านส่ง'],
+            ['OIL-2', 'น้ำมันเกียร์', 'ไม่มีหมวด', 50, 80, 1, ''],
+            ['OIL-3', 'น้ำมันเบรก', 'น้ำมัน', 'สิบ', 80, 1, ''],
+            ['OIL-4', 'หัวเทียน', 'น้ำมัน', 30, 50, 0, ''],
+            ['OIL-5', 'จาระบี', 'น้ำมัน', 40, 60, 2, 'ร้านใหม่'],
+        ), default_supplier_id=self.supplier.id)
+
+        self.assertEqual([row['sku'] for row in rows], ['OIL-1', 'OIL-5'])
+        self.assertEqual({row['supplier_id'] for row in rows}, {self.supplier.id})
+        self.assertEqual(
+            [(e['row'], e['skipped']) for e in errors],
+            [(3, True), (4, True), (5, True), (6, False)],
+        )
+        self.assertIn('ไม่มีหมวด', errors[0]['message'])
+
+
+class ImportErrorReportTests(TestCase):
+    """รายงานแถวที่มีปัญหาเก็บบน ImportBatch → ดาวน์โหลดได้จากทุก Worker (ไม่อยู่ใน Session)"""
+
+    def setUp(self):
+        Category.objects.create(name='น้ำมัน', code='OIL')
+        self.user = make_user()
+        self.client.force_login(self.user)
+
+    def upload(self, *rows):
+        return self.client.post(reverse('import_product_file'), {'action': 'upload_file', 'file': import_csv(*rows)})
+
+    def download_report(self):
+        response = self.client.get(reverse('import_error_report'))
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+
+    def test_report_is_stored_on_the_batch(self):
+        self.upload(
+            ['OIL-1', 'น้ำมันเครื่อง', 'น้ำมัน', 120, 180, 5, ''],
+            ['OIL-2', 'น้ำมันเกียร์', 'ไม่มีหมวด', 50, 80, 1, ''],
+        )
+
+        batch = ImportBatch.objects.get(user=self.user)
+        self.assertEqual(batch.rows.count(), 1)
+        self.assertEqual([e['sku'] for e in batch.error_report], ['OIL-2'])
+
+        rows = self.download_report()
+        self.assertEqual(rows[0], ERROR_REPORT_HEADER)
+        self.assertEqual([row[:2] for row in rows[1:]], [['3', 'OIL-2']])
+
+    def test_clean_upload_clears_the_report(self):
+        self.upload(['OIL-2', 'น้ำมันเกียร์', 'ไม่มีหมวด', 50, 80, 1, ''])
+        self.upload(['OIL-1', 'น้ำมันเครื่อง', 'น้ำมัน', 120, 180, 5, ''])
+
+        self.assertEqual(ImportBatch.objects.get(user=self.user).error_report, [])
+        response = self.client.get(reverse('import_error_report'))
+        self.assertRedirects(response, reverse('import_product_file'), fetch_redirect_response=False)
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Category, ImportBatch, ImportRow
+from products.tests.factories import make_user
+from products.views.helpers import IMPORT_BATCH_KEY, IMPORT_PAGE_SIZE, STALE_BATCH_DAYS
+
+
+class ImportRowTests(TestCase):
+
+    def test_stage_round_trip(self):
+        category = Category.objects.create(name='น้ำมัน', code='OIL')
+        batch = ImportBatch.objects.create(user=make_user())
+
+        row = ImportRow.from_stage(batch, {
+            'category_id': category.id, 'sku': 'OIL-1', 'name': 'น้ำมันเครื่อง',
+            'cost_price': '120.50', 'selling_price': 'สิบ', 'quantity': None, 'unknown': 'x',
+        })
+        row.save()
+
+        self.assertEqual(row.cost_price, Decimal('120.50'))
+        self.assertEqual(row.selling_price, Decimal('0'))
+        self.assertEqual(row.quantity, Decimal('0'))
+        data = row.as_stage()
+        self.assertEqual(data['cost_price'], '120.50')
+        self.assertEqual(data['category_id'], category.id)
+        self.assertNotIn('unknown', data)
+
+
+class ManualImportStageTests(TestCase):
+    """ตะกร้านำเข้าอยู่ในตาราง ImportBatch / ImportRow — Session เก็บแค่ id ของ Batch"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='น้ำมัน', code='OIL')
+        self.owner = make_user('owner', is_superuser=True)
+        self.client.force_login(self.owner)
+        self.url = reverse('import_product_manual')
+
+    def add_row(self, name, quantity=5):
+        return self.client.post(self.url, {
+            'action': 'add_row', 'category': self.category.id, 'name': name,
+            'cost_price': '100', 'selling_price': '150', 'quantity': quantity,
+        })
+
+    def batch(self):
+        return ImportBatch.objects.get(id=self.client.session[IMPORT_BATCH_KEY])
+
+    def test_add_row_stores_rows_in_the_batch(self):
+        self.add_row('น้ำมันเครื่อง')
+        self.add_row('น้ำมันเกียร์')
+
+        batch = self.batch()
+        self.assertEqual(batch.user, self.owner)
+        self.assertEqual(list(batch.rows.values_list('name', flat=True)), ['น้ำมันเครื่อง', 'น้ำมันเกียร์'])
+        self.assertNotIn('import_stage', self.client.session)
+
+    def test_remove_row_by_id(self):
+        self.add_row('น้ำมันเครื่อง')
+        self.add_row('น้ำมันเกียร์')
+        first = self.batch().rows.first()
+
+        self.client.post(self.url, {'action': 'remove_row', 'row_id': first.id})
+
+        self.assertEqual(list(self.batch().rows.values_list('name', flat=True)), ['น้ำมันเกียร์'])
+
+    def test_cannot_remove_rows_of_another_batch(self):
+        other = ImportBatch.objects.create(user=make_user('other'))
+        row = ImportRow.objects.create(batch=other, category=self.category, name='ของคนอื่น')
+        self.add_row('น้ำมันเครื่อง')
+
+        self.client.post(self.url, {'action': 'remove_row', 'row_id': row.id})
+
+        self.assertTrue(ImportRow.objects.filter(id=row.id).exists())
+
+    def test_edit_moves_the_row_back_to_the_form(self):
+        self.add_row('น้ำมันเครื่อง')
+        row = self.batch().rows.get()
+
+        response = self.client.get(self.url, {'edit': row.id})
+
+        self.assertEqual(response.context['edit_data']['name'], 'น้ำมันเครื่อง')
+        self.assertFalse(ImportRow.objects.filter(id=row.id).exists())
+
+    def test_clear_all_drops_the_batch(self):
+        self.add_row('น้ำมันเครื่อง')
+        batch = self.batch()
+
+        self.client.post(self.url, {'action': 'clear_all'})
+
+        self.assertFalse(ImportBatch.objects.filter(id=batch.id).exists())
+        self.assertFalse(ImportRow.objects.exists())
+        self.assertNotIn(IMPORT_BATCH_KEY, self.client.session)
+
+    def test_preview_is_paginated(self):
+        self.add_row('น้ำมันเครื่อง')
+        batch = self.batch()
+        ImportRow.objects.bulk_create(
+            ImportRow(batch=batch, category=self.category, name=f"สินค้า {i}") for i in range(IMPORT_PAGE_SIZE)
+        )
+
+        response = self.client.get(self.url, {'page': 2})
+
+        self.assertEqual(response.context['total_rows'], IMPORT_PAGE_SIZE + 1)
+        self.assertEqual(len(response.context['stage']), 1)
+
+    def test_new_batch_purges_stale_batches(self):
+        stale = ImportBatch.objects.create(user=self.owner)
+        fresh = ImportBatch.objects.create(user=make_user('other'))
+        ImportBatch.objects.filter(id=stale.id).update(
+            updated_at=timezone.now() - timedelta(days=STALE_BATCH_DAYS + 1),
+        )
+
+        self.add_row('น้ำมันเครื่อง')
+
+        self.assertFalse(ImportBatch.objects.filter(id=stale.id).exists())
+        self.assertTrue(ImportBatch.objects.filter(id=fresh.id).exists())
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from products.models import Job
+from products.Services.job_service import (
+    JOB_HANDLERS, STALE_JOB_MINUTES, claim_job, enqueue_job, job_handler, requeue_stale_jobs, run_job,
+)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.register('tests_ok', lambda job: self.calls.append(job.id) or {'ok': job.id})
+        self.register('tests_boom', self.boom)
+
+    def register(self, kind, func):
+        job_handler(kind)(func)
+        self.addCleanup(JOB_HANDLERS.pop, kind, None)
+
+    def boom(self, job):
+        raise RuntimeError("พังตั้งใจ")
+
+    def make_stale(self, job, attempts=1):
+        # จำลอง Worker ตาย: RUNNING แต่ Heartbeat หยุดไปนานกว่า STALE_JOB_MINUTES
+        Job.objects.filter(id=job.id).update(
+            status='RUNNING', attempts=attempts, locked_by='dead:1',
+            updated_at=timezone.now() - timedelta(minutes=STALE_JOB_MINUTES + 1),
+        )
+
+    def test_unknown_kind_is_rejected_on_enqueue(self):
+        with self.assertRaises(ValueError):
+            enqueue_job('tests_missing')
+
+    def test_claim_takes_oldest_ready_job_once(self):
+        later = enqueue_job('tests_ok')
+        Job.objects.filter(id=later.id).update(run_after=timezone.now() + timedelta(hours=1))
+        first = enqueue_job('tests_ok')
+        second = enqueue_job('tests_ok')
+
+        job = claim_job('w1')
+        self.assertEqual((job.id, job.status, job.attempts, job.locked_by), (first.id, 'RUNNING', 1, 'w1'))
+        self.assertEqual(claim_job('w2').id, second.id)
+        self.assertIsNone(claim_job('w3'))
+
+    def test_run_job_marks_done_with_result(self):
+        enqueue_job('tests_ok')
+        job = claim_job('w1')
+
+        self.assertEqual(run_job(job), 'DONE')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.locked_by), ('DONE', {'ok': job.id}, ''))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failure_retries_then_fails(self):
+        created = enqueue_job('tests_boom', max_attempts=2)
+
+        self.assertEqual(run_job(claim_job('w1')), 'PENDING')
+        created.refresh_from_db()
+        self.assertEqual((created.status, created.attempts), ('PENDING', 1))
+        self.assertGreater(created.run_after, timezone.now())
+        self.assertIsNone(claim_job('w1'))   # ยังไม่ถึงเวลาลองใหม่
+
+        Job.objects.filter(id=created.id).update(run_after=timezone.now())
+        self.assertEqual(run_job(claim_job('w1')), 'FAILED')
+        created.refresh_from_db()
+        self.assertEqual((created.status, created.attempts), ('FAILED', 2))
+        self.assertIn("พังตั้งใจ", created.error)
+
+    def test_handler_removed_after_enqueue_fails_the_job(self):
+        enqueue_job('tests_ok')
+        JOB_HANDLERS.pop('tests_ok')
+
+        job = claim_job('w1')
+        self.assertEqual(run_job(job), 'FAILED')
+        job.refresh_from_db()
+        self.assertIn('tests_ok', job.error)
+
+    def test_requeue_only_jobs_without_heartbeat(self):
+        stale = enqueue_job('tests_ok')
+        exhausted = enqueue_job('tests_ok', max_attempts=1)
+        alive = enqueue_job('tests_ok')
+        self.make_stale(stale)
+        self.make_stale(exhausted)
+        Job.objects.filter(id=alive.id).update(status='RUNNING', attempts=1, locked_by='w1')
+
+        self.assertEqual(requeue_stale_jobs(), (1, 1))
+        statuses = dict(Job.objects.values_list('id', 'status'))
+        self.assertEqual(
+            (statuses[stale.id], statuses[exhausted.id], statuses[alive.id]),
+            ('PENDING', 'FAILED', 'RUNNING'),
+        )
+        self.assertEqual(claim_job('w2').id, stale.id)
+
+    def test_worker_requeues_stale_jobs_while_running(self):
+        stranded = enqueue_job('tests_ok')
+        Job.objects.filter(id=stranded.id).update(status='RUNNING', attempts=1, locked_by='dead:1')
+
+        def strand(job):
+            # Worker อื่นตายระหว่างที่ Worker นี้ทำงานอยู่ → ต้องถูกคืนคิวโดยไม่ต้อง Restart
+            self.make_stale(stranded)
+            return {}
+
+        self.register('tests_strand', strand)
+        enqueue_job('tests_strand')
+
+        with mock.patch('products.management.commands.run_worker.STALE_CHECK_SECONDS', 0):
+            call_command('run_worker', once=True, stdout=StringIO())
+
+        stranded.refresh_from_db()
+        self.assertEqual((stranded.status, stranded.attempts), ('DONE', 2))
+        self.assertEqual(self.calls, [stranded.id])
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from products.models import Product
+from products.Services.popular_models_service import get_popular_models
+from products.tests.factories import make_product
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-popular'},
+    'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-local'},
+})
+class PopularModelsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.wave = make_product('PAD-1', compatible_models='Wave 110i, Click 125')
+        make_product('PAD-2', compatible_models='Click 125, Scoopy i')
+        make_product('PAD-3', compatible_models='Click 125, Scoopy i')
+
+    def test_ranked_by_product_count_then_name(self):
+        self.assertEqual(get_popular_models(), ['Click 125', 'Scoopy i', 'Wave 110i'])
+        self.assertEqual(get_popular_models(limit=1), ['Click 125'])
+
+    def test_cached_after_first_read(self):
+        get_popular_models()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_popular_models(limit=2), ['Click 125', 'Scoopy i'])
+
+    def test_product_change_invalidates_after_commit(self):
+        get_popular_models()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for sku in ('PAD-4', 'PAD-5', 'PAD-6'):
+                make_product(sku, compatible_models='Wave 110i')
+
+        self.assertEqual(get_popular_models(), ['Wave 110i', 'Click 125', 'Scoopy i'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(sku__in=['PAD-4', 'PAD-5', 'PAD-6', 'PAD-1']).delete()
+
+        self.assertEqual(get_popular_models(), ['Click 125', 'Scoopy i'])
@@ -0,0 +1,65 @@
+from importlib import import_module
+from decimal import Decimal
+
+from django.apps import apps
+from django.test import TestCase
+from django.urls import reverse
+
+from products.models import Transaction, TransactionItem
+from products.Services.return_service import create_return_transaction
+from products.Services.sale_service import create_payment, create_sale_transaction, post_sale
+from products.tests.factories import make_product, make_user, sell
+
+
+class PriceTypeTests(TestCase):
+    """ประเภทราคา (ปลีก/ส่ง) บันทึกตอนขาย → รายงานกรองจากคอลัมน์ ไม่ต้องเดาจากราคา"""
+
+    def setUp(self):
+        self.user = make_user(is_superuser=True, is_staff=True)
+        self.oil = make_product('OIL-1', quantity=50, cost_price='60', selling_price='100', wholesale_price='80')
+
+    def sell_wholesale(self, qty):
+        sale = create_sale_transaction(self.user, [{'product_id': self.oil.id, 'quantity': qty}], price_type='wholesale')
+        post_sale(sale, payment_method='cash')
+        create_payment(sale, method='cash')
+        return sale
+
+    def test_stored_on_bill_lines_and_returns(self):
+        sale = self.sell_wholesale(2)
+        ret = create_return_transaction(self.user, sale.doc_no, [{'product_id': self.oil.id, 'quantity': 1}])
+
+        self.assertEqual(sale.price_type, 'wholesale')
+        self.assertEqual(set(sale.items.values_list('price_type', flat=True)), {'wholesale'})
+        self.assertEqual(ret.price_type, 'wholesale')
+        self.assertEqual(set(ret.items.values_list('price_type', flat=True)), {'wholesale'})
+
+    def test_report_splits_by_tier(self):
+        sell(self.user, [(self.oil, 1)])
+        self.sell_wholesale(3)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('retail_sales_report'))
+        self.assertEqual(response.context['retail_stats'], {'total': Decimal('100'), 'count': 1, 'profit': Decimal('40')})
+        self.assertEqual(response.context['wholesale_stats'], {'total': Decimal('240'), 'count': 1, 'profit': Decimal('60')})
+
+        response = self.client.get(reverse('retail_sales_report'), {'sale_type': 'wholesale'})
+        self.assertEqual([sale.price_type for sale in response.context['sales']], ['wholesale'])
+
+    def test_migration_classifies_old_lines_by_nearest_price(self):
+        pad = make_product('PAD-1', quantity=50, selling_price='400', wholesale_price='300')
+        sale = create_sale_transaction(self.user, [
+            {'product_id': self.oil.id, 'quantity': 1, 'custom_price': '82'},
+            {'product_id': pad.id, 'quantity': 1, 'custom_price': '310'},
+            {'product_id': pad.id, 'quantity': 1},
+        ])
+        # บิลเก่าก่อนมีคอลัมน์ → ค่าเริ่มต้นขายปลีกทั้งหมด
+        Transaction.objects.update(price_type='retail')
+        TransactionItem.objects.update(price_type='retail')
+
+        import_module('products.migrations.0034_transaction_price_type').fill_price_type(apps, None)
+
+        self.assertEqual(
+            list(sale.items.order_by('id').values_list('price_type', flat=True)),
+            ['wholesale', 'wholesale', 'retail'],
+        )
+        self.assertEqual(Transaction.objects.get(id=sale.id).price_type, 'wholesale')
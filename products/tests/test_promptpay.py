@@ -0,0 +1,61 @@
+import random
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from products.Services import payment_service
+from products.Services.payment_service import (
+    create_promptpay_payload, crc16_ccitt, crc16_ccitt_bitwise, promptpay_qr_image,
+)
+
+
+class PromptPayPayloadTests(SimpleTestCase):
+
+    def test_table_crc_matches_bitwise(self):
+        rng = random.Random(16)
+        for size in (0, 1, 7, 64, 300):
+            data = bytes(rng.randrange(256) for _ in range(size))
+            self.assertEqual(crc16_ccitt(data), crc16_ccitt_bitwise(data))
+
+    def test_phone_payload_with_amount(self):
+        payload = create_promptpay_payload('081-234-5678', Decimal('100'))
+
+        self.assertTrue(payload.startswith('000201010212'))
+        self.assertIn('0016A00000067701011101130066812345678', payload)
+        self.assertIn('5406100.00', payload)
+        body, checksum = payload[:-4], payload[-4:]
+        self.assertTrue(body.endswith('6304'))
+        self.assertEqual(checksum, f"{crc16_ccitt_bitwise(body.encode()):04X}")
+
+    def test_amount_forms_give_the_same_payload(self):
+        expected = create_promptpay_payload('0812345678', Decimal('100.00'))
+        for amount in (100, 100.0, '100', '100.001'):
+            self.assertEqual(create_promptpay_payload('0812345678', amount), expected)
+
+    def test_no_amount_and_national_id(self):
+        payload = create_promptpay_payload('1234567890123', 0)
+
+        self.assertTrue(payload.startswith('000201010211'))
+        self.assertIn('02131234567890123', payload)
+        self.assertNotIn('5406', payload)
+
+
+class PromptPayImageTests(SimpleTestCase):
+
+    def setUp(self):
+        payment_service._cached_qr.cache_clear()
+
+    def test_repeat_requests_hit_the_cache(self):
+        first = promptpay_qr_image('0812345678', 100)
+        second = promptpay_qr_image('081-234-5678', '100.00')
+
+        self.assertTrue(first.startswith('data:image/png;base64,'))
+        self.assertIs(first, second)
+        self.assertEqual(payment_service._cached_qr.cache_info().hits, 1)
+
+    def test_svg_format(self):
+        self.assertTrue(promptpay_qr_image('0812345678', 50, fmt='svg').startswith('data:image/svg+xml;base64,'))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            promptpay_qr_image('0812345678', 50, fmt='gif')
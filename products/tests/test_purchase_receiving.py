@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Product, Purchase, PurchaseItem, StockMovement, Supplier
+from products.Services.purchase_service import cancel_purchase, post_purchase
+from products.tests.factories import make_bundle, make_product, make_user
+
+
+class PurchaseReceivingTests(TestCase):
+    """รับเข้า / ยกเลิกใบรับสินค้า: จำนวน + ทุนเฉลี่ยถ่วงน้ำหนัก"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.supplier = Supplier.objects.create(name='ผู้ขาย')
+        self.oil = make_product('OIL-1', quantity=10, cost_price='60')
+        self.count = 0
+
+    def purchase(self, *lines):
+        self.count += 1
+        purchase = Purchase.objects.create(doc_no=f"PO-TEST-{self.count:03d}", supplier=self.supplier, created_by=self.user)
+        for product, quantity, unit_cost in lines:
+            PurchaseItem.objects.create(
+                purchase=purchase, product=product, quantity=Decimal(str(quantity)), unit_cost=Decimal(str(unit_cost)),
+            )
+        return purchase
+
+    def stock(self, product):
+        product.refresh_from_db()
+        return product.quantity, product.cost_price
+
+    def test_weighted_average_cost(self):
+        self.assertTrue(post_purchase(self.purchase((self.oil, 10, 80)), self.user))
+
+        self.assertEqual(self.stock(self.oil), (Decimal('20'), Decimal('70')))
+        movement = StockMovement.objects.get(product=self.oil, reference='PO-TEST-001')
+        self.assertEqual((movement.movement_type, movement.balance_after), ('IN', Decimal('20')))
+
+    def test_same_product_twice_in_one_purchase(self):
+        post_purchase(self.purchase((self.oil, 10, 80), (self.oil, 20, 100)), self.user)
+
+        # 10@60 + 10@80 → 20@70, + 20@100 → 40@85
+        self.assertEqual(self.stock(self.oil), (Decimal('40'), Decimal('85')))
+        balances = StockMovement.objects.filter(product=self.oil).order_by('id').values_list('balance_after', flat=True)
+        self.assertEqual(list(balances), [Decimal('20'), Decimal('40')])
+
+    def test_purchase_unit_multiplier(self):
+        box = make_product('BOX-1', quantity=0, cost_price='0', items_per_purchase_unit=4)
+
+        post_purchase(self.purchase((box, 2, 400)), self.user)
+
+        self.assertEqual(self.stock(box), (Decimal('8'), Decimal('100')))
+
+    def test_bundle_is_received_into_its_children(self):
+        left = make_product('PAD-L', quantity=0, cost_price='0')
+        right = make_product('PAD-R', quantity=0, cost_price='0')
+        bundle = make_bundle('PAD-SET', [left, right])
+
+        post_purchase(self.purchase((bundle, 5, 200)), self.user)
+
+        self.assertEqual(self.stock(left), (Decimal('5'), Decimal('100')))
+        self.assertEqual(self.stock(right), (Decimal('5'), Decimal('100')))
+        self.assertEqual(StockMovement.objects.get(product=bundle).balance_after, 0)
+
+    def test_cancel_takes_the_stock_back(self):
+        purchase = self.purchase((self.oil, 10, 80))
+        post_purchase(purchase, self.user)
+        purchase.refresh_from_db()
+
+        self.assertTrue(cancel_purchase(purchase, self.user))
+
+        purchase.refresh_from_db()
+        self.assertEqual(purchase.status, 'CANCELLED')
+        self.assertEqual(self.stock(self.oil), (Decimal('10'), Decimal('70')))
+        movement = StockMovement.objects.get(reference='CANCEL-PO-TEST-001')
+        self.assertEqual((movement.movement_type, movement.balance_after), ('OUT', Decimal('10')))
+
+    def test_query_count_does_not_grow_with_lines(self):
+        def post_queries(lines):
+            purchase = self.purchase(*lines)
+            with CaptureQueriesContext(connection) as ctx:
+                post_purchase(purchase, self.user)
+            return len(ctx)
+
+        small = post_queries([(make_product('A-1'), 1, 50)])
+        products = [make_product(f"B-{i}") for i in range(6)]
+        large = post_queries([(product, 1, 50) for product in products])
+
+        self.assertEqual(small, large)
+        self.assertEqual(Product.objects.filter(sku__startswith='B-', quantity=11).count(), 6)
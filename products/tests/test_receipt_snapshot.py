@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.Services.cache_tiers import forget_versions, local_cache
+from products.Services.receipt_snapshot_service import get_receipt_snapshot
+from products.Services.return_service import create_return_transaction, post_return
+from products.Services.sale_service import cancel_sale, create_sale_transaction
+from products.Services.settings_service import save_settings
+from products.tests.factories import make_product, make_user, sell
+
+
+@override_settings(SHARED_VERSION_POLL=0)
+class ReceiptSnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache().clear()
+        forget_versions()
+        self.user = make_user()
+        self.oil = make_product('OIL-1', name='น้ำมันเครื่อง', selling_price='350')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sale = sell(self.user, [(self.oil, 2)])
+
+    def reprint_queries(self, txn_id):
+        with CaptureQueriesContext(connection) as ctx:
+            snapshot = get_receipt_snapshot(txn_id)
+        return snapshot, len(ctx)
+
+    def test_snapshot_content(self):
+        snapshot = get_receipt_snapshot(self.sale.id, doc_type='SALE')
+
+        self.assertEqual(snapshot['sale']['doc_no'], self.sale.doc_no)
+        self.assertEqual(snapshot['sale']['status'], 'POSTED')
+        self.assertEqual(snapshot['sale']['payment']['method'], 'cash')
+        self.assertEqual(snapshot['sale']['total_quantity'], 2)
+        self.assertEqual(snapshot['items'][0]['product']['sku'], 'OIL-1')
+        self.assertEqual(snapshot['items'][0]['line_total'], 700)
+
+    def test_wrong_doc_type_or_missing_bill(self):
+        self.assertIsNone(get_receipt_snapshot(self.sale.id, doc_type='RETURN'))
+        self.assertIsNone(get_receipt_snapshot(999999))
+
+    def test_cancel_gives_a_new_snapshot(self):
+        get_receipt_snapshot(self.sale.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_sale(self.sale)
+
+        with self.settings(SHARED_VERSION_POLL=60):
+            snapshot, queries = self.reprint_queries(self.sale.id)
+        self.assertEqual(snapshot['sale']['status'], 'CANCELLED')
+        self.assertEqual(queries, 1)
+
+    def test_settings_change_gives_a_new_snapshot(self):
+        get_receipt_snapshot(self.sale.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            save_settings({'store_name': 'ร้านใหม่'})
+
+        self.assertEqual(get_receipt_snapshot(self.sale.id)['settings']['store_name'], 'ร้านใหม่')
+
+    def test_draft_is_never_cached(self):
+        draft = create_sale_transaction(self.user, [{'product_id': self.oil.id, 'quantity': 1}])
+
+        get_receipt_snapshot(draft.id)
+        draft.items.update(quantity=3)
+        snapshot, queries = self.reprint_queries(draft.id)
+        self.assertEqual(snapshot['items'][0]['quantity'], 3)
+        self.assertGreater(queries, 1)
+
+    def test_receipt_and_return_pages(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('print_receipt', args=[self.sale.id]))
+        self.assertContains(response, self.sale.doc_no)
+        self.assertContains(response, 'น้ำมันเครื่อง')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ret = create_return_transaction(self.user, self.sale.doc_no, [{'product_id': self.oil.id, 'quantity': 1}])
+            post_return(ret)
+        response = self.client.get(reverse('return_detail', args=[ret.id]))
+        self.assertContains(response, ret.doc_no)
+
+        self.assertEqual(self.client.get(reverse('print_receipt', args=[ret.id])).status_code, 404)
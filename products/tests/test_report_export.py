@@ -0,0 +1,79 @@
+import csv
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from products.Services.return_service import create_return_transaction, post_return
+from products.Services.sale_service import cancel_sale
+from products.tests.factories import make_product, make_user, sell
+from products.views.product_report_views import PRODUCT_EXPORT_HEADER
+from products.views.reports_return import RETURN_EXPORT_HEADER
+from products.views.sales_report import SALES_EXPORT_HEADER
+
+
+class ReportExportTests(TestCase):
+    """ไฟล์ส่งออกต้องมีแถวเท่ากับที่หน้าเว็บกรองได้ (ครบทุกหน้า ไม่ใช่แค่หน้าแรก)"""
+
+    def setUp(self):
+        self.user = make_user(is_superuser=True, is_staff=True)
+        self.oil = make_product('OIL-1', quantity=100, cost_price='60', selling_price='100')
+        self.pad = make_product('PAD-1', quantity=100, cost_price='250', selling_price='400')
+
+        self.sales = [sell(self.user, [(self.oil, 1)]) for _ in range(4)]
+        self.sales.append(sell(self.user, [(self.pad, 1)], method='transfer'))
+        cancel_sale(sell(self.user, [(self.pad, 1)]))
+
+        self.ret = create_return_transaction(self.user, self.sales[0].doc_no, [{'product_id': self.oil.id, 'quantity': 1}])
+        post_return(self.ret)
+        self.client.force_login(self.user)
+
+    def download(self, name, fmt, **params):
+        response = self.client.get(reverse(name), {'export': fmt, **params})
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+        if fmt == 'xlsx':
+            return [list(row) for row in load_workbook(io.BytesIO(content), read_only=True).active.values]
+        return list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+
+    def test_sales_csv_has_every_posted_bill(self):
+        # Chunk เล็ก → ยอดคืนต้องจับคู่ถูกข้าม Chunk
+        with mock.patch('products.views.sales_report.EXPORT_CHUNK_SIZE', 2):
+            rows = self.download('sales_report', 'csv')
+
+        self.assertEqual(rows[0], SALES_EXPORT_HEADER)
+        self.assertEqual(sorted(row[0] for row in rows[1:]), sorted(sale.doc_no for sale in self.sales))
+        refunded = next(row for row in rows[1:] if row[0] == self.sales[0].doc_no)
+        self.assertEqual(Decimal(refunded[SALES_EXPORT_HEADER.index('ยอดคืน')]), Decimal('100'))
+        self.assertEqual(Decimal(refunded[SALES_EXPORT_HEADER.index('ยอดหลังหักคืน')]), Decimal('0'))
+
+    def test_sales_filters_apply_to_export(self):
+        rows = self.download('sales_report', 'csv', payment_method='transfer')
+        self.assertEqual([row[0] for row in rows[1:]], [self.sales[4].doc_no])
+
+        rows = self.download('sales_report', 'csv', status='CANCELLED')
+        self.assertEqual(len(rows), 2)
+
+    def test_sales_xlsx_matches_csv(self):
+        csv_rows = self.download('sales_report', 'csv')
+        xlsx_rows = self.download('sales_report', 'xlsx')
+
+        self.assertEqual(xlsx_rows[0], SALES_EXPORT_HEADER)
+        self.assertEqual([row[0] for row in xlsx_rows], [row[0] for row in csv_rows])
+
+    def test_product_export(self):
+        rows = self.download('product_sales_report', 'csv')
+
+        self.assertEqual(rows[0], PRODUCT_EXPORT_HEADER)
+        quantities = {row[0]: Decimal(row[4]) for row in rows[1:]}
+        self.assertEqual(quantities, {'OIL-1': Decimal('4'), 'PAD-1': Decimal('1')})
+
+    def test_return_export(self):
+        rows = self.download('return_list', 'xlsx')
+
+        self.assertEqual(rows[0], RETURN_EXPORT_HEADER)
+        self.assertEqual([row[0] for row in rows[1:]], [self.ret.doc_no])
+        self.assertEqual(Decimal(str(rows[1][-1])), Decimal('1'))
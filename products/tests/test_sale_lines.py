@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Transaction
+from products.Services.sale_service import create_sale_transaction
+from products.tests.factories import make_bundle, make_product, make_user
+
+
+class CreateSaleLinesTests(TestCase):
+    """สร้างรายการขายแบบ Batch: โหลดสินค้า / ลูกชุดครั้งเดียว ตรวจสต็อกทั้งบิลในหน่วยความจำ"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.products = [make_product(f'OIL-{i}', quantity=50, selling_price='100') for i in range(12)]
+        self.left = make_product('LAMP-L', quantity=5, cost_price='40')
+        self.right = make_product('LAMP-R', quantity=3, cost_price='45')
+        self.pair = make_bundle('LAMP-LR', [self.left, self.right], selling_price='250')
+
+    def lines(self, count):
+        return [{'product_id': p.id, 'quantity': 1} for p in self.products[:count]] + [
+            {'product_id': self.pair.id, 'quantity': 1},
+        ]
+
+    def test_query_count_does_not_grow_with_lines(self):
+        create_sale_transaction(self.user, self.lines(1))   # แถวตัวนับเลขที่เอกสารของวันนี้
+        counts = []
+        for count in (2, 12):
+            with CaptureQueriesContext(connection) as queries:
+                create_sale_transaction(self.user, self.lines(count))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bundle_line_snapshots_components(self):
+        sale = create_sale_transaction(self.user, [{'product_id': self.pair.id, 'quantity': 2}])
+
+        line = sale.items.get()
+        self.assertEqual(sorted(line.bundle_items), sorted([self.left.id, self.right.id]))
+        self.assertEqual(sale.total_amount, Decimal('500'))
+
+    def test_prices(self):
+        oil = self.products[0]
+        oil.wholesale_price = Decimal('80')
+        oil.save()
+
+        wholesale = create_sale_transaction(self.user, [{'product_id': oil.id, 'quantity': 2}], price_type='wholesale')
+        custom = create_sale_transaction(self.user, [{'product_id': oil.id, 'quantity': 1, 'custom_price': '95'}], discount_amount=5)
+
+        self.assertEqual(wholesale.items.get().unit_price, Decimal('80'))
+        self.assertEqual((custom.total_amount, custom.grand_total), (Decimal('95'), Decimal('90')))
+
+    def test_children_demand_is_summed_across_lines(self):
+        with self.assertRaisesMessage(ValueError, 'LAMP-R'):
+            create_sale_transaction(self.user, [
+                {'product_id': self.pair.id, 'quantity': 2},
+                {'product_id': self.right.id, 'quantity': 2},
+            ])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_inactive_product_is_rejected(self):
+        oil = self.products[0]
+        oil.is_active = False
+        oil.save()
+
+        with self.assertRaisesMessage(ValueError, 'ไม่พบสินค้า'):
+            create_sale_transaction(self.user, [{'product_id': oil.id, 'quantity': 1}])
@@ -0,0 +1,129 @@
+import io
+from importlib import import_module
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from products.models import DailySalesSummary, ProductDailySales
+from products.Services.return_service import create_return_transaction, post_return
+from products.Services.sale_service import cancel_sale
+from products.Services.sales_summary_service import (
+    SUMMARY_FIELDS, rebuild_product_daily_sales, rebuild_sales_summary,
+)
+from products.tests.factories import make_product, make_user, sell
+
+
+PRODUCT_FIELDS = ('qty', 'sales_amount', 'cost_amount', 'return_qty', 'return_amount', 'return_cost')
+
+
+def summary_table():
+    """ยอดในตารางสรุป (ตัดแถวที่เป็น 0 ทั้งแถว เช่น บิลที่ขายแล้วยกเลิกในวันเดียวกัน)"""
+    rows = {}
+    for row in DailySalesSummary.objects.values('summary_date', 'created_by_id', 'doc_type', 'payment_method', *SUMMARY_FIELDS):
+        values = tuple(row[name] for name in SUMMARY_FIELDS)
+        if any(values):
+            rows[(row['summary_date'], row['created_by_id'], row['doc_type'], row['payment_method'])] = values
+    return rows
+
+
+def product_table():
+    rows = {}
+    for row in ProductDailySales.objects.values('product_id', 'sales_date', *PRODUCT_FIELDS):
+        values = tuple(row[name] for name in PRODUCT_FIELDS)
+        if any(values):
+            rows[(row['product_id'], row['sales_date'])] = values
+    return rows
+
+
+class RecordBillMatchesRebuildTests(TestCase):
+    """ยอดที่บวก/หักทีละบิล (record_bill) ต้องเท่ากับการคำนวณใหม่จากบิล POSTED"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.oil = make_product('OIL-1', quantity=20, cost_price='60', selling_price='100')
+        self.pad = make_product('PAD-1', quantity=20, cost_price='250', selling_price='400')
+
+        # ขายปกติ + รับคืนบางส่วน
+        self.sale = sell(self.user, [(self.oil, 3), (self.pad, 1)], discount=20)
+        self.ret = create_return_transaction(self.user, self.sale.doc_no, [{'product_id': self.oil.id, 'quantity': 1}])
+        post_return(self.ret)
+
+        # ขายแล้วยกเลิก → ต้องไม่เหลือยอด
+        cancelled = sell(self.user, [(self.pad, 2)], method='transfer')
+        cancel_sale(cancelled)
+
+    def test_incremental_rows(self):
+        summary = summary_table()
+        sale_row = next(v for k, v in summary.items() if k[2] == 'SALE')
+        return_row = next(v for k, v in summary.items() if k[2] == 'RETURN')
+        self.assertEqual(len(summary), 2)
+        self.assertEqual(sale_row[SUMMARY_FIELDS.index('bill_count')], 1)
+        self.assertEqual(sale_row[SUMMARY_FIELDS.index('grand_total')], Decimal('680'))
+        self.assertEqual(return_row[SUMMARY_FIELDS.index('grand_total')], Decimal('-100'))
+
+        products = product_table()
+        oil = next(v for k, v in products.items() if k[0] == self.oil.id)
+        self.assertEqual(oil, (Decimal('3'), Decimal('300'), Decimal('180'), Decimal('1'), Decimal('100'), Decimal('60')))
+
+    def test_rebuild_matches_record_bill(self):
+        summary, products = summary_table(), product_table()
+
+        self.assertEqual(rebuild_sales_summary(), 2)
+        self.assertEqual(rebuild_product_daily_sales(), 2)
+
+        self.assertEqual(summary_table(), summary)
+        self.assertEqual(product_table(), products)
+
+    def test_rebuild_command(self):
+        summary, products = summary_table(), product_table()
+        DailySalesSummary.objects.all().delete()
+        ProductDailySales.objects.all().delete()
+
+        call_command('rebuild_sales_summary', stdout=io.StringIO())
+
+        self.assertEqual(summary_table(), summary)
+        self.assertEqual(product_table(), products)
+
+    def test_data_migration_fills_old_sales(self):
+        summary, products = summary_table(), product_table()
+        DailySalesSummary.objects.all().delete()
+        ProductDailySales.objects.all().delete()
+
+        migration = import_module('products.migrations.0041_fill_sales_summaries')
+        migration.fill_sales_summaries(apps, None)
+
+        self.assertEqual(summary_table(), summary)
+        self.assertEqual(product_table(), products)
+
+
+class SalesReportRollupTests(TestCase):
+    """หน้ารายงานขาย: ยอดจากตารางสรุปต้องเท่ากับยอดที่รวมจากหัวบิล"""
+
+    def setUp(self):
+        self.user = make_user(is_superuser=True, is_staff=True)
+        oil = make_product('OIL-1', quantity=20, cost_price='60', selling_price='100')
+        pad = make_product('PAD-1', quantity=20, cost_price='250', selling_price='400')
+        self.sale = sell(self.user, [(oil, 3), (pad, 1)], discount=20)
+        sell(self.user, [(oil, 1)], method='transfer')
+        cancel_sale(sell(self.user, [(pad, 2)]))
+        self.client.force_login(self.user)
+
+    def report_summary(self, **params):
+        response = self.client.get(reverse('sales_report'), params)
+        self.assertEqual(response.status_code, 200)
+        return {key: Decimal(str(value)) for key, value in response.context['summary'].items()}
+
+    def test_rollup_summary_matches_bill_headers(self):
+        # ค้นเลขบิล → คำนวณจากหัวบิล, ไม่กรอง → อ่านจากตารางสรุป
+        from_bills = self.report_summary(search_doc_no=self.sale.doc_no[:4])
+        from_rollup = self.report_summary()
+
+        self.assertEqual(from_rollup, from_bills)
+        self.assertEqual(from_rollup['total_bills'], 2)
+        self.assertEqual(from_rollup['total_grand'], Decimal('780'))
+
+    def test_payment_method_filter(self):
+        self.assertEqual(self.report_summary(payment_method='transfer')['total_grand'], Decimal('100'))
@@ -0,0 +1,151 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from products.Services import search_index
+from products.Services.cache_tiers import forget_versions
+from products.Services.search_backends import MemorySearchBackend, SQLiteFTSSearchBackend, _fts_query
+from products.tests.factories import make_product
+
+
+# Cache ค่าเริ่มต้นของระบบเมื่อไม่ตั้ง REDIS_URL (incr/touch ทำงานผ่าน SQL)
+DATABASE_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'pos_cache'},
+    'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-local'},
+}
+
+
+@override_settings(CACHES=DATABASE_CACHES)
+class SearchIndexInvalidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        forget_versions()
+        search_index.reset_search_index()
+        self.addCleanup(search_index.reset_search_index)
+        self.product = make_product('BRK-100', name='ผ้าเบรกหน้า')
+
+    def rename(self, product, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = name
+            product.save()
+
+    def expires_of(self, key):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT expires FROM pos_cache WHERE cache_key = %s", [cache.make_key(key)])
+            return cursor.fetchone()[0]
+
+    def test_version_counter_never_expires(self):
+        self.rename(self.product, 'ผ้าเบรกหลัง')
+        self.rename(self.product, 'ผ้าเบรกหน้า')
+
+        self.assertEqual(search_index.current_version(), 2)
+        self.assertEqual(self.expires_of(search_index.VERSION_KEY).year, 9999)
+
+    def test_memory_index_reloads_changed_products(self):
+        backend = MemorySearchBackend()
+        self.assertEqual([pid for pid, _ in backend.search('หน้า')], [self.product.id])
+
+        self.rename(self.product, 'ผ้าเบรกหลัง')
+
+        self.assertEqual(backend.search('หน้า'), [])
+        self.assertEqual([pid for pid, _ in backend.search('หลัง')], [self.product.id])
+
+    def test_memory_index_drops_deactivated_products(self):
+        self.assertTrue(MemorySearchBackend().search('BRK'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.is_active = False
+            self.product.save()
+
+        self.assertEqual(MemorySearchBackend().search('BRK'), [])
+
+
+@override_settings(CACHES=DATABASE_CACHES)
+class FTSSyncTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        forget_versions()
+        search_index.reset_search_index()
+        self.addCleanup(search_index.reset_search_index)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.backend = SQLiteFTSSearchBackend(path=Path(directory) / 'fts.sqlite3')
+        self.product = make_product('OIL-200', name='น้ำมันเครื่อง')
+
+    def fts_ids(self, text):
+        return self.backend._match(_fts_query(text), 10)
+
+    def rename(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = name
+            self.product.save()
+
+    def test_incremental_sync(self):
+        self.assertEqual(self.fts_ids('OIL'), [self.product.id])
+
+        self.rename('ไส้กรองอากาศ')
+
+        self.assertEqual(self.fts_ids('ไส้กรอง'), [self.product.id])
+        self.assertEqual(self.fts_ids('น้ำมันเครื่อง'), [])
+
+    def test_counter_reset_rebuilds_instead_of_skipping(self):
+        for name in ('น้ำมันเกียร์', 'น้ำมันเบรก', 'น้ำมันเครื่อง'):
+            self.rename(name)
+        self.assertEqual(self.fts_ids('OIL'), [self.product.id])
+        self.assertEqual(self.backend._version, 3)
+
+        # Cache ถูกล้าง → ตัวนับเริ่มที่ 1 ใหม่ (น้อยกว่าที่ Sync ไว้)
+        cache.clear()
+        self.rename('ไส้กรองอากาศ')
+        self.assertEqual(search_index.current_version(), 1)
+
+        self.assertEqual(self.fts_ids('ไส้กรอง'), [self.product.id])
+        self.assertEqual(self.backend._version, 1)
+
+
+@override_settings(CACHES=DATABASE_CACHES)
+class FTSSearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        forget_versions()
+        search_index.reset_search_index()
+        self.addCleanup(search_index.reset_search_index)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.backend = SQLiteFTSSearchBackend(path=Path(directory) / 'fts.sqlite3')
+        self.front = make_product('BRK-100', name='ผ้าเบรกหน้า', compatible_models='Wave 110i')
+        self.rear = make_product('PAD-900', name='ผ้าเบรกหลัง BRK-100', compatible_models='Click 125')
+
+    def test_exact_sku_comes_first(self):
+        results = self.backend.search('BRK-100')
+        self.assertEqual(results[0], (self.front.id, 'exact_sku'))
+        self.assertEqual({pid for pid, _ in results}, {self.front.id, self.rear.id})
+
+    def test_thai_name_with_common_misspelling(self):
+        results = self.backend.search('ผ้าเบรค')
+        self.assertEqual({pid for pid, _ in results}, {self.front.id, self.rear.id})
+
+    def test_mid_word_fragment_falls_back_to_substring(self):
+        # FTS ตรงเฉพาะต้นคำ → "RK-10" ไม่เจอใน FTS แต่ substring เจอ
+        self.assertEqual(self.backend._match(_fts_query('RK-10'), 10), [])
+        self.assertEqual(self.backend.search('RK-10'), [(self.front.id, 'sku'), (self.rear.id, 'name')])
+
+    def test_filter_by_product_and_model(self):
+        self.assertEqual(self.backend.filter(model_query='wave'), [self.front.id])
+        self.assertEqual(self.backend.filter(product_query='ผ้าเบรก', model_query='click'), [self.rear.id])
+        self.assertEqual(self.backend.filter(product_query='ผ้าเบรก', model_query='scoopy'), [])
+
+    def test_matches_memory_backend_on_the_same_query(self):
+        memory = MemorySearchBackend()
+        for query in ('BRK', 'ผ้าเบรก', 'wave'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    {pid for pid, _ in self.backend.search(query)},
+                    {pid for pid, _ in memory.search(query)},
+                )
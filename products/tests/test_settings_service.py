@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from products.models import SystemSetting
+from products.Services import settings_service
+from products.Services.cache_tiers import forget_versions
+from products.Services.settings_service import VERSION_KEY, get_setting, get_settings, save_settings, settings_version
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'pos_cache'},
+        'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-local'},
+    },
+    SHARED_VERSION_POLL=0,
+)
+class SettingsServiceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        forget_versions()
+        settings_service._local['version'] = None
+
+    def test_defaults(self):
+        SystemSetting.objects.filter(key='store_phone').delete()
+
+        self.assertEqual(get_setting('store_phone'), '')
+        self.assertEqual(get_setting('store_phone', '02-000-0000'), '02-000-0000')
+        self.assertEqual(get_setting('no_such_key'), '')
+        self.assertEqual(get_settings()['receipt_footer'], SystemSetting.get('receipt_footer'))
+
+    def test_set_is_seen_after_commit(self):
+        get_settings()
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemSetting.set('store_name', 'ร้านใหม่')
+
+        self.assertEqual(get_setting('store_name'), 'ร้านใหม่')
+
+    def test_rolled_back_save_keeps_the_version(self):
+        version = settings_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    save_settings({'store_name': 'ร้านชั่วคราว'})
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(settings_version(), version)
+        self.assertNotEqual(get_setting('store_name'), 'ร้านชั่วคราว')
+
+    def test_unchanged_save_keeps_the_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            save_settings({'store_name': 'ร้านเดิม'})
+        version = settings_version()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            save_settings({'store_name': 'ร้านเดิม'})
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(settings_version(), version)
+
+    def test_other_process_change_is_loaded_when_the_version_moves(self):
+        SystemSetting.set('store_name', 'ร้านเดิม')
+        get_settings()
+
+        # Process อื่นแก้ค่าแล้วเปลี่ยน version (ไม่ผ่าน Signal ของ Process นี้)
+        SystemSetting.objects.filter(key='store_name').update(value='ร้านจากเครื่องอื่น')
+        self.assertEqual(get_setting('store_name'), 'ร้านเดิม')
+        cache.set(VERSION_KEY, 'other-process', None)
+
+        self.assertEqual(get_setting('store_name'), 'ร้านจากเครื่องอื่น')
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from products.models import Product, StockMovement, Transaction
+from products.Services.return_service import cancel_return, create_return_transaction, post_return
+from products.Services.sale_service import cancel_sale, create_sale_transaction, post_sale
+from products.tests.factories import make_bundle, make_product, make_user, sell
+
+
+class StockEngineTests(TestCase):
+    """ตัด/คืนสต็อกทั้งบิลในรอบเดียว: ขาย → ยกเลิก / รับคืน → ยกเลิกรับคืน ต้องกลับมาที่เดิม"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.left = make_product('LAMP-L', quantity=5)
+        self.right = make_product('LAMP-R', quantity=3)
+        self.pair = make_bundle('LAMP-LR', [self.left, self.right])
+
+    def stock(self):
+        return dict(Product.objects.filter(id__in=[self.left.id, self.right.id]).values_list('sku', 'quantity'))
+
+    def movements(self, reference):
+        return list(
+            StockMovement.objects.filter(reference=reference)
+            .order_by('id').values_list('product__sku', 'movement_type', 'quantity', 'balance_after')
+        )
+
+    def test_sale_and_cancel_round_trip(self):
+        # ลูกตัวเดียวกันทั้งขายเดี่ยวและอยู่ในชุด → รวมจำนวนก่อนเช็คสต็อก, balance_after ไล่ตามลำดับรายการ
+        sale = sell(self.user, [(self.left, 1), (self.pair, 2)])
+
+        self.assertEqual(self.stock(), {'LAMP-L': Decimal('2'), 'LAMP-R': Decimal('1')})
+        self.assertEqual(self.movements(sale.doc_no), [
+            ('LAMP-L', 'OUT', Decimal('1'), Decimal('4')),
+            ('LAMP-L', 'OUT', Decimal('2'), Decimal('2')),
+            ('LAMP-R', 'OUT', Decimal('2'), Decimal('1')),
+        ])
+
+        cancel_sale(sale)
+        self.assertEqual(self.stock(), {'LAMP-L': Decimal('5'), 'LAMP-R': Decimal('3')})
+        self.assertEqual(len(self.movements(f'CANCEL-{sale.doc_no}')), 3)
+        self.assertEqual(Transaction.objects.get(id=sale.id).status, 'CANCELLED')
+
+    def test_insufficient_stock_changes_nothing(self):
+        # พักบิลไว้ตอนสต็อกพอ แล้วเครื่องอื่นขาย LAMP-L ไปก่อน → ตอนยืนยันทั้งบิลต้องการ 4 แต่เหลือ 3
+        sale = create_sale_transaction(self.user, [
+            {'product_id': self.left.id, 'quantity': 2},
+            {'product_id': self.pair.id, 'quantity': 2},
+        ])
+        Product.objects.filter(id=self.left.id).update(quantity=3)
+
+        with self.assertRaisesMessage(ValueError, 'สต็อกไม่พอ'):
+            post_sale(sale, payment_method='cash')
+
+        self.assertEqual(self.stock(), {'LAMP-L': Decimal('3'), 'LAMP-R': Decimal('3')})
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(Transaction.objects.get(id=sale.id).status, 'DRAFT')
+
+    def test_return_and_cancel_return_round_trip(self):
+        sale = sell(self.user, [(self.pair, 2)])
+        ret = create_return_transaction(self.user, sale.doc_no, [{'product_id': self.pair.id, 'quantity': 1}])
+
+        post_return(ret)
+        self.assertEqual(self.stock(), {'LAMP-L': Decimal('4'), 'LAMP-R': Decimal('2')})
+        self.assertEqual([m[:3] for m in self.movements(ret.doc_no)], [
+            ('LAMP-L', 'IN', Decimal('1')),
+            ('LAMP-R', 'IN', Decimal('1')),
+        ])
+
+        cancel_return(ret)
+        self.assertEqual(self.stock(), {'LAMP-L': Decimal('3'), 'LAMP-R': Decimal('1')})
+        self.assertEqual(len(self.movements(f'CANCEL-{ret.doc_no}')), 2)
+
+    def test_cancel_skips_deleted_children(self):
+        sale = sell(self.user, [(self.pair, 1)])
+        StockMovement.objects.filter(product=self.right).delete()
+        Product.objects.filter(id=self.right.id).delete()
+
+        cancel_sale(sale)
+        self.assertEqual(Product.objects.get(id=self.left.id).quantity, Decimal('5'))
+        self.assertEqual(self.movements(f'CANCEL-{sale.doc_no}')[0][:3], ('LAMP-L', 'IN', Decimal('1')))
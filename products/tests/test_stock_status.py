@@ -0,0 +1,59 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from products.models import Product
+from products.Services.product_service import ProductService
+from products.tests.factories import make_bundle, make_product, make_user
+
+
+class StockStatusSQLTests(TestCase):
+    """สถานะสต็อกฝั่ง SQL ต้องตรงกับ get_stock_status ของสินค้าแต่ละตัว"""
+
+    def setUp(self):
+        make_product('OUT-1', quantity=0)
+        make_product('LOW-1', quantity=5)                   # min_stock 0 → เกณฑ์ 5
+        make_product('LOW-2', quantity=12, min_stock=12)
+        make_product('IN-1', quantity=6)
+        make_product('IN-2', quantity=13, min_stock=12)
+        left = make_product('LAMP-L', quantity=30)
+        right = make_product('LAMP-R', quantity=2)
+        make_bundle('LAMP-LR', [left, right])                # ชุดอ่าน available_sets = 2
+
+    def test_annotation_matches_python_rule(self):
+        annotated = ProductService.annotate_stock_status(Product.objects.all())
+        for product in annotated:
+            with self.subTest(sku=product.sku):
+                self.assertEqual(product.stock_status, ProductService.get_stock_status(product)['status'])
+
+    def test_filter_and_counts(self):
+        products = ProductService.annotate_stock_status(Product.objects.all())
+
+        low = ProductService.filter_stock_status(products, 'low_stock')
+        self.assertEqual(sorted(low.values_list('sku', flat=True)), ['LAMP-LR', 'LAMP-R', 'LOW-1', 'LOW-2'])
+        self.assertEqual(
+            ProductService.stock_status_counts(products),
+            {'total': 8, 'in_stock': 3, 'low_stock': 4, 'out_of_stock': 1},
+        )
+        self.assertEqual(ProductService.filter_stock_status(products, 'bogus').count(), 8)
+
+
+class ManageProductsPageTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(make_user(is_superuser=True, is_staff=True))
+
+    def page(self, **params):
+        response = self.client.get(reverse('manage_products'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_filters_in_sql_before_paginating(self):
+        for i in range(25):
+            make_product(f'LOW-{i:02d}', quantity=1)
+        for i in range(5):
+            make_product(f'IN-{i:02d}', quantity=100)
+
+        context = self.page(stock_status='low_stock', page=2)
+        self.assertEqual(context['total_products'], 25)
+        self.assertEqual([p.sku for p in context['products']], [f'LOW-{i:02d}' for i in range(20, 25)])
+        self.assertEqual(context['status_counts']['in_stock'], 5)
@@ -0,0 +1,64 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from products.models import Product, VehicleModel
+from products.Services.product_service import ProductService
+from products.tests.factories import make_product
+
+
+class VehicleModelLinkTests(TestCase):
+    """ตาราง VehicleModel ต้องตรงกับ Product.compatible_models และ product_count ต้องตรงกับจำนวนที่ผูก"""
+
+    def counts(self):
+        return dict(VehicleModel.objects.filter(product_count__gt=0).values_list('name_key', 'product_count'))
+
+    def test_save_links_and_counts_models(self):
+        make_product('PAD-1', compatible_models='Honda Wave 110i, Click 125, honda  wave 110i')
+        make_product('PAD-2', compatible_models='Click 125')
+
+        self.assertEqual(self.counts(), {'honda wave 110i': 1, 'click 125': 2})
+
+    def test_editing_moves_counts(self):
+        product = make_product('PAD-1', compatible_models='Wave 110i, Click 125')
+        product.compatible_models = 'Click 125, Scoopy i'
+        product.save()
+
+        self.assertEqual(self.counts(), {'click 125': 1, 'scoopy i': 1})
+        self.assertEqual(
+            sorted(product.vehicle_models.values_list('name', flat=True)),
+            ['Click 125', 'Scoopy i'],
+        )
+
+    def test_stock_only_save_does_not_touch_links(self):
+        product = make_product('PAD-1', compatible_models='Wave 110i')
+        Product.objects.filter(id=product.id).update(compatible_models='Click 125')
+        product.refresh_from_db()
+        product.quantity = 3
+        product.save(update_fields=['quantity'])
+
+        self.assertEqual(self.counts(), {'wave 110i': 1})
+
+    def test_delete_unlinks(self):
+        product = make_product('PAD-1', compatible_models='Wave 110i')
+        Product.objects.filter(id=product.id).delete()
+
+        self.assertEqual(self.counts(), {})
+
+    def test_search_by_model_matches_part_of_the_name(self):
+        wave = make_product('PAD-1', compatible_models='Honda Wave 110i')
+        make_product('PAD-2', compatible_models='Click 125')
+        make_product('PAD-3', compatible_models='Wave 125', is_active=False)
+
+        self.assertEqual(list(ProductService.search_by_model('wave')), [wave])
+        self.assertEqual(list(ProductService.search_by_model('  WAVE  110I ')), [wave])
+        self.assertEqual(list(ProductService.search_by_model('')), [])
+
+    def test_recount_fixes_drifted_counts(self):
+        make_product('PAD-1', compatible_models='Wave 110i')
+        VehicleModel.objects.update(product_count=7)
+
+        call_command('recount_vehicle_models', stdout=io.StringIO())
+
+        self.assertEqual(self.counts(), {'wave 110i': 1})
@@ -17,6 +17,7 @@ from .views import (
     sales, sales_report, return_view,
     supplier_view, category_views,
     receipt_settings_views,
+    job_views,
 )
 
 
@@ -34,6 +35,7 @@ urlpatterns = [
     # ========================================
     path('import/manual/', import_product_manual.import_manual, name='import_product_manual'),
     path('import/file/', import_product_file.import_product_file, name='import_product_file'),
+    path('import/file/errors/', import_product_file.import_error_report, name='import_error_report'),
     
     
     # ========================================
@@ -52,6 +54,7 @@ urlpatterns = [
     ## หน้าหลัก
     path('sales/', sales.sales, name='sales'),
     path('sales/<int:sale_id>/print/', sales.print_receipt, name='print_receipt'),
+    path('sales/<int:sale_id>/print/escpos/', sales.print_receipt_escpos, name='print_receipt_escpos'),
     
     ## API
     path('sales/api/search/', sales.search_products_ajax, name='search_products_ajax'),
@@ -136,5 +139,6 @@ urlpatterns = [
     # 🔌 API Endpoints (ทั่วไป)
     # ========================================
     path('api/products/<int:product_id>/', sales.product_detail_api, name='product_detail_api'),
+    path('api/jobs/<int:job_id>/', job_views.job_status_api, name='job_status'),
     
 ]
@@ -9,22 +9,22 @@ Helper Functions สำหรับการนำเข้าสินค้า
 """
 
 from decimal import Decimal
-from urllib import request
 from django.shortcuts import redirect
 from django.contrib import messages
-from django.db import transaction
+from django.core.paginator import Paginator
 from django.utils import timezone
-from datetime import datetime
+from datetime import timedelta
 from django.contrib.auth import get_user_model
 
 # Import Models
 from products.models import (
-    Product,
-    Supplier, Purchase, PurchaseItem,
+    Supplier,
+    ImportBatch, ImportRow,
+    Job,
 )
 
-# ✅ Import Service
-from products.Services.purchase_service import post_purchase
+# ✅ Import Service (บันทึกจริงทำใน run_worker ดู Services/job_tasks.py)
+from products.Services.job_service import enqueue_job
 
 User = get_user_model()
 
@@ -39,63 +39,97 @@ def _D(v, default=Decimal("0")):
         return default
 
 
-def _stage(session):
-    """ดึงข้อมูลตะกร้าสินค้าจาก Session"""
-    return session.setdefault("import_stage", [])
+# ===================================
+# Staging: เก็บแถวรอบันทึกในตาราง ImportBatch / ImportRow
+# (Session เก็บแค่ id ของ Batch ไม่ว่าไฟล์จะใหญ่แค่ไหน)
+# ===================================
+IMPORT_BATCH_KEY = "import_batch_id"
+IMPORT_JOB_KEY = "import_job_id"
+IMPORT_PAGE_SIZE = 50       # แถวต่อหน้าใน Preview
+IMPORT_CHUNK_SIZE = 1000    # แถวต่อรอบตอนเขียนลงตะกร้า
+STALE_BATCH_DAYS = 7        # Batch ที่ค้างนานกว่านี้ลบทิ้งตอนสร้าง Batch ใหม่
 
 
-def _remove_row(request, stage, redirect_to):
-    """ลบแถวออกจากตารางชั่วคราว"""
-    idx = int(request.POST.get("index", "-1"))
-    if 0 <= idx < len(stage):
-        stage.pop(idx)
-        request.session.modified = True
+def _stage(request, create=False):
+    """
+    Batch นำเข้าของ Session นี้
+
+    Args:
+        create: True = สร้างใหม่ถ้ายังไม่มี
+
+    Returns:
+        ImportBatch หรือ None
+    """
+    batch_id = request.session.get(IMPORT_BATCH_KEY)
+    batch = ImportBatch.objects.filter(id=batch_id, user=request.user).first() if batch_id else None
+    if batch is None and create:
+        ImportBatch.objects.filter(updated_at__lt=timezone.now() - timedelta(days=STALE_BATCH_DAYS)).delete()
+        batch = ImportBatch.objects.create(user=request.user)
+        request.session[IMPORT_BATCH_KEY] = batch.id
+    return batch
+
+
+def _stage_rows(request, rows):
+    """เพิ่มแถว (dict Staging) ลง Batch ด้วย bulk_create ทีละ IMPORT_CHUNK_SIZE"""
+    batch = _stage(request, create=True)
+    ImportRow.objects.bulk_create(
+        [ImportRow.from_stage(batch, row) for row in rows],
+        batch_size=IMPORT_CHUNK_SIZE,
+    )
+    batch.save(update_fields=['updated_at'])
+    return batch
+
+
+def _stage_page(request, batch):
+    """
+    Preview แบบแบ่งหน้า (?page=N)
+
+    Returns:
+        tuple: (page_obj, total_rows)
+    """
+    rows = batch.rows.all() if batch else ImportRow.objects.none()
+    paginator = Paginator(rows, IMPORT_PAGE_SIZE)
+    return paginator.get_page(request.GET.get("page")), paginator.count
+
+
+def _drop_stage(request):
+    """ลบ Batch ของ Session นี้ทิ้ง (แถวถูกลบตาม CASCADE)"""
+    batch_id = request.session.pop(IMPORT_BATCH_KEY, None)
+    if batch_id:
+        ImportBatch.objects.filter(id=batch_id, user=request.user).delete()
+
+
+def _remove_row(request, batch, redirect_to):
+    """ลบแถวออกจากตารางชั่วคราว (อ้างอิงด้วย id ของแถว)"""
+    row_id = request.POST.get("row_id")
+    if batch and row_id and batch.rows.filter(id=row_id).delete()[0]:
         messages.success(request, "🗑️ ลบรายการเรียบร้อย")
     return redirect(redirect_to)
 
 
 def _clear_all(request, redirect_to):
     """ล้างตารางทั้งหมด"""
-    request.session["import_stage"] = []
-    request.session.modified = True
+    _drop_stage(request)
     messages.success(request, "🗑️ ล้างข้อมูลทั้งหมดแล้ว")
     return redirect(redirect_to)
 
 
-def _generate_purchase_doc_no():
-    """สร้างเลขที่เอกสาร PO-YYYYMMDD-XXX"""
-    today = datetime.now()
-    prefix = f"PO-{today.strftime('%Y%m%d')}"
-    
-    last_purchase = Purchase.objects.filter(
-        doc_no__startswith=prefix
-    ).order_by("-doc_no").first()
-    
-    if last_purchase:
-        try:
-            last_num = int(last_purchase.doc_no.split("-")[-1])
-            new_num = last_num + 1
-        except:
-            new_num = 1
-    else:
-        new_num = 1
-    
-    return f"{prefix}-{new_num:03d}"
-
-
-def _commit_to_database(request, stage, redirect_to):
+def _commit_to_database(request, batch, redirect_to):
     """
-    บันทึกข้อมูลลงฐานข้อมูลจริง
+    ส่งตะกร้าเข้าคิวบันทึก (run_worker ทำ commit_import_batch ดู Services/import_commit_service.py)
     
-    ขั้นตอน:
+    ขั้นตอน (ใน Worker):
     1. สร้าง Purchase (DRAFT)
-    2. สร้าง/อัปเดต Product (รองรับ bundle_type)
+    2. ทีละก้อน: สร้าง/อัปเดต Product แบบ Bulk (รองรับ bundle_type) + PurchaseItem
        - selling_price / wholesale_price → overwrite ล่าสุด
        - cost_price → ไม่ overwrite ที่นี่ เพราะ post_purchase จะ Weighted Average ให้เอง
-    3. สร้าง PurchaseItem (เก็บ unit_cost จากไฟล์/ฟอร์ม)
-    4. เรียก post_purchase() → Service จะ คำนวณ Weighted Average + เพิ่มสต็อก
+    3. เรียก post_purchase() → Service จะ คำนวณ Weighted Average + เพิ่มสต็อก
+    
+    หน้าเว็บตอบกลับทันที แล้ว Poll ความคืบหน้าจาก job_status
     """
-    if not stage:
+    first = batch.rows.first() if batch else None
+    # ไม่มีแถวเหลือแต่มีใบ DRAFT ค้าง (ล้มหลังบันทึกก้อนสุดท้าย) → ส่งเข้าคิวเพื่อรับเข้าสต็อกต่อ
+    if first is None and not (batch and batch.purchase_id):
         messages.error(request, "❌ ไม่มีข้อมูลในรายการ")
         return redirect(redirect_to)
     
@@ -103,12 +137,9 @@ def _commit_to_database(request, stage, redirect_to):
     user = request.user if request.user.is_authenticated else User.objects.filter(is_superuser=True).first()
     
     # ดึง Supplier จากรายการแรก
-    first_row = stage[0]
-    supplier_id = first_row.get('supplier_id')
     supplier = None
-    
-    if supplier_id:
-        supplier = Supplier.objects.filter(id=supplier_id).first()
+    if first and first.supplier_id:
+        supplier = Supplier.objects.filter(id=first.supplier_id).first()
         
     if not supplier:
         supplier, _ = Supplier.objects.get_or_create(
@@ -116,218 +147,43 @@ def _commit_to_database(request, stage, redirect_to):
             defaults={"address": "-"}
         )
 
-    created_count = 0
-    updated_count = 0
-    total_amount = Decimal("0")
+    # ไม่ลองใหม่อัตโนมัติ: ทุกครั้งที่ลองจะเปิดใบรับสินค้าใหม่ → ให้ผู้ใช้กดบันทึกแถวที่เหลือเอง
+    job = enqueue_job(
+        "import_commit",
+        {"batch_id": batch.id, "user_id": user.id if user else None, "supplier_id": supplier.id},
+        user=request.user,
+        max_attempts=1,
+        message=f"⏳ รอคิวบันทึก {batch.rows.count()} แถว...",
+    )
+    request.session[IMPORT_JOB_KEY] = job.id
+    return redirect(redirect_to)
 
-    try:
-        with transaction.atomic():
-            # 2. สร้างหัวเอกสาร Purchase (DRAFT)
-            doc_no = _generate_purchase_doc_no()
-            purchase = Purchase.objects.create(
-                doc_no=doc_no,
-                supplier=supplier,
-                purchase_date=timezone.now(),
-                status='DRAFT',
-                created_by=user,
-                remark=f"Import Ref: {first_row.get('reference', '-')}"
-            )
-
-            # 3. วนลูปสินค้า
-            for row in stage:
-                sku = row.get('sku', '').strip()
-                name = row.get('name', '').strip()
-                
-                # แปลงตัวเลข
-                qty = _D(row.get('quantity'))       # จำนวนที่ซื้อ (เป็นหน่วยซื้อ เช่น คู่/กล่อง)
-                cost = _D(row.get('cost_price'))    # ทุนต่อหน่วยซื้อ
-                price = _D(row.get('selling_price'))
-                wholesale = _D(row.get('wholesale_price'))
-                
-                # ข้อมูลหน่วย
-                unit = row.get('unit', 'ชิ้น')
-                items_per_unit = int(row.get('items_per_purchase_unit', 1))
-                purchase_unit_name = row.get('purchase_unit_name', unit)
-                bundle_type = row.get('bundle_type', 'SAME')
-                
-                # ===================================================
-                # กรณี L-R หรือ F-R → สร้าง แม่ + ลูก 2 ตัว
-                # ===================================================
-                if bundle_type in ['L-R', 'F-R']:
-                    suffix_1 = 'L' if bundle_type == 'L-R' else 'F'
-                    suffix_2 = 'R'
-                    name_1 = f"{name} ({'ซ้าย' if bundle_type == 'L-R' else 'หน้า'})"
-                    name_2 = f"{name} ({'ขวา' if bundle_type == 'L-R' else 'หลัง'})"
-                    
-                    # ราคาต่อข้าง (หาร 2)
-                    price_per_side = price / 2
-                    wholesale_per_side = wholesale / 2
-                    
-                    # ── ลูก defaults พื้นฐาน ──
-                    # ⭐ ไม่มี cost_price ตรงนี้ เพราะ post_purchase จะ Weighted Average ให้
-                    child_base = {
-                        'category_id': row.get('category_id'),
-                        'unit': 'ชิ้น',
-                        'base_name': name,
-                        'items_per_purchase_unit': 1,
-                        'purchase_unit_name': '',
-                        'allow_partial_sale': True,
-                        'bundle_group': sku,
-                        'is_bundle': False,
-                        'selling_price': price_per_side,
-                        'wholesale_price': wholesale_per_side,
-                        'compatible_models': row.get('compatible_models', ''),
-                        'is_active': True,
-                        'primary_supplier': supplier,
-                    }
-                    
-                    # ลูก 1 (ซ้าย/หน้า)
-                    d1 = child_base.copy()
-                    d1['name'] = name_1
-                    d1['bundle_type'] = suffix_1
-                    product_1, created_1 = Product.objects.update_or_create(
-                        sku=f"{sku}-{suffix_1}", defaults=d1
-                    )
-                    # สำหรับสินค้าใหม่ ให้ set cost_price เริ่มต้นเลย
-                    # (Weighted Average จะทำงานถูกต้องเมื่อมีสต็อกเดิมอยู่แล้ว)
-                    if created_1:
-                        product_1.cost_price = cost / 2
-                        product_1.save(update_fields=['cost_price'])
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                    
-                    # ลูก 2 (ขวา/หลัง)
-                    d2 = child_base.copy()
-                    d2['name'] = name_2
-                    d2['bundle_type'] = 'R'
-                    product_2, created_2 = Product.objects.update_or_create(
-                        sku=f"{sku}-{suffix_2}", defaults=d2
-                    )
-                    if created_2:
-                        product_2.cost_price = cost / 2
-                        product_2.save(update_fields=['cost_price'])
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                    
-                    # ── แม่ (Parent bundle) ──
-                    # ⭐ แม่ cost_price เก็บ full cost (แม่ไม่มีสต็อกเอง แค่เป็น reference)
-                    parent_defaults = {
-                        'name': name,
-                        'category_id': row.get('category_id'),
-                        'base_name': name,
-                        'unit': 'ชุด',
-                        'bundle_type': bundle_type,
-                        'is_bundle': True,
-                        'items_per_purchase_unit': items_per_unit,  # ✅ ใช้ค่าจริงจากไฟล์ (เผื่อซื้อเป็นลัง)
-                        'purchase_unit_name': purchase_unit_name,
-                        'bundle_group': sku,
-                        'cost_price': cost,            # แม่เก็บทุนเต็ม (ใช้แค่ reference)
-                        'selling_price': price,
-                        'wholesale_price': wholesale,
-                        'compatible_models': row.get('compatible_models', ''),
-                        'is_active': True,
-                        'primary_supplier': supplier,
-                    }
-                    parent_product, created_parent = Product.objects.update_or_create(
-                        sku=sku, defaults=parent_defaults
-                    )
-                    # เชื่อม bundle_components
-                    parent_product.bundle_components.set([product_1, product_2])
-                    
-                    if created_parent: created_count += 1
-                    else: updated_count += 1
-                    
-                    # ── PurchaseItem → บิลใช้ตัวแม่ ──
-                    # post_purchase จะเห็นว่า แม่ is_bundle=True
-                    # แล้วกระจายสต็อกให้ ลูกๆ พร้อม Weighted Average
-                    line_total = qty * cost
-                    total_amount += line_total
-                    
-                    PurchaseItem.objects.create(
-                        purchase=purchase,
-                        product=parent_product,
-                        quantity=qty,
-                        unit_cost=cost,
-                        line_total=line_total,
-                        actual_stock=qty * items_per_unit,  # ✅ คำนวณจำนวนชุดจริงที่รับเข้า
-                    )
-                
-                # ===================================================
-                # กรณีปกติ (SAME) → สร้าง/อัปเดต Product คนเดียว
-                # ===================================================
-                else:
-                    # คำนวณต้นทุนต่อชิ้น (สำหรับ สินค้าใหม่)
-                    cost_per_piece = cost / items_per_unit if items_per_unit > 0 else cost
-                    
-                    # ⭐ defaults ไม่มี cost_price
-                    # เพราะ post_purchase จะ Weighted Average ให้เอง
-                    defaults = {
-                        'name': name,
-                        'category_id': row.get('category_id'),
-                        'unit': unit,
-                        'items_per_purchase_unit': items_per_unit,
-                        'purchase_unit_name': purchase_unit_name,
-                        'allow_partial_sale': True,
-                        'bundle_type': 'SAME',
-                        'selling_price': price,
-                        'wholesale_price': wholesale,
-                        'compatible_models': row.get('compatible_models', ''),
-                        'is_active': True,
-                        'primary_supplier': supplier,
-                    }
-                    
-                    # สร้าง/อัปเดต Product
-                    if sku:
-                        product, created = Product.objects.update_or_create(
-                            sku=sku, defaults=defaults
-                        )
-                    else:
-                        product = Product.objects.create(**defaults)
-                        created = True
-
-                    # สำหรับสินค้าใหม่ ให้ set cost_price เริ่มต้นเลย
-                    if created:
-                        product.cost_price = cost_per_piece
-                        product.save(update_fields=['cost_price'])
-                        created_count += 1
-                    else:
-                        updated_count += 1
-
-                    # สร้าง PurchaseItem
-                    # unit_cost เก็บทุนต่อหน่วยซื้อ (เช่น ต่อกล่อง)
-                    # post_purchase จะ หาร items_per_purchase_unit เอง
-                    line_total = qty * cost
-                    total_amount += line_total
-                    
-                    item = PurchaseItem.objects.create(
-                        purchase=purchase,
-                        product=product,
-                        quantity=qty,
-                        unit_cost=cost,
-                    )
-                    
-                    item.actual_stock = qty * items_per_unit
-                    item.save(update_fields=['actual_stock'])
-            
-            purchase.grand_total = total_amount          # ← 314
-            purchase.save(update_fields=['grand_total'])
-            # 4. เรียก Service → จะ คำนวณ Weighted Average + เพิ่มสต็อก
-            if post_purchase(purchase):
-                messages.success(request, f"✅ บันทึกสำเร็จ! {doc_no} (สินค้าใหม่ {created_count}, เก่า {updated_count})")
-            else:
-                messages.warning(request, "⚠️ บันทึก Draft แล้ว แต่ยังไม่ตัดสต็อก")
-
-            # เคลียร์ Session
-            request.session['import_stage'] = []
-            request.session.modified = True
-            
-            # เก็บ ID บิลล่าสุด
-            request.session['last_purchase_id'] = purchase.id
-
-    except Exception as e:
-        messages.error(request, f"❌ เกิดข้อผิดพลาด: {str(e)}")
+
+def _import_job(request):
+    """งานบันทึกนำเข้าล่าสุดของ Session นี้ (Job หรือ None)"""
+    job_id = request.session.get(IMPORT_JOB_KEY)
+    job = Job.objects.filter(id=job_id, created_by=request.user).first() if job_id else None
+    if job is None:
+        request.session.pop(IMPORT_JOB_KEY, None)
+    return job
+
+
+def _finish_import_job(request, job, redirect_to):
+    """งานเสร็จแล้ว → แจ้งผล + เคลียร์ Session (สำเร็จไปหน้าใบรับสินค้า, ล้มเหลวกลับหน้าเดิม)"""
+    request.session.pop(IMPORT_JOB_KEY, None)
+
+    if job.status == "FAILED":
+        messages.error(request, f"❌ เกิดข้อผิดพลาด: {job.error_summary}")
         return redirect(redirect_to)
 
-    return redirect('purchase_report')
\ No newline at end of file
+    result = job.result or {}
+    if result.get("posted"):
+        messages.success(request, f"✅ บันทึกสำเร็จ! {result.get('doc_no')} (สินค้าใหม่ {result.get('created')}, เก่า {result.get('updated')})")
+    else:
+        messages.warning(request, "⚠️ บันทึก Draft แล้ว แต่ยังไม่ตัดสต็อก")
+
+    # เคลียร์ Batch (Session เหลือแค่ id บิลล่าสุด)
+    _drop_stage(request)
+    request.session['last_purchase_id'] = result.get("purchase_id")
+
+    return redirect('purchase_report')
@@ -9,13 +9,20 @@ View: นำเข้าสินค้าจากไฟล์ Excel/CSV (Versi
 - Preview ข้อมูลก่อนบันทึก
 """
 
-from decimal import Decimal
 from django.shortcuts import render, redirect
 from django.contrib import messages
-import pandas as pd
 from django.contrib.auth.decorators import login_required
-from products.models import Category, Supplier, Product
-from .helpers import _D, _stage, _clear_all, _commit_to_database
+from products.models import Category, Supplier
+from products.Services.import_service import (
+    ERROR_REPORT_HEADER,
+    error_report_rows,
+    load_error_report,
+    parse_import_frame,
+    read_import_file,
+    save_error_report,
+)
+from .helpers import _stage, _stage_rows, _stage_page, _drop_stage, _remove_row, _clear_all, _commit_to_database, _import_job, _finish_import_job
+from .report_export import export_format, export_response
 
 @login_required
 def import_product_file(request):
@@ -25,40 +32,54 @@ def import_product_file(request):
     categories = Category.objects.order_by("name")
     suppliers = Supplier.objects.order_by("name")
     
-    # โหลดข้อมูล Staging
-    stage = _stage(request.session)
+    # โหลด Batch ที่รอบันทึก (Session เก็บแค่ id)
+    batch = _stage(request)
+    import_job = _import_job(request)
     
     # ===== GET: แสดงหน้าอัปโหลด =====
     if request.method == "GET":
+        if import_job and import_job.is_finished:
+            return _finish_import_job(request, import_job, "import_product_file")
+        
         # Reset ถ้ามีการขอ
-        if request.GET.get("reset"):
-            request.session["import_stage"] = []
-            request.session.modified = True
+        if request.GET.get("reset") and not import_job:
+            _drop_stage(request)
+            request.session.pop("import_error_report", None)
             return redirect("import_product_file")
         
+        stage, total_rows = _stage_page(request, batch)
         return render(request, "products/stock/import_file.html", {
             "categories": categories,
             "suppliers": suppliers,
             "stage": stage,
-            "total_rows": len(stage),
+            "total_rows": total_rows,
+            "import_job": import_job,
+            "error_report": request.session.get("import_error_report"),
         })
     
     # ===== POST: ประมวลผล =====
     action = request.POST.get("action")
     
+    # กำลังบันทึกอยู่ → ห้ามแก้ตะกร้าจนกว่างานจะเสร็จ
+    if import_job and not import_job.is_finished:
+        messages.warning(request, "⏳ กำลังบันทึกรายการนี้อยู่ กรุณารอให้เสร็จก่อน")
+        return redirect("import_product_file")
+    
     if action == "upload_file":
-        return _upload_file(request, stage)
+        return _upload_file(request)
+    elif action == "remove_row":
+        return _remove_row(request, batch, "import_product_file")
     elif action == "clear_all":
         return _clear_all(request, "import_product_file")
     elif action == "commit":
-        return _commit_to_database(request, stage, "import_product_file")
+        return _commit_to_database(request, batch, "import_product_file")
     
     return redirect("import_product_file")
 
 
-def _upload_file(request, stage):
+def _upload_file(request):
     """
-    อัปโหลดและประมวลผลไฟล์
+    อัปโหลดและประมวลผลไฟล์ (แปลงทั้งไฟล์ด้วย pandas ดู Services/import_service.py)
     
     คอลัมน์ที่ต้องมี:
     - SKU
@@ -78,6 +99,8 @@ def _upload_file(request, stage):
     - ผู้นำเข้า
     - ซัพพลายเออร์
     - เลขที่อ้างอิง
+    
+    แถวที่มีปัญหา → รวมเป็นรายงานให้ดาวน์โหลด (ไม่ส่ง Message ทีละแถว)
     """
     
     uploaded_file = request.FILES.get("file")
@@ -89,168 +112,53 @@ def _upload_file(request, stage):
         return redirect("import_product_file")
     
     try:
-        # ===== 1. อ่านไฟล์ =====
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file, encoding='utf-8-sig')
-        elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(uploaded_file)
-        else:
-            messages.error(request, "❌ รองรับเฉพาะไฟล์ .xlsx, .xls, .csv")
-            return redirect("import_product_file")
-        
-        # ===== 2. Validate คอลัมน์ที่จำเป็น =====
-        required_cols = ['SKU', 'ชื่อสินค้า', 'หมวดหมู่', 'ราคาทุน', 'ราคาขาย', 'จำนวน']
-        missing = [col for col in required_cols if col not in df.columns]
-        
-        if missing:
-            messages.error(request, f"❌ ไฟล์ขาดคอลัมน์: {', '.join(missing)}")
+        # ===== 1. อ่านไฟล์ + ตรวจคอลัมน์ =====
+        try:
+            df = read_import_file(uploaded_file)
+        except ValueError as e:
+            messages.error(request, f"❌ {e}")
             return redirect("import_product_file")
         
-        # ===== 3. แปลงเป็น Staging =====
-        added_count = 0
-        error_count = 0
+        # ===== 2. แปลงเป็น Staging (ทั้งคอลัมน์) =====
+        rows, errors = parse_import_frame(df, default_created_by, default_supplier_id)
+        batch = _stage_rows(request, rows) if rows else _stage(request, create=bool(errors))
         
-        for idx, row in df.iterrows():
-            try:
-                # Skip แถวว่าง
-                if pd.isna(row['SKU']) or pd.isna(row['ชื่อสินค้า']):
-                    continue
-                
-                # ===== 3.1 หาหมวดหมู่ =====
-                category_name = str(row['หมวดหมู่']).strip()
-                try:
-                    category = Category.objects.get(name__iexact=category_name)
-                    category_id = category.id
-                except Category.DoesNotExist:
-                    messages.warning(request, f"⚠️ แถว {idx+2}: ไม่พบหมวดหมู่ '{category_name}' (ข้าม)")
-                    error_count += 1
-                    continue
-                
-                # ===== 3.2 จัดการ Supplier =====
-                row_supplier_id = None
-                supplier_name = str(row.get('ซัพพลายเออร์', '')).strip() if not pd.isna(row.get('ซัพพลายเออร์')) else ''
-                
-                if supplier_name:
-                    try:
-                        supplier = Supplier.objects.get(name__iexact=supplier_name)
-                        row_supplier_id = supplier.id
-                    except Supplier.DoesNotExist:
-                        messages.warning(request, f"⚠️ แถว {idx+2}: ไม่พบซัพพลายเออร์ '{supplier_name}' (ใช้ default)")
-                
-                # ถ้าไม่มีในไฟล์ ใช้ default
-                if not row_supplier_id and default_supplier_id:
-                    row_supplier_id = int(default_supplier_id)
-                
-                # ===== 3.3 ข้อมูลพื้นฐาน =====
-                sku = str(row['SKU']).strip().upper()
-                name = str(row['ชื่อสินค้า']).strip()
-                
-                # รุ่นรถ
-                compatible_models = str(row.get('รุ่นรถที่ใช้ได้', '')).strip() if not pd.isna(row.get('รุ่นรถที่ใช้ได้')) else ''
-                
-                # หน่วย (จากไฟล์หรือ default)
-                sales_unit = str(row.get('หน่วย', 'ชิ้น')).strip() if not pd.isna(row.get('หน่วย')) else 'ชิ้น'
-                
-                # ชิ้น/หน่วย (default = 1)
-                items_per_unit = 1
-                if 'ชิ้น/หน่วย' in df.columns and not pd.isna(row.get('ชิ้น/หน่วย')):
-                    try:
-                        items_per_unit = int(float(row['ชิ้น/หน่วย']))
-                        if items_per_unit < 1:
-                            items_per_unit = 1
-                    except:
-                        items_per_unit = 1
-                
-                # หน่วยซื้อ (จากไฟล์หรือ default)
-                purchase_unit_name = str(row.get('หน่วยซื้อ', '')).strip() if not pd.isna(row.get('หน่วยซื้อ')) else ''
-                
-                # กำหนด Base Unit และ Purchase Unit Name
-                if items_per_unit > 1:
-                    base_unit = "ชิ้น"
-                    if not purchase_unit_name:
-                        purchase_unit_name = sales_unit if sales_unit != "ชิ้น" else "ชุด"
-                else:
-                    base_unit = sales_unit
-                    if not purchase_unit_name:
-                        purchase_unit_name = sales_unit
-                
-                # ===== 3.4 bundle_type =====
-                # อ่านจากไฟล์ ถ้ามี column bundle_type
-                # ค่าที่รับ: L-R, F-R (นอกนั้นเป็น SAME)
-                bundle_type = 'SAME'
-                if 'bundle_type' in df.columns and not pd.isna(row.get('bundle_type')):
-                    raw_bt = str(row['bundle_type']).strip().upper()
-                    if raw_bt in ['L-R', 'F-R']:
-                        bundle_type = raw_bt
-                
-                # ===== 3.5 ราคา =====
-                cost_price = float(row['ราคาทุน']) if not pd.isna(row['ราคาทุน']) else 0
-                selling_price = float(row['ราคาขาย']) if not pd.isna(row['ราคาขาย']) else 0
-                wholesale_price = float(row.get('ราคาส่ง', 0)) if not pd.isna(row.get('ราคาส่ง')) else 0
-                
-                # จำนวน
-                quantity = float(row['จำนวน']) if not pd.isna(row['จำนวน']) else 0
-                
-                # ผู้นำเข้า
-                file_created_by = str(row.get('ผู้นำเข้า', '')).strip() if not pd.isna(row.get('ผู้นำเข้า')) else default_created_by
-                
-                # เลขที่อ้างอิง
-                reference = str(row.get('เลขที่อ้างอิง', 'FILE-IMPORT')).strip() if not pd.isna(row.get('เลขที่อ้างอิง')) else 'FILE-IMPORT'
-                
-                # ===== 3.6 Validate =====
-                if not sku or not name or quantity <= 0:
-                    messages.warning(request, f"⚠️ แถว {idx+2}: ข้อมูลไม่ครบหรือจำนวน ≤ 0 (ข้าม)")
-                    error_count += 1
-                    continue
-                
-                if cost_price < 0 or selling_price < 0:
-                    messages.warning(request, f"⚠️ แถว {idx+2}: ราคาต้องไม่ติดลบ (ข้าม)")
-                    error_count += 1
-                    continue
-                
-                # ===== 3.7 เพิ่มลง Staging =====
-                stage.append({
-                    "category_id": category_id,
-                    "category_name": category_name,
-                    "sku": sku,
-                    "name": name,
-                    "compatible_models": compatible_models,
-                    "bundle_type": bundle_type,                  # ← L-R / F-R / SAME
-                    
-                    # ข้อมูลหน่วย
-                    "unit": base_unit,                           # หน่วยสต็อก (ชิ้น)
-                    "items_per_purchase_unit": items_per_unit,   # ตัวคูณ (เช่น 4 สำหรับกล่อง)
-                    "purchase_unit_name": purchase_unit_name,    # ชื่อหน่วยซื้อ (เช่น กล่อง)
-                    
-                    # ราคา (เก็บเป็น String เพื่อกัน Error Serialize)
-                    "cost_price": str(cost_price),
-                    "selling_price": str(selling_price),
-                    "wholesale_price": str(wholesale_price),
-                    "quantity": str(quantity),
-                    
-                    "created_by": file_created_by,
-                    "reference": reference,
-                    "supplier_id": row_supplier_id,
-                })
-                added_count += 1
-                
-            except Exception as e:
-                messages.warning(request, f"⚠️ แถว {idx+2}: {str(e)} (ข้าม)")
-                error_count += 1
-                continue
-        
-        # บันทึก Session
-        request.session.modified = True
+        # ===== 3. รายงานแถวที่มีปัญหา (เก็บบน Batch) =====
+        if batch is not None:
+            save_error_report(batch, errors)
+        if errors:
+            request.session["import_error_report"] = {"count": len(errors)}
+        else:
+            request.session.pop("import_error_report", None)
         
         # ===== 4. สรุปผล =====
+        added_count = len(rows)
+        error_count = sum(1 for e in errors if e["skipped"])
         if added_count > 0:
             messages.success(request, f"✅ อัปโหลดสำเร็จ: {added_count} รายการ")
-        if error_count > 0:
-            messages.warning(request, f"⚠️ ข้าม/ผิดพลาด: {error_count} รายการ")
+        if errors:
+            messages.warning(request, f"⚠️ ข้าม/ผิดพลาด: {error_count} รายการ, คำเตือน: {len(errors) - error_count} รายการ (ดาวน์โหลดรายงานได้)")
         if added_count == 0:
             messages.error(request, "❌ ไม่สามารถนำเข้าข้อมูลได้")
         
     except Exception as e:
         messages.error(request, f"❌ เกิดข้อผิดพลาด: {str(e)}")
     
-    return redirect("import_product_file")
\ No newline at end of file
+    return redirect("import_product_file")
+
+
+@login_required
+def import_error_report(request):
+    """ดาวน์โหลดรายงานแถวที่นำเข้าไม่ได้ (?export=xlsx สำหรับ Excel, ค่าเริ่มต้น CSV)"""
+    errors = load_error_report(_stage(request))
+    if errors is None:
+        messages.error(request, "❌ รายงานหมดอายุแล้ว กรุณาอัปโหลดไฟล์ใหม่")
+        return redirect("import_product_file")
+    
+    return export_response(
+        export_format(request) or "csv",
+        "import_errors",
+        ERROR_REPORT_HEADER,
+        error_report_rows(errors),
+        sheet_title="Import Errors",
+    )
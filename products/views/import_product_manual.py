@@ -11,7 +11,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 
 from products.models import Category, Supplier
-from .helpers import _D, _stage, _remove_row, _clear_all, _commit_to_database
+from .helpers import _D, _stage, _stage_rows, _stage_page, _remove_row, _clear_all, _commit_to_database, _import_job, _finish_import_job
 
 
 @login_required
@@ -25,48 +25,56 @@ def import_manual(request):
         
     categories = Category.objects.order_by("name")
     suppliers = Supplier.objects.order_by("name")
-    stage = _stage(request.session)
+    batch = _stage(request)
+    import_job = _import_job(request)
     
     if request.method == "GET":
+        if import_job and import_job.is_finished:
+            return _finish_import_job(request, import_job, "import_product_manual")
+        
         edit_data = None
-        edit_index = request.GET.get("edit")
+        edit_id = request.GET.get("edit")
         
-        if edit_index is not None:
-            try:
-                idx = int(edit_index)
-                if 0 <= idx < len(stage):
-                    edit_data = stage[idx]
-                    stage.pop(idx)
-                    request.session.modified = True
-            except:
-                pass
+        # แก้ไข = ดึงแถวกลับขึ้นฟอร์ม แล้วลบออกจากตาราง (กดเพิ่มใหม่หลังแก้)
+        if batch and not import_job and edit_id and edit_id.isdigit():
+            row = batch.rows.filter(id=edit_id).first()
+            if row:
+                edit_data = row.as_stage()
+                row.delete()
         
+        stage, total_rows = _stage_page(request, batch)
         return render(request, "products/stock/import_manual.html", {
             "categories": categories,
             "suppliers": suppliers,
             "stage": stage,
-            "total_rows": len(stage),
+            "total_rows": total_rows,
+            "import_job": import_job,
             "edit_data": edit_data,
         })
     
     # POST Request
     action = request.POST.get("action")
     
+    # กำลังบันทึกอยู่ → ห้ามแก้ตะกร้าจนกว่างานจะเสร็จ
+    if import_job and not import_job.is_finished:
+        messages.warning(request, "⏳ กำลังบันทึกรายการนี้อยู่ กรุณารอให้เสร็จก่อน")
+        return redirect("import_product_manual")
+    
     if action == "add_row":
-        return _add_row_manual(request, stage)
+        return _add_row_manual(request)
     elif action == "remove_row":
-        return _remove_row(request, stage, "import_product_manual")
+        return _remove_row(request, batch, "import_product_manual")
     elif action == "clear_all":
         return _clear_all(request, "import_product_manual")
     elif action == "commit":
-        return _commit_to_database(request, stage, "import_product_manual")
+        return _commit_to_database(request, batch, "import_product_manual")
     
     return redirect("import_product_manual")
 
 
-def _add_row_manual(request, stage):
+def _add_row_manual(request):
     """
-    ฟังก์ชันย่อย: รับค่าจากฟอร์มลง Session
+    ฟังก์ชันย่อย: รับค่าจากฟอร์มลงตาราง Staging (ImportRow)
     """
     try:
         # 1. ข้อมูลพื้นฐาน
@@ -123,7 +131,7 @@ def _add_row_manual(request, stage):
             except:
                 pass
 
-        # 7. ✅ เก็บลง Session (ระวังเรื่อง Key ให้ตรงกับ Helper)
+        # 7. ✅ เก็บลง Staging (Key ตรงกับฟิลด์ของ ImportRow)
         item = {
             "category_id": int(category_id),
             "category_name": category_name,
@@ -131,7 +139,7 @@ def _add_row_manual(request, stage):
             "name": name,
             "compatible_models": compatible_models,
             
-            # ราคาเก็บเป็น String เพื่อกัน Error เวลา Serialize ลง Session
+            # ราคาเก็บเป็น String (ImportRow.from_stage แปลงเป็น Decimal ให้)
             "cost_price": str(cost_price),
             "selling_price": str(selling_price),
             "wholesale_price": str(wholesale_price),
@@ -148,8 +156,7 @@ def _add_row_manual(request, stage):
             "supplier_id": int(supplier_id) if supplier_id else None,
         }
         
-        stage.append(item)
-        request.session.modified = True
+        _stage_rows(request, [item])
         
         # ข้อความแจ้งเตือนให้ชัดเจน
         if items_per_purchase_unit > 1:
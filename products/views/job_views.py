@@ -0,0 +1,21 @@
+"""
+products/views/job_views.py
+สถานะงานเบื้องหลัง (JSON) ให้ Template Poll ดูความคืบหน้า
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from products.models import Job
+from products.Services.job_service import job_status
+
+
+@login_required
+@require_http_methods(["GET"])
+def job_status_api(request, job_id):
+    """สถานะงาน (เห็นได้เฉพาะผู้สั่งงาน / Superuser)"""
+    jobs = Job.objects.all() if request.user.is_superuser else Job.objects.filter(created_by=request.user)
+    job = get_object_or_404(jobs, id=job_id)
+    return JsonResponse({'success': True, 'job': job_status(job)})
@@ -36,8 +36,10 @@ def manage_products(request):
     stock_status = request.GET.get('stock_status', '')
     
     # ===== Query สินค้า =====
-    # prefetch_related bundle_components เพื่อลด query เวลาคำนวณสต็อก
-    products = Product.objects.select_related('category').prefetch_related('bundle_components').order_by('sku')
+    # สถานะสต็อกคำนวณใน SQL (ชุดอ่าน available_sets, เกณฑ์ใกล้หมดตาม min_stock ของแต่ละสินค้า)
+    products = ProductService.annotate_stock_status(
+        Product.objects.select_related('category')
+    ).order_by('sku')
     
     # ค้นหา
     if search:
@@ -50,37 +52,18 @@ def manage_products(request):
     if category_id:
         products = products.filter(category_id=category_id)
     
-    # ✅ กรองตามสถานะสต็อก (ปรับปรุงใหม่ รองรับ Bundle)
+    # ✅ จำนวนแต่ละสถานะ (Query เดียว) สำหรับตัวกรอง
+    status_counts = ProductService.stock_status_counts(products)
+    
+    # ✅ กรองตามสถานะสต็อก (ใน Query → Paginator ดึงแค่หน้าที่แสดง)
     if stock_status:
-        products_list = []
-        # หมายเหตุ: การวน loop กรองแบบนี้อาจช้าถ้าสินค้าเยอะมาก 
-        # แต่อยู่ในขอบเขตที่ยอมรับได้สำหรับระบบจัดการหลังบ้าน
-        for p in products:
-            # ใช้ Service คำนวณสต็อกจริง (รวมถึง Bundle)
-            status_data = ProductService.get_stock_status(p)
-            qty = status_data['quantity']
-            
-            if stock_status == 'in_stock' and qty > 10:
-                products_list.append(p)
-            elif stock_status == 'low_stock' and 0 < qty <= 10:
-                products_list.append(p)
-            elif stock_status == 'out_of_stock' and qty <= 0:
-                products_list.append(p)
-        
-        products = products_list
+        products = ProductService.filter_stock_status(products, stock_status)
     
     # ===== Pagination =====
     paginator = Paginator(products, 20)
     page = request.GET.get('page', 1)
     products_page = paginator.get_page(page)
     
-    # ===== เพิ่ม stock_quantity ให้แต่ละสินค้า (สำหรับแสดงผล) =====
-    for product in products_page:
-        # ✅ เรียกใช้ Service คำนวณสต็อกที่จะโชว์
-        # ถ้าเป็น Bundle มันจะไปนับลูกมาให้ ถ้าเป็นปกติก็โชว์ตามจริง
-        status_data = ProductService.get_stock_status(product)
-        product.stock_quantity = status_data['quantity'] # แปะค่ากลับเข้าไปเพื่อเอาไปโชว์ใน HTML
-    
     # ===== Context =====
     context = {
         'products': products_page,
@@ -88,7 +71,8 @@ def manage_products(request):
         'search': search,
         'category_id': category_id,
         'stock_status': stock_status,
-        'total_products': len(products) if isinstance(products, list) else products.count(),
+        'status_counts': status_counts,
+        'total_products': paginator.count,
     }
     
     return render(request, 'products/manage/manage_products.html', context)
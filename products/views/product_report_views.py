@@ -1,10 +1,18 @@
 import calendar
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, F, Q, DecimalField, ExpressionWrapper
 from django.utils import timezone
-from datetime import datetime, time
-from products.models import TransactionItem, Category, Product
+from datetime import datetime
+from products.models import Category, Product
+from products.Services.sales_summary_service import product_sales_rows
+from products.views.report_export import export_format, export_response
+
+
+PRODUCT_EXPORT_HEADER = [
+    'SKU', 'ชื่อสินค้า', 'หมวดหมู่', 'หน่วย', 'จำนวนขาย', 'ยอดขาย', 'ต้นทุน', 'กำไร',
+    'คงเหลือ', 'ราคาทุน', 'ราคาขาย', 'ราคาส่ง',
+]
+
 
 @login_required
 def product_sales_report(request):
@@ -32,48 +40,41 @@ def product_sales_report(request):
         # สร้าง String วันที่ในรูปแบบ YYYY-MM-DD เพื่อส่งให้ HTML Input
         date_from = f"{year}-{month:02d}-01"
         date_to = f"{year}-{month:02d}-{last_day}"
-    # 1. แปลง String เป็น Timezone Aware Datetime
+    # 1. แปลง String เป็นวันที่
     start_date_obj = datetime.strptime(date_from, "%Y-%m-%d").date()
     end_date_obj = datetime.strptime(date_to, "%Y-%m-%d").date()
-    start_aware = timezone.make_aware(datetime.combine(start_date_obj, time.min))
-    end_aware = timezone.make_aware(datetime.combine(end_date_obj, time.max))
     
-    # 2. Query Items
-    # ✅ แก้ไข: ใช้ __date__gte + __date__lte แทน __range
-    items = TransactionItem.objects.filter(
-        transaction__doc_type='SALE',
-        transaction__status='POSTED',
-        transaction__transaction_date__range=(start_aware, end_aware),
-        product__isnull=False
-    )
+    # 2. ยอดรายสินค้าจากตาราง ProductDailySales (Group by product_id อย่างเดียว)
+    sales_rows = list(product_sales_rows(start_date_obj, end_date_obj, category_id=category_id, search=search))
 
-    if category_id: items = items.filter(product__category_id=category_id)
-    if search:
-        items = items.filter(Q(product__name__icontains=search) | Q(product__sku__icontains=search))
+    # 3. โหลดข้อมูลสินค้าเฉพาะที่มียอดขาย (1 Query)
+    products = Product.objects.select_related('category').only(
+        'sku', 'name', 'unit', 'quantity', 'is_bundle', 'available_sets',
+        'cost_price', 'selling_price', 'wholesale_price', 'category__name',
+    ).in_bulk([row['product_id'] for row in sales_rows])
 
-    # 3. Group By Product
-    report_data = items.values(
-        'product__id', 
-        'product__sku', 
-        'product__name', 
-        'product__unit',
-        'product__category__name',
-        'product__quantity',
-        'product__is_bundle',
-        # ✅ เพิ่ม: ดึงข้อมูลราคามาแสดง
-        'product__cost_price',      # ราคาทุน
-        'product__selling_price',   # ราคาขาย
-        'product__wholesale_price'  # ราคาส่ง
-    ).annotate(
-        total_qty=Sum('quantity'),
-        total_sales=Sum('line_total'),
-        total_cost=Sum(
-            ExpressionWrapper(
-                F('quantity') * F('cost_price'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )
-    ).order_by('-total_qty')
+    report_data = []
+    for row in sales_rows:
+        product = products.get(row['product_id'])
+        if product is None:
+            continue
+        report_data.append({
+            'product__id': product.id,
+            'product__sku': product.sku,
+            'product__name': product.name,
+            'product__unit': product.unit,
+            'product__category__name': product.category.name if product.category else None,
+            'product__quantity': product.quantity,
+            'product__is_bundle': product.is_bundle,
+            'product__available_sets': product.available_sets,
+            # ✅ เพิ่ม: ดึงข้อมูลราคามาแสดง
+            'product__cost_price': product.cost_price,          # ราคาทุน
+            'product__selling_price': product.selling_price,    # ราคาขาย
+            'product__wholesale_price': product.wholesale_price,  # ราคาส่ง
+            'total_qty': row['total_qty'],
+            'total_sales': row['total_sales'],
+            'total_cost': row['total_cost'],
+        })
 
     # 4. Loop คำนวณและสรุป
     total_sales_sum = 0
@@ -82,54 +83,14 @@ def product_sales_report(request):
     
     final_data = []
     
-    # Pre-fetch Products
-    product_ids = [item['product__id'] for item in report_data if item['product__is_bundle']]
-    bundle_map = {}
-    if product_ids:
-        bundles = Product.objects.filter(id__in=product_ids)
-        for b in bundles:
-            bundle_map[b.id] = b
-
     for item in report_data:
         sales = item['total_sales'] or 0
         cost = item['total_cost'] or 0
         qty = item['total_qty'] or 0
         profit = sales - cost
         
-        # --- Logic คำนวณสต็อก Bundle ---
-        real_stock = item['product__quantity']
-        
-        if item['product__is_bundle']:
-            product_obj = bundle_map.get(item['product__id'])
-            if product_obj:
-                components = None
-                if hasattr(product_obj, 'bundle_components'):
-                    components = product_obj.bundle_components.all()
-                elif hasattr(product_obj, 'bundlecomponent_set'):
-                    components = product_obj.bundlecomponent_set.all()
-                
-                if components and components.exists():
-                    max_buildable = []
-                    for comp in components:
-                        child_stock = 0
-                        qty_needed = 1
-                        
-                        if hasattr(comp, 'product'): 
-                            child_stock = comp.product.quantity
-                            if hasattr(comp, 'quantity'): qty_needed = comp.quantity
-                        elif hasattr(comp, 'component'):
-                            child_stock = comp.component.quantity
-                            if hasattr(comp, 'quantity'): qty_needed = comp.quantity
-                        else:
-                            child_stock = comp.quantity
-                            qty_needed = 1
-                        
-                        if qty_needed > 0:
-                            max_buildable.append(int(child_stock // qty_needed))
-                        else:
-                            max_buildable.append(0)
-                    
-                    real_stock = min(max_buildable) if max_buildable else 0
+        # --- สต็อก Bundle: อ่านจำนวนชุดที่ขายได้จากคอลัมน์ ---
+        real_stock = item['product__available_sets'] if item['product__is_bundle'] else item['product__quantity']
         
         item['real_stock'] = real_stock
         item['profit'] = profit
@@ -139,6 +100,24 @@ def product_sales_report(request):
         total_profit_sum += profit
         total_qty_sum += qty
 
+    # ✅ ส่งออก CSV / Excel (ใช้ตัวกรองชุดเดียวกับหน้าเว็บ)
+    fmt = export_format(request)
+    if fmt:
+        return export_response(
+            fmt, f"product_sales_{date_from}_{date_to}",
+            PRODUCT_EXPORT_HEADER,
+            (
+                [
+                    item['product__sku'], item['product__name'], item['product__category__name'] or '',
+                    item['product__unit'], item['total_qty'], item['total_sales'], item['total_cost'],
+                    item['profit'], item['real_stock'],
+                    item['product__cost_price'], item['product__selling_price'], item['product__wholesale_price'],
+                ]
+                for item in final_data
+            ),
+            sheet_title='Products',
+        )
+
     best_seller = final_data[0]['product__name'] if final_data else "-"
     categories = Category.objects.order_by('name')
     
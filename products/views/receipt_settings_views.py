@@ -20,7 +20,8 @@ def receipt_settings(request):
         }, status=403)
         
     if request.method == 'POST':
-        # บันทึกทุก key ที่มี META
+        # บันทึกทุก key ที่มี META (รวบเป็นชุดเดียว)
+        values = {}
         for key, meta in SYSTEM_SETTINGS_META.items():
             if meta['type'] == 'checkbox':
                 # Checkbox: มี = true, ไม่มี = false
@@ -29,7 +30,9 @@ def receipt_settings(request):
                 # Text/Textarea
                 value = request.POST.get(key, "").strip()
             
-            SystemSetting.set(key, value)
+            values[key] = value
+        
+        SystemSetting.set_many(values)
         
         messages.success(request, "✅ บันทึกการตั้งค่าบิลเรียบร้อย")
         return redirect('receipt_settings')
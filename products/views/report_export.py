@@ -0,0 +1,81 @@
+"""
+products/views/report_export.py
+ส่งออกรายงานเป็น CSV / Excel (?export=csv หรือ ?export=xlsx)
+
+- CSV: StreamingHttpResponse เขียนทีละแถว (ไม่ต้องโหลดผลลัพธ์ทั้งหมดเข้าหน่วยความจำ)
+- Excel: openpyxl แบบ write_only เขียนลงไฟล์ชั่วคราว แล้วส่งไฟล์ออกไป
+- rows เป็น iterable/generator (ควรสร้างจาก queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+"""
+
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_CHUNK_SIZE = 500
+
+
+class _Echo:
+    """Buffer ปลอมสำหรับ csv.writer → คืนค่าแถวที่เขียนแทนการเก็บไว้"""
+    def write(self, value):
+        return value
+
+
+def export_format(request):
+    """รูปแบบไฟล์ที่ขอส่งออก ('csv' / 'xlsx') หรือ None ถ้าเป็นการเปิดหน้าเว็บปกติ"""
+    fmt = request.GET.get('export', '').lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+def local_datetime(value):
+    """แปลงวันเวลาเป็นข้อความตามเวลาไทย (Excel ไม่รองรับ datetime ที่มี timezone)"""
+    if not value:
+        return ''
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+
+
+def _csv_response(filename, header, rows):
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield '\ufeff'  # BOM ให้ Excel อ่านภาษาไทยถูก
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def _xlsx_response(filename, header, rows, sheet_title):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=f'{filename}.xlsx')
+
+
+def export_response(fmt, filename, header, rows, sheet_title='Report'):
+    """
+    สร้าง Response สำหรับดาวน์โหลดรายงาน
+
+    Args:
+        fmt: 'csv' หรือ 'xlsx' (จาก export_format())
+        filename: ชื่อไฟล์ (ไม่ต้องใส่นามสกุล)
+        header: หัวคอลัมน์
+        rows: iterable ของ list/tuple (ตัวเลขส่งเป็น Decimal/int ได้เลย)
+    """
+    if fmt == 'xlsx':
+        return _xlsx_response(filename, header, rows, sheet_title)
+    return _csv_response(filename, header, rows)
@@ -6,7 +6,7 @@ Reports & Statistics for Returns (แก้ไขแล้ว - แยกสิ
 import calendar
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.db.models import Q, Sum, Count
 from django.views.decorators.http import require_http_methods
 
@@ -18,6 +18,15 @@ from django.views.decorators.clickjacking import xframe_options_exempt
 from django.utils import timezone
 
 from products.models import Transaction, TransactionItem
+from products.Services.sales_summary_service import summary_rows, summarize
+from products.Services.receipt_snapshot_service import get_receipt_snapshot
+from products.views.report_export import EXPORT_CHUNK_SIZE, export_format, export_response, local_datetime
+
+
+RETURN_EXPORT_HEADER = [
+    'เลขที่บิลคืน', 'วันที่', 'อ้างอิงบิลขาย', 'พนักงาน', 'สถานะ',
+    'ยอดคืน', 'ส่วนลด', 'ยอดคืนสุทธิ', 'จำนวนชิ้น',
+]
 
 
 # ===================================
@@ -81,21 +90,52 @@ def return_list(request):
             Q(created_by__username__icontains=search)
         )
 
+    # ✅ ส่งออก CSV / Excel (ใช้ตัวกรองชุดเดียวกับหน้าเว็บ)
+    fmt = export_format(request)
+    if fmt:
+        return export_response(
+            fmt, f"returns_{date_from}_{date_to}",
+            RETURN_EXPORT_HEADER,
+            (
+                [
+                    ret.doc_no, local_datetime(ret.transaction_date), ret.ref_doc_no,
+                    ret.created_by.username, ret.get_status_display(),
+                    abs(ret.total_amount), ret.discount_amount, abs(ret.grand_total), ret.total_qty or 0,
+                ]
+                for ret in returns.annotate(total_qty=Sum('items__quantity')).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            ),
+            sheet_title='Returns',
+        )
+
     # ดึงรายชื่อพนักงานสำหรับ Dropdown (เฉพาะเจ้าของร้าน)
     all_staff = User.objects.filter(is_active=True).order_by('username') if is_owner else None
 
     # 5. คำนวณ Metrics (Aggregate)
-    metrics = returns.aggregate(
-        total_amount=Sum('grand_total'),
-        total_discount=Sum('discount_amount'),
-        total_count=Count('id')
-    )
-    
-    # คำนวณจำนวนชิ้นสินค้าคืนรวม
-    qty_data = TransactionItem.objects.filter(transaction__in=returns).aggregate(
-        total_qty=Sum('quantity')
-    )
-    metrics['total_quantity'] = qty_data['total_qty'] or 0
+    # ✅ เฉพาะบิลที่ยืนยันแล้ว + ไม่มีคำค้นหา → อ่านจากตารางสรุปรายวัน
+    if status == 'POSTED' and not search:
+        rollup = summarize(summary_rows(
+            start_date_obj, end_date_obj,
+            doc_type='RETURN',
+            user_id=user_filter if is_owner else current_user.id,
+        ))
+        metrics = {
+            'total_amount': rollup['grand_total'],
+            'total_discount': rollup['discount_amount'],
+            'total_count': rollup['bill_count'],
+            'total_quantity': rollup['item_qty'],
+        }
+    else:
+        metrics = returns.aggregate(
+            total_amount=Sum('grand_total'),
+            total_discount=Sum('discount_amount'),
+            total_count=Count('id')
+        )
+        
+        # คำนวณจำนวนชิ้นสินค้าคืนรวม
+        qty_data = TransactionItem.objects.filter(transaction__in=returns).aggregate(
+            total_qty=Sum('quantity')
+        )
+        metrics['total_quantity'] = qty_data['total_qty'] or 0
 
     # 6. Pagination (แสดงหน้าละ 20 รายการ)
     paginator = Paginator(returns, 20)
@@ -125,51 +165,38 @@ def return_detail(request, return_id):
     แสดงรายละเอียดของบิลรับคืน 1 ใบ
     ✅ แยกสิทธิ์: Staff ดูได้เฉพาะบิลของตัวเอง
     """
-    from products.models import SystemSetting
-    
     user = request.user
     is_owner = user.is_superuser
     
-    # ดึงข้อมูลบิลคืน
-    sale = get_object_or_404(Transaction, id=return_id, doc_type='RETURN')
+    # ดึงข้อมูลบิลคืน (จาก Snapshot → พิมพ์ซ้ำไม่ต้อง Query บิล)
+    snapshot = get_receipt_snapshot(return_id, doc_type='RETURN')
+    if snapshot is None:
+        raise Http404("ไม่พบบิลรับคืน")
+    sale = snapshot['sale']
 
     # ✅ ตรวจสอบสิทธิ์: Staff ดูได้เฉพาะของตัวเอง
-    if not is_owner and sale.created_by != user:
+    if not is_owner and sale['created_by_id'] != user.id:
         from django.http import HttpResponseForbidden
         return HttpResponseForbidden("คุณไม่มีสิทธิ์เข้าถึงบิลนี้")
     
-    # ดึงรายการสินค้า
-    items = sale.items.select_related('product', 'product__category').all()
     payment_method_display = 'ไม่ระบุ'
-    if hasattr(sale, 'payment') and sale.payment:
-        if sale.payment.method == 'cash':
+    if sale['payment']:
+        method = sale['payment']['method']
+        if method == 'cash':
             payment_method_display = '💵 เงินสด'
-        elif sale.payment.method == 'transfer':
+        elif method == 'transfer':
             payment_method_display = '🏦 โอนเงิน'
-        elif sale.payment.method == 'credit':
+        elif method == 'credit':
             payment_method_display = '💳 บัตรเครดิต'
         else:
-            payment_method_display = sale.payment.method
-            
-    # คำนวณจำนวนรวม
-    total_quantity = items.aggregate(total=Sum('quantity'))['total'] or 0
-    sale.total_quantity = total_quantity
-    
-    # หาบิลต้นฉบับ
-    original_return = None
-    if sale.ref_doc_no:
-        original_return = Transaction.objects.filter(doc_no=sale.ref_doc_no, doc_type='SALE').first()
-    
-    # ✅ ดึง settings
-    settings = SystemSetting.get_all()
+            payment_method_display = method
     
     context = {
         'sale': sale,
-        'items': items,
-        'original_return': original_return,
+        'items': snapshot['items'],
         'print_date': timezone.now(),
         'payment_method_display': payment_method_display,
-        'settings': settings,  # ✅ ส่ง settings ไปให้ template
+        'settings': snapshot['settings'],  # ✅ ค่าตั้งร้าน ณ เวอร์ชันปัจจุบัน
     }
     
     return render(request, 'products/returns/return_detail.html', context)
@@ -1,15 +1,16 @@
 import calendar
-from django.db.models import Sum, F, DecimalField, Avg, Count, Case, When, Q, ExpressionWrapper
+from django.db.models import Sum, Avg, Count, Q
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from datetime import datetime, time, timedelta
 from django.utils import timezone
 from products.models import Transaction, TransactionItem
+from products.Services.sales_summary_service import summary_rows, summarize
 
 @login_required
 def sales_type_report(request):
     """
-    รายงานขายปลีก-ส่ง (แก้ไข Error: ใช้ DecimalField และ ExpressionWrapper)
+    รายงานขายปลีก-ส่ง (แยกตาม price_type ที่บันทึกไว้ตอนขาย)
     """
     
     # รับค่าจาก URL Parameters
@@ -22,54 +23,15 @@ def sales_type_report(request):
     user_id = request.GET.get('user_id', '')
     
     # ===================================
-    # 1. หา Sale IDs แยกตามประเภท
-    # ===================================
-    
-    # 1.1 Sale IDs ที่เป็นขายปลีก
-    retail_items = TransactionItem.objects.filter(product__isnull=False).annotate(
-        diff_to_retail=Case(
-            When(unit_price__gte=F('product__selling_price'), then=F('unit_price') - F('product__selling_price')),
-            default=F('product__selling_price') - F('unit_price'),
-            output_field=DecimalField(max_digits=12, decimal_places=2)
-        ),
-        diff_to_wholesale=Case(
-            When(unit_price__gte=F('product__wholesale_price'), then=F('unit_price') - F('product__wholesale_price')),
-            default=F('product__wholesale_price') - F('unit_price'),
-            output_field=DecimalField(max_digits=12, decimal_places=2)
-        )
-    ).filter(diff_to_retail__lte=F('diff_to_wholesale'))
-    
-    retail_sale_ids = retail_items.values_list('transaction_id', flat=True).distinct()
-    
-    # 1.2 Sale IDs ที่เป็นขายส่ง
-    wholesale_items = TransactionItem.objects.filter(product__isnull=False).annotate(
-        diff_to_retail=Case(
-            When(unit_price__gte=F('product__selling_price'), then=F('unit_price') - F('product__selling_price')),
-            default=F('product__selling_price') - F('unit_price'),
-            output_field=DecimalField(max_digits=12, decimal_places=2)
-        ),
-        diff_to_wholesale=Case(
-            When(unit_price__gte=F('product__wholesale_price'), then=F('unit_price') - F('product__wholesale_price')),
-            default=F('product__wholesale_price') - F('unit_price'),
-            output_field=DecimalField(max_digits=12, decimal_places=2)
-        )
-    ).filter(diff_to_wholesale__lt=F('diff_to_retail'))
-    
-    wholesale_sale_ids = wholesale_items.values_list('transaction_id', flat=True).distinct()
-    
-    # ===================================
-    # 2. Query เริ่มต้น
+    # 1-2. Query เริ่มต้น (กรองตามประเภทราคาที่บันทึกไว้ในบิล/รายการ)
     # ===================================
     sales = Transaction.objects.filter(doc_type='SALE')
     
-    items_query = TransactionItem.objects.filter(product__isnull=False) # Default
+    items_query = TransactionItem.objects.all() # Default
     
-    if sale_type == 'retail':
-        sales = sales.filter(id__in=retail_sale_ids)
-        items_query = retail_items
-    elif sale_type == 'wholesale':
-        sales = sales.filter(id__in=wholesale_sale_ids)
-        items_query = wholesale_items
+    if sale_type in ('retail', 'wholesale'):
+        sales = sales.filter(price_type=sale_type)
+        items_query = items_query.filter(price_type=sale_type)
     
     sales = sales.select_related('created_by').order_by('-transaction_date')
     
@@ -125,45 +87,64 @@ def sales_type_report(request):
     # ===================================
     posted_sales = sales.filter(status='POSTED')
     
-    summary = posted_sales.aggregate(
-        total_sales=Sum('grand_total'),
-        total_discount=Sum('discount_amount'),
-        avg_sale=Avg('grand_total'),
-        count=Count('id')
-    )
-    
     # ดึงรายการสินค้าทั้งหมดที่อยู่ในบิลที่ Posted (เพื่อคำนวณต้นทุน)
     items_in_posted = items_query.filter(transaction__in=posted_sales)
+
+    # ✅ ทุกประเภท + ไม่มีคำค้นหา → อ่านจากตารางสรุปรายวัน (ตามจำนวนวัน ไม่ต้องสแกนรายการขาย)
+    if sale_type == 'all' and not search and status in ('', 'POSTED'):
+        rollup_qs = summary_rows(
+            start_date_obj, end_date_obj,
+            doc_type='SALE',
+            user_id=user_id if request.user.is_superuser else request.user.id,
+            payment_method=payment_method,
+        )
+        rollup = summarize(rollup_qs)
+        summary = {
+            'total_sales': rollup['grand_total'],
+            'total_discount': rollup['discount_amount'],
+            'avg_sale': rollup['grand_total'] / rollup['bill_count'] if rollup['bill_count'] else None,
+            'count': rollup['bill_count'],
+            'total_quantity': rollup['item_qty'],
+            'total_items': rollup['line_count'],
+            'total_profit': rollup['grand_total'] - rollup['cost_amount'],
+        }
+
+        # ===================================
+        # 7. สถิติตามวิธีชำระเงิน
+        # ===================================
+        payment_summary = [
+            {'payment__method': row['payment_method'] or None, 'total': row['total'], 'count': row['count']}
+            for row in rollup_qs.values('payment_method').annotate(
+                total=Sum('grand_total'),
+                count=Sum('bill_count'),
+            ).filter(count__gt=0).order_by('-total')
+        ]
+    else:
+        summary = posted_sales.aggregate(
+            total_sales=Sum('grand_total'),
+            total_discount=Sum('discount_amount'),
+            avg_sale=Avg('grand_total'),
+            count=Count('id'),
+            total_cost=Sum('total_cost'),
+        )
     
-    # ✅ FIX: ใช้ ExpressionWrapper + DecimalField เพื่อความแม่นยำและแก้ Error
-    cost_summary = items_in_posted.aggregate(
-        total_cost=Sum(
-            ExpressionWrapper(
-                F('quantity') * F('cost_price'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        ),
-        total_qty=Sum('quantity'),
-        total_items=Count('id')
-    )
-    
-    total_sales_val = summary['total_sales'] or 0
-    total_cost_val = cost_summary['total_cost'] or 0
-    
-    # คำนวณกำไร
-    total_profit = total_sales_val - total_cost_val
+        item_summary = items_in_posted.aggregate(
+            total_qty=Sum('quantity'),
+            total_items=Count('id')
+        )
     
-    summary['total_quantity'] = cost_summary['total_qty'] or 0
-    summary['total_items'] = cost_summary['total_items'] or 0
-    summary['total_profit'] = total_profit
+        # คำนวณกำไร (ต้นทุนจากหัวบิล)
+        summary['total_quantity'] = item_summary['total_qty'] or 0
+        summary['total_items'] = item_summary['total_items'] or 0
+        summary['total_profit'] = (summary['total_sales'] or 0) - (summary.pop('total_cost') or 0)
     
-    # ===================================
-    # 7. สถิติตามวิธีชำระเงิน
-    # ===================================
-    payment_summary = posted_sales.values('payment__method').annotate(
-        total=Sum('grand_total'),
-        count=Count('id')
-    ).order_by('-total')
+        # ===================================
+        # 7. สถิติตามวิธีชำระเงิน
+        # ===================================
+        payment_summary = posted_sales.values('payment__method').annotate(
+            total=Sum('grand_total'),
+            count=Count('id')
+        ).order_by('-total')
     
     # ===================================
     # 8. Top 10 สินค้าขายดี
@@ -177,49 +158,38 @@ def sales_type_report(request):
     ).order_by('-total_qty')[:10]
     
     # ===================================
-    # 9. สถิติแยกตามประเภท (Helper Function)
+    # 9. สถิติแยกตามประเภท (Group by price_type ในช่วงวันที่)
     # ===================================
-    def calculate_subset_stats(subset_ids):
-        """Helper Function คำนวณยอดขาย + กำไร ของกลุ่มย่อย"""
-        # ✅ แก้ไข: ใช้ __date__gte + __date__lte แทน __range
-        subset_sales = Transaction.objects.filter(
-            doc_type='SALE',
-            status='POSTED',
-            id__in=subset_ids,
-            transaction_date__date__gte=date_from,
-            transaction_date__date__lte=date_to
-        )
-        
-        if request.user.is_superuser and user_id:
-            subset_sales = subset_sales.filter(created_by_id=user_id)
-        elif not request.user.is_superuser:
-            subset_sales = subset_sales.filter(created_by=request.user)
-            
-        stats = subset_sales.aggregate(
+    tier_sales = Transaction.objects.filter(
+        doc_type='SALE',
+        status='POSTED',
+        transaction_date__range=(start_aware, end_aware),
+    )
+    if request.user.is_superuser and user_id:
+        tier_sales = tier_sales.filter(created_by_id=user_id)
+    elif not request.user.is_superuser:
+        tier_sales = tier_sales.filter(created_by=request.user)
+
+    tier_stats = {
+        row['price_type']: row
+        for row in tier_sales.values('price_type').annotate(
             total=Sum('grand_total'),
-            count=Count('id')
-        )
-        
-        # คำนวณต้นทุนกลุ่มย่อย
-        subset_items = TransactionItem.objects.filter(transaction__in=subset_sales)
-        
-        # ✅ FIX: ใช้ ExpressionWrapper แบบเดียวกัน
-        subset_cost_data = subset_items.aggregate(
-            cost=Sum(
-                ExpressionWrapper(
-                    F('quantity') * F('cost_price'),
-                    output_field=DecimalField(max_digits=12, decimal_places=2)
-                )
-            )
-        )
-        subset_cost = subset_cost_data['cost'] or 0
-        
-        total_val = stats['total'] or 0
-        stats['profit'] = total_val - subset_cost
-        return stats
+            count=Count('id'),
+            cost=Sum('total_cost'),
+        ).order_by()
+    }
+
+    def tier_summary(tier):
+        """ยอดขาย + จำนวนบิล + กำไร ของประเภทราคา"""
+        stats = tier_stats.get(tier, {'total': None, 'count': 0, 'cost': None})
+        return {
+            'total': stats['total'],
+            'count': stats['count'],
+            'profit': (stats['total'] or 0) - (stats['cost'] or 0),
+        }
 
-    retail_stats = calculate_subset_stats(retail_sale_ids)
-    wholesale_stats = calculate_subset_stats(wholesale_sale_ids)
+    retail_stats = tier_summary('retail')
+    wholesale_stats = tier_summary('wholesale')
     
     # ===================================
     # 10. Pagination
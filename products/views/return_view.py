@@ -9,6 +9,7 @@ import json
 from django.core.paginator import Paginator
 
 from products.Services.payment_service import PaymentService
+from products.Services.doc_number_service import peek_doc_no
 from products.models import Transaction, TransactionItem, Product, Supplier 
 from products.Services.return_service import (
     create_return_transaction,
@@ -26,16 +27,9 @@ def returns(request):
     """หน้ารับคืนสินค้าหลัก"""
     
     today = datetime.now()
-    doc_prefix = f"RET-{today.strftime('%Y%m%d')}"
     
-    # นับบิลรับคืนวันนี้
-    today_returns_count = Transaction.objects.filter(
-        doc_no__startswith=doc_prefix,
-        doc_type='RETURN'
-    ).count()
-    
-    next_number = str(today_returns_count + 1).zfill(4)
-    doc_no = f"{doc_prefix}-{next_number}"
+    # แสดงเลขถัดไป (เลขจริงออกตอนบันทึกบิลรับคืน)
+    doc_no = peek_doc_no('RETURN')
     
     context = {
         'doc_no': doc_no,
@@ -156,7 +150,6 @@ def create_return(request):
     try:
         data = json.loads(request.body)
         
-        doc_no = data.get('doc_no')
         ref_doc_no = data.get('ref_doc_no')
         items = data.get('items', [])
         
@@ -176,12 +169,6 @@ def create_return(request):
         if not items:
             return JsonResponse({'success': False, 'error': 'ไม่มีรายการสินค้าที่คืน'}, status=400)
         
-        if Transaction.objects.filter(doc_no=doc_no).exists():
-             today_str = datetime.now().strftime('%Y%m%d')
-             prefix = f"RET-{today_str}"
-             last = Transaction.objects.filter(doc_no__startswith=prefix).count()
-             doc_no = f"{prefix}-{str(last + 1).zfill(4)}"
-        
         original_transaction = get_object_or_404(
             Transaction,
             doc_no=ref_doc_no,
@@ -199,7 +186,7 @@ def create_return(request):
             return_reason=return_reason,
             return_note=return_note,
             discount_amount=discount_return,
-            doc_no=doc_no
+            doc_no=None  # ✅ ให้ตัวนับออกเลขตอนบันทึก
         )
         
         refund_amount = -abs(return_transaction.grand_total)
@@ -1,19 +1,24 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.http import require_http_methods
 from decimal import Decimal
 from datetime import datetime
 import json
 from django.urls import reverse
+from django.db import transaction as db_transaction
 from django.views.decorators.clickjacking import xframe_options_exempt
 # Models
 from products.models import Product, Transaction, SystemSetting
 from products.Services.product_service import ProductService
+from products.Services.doc_number_service import peek_doc_no
+from products.Services.search_backends import search_sale_products
 # Services
 from products.Services.payment_service import PaymentService
 from django.conf import settings
 from products.Services.payment_service import generate_promptpay_qr
+from products.Services.escpos_service import build_receipt
+from products.Services.receipt_snapshot_service import get_receipt_snapshot
 from products.Services.sale_service import (
     create_sale_transaction, 
     post_sale, 
@@ -28,25 +33,10 @@ from products.Services.sale_service import (
 def sales(request):
     """หน้าขายสินค้าหลัก"""
     today = datetime.now()
-    doc_prefix = f"SALE-{today.strftime('%Y%m%d')}"
     
-    # ✅ แก้ไข Logic 1: หาเลขท้ายสุด + 1 (ปลอดภัยกว่าการนับ count)
-    last_sale = Transaction.objects.filter(
-        doc_no__startswith=doc_prefix, 
-        doc_type='SALE'
-    ).order_by('doc_no').last()
-
-    if last_sale:
-        try:
-            # ตัดเอา 4 ตัวท้ายมาบวก 1
-            last_run_no = int(last_sale.doc_no.split('-')[-1])
-            next_number = str(last_run_no + 1).zfill(4)
-        except ValueError:
-            next_number = '0001'
-    else:
-        next_number = '0001'
-
-    doc_no = f"{doc_prefix}-{next_number}"
+    # ✅ แสดงเลขถัดไปเพื่อให้พนักงานเห็นเท่านั้น
+    # เลขจริงจะถูกออกจากตัวนับตอนบันทึกบิล (กันเลขซ้ำเมื่อหลายเครื่องขายพร้อมกัน)
+    doc_no = peek_doc_no('SALE')
     
     context = {'doc_no': doc_no, 'today': today}
     return render(request, 'products/sales/sale_create.html', context)
@@ -65,59 +55,9 @@ def search_products_ajax(request):
     if len(query) < 1:
         return JsonResponse({'products': []})
     
+    # ✅ ค้นผ่าน Search Backend (memory / fts5) ข้อมูลแสดงผลมาจาก Index ในหน่วยความจำ
     # Priority: SKU ตรง → SKU คล้าย → ชื่อ → รุ่นรถ
-    exact_sku = list(Product.objects.filter(sku__iexact=query, is_active=True).select_related('category')[:5])
-    excluded_ids = [p.id for p in exact_sku]
-
-    similar_sku = list(Product.objects.filter(sku__icontains=query, is_active=True).exclude(id__in=excluded_ids).select_related('category')[:10])
-    excluded_ids.extend([p.id for p in similar_sku])
-    
-    name_products = list(Product.objects.filter(name__icontains=query, is_active=True).exclude(id__in=excluded_ids).select_related('category')[:8])
-    excluded_ids.extend([p.id for p in name_products])
-    
-    car_products = list(Product.objects.filter(compatible_models__icontains=query, is_active=True).exclude(id__in=excluded_ids).select_related('category')[:7])
-    
-    # รวมผลลัพธ์
-    products = (exact_sku + similar_sku + name_products + car_products)[:20]
-    
-    # สร้าง JSON
-    results = []
-    for p in products:
-        stock_status = ProductService.get_stock_status(p)
-        stock_qty = stock_status['quantity']
-        
-        match_type = 'sku'
-        if p in exact_sku: match_type = 'exact_sku'
-        elif p in name_products: match_type = 'name'
-        elif p in car_products: match_type = 'car'
-        
-        # หาสินค้าคู่/ชุด (ถ้ามี)
-        pair_products = []
-        if p.bundle_group:
-            siblings = Product.objects.filter(
-                bundle_group=p.bundle_group,
-                is_active=True
-            ).exclude(id=p.id).values('id', 'sku', 'name', 'quantity', 'selling_price')
-            pair_products = list(siblings)
-        
-        results.append({
-            'id': p.id,
-            'sku': p.sku,
-            'name': p.name,
-            'category': p.category.name if p.category else '-',
-            'compatible_models': p.compatible_models or '',
-            'unit': p.unit,
-            'cost_price': float(p.cost_price),
-            'selling_price': float(p.selling_price),
-            'wholesale_price': float(p.wholesale_price),
-            'stock_units': float(stock_qty),
-            'has_stock': stock_qty > 0,
-            'match_type': match_type,
-            'bundle_type': p.bundle_type,
-            'bundle_group': p.bundle_group,
-            'has_pair': len(pair_products) > 0,
-            'pair_products': pair_products,
-        })
+    results = search_sale_products(query)
 
     return JsonResponse({
         'products': results,
@@ -164,13 +104,20 @@ def get_pair_products(request):
 # ===================================
 # 3. บันทึกบิลขาย (AJAX)
 # ===================================
+class InsufficientPaymentError(ValueError):
+    """เงินสดที่รับมาไม่พอ → Rollback บิลทั้งใบ (รวมเลขที่บิลที่ออกไปแล้ว)"""
+
+    def __init__(self, shortfall):
+        self.shortfall = shortfall
+        super().__init__(f'ยอดเงินที่รับมาไม่เพียงพอ (ขาด {shortfall:,.2f} บาท)')
+
+
 @login_required
 @require_http_methods(["POST"])
 def create_sale(request):
     try:
         data = json.loads(request.body)
         sale_id = data.get('sale_id')
-        doc_no = data.get('doc_no')
         items = data.get('items', [])
         
         # Payment Info
@@ -194,62 +141,49 @@ def create_sale(request):
         if not items:
             return JsonResponse({'success': False, 'error': 'ไม่มีรายการสินค้า'}, status=400)
         
-        # ✅ Auto-Fix เลขที่บิลซ้ำ (กันตาย)
-        if doc_no and not sale_id and Transaction.objects.filter(doc_no=doc_no).exists():
-            today = datetime.now()
-            doc_prefix = f"SALE-{today.strftime('%Y%m%d')}"
-            last_sale = Transaction.objects.filter(doc_no__startswith=doc_prefix).order_by('doc_no').last()
-            if last_sale:
-                try:
-                    new_run_no = int(last_sale.doc_no.split('-')[-1]) + 1
-                    doc_no = f"{doc_prefix}-{str(new_run_no).zfill(4)}"
-                except:
-                    import uuid
-                    doc_no = f"{doc_prefix}-{str(uuid.uuid4())[:4]}"
-            else:
-                doc_no = f"{doc_prefix}-0001"
-        
-        # สร้างบิล (เรียก SaleService)
-        sale = create_sale_transaction(
-            user=request.user,
-            sale_id=sale_id,
-            items_data=items,
-            price_type=price_type,
-            discount_amount=discount_amount,
-            remark=remark,
-            doc_no=doc_no,
-            doc_type='SALE',
-            status='DRAFT' 
-        )
-        
         payment_change = Decimal('0.00')
-        
-        # ✅ เช็คเงินก่อน (ก่อนตัดสต็อก)
-        if status != 'HOLD' and auto_post:
-            if payment_method == 'cash':
-                if payment_received < sale.grand_total:
-                    sale.delete()
-                    return JsonResponse({
-                        'success': False,
-                        'error': f'ยอดเงินที่รับมาไม่เพียงพอ (ขาด {sale.grand_total - payment_received:,.2f} บาท)'
-                    }, status=400)
-                payment_change = payment_received - sale.grand_total
-            else:
-                payment_received = sale.grand_total
-            
-            # ✅ เงินพอแล้ว → ค่อยตัดสต็อก
-            post_sale(sale)
-        
-        # บันทึก Payment
-        payment_note = f"เงินทอน: {payment_change:,.2f}" if payment_method == 'cash' and status != 'HOLD' else ""
-        
-        PaymentService.create_payment(
-            sale=sale,
-            method=payment_method,
-            received=payment_received,
-            note=payment_note
-        )
-        
+
+        # ✅ ออกเลข + สร้างบิล + ตัดสต็อก + รับเงิน ใน DB Transaction เดียว
+        # เงินไม่พอ / ตัดสต็อกไม่ได้ → Rollback ทั้งหมด เลขที่บิลถูกคืนให้ตัวนับ (ไม่มีเลขหาย, บิลพักเดิมไม่ถูกลบ)
+        try:
+            with db_transaction.atomic():
+                # สร้างบิล (เรียก SaleService)
+                sale = create_sale_transaction(
+                    user=request.user,
+                    sale_id=sale_id,
+                    items_data=items,
+                    price_type=price_type,
+                    discount_amount=discount_amount,
+                    remark=remark,
+                    doc_no=None,  # ✅ ให้ตัวนับออกเลขตอนบันทึก (บิลพักเดิมใช้เลขเดิม)
+                    doc_type='SALE',
+                    status='DRAFT'
+                )
+
+                # ✅ เช็คเงินก่อน (ก่อนตัดสต็อก)
+                if status != 'HOLD' and auto_post:
+                    if payment_method == 'cash':
+                        if payment_received < sale.grand_total:
+                            raise InsufficientPaymentError(sale.grand_total - payment_received)
+                        payment_change = payment_received - sale.grand_total
+                    else:
+                        payment_received = sale.grand_total
+
+                    # ✅ เงินพอแล้ว → ค่อยตัดสต็อก
+                    post_sale(sale, payment_method=payment_method)
+
+                # บันทึก Payment
+                payment_note = f"เงินทอน: {payment_change:,.2f}" if payment_method == 'cash' and status != 'HOLD' else ""
+
+                PaymentService.create_payment(
+                    sale=sale,
+                    method=payment_method,
+                    received=payment_received,
+                    note=payment_note
+                )
+        except InsufficientPaymentError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
         return JsonResponse({
             'success': True,
             'sale_id': sale.id,
@@ -270,36 +204,65 @@ def create_sale(request):
 @login_required
 @xframe_options_exempt
 def print_receipt(request, sale_id):
-
-    
-    sale = get_object_or_404(Transaction, id=sale_id, doc_type='SALE')
-    items = sale.items.select_related('product')
+    """ใบเสร็จ (พิมพ์ซ้ำจากรายงานบ่อย → อ่านจาก Snapshot ไม่ต้อง Query บิลทุกครั้ง)"""
+    snapshot = get_receipt_snapshot(sale_id, doc_type='SALE')
+    if snapshot is None:
+        raise Http404("ไม่พบบิลขาย")
+    sale = snapshot['sale']
     
     payment_method_display = ''
-    if hasattr(sale, 'payment') and sale.payment:
+    if sale['payment']:
         payment_method_map = {
             'cash': '💵 เงินสด',
             'qr': '📱 QR Code',
             'transfer': '🏦 โอนเงิน',
         }
-        payment_method_display = payment_method_map.get(sale.payment.method, sale.payment.method)
-    
-    # ✅ ดึง settings
-    settings = SystemSetting.get_all()
+        payment_method_display = payment_method_map.get(sale['payment']['method'], sale['payment']['method'])
     
     is_from_report = request.GET.get('source') == 'report'
     
     context = {
         'sale': sale,
-        'items': items,
+        'items': snapshot['items'],
         'payment_method_display': payment_method_display,
         'print_date': datetime.now(),
         'is_from_report': is_from_report,
-        'settings': settings,  # ✅ ส่ง settings ไปให้ template
+        'settings': snapshot['settings'],  # ✅ ค่าตั้งร้าน ณ เวอร์ชันปัจจุบัน
     }
     return render(request, 'products/sales/receipt.html', context)
 
 
+@login_required
+def print_receipt_escpos(request, sale_id):
+    """
+    ใบเสร็จแบบ ESC/POS (Raw bytes) สำหรับส่งตรงให้เครื่องพิมพ์ความร้อน
+
+    Query:
+        width: 58 หรือ 80 (มม., default 80)
+        qr: 1 = พิมพ์ QR PromptPay ตามยอดสุทธิ
+        download: 1 = ดาวน์โหลดเป็นไฟล์ .bin
+    """
+    sale = get_object_or_404(
+        Transaction.objects.select_related('created_by', 'payment'),
+        id=sale_id, doc_type='SALE',
+    )
+    try:
+        paper_width = int(request.GET.get('width', 80))
+        data = build_receipt(
+            sale,
+            settings_values=SystemSetting.get_all(),
+            paper_width=paper_width,
+            include_qr=request.GET.get('qr') == '1',
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    response = HttpResponse(data, content_type='application/octet-stream')
+    if request.GET.get('download') == '1':
+        response['Content-Disposition'] = f'attachment; filename="{sale.doc_no}.bin"'
+    return response
+
+
 @login_required
 @require_http_methods(["POST"])
 def generate_qr_code(request):
@@ -308,6 +271,7 @@ def generate_qr_code(request):
         data = json.loads(request.body)
         amount = data.get('amount')
         reference = data.get('reference', '')
+        qr_format = data.get('format', 'png')  # 'svg' = ไม่ผ่าน PIL, ไฟล์เล็กกว่า
         
         if not amount or float(amount) <= 0:
             return JsonResponse({'success': False, 'error': 'ยอดเงินไม่ถูกต้อง'}, status=400)
@@ -317,8 +281,9 @@ def generate_qr_code(request):
         
         qr_image = generate_promptpay_qr(
             phone_number=PROMPTPAY_NUMBER,
-            amount=float(amount),
-            reference=reference
+            amount=amount,
+            reference=reference,
+            fmt=qr_format,
         )
         
         return JsonResponse({'success': True, 'qr_image': qr_image})
@@ -1,19 +1,68 @@
 import calendar
 from datetime import datetime, time # ✅ ต้องเพิ่มตรงนี้
 
-from django.forms import DecimalField
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, F, ExpressionWrapper, DecimalField
+from django.db.models import Sum, Count
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils import timezone
 from django.db.models import Q
 
 from products.models import Transaction, TransactionItem
 from products.models.catalog import Category # ตรวจสอบ path ให้ถูกนะครับ
+from products.Services.sales_summary_service import summary_rows, summarize
+from products.views.report_export import EXPORT_CHUNK_SIZE, export_format, export_response, local_datetime
 from django.contrib.auth.models import User
 
+SALES_EXPORT_HEADER = [
+    'เลขที่บิล', 'วันที่', 'พนักงาน', 'วิธีชำระเงิน', 'สถานะ',
+    'ยอดรวม', 'ส่วนลด', 'ยอดสุทธิ', 'ยอดคืน', 'ยอดหลังหักคืน', 'กำไร',
+]
+
+
+def _sales_export_rows(sales):
+    """
+    แถวสำหรับส่งออกรายงานขาย (อ่านทีละ EXPORT_CHUNK_SIZE บิล)
+    ยอดคืนของแต่ละบิลดึงเป็นชุดต่อ Chunk เหมือนการจับคู่บิลคืนในหน้าเว็บ
+    """
+    chunk = []
+    for sale in sales.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(sale)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield from _sales_chunk_rows(chunk)
+            chunk = []
+    if chunk:
+        yield from _sales_chunk_rows(chunk)
+
+
+def _sales_chunk_rows(chunk):
+    refunds = {}
+    for ref, amount in Transaction.objects.filter(
+        doc_type='RETURN',
+        ref_doc_no__in=[sale.doc_no for sale in chunk],
+        status='POSTED',
+    ).values_list('ref_doc_no', 'grand_total'):
+        refunds[ref] = refunds.get(ref, 0) + abs(amount)
+
+    for sale in chunk:
+        payment = getattr(sale, 'payment', None)
+        refund_total = refunds.get(sale.doc_no, 0)
+        yield [
+            sale.doc_no,
+            local_datetime(sale.transaction_date),
+            sale.created_by.username,
+            payment.get_method_display() if payment else '',
+            sale.get_status_display(),
+            sale.total_amount,
+            sale.discount_amount,
+            sale.grand_total,
+            refund_total,
+            sale.grand_total - refund_total,
+            sale.gross_profit,
+        ]
+
+
 @login_required
 def sales_report(request):
     # 1. รับค่าจาก URL
@@ -58,7 +107,10 @@ def sales_report(request):
     all_categories = list(categories)
     
     if category_id:
-        sales = sales.filter(items__product__category_id=category_id).distinct()
+        # Subquery แทน Join + distinct() → หัวบิลไม่ซ้ำ, รวมยอด/แบ่งหน้าได้ตรง ๆ
+        sales = sales.filter(id__in=TransactionItem.objects.filter(
+            product__category_id=category_id,
+        ).values('transaction_id'))
 
     # กรองตามสิทธิ์
     if request.user.is_superuser:
@@ -83,13 +135,41 @@ def sales_report(request):
     if search_doc_no:
         sales = sales.filter(doc_no__icontains=search_doc_no)
 
-    # 4. คำนวณสรุปยอด (Aggregate) ก่อนจะมีการ order_by หรือ annotate เพิ่มเติม
-    summary = sales.aggregate(
-        total_bills=Count('id'),
-        total_amount=Sum('total_amount'),
-        total_discount=Sum('discount_amount'),
-        total_grand=Sum('grand_total'), 
-    )
+    # ✅ ส่งออก CSV / Excel (ใช้ตัวกรองชุดเดียวกับหน้าเว็บ)
+    fmt = export_format(request)
+    if fmt:
+        return export_response(
+            fmt, f"sales_report_{date_from}_{date_to}",
+            SALES_EXPORT_HEADER,
+            _sales_export_rows(sales.select_related('payment').order_by('-transaction_date')),
+            sheet_title='Sales',
+        )
+
+    # 4. คำนวณสรุปยอด
+    # ✅ ไม่มีตัวกรองระดับบิล/สินค้า → อ่านจากตารางสรุปรายวัน (ตามจำนวนวัน ไม่ต้องสแกนรายการขาย)
+    if not category_id and not search_doc_no and (status or 'POSTED') == 'POSTED':
+        rollup = summarize(summary_rows(
+            start_date_obj, end_date_obj,
+            doc_type='SALE',
+            user_id=user_id if request.user.is_superuser else request.user.id,
+            payment_method=payment_method,
+        ))
+        summary = {
+            'total_bills': rollup['bill_count'],
+            'total_amount': rollup['gross_amount'],
+            'total_discount': rollup['discount_amount'],
+            'total_grand': rollup['grand_total'],
+            'total_profit': rollup['gross_amount'] - rollup['cost_amount'],
+        }
+    else:
+        # 🔥 กำไรขั้นต้นรวมจากคอลัมน์บนหัวบิล (ไม่ต้อง Join รายการสินค้า)
+        summary = sales.aggregate(
+            total_bills=Count('id'),
+            total_amount=Sum('total_amount'),
+            total_discount=Sum('discount_amount'),
+            total_grand=Sum('grand_total'), 
+            total_profit=Sum('gross_profit'),
+        )
 
     if search:
         categories = categories.filter(
@@ -97,32 +177,6 @@ def sales_report(request):
             Q(description__icontains=search)
         )
 
-    # =========================================================
-    # 🔥 คำนวณกำไรขั้นต้น (Gross Profit)
-    # =========================================================
-    # ดึงรายการสินค้ามาคำนวณกำไรรวมทั้งหมด (Total Profit Stat)
-    sale_items = TransactionItem.objects.filter(transaction__in=sales)
-    
-    profit_stats = sale_items.aggregate(
-        total_profit=Sum(
-            ExpressionWrapper(
-                (F('unit_price') - F('cost_price')) * F('quantity'),
-                output_field=DecimalField()
-            )
-        )
-    )
-    summary['total_profit'] = profit_stats['total_profit'] or 0
-
-    # Annotate กำไรต่อบิล (Bill Profit) เพื่อใช้แสดงในตาราง
-    sales = sales.annotate(
-        bill_profit=Sum(
-            ExpressionWrapper(
-                (F('items__unit_price') - F('items__cost_price')) * F('items__quantity'),
-                output_field=DecimalField()
-            )
-        )
-    )
-
     # ✅ Order by ครั้งเดียวพอ (เอาไว้ท้ายสุดก่อน Pagination)
     sales = sales.order_by('-transaction_date') 
 
@@ -174,7 +228,7 @@ def sales_report(request):
         total_refunded = sum(r['amount'] for r in return_list)
         
         net_total = sale.grand_total - total_refunded
-        profit = sale.bill_profit or 0
+        profit = sale.gross_profit
 
         sales_data.append({
             'sale': sale,